@@ -4,34 +4,129 @@ Analysis Controller Module.
 Questo modulo gestisce gli endpoint API per l'analisi dei repository.
 Include funzionalità per l'autenticazione GitHub OAuth, clonazione di repository,
 upload di file ZIP, esecuzione dell'analisi delle licenze e rigenerazione dei report.
+
+Gli endpoint `/regenerate/stream` e `/suggest-license/stream` restituiscono gli stessi
+risultati delle controparti sincrone come server-sent events, inoltrando i token
+dell'LLM man mano che vengono generati. La disconnessione del client annulla la
+generazione in corso.
+
+`/analyze` restituisce i problemi che richiedono l'LLM con suggerimento "pending": il
+suggerimento viene calcolato al primo accesso tramite `/issues/suggestion`.
+
+L'endpoint `/llm/scheduler` espone la profondità delle code e i contatori dello
+scheduler delle richieste LLM; `/llm/ready` lo stato di caricamento dei modelli,
+`/llm/circuit` lo stato dei circuit breaker per modello, `/llm/hosts` lo stato delle
+istanze Ollama del pool e `/llm/structured` i contatori di validazione e correzione delle
+risposte JSON.
+
+`/jobs/analyze` e `/jobs/regenerate` eseguono analisi e rigenerazione come job in un
+pool dedicato e restituiscono subito l'identificativo del job, senza occupare la
+richiesta per la durata di ScanCode e delle chiamate LLM: lo stato si interroga con
+`/jobs/{job_id}` e l'avanzamento si riceve come server-sent events da
+`/jobs/{job_id}/events`.
+
+Il lavoro bloccante non usa il pool di thread condiviso di FastAPI: gli endpoint sono
+asincroni e delegano clonazione, analisi, rigenerazione, download e chiamate LLM ai pool
+di fase (vedi `app.services.executors`), le cui code sono esposte da `/executors`; gli
+endpoint di stato non occupano alcun thread.
+
+`/compatibility/cache` espone le metriche delle cache di normalizzazione ed estrazione
+dei simboli di licenza.
 """
 
-from typing import Dict
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Tuple
 from fastapi import APIRouter, HTTPException, Body, UploadFile, Form, File
-from fastapi.responses import RedirectResponse, FileResponse
+from fastapi.responses import JSONResponse, RedirectResponse, FileResponse, StreamingResponse
 
 from app.services.analysis_workflow import (
+    get_existing_repo_path,
     perform_cloning,
     perform_initial_scan,
+    perform_issue_suggestion,
     perform_regeneration,
-    perform_upload_zip
+    perform_upload_zip,
+    stream_regeneration
+)
+from app.services.analysis_jobs import (
+    Job,
+    JobConflict,
+    JobQueueFull,
+    get_job_manager,
+    stream_job_events,
+    submit_analysis_job,
+    submit_regeneration_job
 )
 from app.services.downloader.download_service import perform_download
+from app.services.executors import IO, SUBPROCESS, get_executor_stats, run_stage
+from app.services.compatibility.compat_utils import get_cache_stats
 from app.models.schemas import (
     AnalyzeResponse,
+    IssueSuggestionRequest,
+    LicenseIssue,
     LicenseRequirementsRequest,
     LicenseSuggestionResponse
 )
-from app.services.llm.license_recommender import suggest_license_based_on_requirements
+from app.services.llm.license_recommender import (
+    stream_license_suggestion,
+    suggest_license_based_on_requirements
+)
+from app.services.llm.circuit_breaker import get_circuit_breaker_stats
+from app.services.llm.host_pool import get_host_pool_stats
+from app.services.llm.ollama_api import get_model_warmup_status
+from app.services.llm.scheduler import get_llm_scheduler
+from app.services.llm.structured_output import get_structured_output_stats
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Header delle risposte SSE: disabilitano cache e buffering dei proxy
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _format_sse(event: str, data: Any) -> str:
+    """
+    Serializza un evento nel formato server-sent events.
+
+    Args:
+        event (str): Il nome dell'evento.
+        data (Any): Il payload, serializzato in JSON.
+
+    Returns:
+        str: Il blocco di testo dell'evento.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _sse_stream(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    """
+    Converte una sequenza di eventi (nome, dati) in un flusso SSE.
+
+    Gli errori dopo l'apertura dello stream non possono più diventare codici HTTP:
+    vengono quindi inviati come evento "error" finale.
+
+    Args:
+        events (AsyncIterator[Tuple[str, Any]]): Gli eventi prodotti dal servizio.
+
+    Yields:
+        str: I blocchi di testo SSE.
+    """
+    try:
+        async for event, data in events:
+            yield _format_sse(event, data)
+    # Ampia eccezione catturata intenzionalmente: l'errore viene riportato al client
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.exception("Streaming endpoint failed")
+        yield _format_sse("error", {"detail": f"Internal error: {str(e)}"})
+
 # ------------------------------------------------------------------
 # 1. FLUSSO DI CLONAZIONE
 # ------------------------------------------------------------------
 
 @router.post("/clone")
-def clone_repository(payload: Dict[str, str] = Body(...)) -> Dict[str, str]:
+async def clone_repository(payload: Dict[str, str] = Body(...)) -> Dict[str, str]:
     """
     Clona un repository GitHub.
 
@@ -53,7 +148,9 @@ def clone_repository(payload: Dict[str, str] = Body(...)) -> Dict[str, str]:
         raise HTTPException(status_code=400, detail="Owner and Repo are required")
 
     try:
-        repo_path = perform_cloning(
+        repo_path = await run_stage(
+            SUBPROCESS,
+            perform_cloning,
             owner=owner,
             repo=repo,
         )
@@ -76,7 +173,7 @@ def clone_repository(payload: Dict[str, str] = Body(...)) -> Dict[str, str]:
 # ------------------------------------------------------------------
 
 @router.post("/zip")
-def upload_zip(
+async def upload_zip(
         owner: str = Form(...),
         repo: str = Form(...),
         uploaded_file: UploadFile = File(...)
@@ -98,7 +195,9 @@ def upload_zip(
             - 500: Se si verifica un errore interno del server.
     """
     try:
-        repo_path = perform_upload_zip(
+        repo_path = await run_stage(
+            IO,
+            perform_upload_zip,
             owner=owner,
             repo=repo,
             uploaded_file=uploaded_file
@@ -125,7 +224,7 @@ def upload_zip(
 # ------------------------------------------------------------------
 
 @router.post("/analyze", response_model=AnalyzeResponse)
-def run_analysis(payload: Dict[str, str] = Body(...)) -> AnalyzeResponse:
+async def run_analysis(payload: Dict[str, str] = Body(...)) -> AnalyzeResponse:
     """
     Esegue l'analisi iniziale delle licenze su un repository preparato.
 
@@ -150,7 +249,7 @@ def run_analysis(payload: Dict[str, str] = Body(...)) -> AnalyzeResponse:
         raise HTTPException(status_code=400, detail="Owner and Repo are required")
 
     try:
-        result = perform_initial_scan(owner=owner, repo=repo)
+        result = await run_stage(IO, perform_initial_scan, owner=owner, repo=repo)
         return result
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve)) from ve
@@ -158,8 +257,44 @@ def run_analysis(payload: Dict[str, str] = Body(...)) -> AnalyzeResponse:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}") from e
 
 
+@router.post("/issues/suggestion", response_model=LicenseIssue)
+async def issue_suggestion(request: IssueSuggestionRequest = Body(...)) -> LicenseIssue:
+    """
+    Calcola il suggerimento di un problema restituito da `/analyze` come "pending".
+
+    La chiamata LLM ha priorità interattiva; la risposta viene memorizzata nella cache
+    e le richieste successive per lo stesso problema sono immediate.
+
+    Args:
+        request (IssueSuggestionRequest): Repository, licenza principale e problema.
+
+    Returns:
+        LicenseIssue: Il problema con suggerimento, licenze alternative e stato "ready".
+
+    Raises:
+        HTTPException:
+            - 400: Se il formato del repository non è valido, il repository non esiste o
+              il file del problema è esterno al repository.
+            - 500: Se il calcolo del suggerimento fallisce.
+    """
+    if "/" not in request.repository:
+        raise HTTPException(
+            status_code=400, detail="Invalid repository format. Expected 'owner/repo'"
+        )
+
+    owner, repo = request.repository.split("/", 1)
+    try:
+        return await run_stage(
+            IO, perform_issue_suggestion, owner, repo, request.main_license, request.issue
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve)) from ve
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}") from e
+
+
 @router.post("/regenerate", response_model=AnalyzeResponse)
-def regenerate_analysis(previous_analysis: AnalyzeResponse = Body(...)) -> AnalyzeResponse:
+async def regenerate_analysis(previous_analysis: AnalyzeResponse = Body(...)) -> AnalyzeResponse:
     """
     Rigenera l'analisi basandosi sui risultati precedenti.
 
@@ -184,7 +319,9 @@ def regenerate_analysis(previous_analysis: AnalyzeResponse = Body(...)) -> Analy
 
         owner, repo = previous_analysis.repository.split("/", 1)
 
-        result = perform_regeneration(
+        result = await run_stage(
+            IO,
+            perform_regeneration,
             owner=owner,
             repo=repo,
             previous_analysis=previous_analysis
@@ -196,12 +333,48 @@ def regenerate_analysis(previous_analysis: AnalyzeResponse = Body(...)) -> Analy
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}") from e
 
 
+@router.post("/regenerate/stream")
+async def regenerate_analysis_stream(
+        previous_analysis: AnalyzeResponse = Body(...)
+) -> StreamingResponse:
+    """
+    Rigenera l'analisi come flusso di server-sent events.
+
+    Eventi emessi: "file_start", "token" (frammenti del codice generato), "file_done",
+    "result" (l'AnalyzeResponse finale) ed eventualmente "error".
+
+    Args:
+        previous_analysis (AnalyzeResponse): Il risultato della scansione precedente.
+
+    Returns:
+        StreamingResponse: Il flusso SSE (`text/event-stream`).
+
+    Raises:
+        HTTPException:
+            - 400: Se il formato del repository non è valido o il repository non esiste.
+    """
+    try:
+        if "/" not in previous_analysis.repository:
+            raise ValueError("Invalid repository format. Expected 'owner/repo'")
+
+        owner, repo = previous_analysis.repository.split("/", 1)
+        get_existing_repo_path(owner, repo)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve)) from ve
+
+    return StreamingResponse(
+        _sse_stream(stream_regeneration(owner, repo, previous_analysis)),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
 # ------------------------------------------------------------------
 # 4. DOWNLOAD
 # ------------------------------------------------------------------
 
 @router.post("/download")
-def download_repo(payload: Dict[str, str] = Body(...)) -> FileResponse:
+async def download_repo(payload: Dict[str, str] = Body(...)) -> FileResponse:
     """
     Genera e restituisce un archivio ZIP scaricabile del repository.
 
@@ -223,7 +396,7 @@ def download_repo(payload: Dict[str, str] = Body(...)) -> FileResponse:
         raise HTTPException(status_code=400, detail="Owner and Repo are required")
 
     try:
-        zip_path = perform_download(owner=owner, repo=repo)
+        zip_path = await run_stage(IO, perform_download, owner=owner, repo=repo)
 
         return FileResponse(
             path=zip_path,
@@ -241,7 +414,7 @@ def download_repo(payload: Dict[str, str] = Body(...)) -> FileResponse:
 # ------------------------------------------------------------------
 
 @router.post("/suggest-license", response_model=LicenseSuggestionResponse)
-def suggest_license(
+async def suggest_license(
     requirements: LicenseRequirementsRequest = Body(...)
 ) -> LicenseSuggestionResponse:
     """
@@ -269,7 +442,9 @@ def suggest_license(
         detected_licenses = requirements_dict.pop("detected_licenses", None)
 
         # Ottiene il suggerimento dell'AI con le licenze rilevate
-        suggestion = suggest_license_based_on_requirements(
+        suggestion = await run_stage(
+            IO,
+            suggest_license_based_on_requirements,
             requirements_dict,
             detected_licenses=detected_licenses
         )
@@ -286,4 +461,308 @@ def suggest_license(
         ) from e
 
 
+@router.post("/suggest-license/stream")
+async def suggest_license_stream(
+    requirements: LicenseRequirementsRequest = Body(...)
+) -> StreamingResponse:
+    """
+    Suggerisce una licenza come flusso di server-sent events.
+
+    Eventi emessi: "token" (frammenti della risposta dell'LLM), "result" (con gli stessi
+    campi di `LicenseSuggestionResponse`) ed eventualmente "error".
+
+    Args:
+        requirements (LicenseRequirementsRequest): Requisiti e vincoli delle licenze dell'utente.
+
+    Returns:
+        StreamingResponse: Il flusso SSE (`text/event-stream`).
+    """
+    requirements_dict = requirements.model_dump()
+    detected_licenses = requirements_dict.pop("detected_licenses", None)
+
+    return StreamingResponse(
+        _sse_stream(stream_license_suggestion(requirements_dict, detected_licenses)),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
+# ------------------------------------------------------------------
+# 6. STATO LLM
+# ------------------------------------------------------------------
+
+@router.get("/llm/scheduler")
+async def llm_scheduler_status() -> Dict[str, Any]:
+    """
+    Restituisce lo stato dello scheduler delle richieste LLM.
+
+    Returns:
+        Dict[str, Any]: Slot totali e, per le classi "interactive" e "bulk", richieste in
+        esecuzione e in coda, limiti, contatori di richieste avviate/completate/rifiutate
+        e tempi di attesa in coda (secondi).
+    """
+    return get_llm_scheduler().stats()
+
+
+@router.get("/llm/ready")
+async def llm_readiness() -> JSONResponse:
+    """
+    Riporta se i modelli Ollama configurati sono stati caricati dal warm-up di avvio.
+
+    Adatto come readiness probe: finché i modelli non sono caricati le prime richieste
+    pagherebbero il caricamento a freddo.
+
+    Returns:
+        JSONResponse: `ready` e lo stato per modello, con codice 200 se tutti i modelli
+        sono pronti e 503 altrimenti.
+    """
+    status = get_model_warmup_status()
+    return JSONResponse(content=status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/llm/circuit")
+async def llm_circuit_status() -> Dict[str, Dict[str, Any]]:
+    """
+    Restituisce lo stato dei circuit breaker delle chiamate LLM.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per ogni modello usato: stato ("closed", "open",
+        "half_open"), tasso di fallimento e latenze p50/p95 delle chiamate recenti,
+        contatori di rifiuti, aperture, errori e violazioni dello SLA.
+    """
+    return get_circuit_breaker_stats()
+
+
+@router.get("/llm/hosts")
+async def llm_hosts_status() -> Dict[str, Dict[str, Any]]:
+    """
+    Restituisce lo stato delle istanze Ollama del pool (`OLLAMA_HOSTS`).
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per ogni istanza: disponibilità, richieste in corso e
+        totali, errori, ultimo errore e modelli installati; vuoto con una sola istanza.
+    """
+    return get_host_pool_stats()
+
+
+@router.get("/llm/structured")
+async def llm_structured_output_status() -> Dict[str, Dict[str, int]]:
+    """
+    Restituisce i contatori di validazione delle risposte JSON dell'LLM.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Per tipo di risposta: chiamate, risposte valide al primo
+        tentativo, risposte corrette, tentativi di correzione e fallimenti.
+    """
+    return get_structured_output_stats()
+
+
+
+# ------------------------------------------------------------------
+# 7. JOB DI ANALISI
+# ------------------------------------------------------------------
+
+def _submitted(job: Job) -> JSONResponse:
+    """
+    Helper interno che descrive un job appena accodato.
+
+    Args:
+        job (Job): Il job.
+
+    Returns:
+        JSONResponse: Risposta 202 con identificativo, stato e URL di stato ed eventi.
+    """
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/jobs/{job.id}",
+            "events_url": f"/api/jobs/{job.id}/events",
+        },
+    )
+
+
+def _get_job_or_404(job_id: str) -> Job:
+    """
+    Helper interno che restituisce un job registrato.
+
+    Args:
+        job_id (str): L'identificativo del job.
+
+    Returns:
+        Job: Il job.
+
+    Raises:
+        HTTPException: 404 se il job non esiste o è scaduto.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.post("/jobs/analyze")
+async def submit_analysis(payload: Dict[str, str] = Body(...)) -> JSONResponse:
+    """
+    Accoda l'analisi iniziale di un repository e restituisce subito l'identificativo del job.
+
+    Il risultato è lo stesso di `/analyze`: si ottiene da `/jobs/{job_id}` o come evento
+    "result" di `/jobs/{job_id}/events`.
+
+    Args:
+        payload (Dict[str, str]): Corpo JSON contenente "owner" e "repo".
+
+    Returns:
+        JSONResponse: Risposta 202 con l'identificativo e gli URL del job (quello già
+        attivo, se il repository ne ha uno dello stesso tipo).
+
+    Raises:
+        HTTPException:
+            - 400: Se i parametri mancano o il repository non esiste.
+            - 409: Se il repository ha già un job attivo di tipo diverso.
+            - 503: Se la coda dei job è piena.
+    """
+    owner = payload.get("owner")
+    repo = payload.get("repo")
+
+    if not owner or not repo:
+        raise HTTPException(status_code=400, detail="Owner and Repo are required")
+
+    owner, repo = owner.strip(), repo.strip()
+    try:
+        get_existing_repo_path(owner, repo)
+        return _submitted(submit_analysis_job(owner, repo))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve)) from ve
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+
+@router.post("/jobs/regenerate")
+async def submit_regeneration(previous_analysis: AnalyzeResponse = Body(...)) -> JSONResponse:
+    """
+    Accoda la rigenerazione di un repository e restituisce subito l'identificativo del job.
+
+    Il risultato è lo stesso di `/regenerate`: si ottiene da `/jobs/{job_id}` o come
+    evento "result" di `/jobs/{job_id}/events`.
+
+    Args:
+        previous_analysis (AnalyzeResponse): Il risultato della scansione precedente.
+
+    Returns:
+        JSONResponse: Risposta 202 con l'identificativo e gli URL del job (quello già
+        attivo, se il repository ne ha uno dello stesso tipo).
+
+    Raises:
+        HTTPException:
+            - 400: Se il formato del repository non è valido o il repository non esiste.
+            - 409: Se il repository ha già un job attivo di tipo diverso.
+            - 503: Se la coda dei job è piena.
+    """
+    try:
+        if "/" not in previous_analysis.repository:
+            raise ValueError("Invalid repository format. Expected 'owner/repo'")
+
+        owner, repo = previous_analysis.repository.split("/", 1)
+        get_existing_repo_path(owner, repo)
+        return _submitted(submit_regeneration_job(owner, repo, previous_analysis))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve)) from ve
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+
+@router.get("/jobs")
+async def jobs_status() -> Dict[str, Any]:
+    """
+    Restituisce lo stato del pool dei job di analisi.
+
+    Returns:
+        Dict[str, Any]: Job simultanei, coda massima, permanenza dei job terminati e
+        numero di job per stato ("queued", "running", "succeeded", "failed").
+    """
+    return get_job_manager().stats()
+
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> Dict[str, Any]:
+    """
+    Restituisce lo stato di un job per l'interrogazione periodica.
+
+    Args:
+        job_id (str): L'identificativo del job.
+
+    Returns:
+        Dict[str, Any]: Stato, avanzamento (fase, file scansionati, problemi trovati, ecc.)
+        e, se terminato, risultato o errore.
+
+    Raises:
+        HTTPException:
+            - 404: Se il job non esiste o è scaduto.
+    """
+    return _get_job_or_404(job_id).snapshot()
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """
+    Restituisce gli eventi di avanzamento di un job come flusso di server-sent events.
+
+    Eventi emessi, dal primo anche se già avvenuti: "status", "progress" (fase e
+    contatori), infine "result" (l'AnalyzeResponse) o "error". La disconnessione del
+    client non interrompe il job.
+
+    Args:
+        job_id (str): L'identificativo del job.
+
+    Returns:
+        StreamingResponse: Il flusso SSE (`text/event-stream`).
+
+    Raises:
+        HTTPException:
+            - 404: Se il job non esiste o è scaduto.
+    """
+    return StreamingResponse(
+        _sse_stream(stream_job_events(_get_job_or_404(job_id))),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
+# ------------------------------------------------------------------
+# 8. POOL DI FASE
+# ------------------------------------------------------------------
 
+@router.get("/executors")
+async def executors_status() -> Dict[str, Dict[str, Any]]:
+    """
+    Restituisce lo stato dei pool di thread per fase.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per fase ("cpu", "subprocess", "io"): thread, attività
+        in esecuzione e in attesa, attività accodate/completate/fallite e attese in coda
+        (secondi).
+    """
+    return get_executor_stats()
+
+
+# ------------------------------------------------------------------
+# 9. CACHE DI COMPATIBILITÀ
+# ------------------------------------------------------------------
+
+@router.get("/compatibility/cache")
+async def compatibility_cache_status() -> Dict[str, Dict[str, Any]]:
+    """
+    Restituisce le metriche delle cache dei simboli di licenza.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per "normalize_symbol" ed "extract_symbols": hit, miss,
+        dimensione corrente e massima; per "normalize_symbol" anche le risoluzioni servite
+        dalla tabella degli alias e le voci della tabella.
+    """
+    return get_cache_stats()
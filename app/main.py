@@ -6,15 +6,36 @@ Configura le policy di Cross-Origin Resource Sharing (CORS) per consentire la co
 con il frontend e registra i router API principali.
 """
 
-from typing import Dict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.controllers.analysis import router as analysis_router
+from app.services.llm.http_client import aclose_http_clients
+from app.services.llm.ollama_api import start_model_warmup
+from app.utility.config import OLLAMA_WARMUP_ON_STARTUP
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """
+    Gestisce il ciclo di vita dell'applicazione.
+
+    All'avvio prepara in background i modelli Ollama configurati (se abilitato),
+    così le prime richieste non pagano il caricamento a freddo. Alla chiusura rilascia
+    i pool di connessioni HTTP condivisi verso Ollama.
+    """
+    if OLLAMA_WARMUP_ON_STARTUP:
+        start_model_warmup()
+    yield
+    await aclose_http_clients()
+
 
 # Inizializza l'istanza dell'applicazione
 app = FastAPI(
     title="License Compatibility Checker + Ollama",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ------------------------------------------------------------------
@@ -49,7 +70,7 @@ app.include_router(analysis_router, prefix="/api", tags=["Analysis"])
 # ------------------------------------------------------------------
 
 @app.get("/")
-def root() -> Dict[str, str]:
+async def root() -> Dict[str, str]:
     """
     Endpoint root per verificare la disponibilità del backend.
 
@@ -3,11 +3,12 @@ Schemas Module.
 
 Questo modulo definisce i modelli Pydantic utilizzati per la validazione dei dati
 nelle richieste e risposte API. Include schemi per le richieste di analisi,
-la segnalazione di problemi relativi alle licenze e i risultati della clonazione dei repository.
+la segnalazione di problemi relativi alle licenze e i risultati della clonazione dei repository,
+oltre agli schemi delle risposte JSON richieste all'LLM (vedi `structured_output`).
 """
 
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
 # ------------------------------------------------------------------
 # REQUEST MODELS
@@ -40,6 +41,8 @@ class LicenseIssue(BaseModel):
         reason (Optional[str]): Spiegazione del motivo per cui la licenza è incompatibile.
         suggestion (Optional[str]): Suggerimento generato dall'AI per risolvere il problema.
         licenses (Optional[str]): Dettagli aggiuntivi della licenza o stringhe di identificazione grezze.
+        suggestion_status (Optional[str]): "ready" se il suggerimento è calcolato, "pending" se
+            va richiesto a `/issues/suggestion`.
         regenerated_code_path (Optional[str]): Percorso a un file generato localmente con correzioni.
     """
     file_path: str
@@ -48,6 +51,7 @@ class LicenseIssue(BaseModel):
     reason: Optional[str] = None
     suggestion: Optional[str] = None
     licenses: Optional[str] = None
+    suggestion_status: Optional[str] = None
     regenerated_code_path: Optional[str] = None
 
 
@@ -71,6 +75,24 @@ class AnalyzeResponse(BaseModel):
     needs_license_suggestion: bool = False
 
 
+# ------------------------------------------------------------------
+# ISSUE SUGGESTION MODELS
+# ------------------------------------------------------------------
+
+class IssueSuggestionRequest(BaseModel):
+    """
+    Rappresenta la richiesta del suggerimento di un singolo problema restituito come "pending".
+
+    Attributes:
+        repository (str): Il nome completo del repository (es. "owner/repo").
+        main_license (str): La licenza principale del progetto.
+        issue (LicenseIssue): Il problema di cui calcolare il suggerimento.
+    """
+    repository: str
+    main_license: str
+    issue: LicenseIssue
+
+
 # ------------------------------------------------------------------
 # INTERNAL MODELS
 # ------------------------------------------------------------------
@@ -138,3 +160,49 @@ class LicenseSuggestionResponse(BaseModel):
     explanation: str
     alternatives: Optional[List[str]] = None
 
+
+
+# ------------------------------------------------------------------
+# LLM OUTPUT MODELS
+# ------------------------------------------------------------------
+
+class DocumentReviewOutput(BaseModel):
+    """
+    Rappresenta la risposta strutturata dell'LLM alla revisione di un documento.
+
+    Attributes:
+        advice (str): Il consiglio operativo per risolvere l'incompatibilità.
+    """
+    advice: str = Field(min_length=1)
+
+
+class BatchSuggestionItem(BaseModel):
+    """
+    Rappresenta le licenze alternative per un conflitto di un prompt raggruppato.
+
+    Attributes:
+        id (int): Il numero del conflitto nel prompt (da 1).
+        licenses (List[str]): Le licenze alternative compatibili.
+    """
+    id: int
+    licenses: List[str]
+
+    @field_validator("licenses", mode="before")
+    @classmethod
+    def split_licenses(cls, value):
+        """
+        Accetta anche le licenze come stringa separata da virgole.
+        """
+        if isinstance(value, str):
+            return [part.strip() for part in value.split(",") if part.strip()]
+        return value
+
+
+class BatchSuggestionOutput(BaseModel):
+    """
+    Rappresenta la risposta strutturata dell'LLM a un prompt raggruppato.
+
+    Attributes:
+        results (List[BatchSuggestionItem]): Le licenze alternative per conflitto.
+    """
+    results: List[BatchSuggestionItem]
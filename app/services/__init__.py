@@ -6,7 +6,10 @@ from .analysis_workflow import (
 )
 from app.services.llm.code_generator import regenerate_code
 from app.services.github.github_client import clone_repo
-from app.services.llm.suggestion import enrich_with_llm_suggestions
+from app.services.llm.suggestion import (
+    enrich_with_llm_suggestions,
+    enrich_with_llm_suggestions_async,
+)
 from app.services.scanner.detection import (
     run_scancode,
     detect_main_license_scancode,
@@ -21,6 +24,7 @@ __all__ = [
     "regenerate_code",
     "clone_repo",
     "enrich_with_llm_suggestions",
+    "enrich_with_llm_suggestions_async",
     "run_scancode",
     "detect_main_license_scancode",
     "filter_licenses",
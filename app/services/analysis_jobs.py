@@ -0,0 +1,435 @@
+"""
+Analysis Jobs Module.
+
+Questo modulo esegue l'analisi iniziale (`perform_initial_scan`) e la rigenerazione
+(`perform_regeneration`) come job asincroni, così le richieste HTTP non restano occupate
+per l'intera durata di ScanCode e delle chiamate LLM.
+
+L'invio di un job restituisce subito il suo identificativo; il job viene eseguito da un
+pool di thread dedicato (`JOB_WORKERS`) e i client ne seguono lo stato interrogandolo
+periodicamente o ricevendo gli eventi di avanzamento:
+    - "status": cambio di stato ("queued", "running");
+    - "progress": fase corrente e contatori (file scansionati, problemi trovati, ecc.);
+    - "result": l'AnalyzeResponse finale serializzata;
+    - "error": il motivo del fallimento.
+
+I job in attesa oltre `JOB_QUEUE_SIZE` vengono rifiutati con `JobQueueFull`; i job
+terminati restano consultabili per `JOB_RETENTION_SECONDS`.
+
+Per ogni repository è attivo (in attesa o in esecuzione) al più un job, perché analisi e
+rigenerazione lavorano sulla stessa copia clonata: un nuovo invio dello stesso tipo
+restituisce il job già attivo, uno di tipo diverso viene rifiutato con `JobConflict`.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.models.schemas import AnalyzeResponse
+from app.services.analysis_workflow import perform_initial_scan, perform_regeneration
+from app.utility.config import JOB_QUEUE_SIZE, JOB_RETENTION_SECONDS, JOB_WORKERS
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS = "analysis"
+REGENERATION = "regeneration"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+JOB_STATES = (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED)
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+# Intervallo (secondi) con cui gli stream controllano i nuovi eventi di un job
+EVENT_POLL_INTERVAL = 0.25
+
+
+class JobQueueFull(RuntimeError):
+    """
+    Sollevata quando un job viene rifiutato perché la coda dei job in attesa è piena.
+    """
+
+
+class JobConflict(RuntimeError):
+    """
+    Sollevata quando un job viene rifiutato perché il repository ha già un job di altro
+    tipo in attesa o in esecuzione.
+
+    Attributes:
+        job (Job): Il job già attivo sul repository.
+    """
+
+    def __init__(self, job: "Job"):
+        self.job = job
+        super().__init__(
+            f"Repository {job.repository} already has a {job.status} {job.kind} job ({job.id})"
+        )
+
+
+class Job:
+    """
+    Stato, avanzamento ed eventi di un singolo job di analisi.
+    """
+
+    def __init__(self, kind: str, repository: str):
+        """
+        Inizializza il job in stato "queued".
+
+        Args:
+            kind (str): Il tipo di job ("analysis" o "regeneration").
+            repository (str): Il repository nel formato "owner/repo".
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.repository = repository
+        self.status = JOB_QUEUED
+        self.progress: Dict[str, Any] = {"stage": JOB_QUEUED}
+        self.result: Optional[AnalyzeResponse] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._events: List[Tuple[str, Dict[str, Any]]] = [("status", {"status": JOB_QUEUED})]
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        """
+        Indica se il job è terminato, con successo o meno.
+
+        Returns:
+            bool: True se il job è terminato.
+        """
+        return self.status in FINISHED_STATES
+
+    def start(self) -> None:
+        """
+        Porta il job in stato "running".
+        """
+        with self._lock:
+            self.status = JOB_RUNNING
+            self.started_at = time.time()
+            self.progress["stage"] = JOB_RUNNING
+            self._events.append(("status", {"status": JOB_RUNNING}))
+
+    def update_progress(self, stage: str, **counters: int) -> None:
+        """
+        Registra la fase corrente e i contatori aggiornati (vedi `ProgressCallback`).
+
+        Args:
+            stage (str): La fase corrente.
+            **counters (int): I contatori aggiornati; quelli non indicati restano invariati.
+        """
+        with self._lock:
+            self.progress.update(counters, stage=stage)
+            self._events.append(("progress", dict(self.progress)))
+
+    def succeed(self, result: AnalyzeResponse) -> None:
+        """
+        Completa il job con il risultato dell'analisi.
+
+        Args:
+            result (AnalyzeResponse): Il risultato.
+        """
+        with self._lock:
+            self.result = result
+            self.status = JOB_SUCCEEDED
+            self.finished_at = time.time()
+            self.progress["stage"] = JOB_SUCCEEDED
+            self.progress["issues_found"] = len(result.issues)
+            self._events.append(("result", result.model_dump()))
+
+    def fail(self, error: str) -> None:
+        """
+        Termina il job con un errore.
+
+        Args:
+            error (str): Il motivo del fallimento.
+        """
+        with self._lock:
+            self.error = error
+            self.status = JOB_FAILED
+            self.finished_at = time.time()
+            self.progress["stage"] = JOB_FAILED
+            self._events.append(("error", {"detail": error}))
+
+    def events_since(self, index: int) -> Tuple[List[Tuple[str, Dict[str, Any]]], bool]:
+        """
+        Restituisce gli eventi successivi a quelli già consegnati.
+
+        Args:
+            index (int): Il numero di eventi già consegnati.
+
+        Returns:
+            Tuple[List[Tuple[str, Dict[str, Any]]], bool]: I nuovi eventi (evento, dati) e
+            se il job è terminato (in tal caso non seguiranno altri eventi).
+        """
+        with self._lock:
+            return self._events[index:], self.finished
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Restituisce lo stato del job per l'interrogazione periodica.
+
+        Returns:
+            Dict[str, Any]: Identificativo, tipo, repository, stato, avanzamento, istanti
+            di creazione/avvio/termine e, se terminato, risultato o errore.
+        """
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "repository": self.repository,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "result": self.result.model_dump() if self.result else None,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """
+    Registro dei job con un pool di esecuzione e una coda di attesa limitata.
+    """
+
+    def __init__(self, workers: int, queue_size: int, retention_seconds: float):
+        """
+        Inizializza il registro e il pool di esecuzione.
+
+        Args:
+            workers (int): Job eseguiti simultaneamente.
+            queue_size (int): Job in attesa massimi.
+            retention_seconds (float): Permanenza dei job terminati nel registro (secondi).
+        """
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="analysis-job"
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+            self,
+            kind: str,
+            repository: str,
+            func: Callable[..., AnalyzeResponse],
+            *args: Any
+    ) -> Job:
+        """
+        Registra un job e lo accoda nel pool di esecuzione.
+
+        Se il repository ha già un job attivo dello stesso tipo viene restituito quello,
+        senza accodarne un altro.
+
+        Args:
+            kind (str): Il tipo di job.
+            repository (str): Il repository nel formato "owner/repo".
+            func (Callable[..., AnalyzeResponse]): Il flusso da eseguire; riceve `args` e
+                la funzione di avanzamento nel parametro `progress`.
+            *args (Any): Gli argomenti del flusso.
+
+        Returns:
+            Job: Il job registrato, o quello già attivo sul repository.
+
+        Raises:
+            JobConflict: Se il repository ha già un job attivo di tipo diverso.
+            JobQueueFull: Se i job in attesa hanno raggiunto `queue_size`.
+        """
+        with self._lock:
+            self._prune()
+            active = self._active_job(repository)
+            if active is not None:
+                if active.kind != kind:
+                    raise JobConflict(active)
+                logger.info("Reusing %s job %s for %s", kind, active.id, repository)
+                return active
+            queued = sum(1 for job in self._jobs.values() if job.status == JOB_QUEUED)
+            if queued >= self.queue_size:
+                raise JobQueueFull(f"Too many queued jobs ({queued}), retry later")
+            job = Job(kind, repository)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, func, args)
+        logger.info("Queued %s job %s for %s", kind, job.id, repository)
+        return job
+
+    @staticmethod
+    def _run(job: Job, func: Callable[..., AnalyzeResponse], args: Tuple[Any, ...]) -> None:
+        """
+        Esegue un job nel pool e ne registra l'esito.
+
+        Args:
+            job (Job): Il job.
+            func (Callable[..., AnalyzeResponse]): Il flusso da eseguire.
+            args (Tuple[Any, ...]): Gli argomenti del flusso.
+        """
+        job.start()
+        try:
+            result = func(*args, progress=job.update_progress)
+        # Ampia eccezione catturata intenzionalmente: l'errore viene riportato nel job
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.exception("%s job %s failed", job.kind, job.id)
+            job.fail(str(e))
+            return
+        job.succeed(result)
+        logger.info("%s job %s completed", job.kind, job.id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Restituisce un job registrato.
+
+        Args:
+            job_id (str): L'identificativo del job.
+
+        Returns:
+            Optional[Job]: Il job, o None se non esiste o è scaduto.
+        """
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def _active_job(self, repository: str) -> Optional[Job]:
+        """
+        Restituisce il job in attesa o in esecuzione sul repository. Da chiamare con il lock.
+
+        Args:
+            repository (str): Il repository nel formato "owner/repo".
+
+        Returns:
+            Optional[Job]: Il job attivo, o None se non ce ne sono.
+        """
+        return next(
+            (job for job in self._jobs.values()
+             if job.repository == repository and not job.finished),
+            None,
+        )
+
+    def _prune(self) -> None:
+        """
+        Rimuove i job terminati da oltre `retention_seconds`. Da chiamare con il lock.
+        """
+        expiry = time.time() - self.retention_seconds
+        for job_id in [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at is not None and job.finished_at < expiry
+        ]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Restituisce lo stato del pool dei job.
+
+        Returns:
+            Dict[str, Any]: Job simultanei, coda massima, permanenza dei job terminati e
+            numero di job registrati per stato.
+        """
+        with self._lock:
+            self._prune()
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "retention_seconds": self.retention_seconds,
+            "jobs": counts,
+        }
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """
+    Restituisce il registro dei job condiviso, creandolo al primo utilizzo.
+
+    Returns:
+        JobManager: Il registro.
+    """
+    global _manager  # pylint: disable=global-statement
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(JOB_WORKERS, JOB_QUEUE_SIZE, JOB_RETENTION_SECONDS)
+        return _manager
+
+
+def submit_analysis_job(owner: str, repo: str) -> Job:
+    """
+    Accoda l'analisi iniziale di un repository già clonato o caricato.
+
+    Args:
+        owner (str): Il proprietario del repository.
+        repo (str): Il nome del repository.
+
+    Returns:
+        Job: Il job registrato, o quello già attivo sul repository.
+
+    Raises:
+        JobConflict: Se il repository ha già un job attivo di tipo diverso.
+        JobQueueFull: Se la coda dei job è piena.
+    """
+    return get_job_manager().submit(
+        ANALYSIS, f"{owner}/{repo}", perform_initial_scan, owner, repo
+    )
+
+
+def submit_regeneration_job(owner: str, repo: str, previous_analysis: AnalyzeResponse) -> Job:
+    """
+    Accoda la rigenerazione del codice di un repository già analizzato.
+
+    Args:
+        owner (str): Il proprietario del repository.
+        repo (str): Il nome del repository.
+        previous_analysis (AnalyzeResponse): Risultati dalla scansione iniziale.
+
+    Returns:
+        Job: Il job registrato, o quello già attivo sul repository.
+
+    Raises:
+        JobConflict: Se il repository ha già un job attivo di tipo diverso.
+        JobQueueFull: Se la coda dei job è piena.
+    """
+    return get_job_manager().submit(
+        REGENERATION, f"{owner}/{repo}", perform_regeneration, owner, repo, previous_analysis
+    )
+
+
+async def stream_job_events(
+        job: Job,
+        poll_interval: float = EVENT_POLL_INTERVAL
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Restituisce gli eventi di un job dal primo fino al termine.
+
+    Gli eventi già avvenuti vengono ripetuti, così un client che si collega (o si
+    ricollega) in ritardo riceve l'intera sequenza. Se il consumatore smette di iterare
+    (client disconnesso) il job prosegue.
+
+    Args:
+        job (Job): Il job.
+        poll_interval (float): Intervallo di controllo dei nuovi eventi (secondi).
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: Coppie (evento, dati); l'ultima è "result" o "error".
+    """
+    delivered = 0
+    while True:
+        events, finished = job.events_since(delivered)
+        for event in events:
+            yield event
+        delivered += len(events)
+        if finished:
+            return
+        await asyncio.sleep(poll_interval)
@@ -8,10 +8,15 @@ Agisce come orchestratore per:
 - Scansione iniziale delle licenze e controllo della compatibilità.
 - Il ciclo di rigenerazione del codice basato sull'intelligenza artificiale per risolvere i conflitti di licenza.
 """
+import logging
 import os
 import shutil
 import tempfile
+import time
 import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
 
 from fastapi import UploadFile, HTTPException
 from app.models.schemas import AnalyzeResponse, LicenseIssue
@@ -19,15 +24,47 @@ from app.services.github.github_client import clone_repo
 from app.services.scanner.detection import (
     run_scancode,
     detect_main_license_scancode,
-    extract_file_licenses
+    extract_file_licenses,
+    extract_file_matched_texts
 )
 from app.services.scanner.filter import filter_licenses
 from app.services.compatibility import check_compatibility
-from app.services.llm.suggestion import enrich_with_llm_suggestions
+from app.services.executors import CPU, IO, SUBPROCESS, run_in_stage, run_stage
+from app.services.llm.suggestion import (
+    enrich_issue,
+    enrich_with_llm_suggestions,
+    prefetch_issue_suggestions
+)
 from app.services.llm.license_recommender import needs_license_suggestion
 from app.services.scanner.license_ranking import choose_most_permissive_license_in_file
-from app.utility.config import CLONE_BASE_DIR
-from app.services.llm.code_generator import regenerate_code
+from app.utility.config import (
+    CLONE_BASE_DIR,
+    OLLAMA_CODING_MODEL,
+    LLM_LAZY_ENRICHMENT,
+    REGEN_FILE_CONCURRENCY,
+    REGEN_FILE_DEADLINE,
+    REGEN_TOTAL_BUDGET,
+)
+from app.services.llm.code_generator import (
+    build_regeneration_prompt,
+    clean_generated_code,
+    get_cached_regenerated_code,
+    regenerate_code,
+    store_regenerated_code,
+)
+from app.services.llm.ollama_api import stream_ollama
+from app.services.llm.scheduler import BULK
+
+logger = logging.getLogger(__name__)
+
+# Riceve l'avanzamento di un'analisi: fase corrente e contatori (es. files_scanned)
+ProgressCallback = Callable[..., None]
+
+# File esclusi dalla rigenerazione (documenti, avvisi, ecc.)
+REGENERATION_IGNORE_SUFFIXES = ('.md', '.txt', '.rst', 'THIRD-PARTY-NOTICE', 'NOTICE')
+
+# Licenze target usate quando il problema non riporta alternative
+DEFAULT_TARGET_LICENSES = "MIT, Apache-2.0, BSD-3-Clause"
 
 
 def perform_cloning(owner: str, repo: str) -> str:
@@ -47,7 +84,7 @@ def perform_cloning(owner: str, repo: str) -> str:
     Raises:
         ValueError: Se l'operazione di clonazione fallisce.
     """
-    clone_result = clone_repo(owner, repo)
+    clone_result = run_in_stage(SUBPROCESS, clone_repo, owner, repo)
     if not clone_result.success:
         raise ValueError(f"Cloning error: {clone_result.error}")
 
@@ -133,7 +170,24 @@ def perform_upload_zip(owner: str, repo: str, uploaded_file: UploadFile) -> str:
     return os.path.abspath(target_dir)
 
 
-def perform_initial_scan(owner: str, repo: str) -> AnalyzeResponse:
+def _report(progress: Optional[ProgressCallback], stage: str, **counters: int) -> None:
+    """
+    Helper interno che notifica l'avanzamento, se richiesto dal chiamante.
+
+    Args:
+        progress (Optional[ProgressCallback]): La funzione che riceve l'avanzamento.
+        stage (str): La fase corrente.
+        **counters (int): I contatori aggiornati.
+    """
+    if progress is not None:
+        progress(stage, **counters)
+
+
+def perform_initial_scan(
+    owner: str,
+    repo: str,
+    progress: Optional[ProgressCallback] = None
+) -> AnalyzeResponse:
     """
     Esegue l'analisi iniziale su un repository già clonato/caricato.
 
@@ -142,11 +196,16 @@ def perform_initial_scan(owner: str, repo: str) -> AnalyzeResponse:
     2. Identifica la licenza principale del progetto.
     3. Filtra i risultati di ScanCode utilizzando LLM e regole regex.
     4. Controlla la compatibilità tra le licenze dei file e la licenza principale.
-    5. Arricchisce i problemi con suggerimenti generati dall'intelligenza artificiale.
+    5. Arricchisce i problemi con suggerimenti generati dall'intelligenza artificiale
+       (con `LLM_LAZY_ENRICHMENT` solo quelli che non richiedono l'LLM; gli altri
+       restano "pending", vedi `perform_issue_suggestion`).
 
     Args:
         owner (str): Il proprietario del repository.
         repo (str): Il nome del repository.
+        progress (Optional[ProgressCallback]): Riceve la fase corrente ("scanning",
+            "filtering", "checking_compatibility", "enriching") e i contatori
+            `files_scanned` e `issues_found`.
 
     Returns:
         AnalyzeResponse: Il risultato completo dell'analisi inclusi problemi e suggerimenti.
@@ -160,7 +219,9 @@ def perform_initial_scan(owner: str, repo: str) -> AnalyzeResponse:
         raise ValueError(f"Repository not found at {repo_path}. Please clone it first.")
 
     # 2) Esegue ScanCode
-    scan_raw = run_scancode(repo_path)
+    # ScanCode e le elaborazioni in memoria usano i rispettivi pool di fase
+    _report(progress, "scanning")
+    scan_raw = run_in_stage(SUBPROCESS, run_scancode, repo_path)
 
     # 3) Rileva la Licenza Principale
     license_result = detect_main_license_scancode(scan_raw)
@@ -173,16 +234,29 @@ def perform_initial_scan(owner: str, repo: str) -> AnalyzeResponse:
         path_license = None
 
     # 4) Filtraggio
-    llm_clean = filter_licenses(scan_raw, main_license, path_license)
+    _report(progress, "filtering", files_scanned=len(scan_raw.get("files", [])))
+    llm_clean = run_in_stage(CPU, filter_licenses, scan_raw, main_license, path_license)
     file_licenses = extract_file_licenses(llm_clean)
 
     remove_or_clauses = choose_most_permissive_license_in_file(file_licenses)
 
     # 5) Controllo Compatibilità
-    compatibility = check_compatibility(main_license, remove_or_clauses)
+    _report(progress, "checking_compatibility")
+    compatibility = run_in_stage(CPU, check_compatibility, main_license, remove_or_clauses)
 
-    # 6) Suggerimenti AI
-    enriched_issues = enrich_with_llm_suggestions(main_license, compatibility["issues"], {})
+    # I testi individuati dalla scansione guidano la riduzione dei documenti nei prompt
+    matched_texts = extract_file_matched_texts(llm_clean)
+    for issue in compatibility["issues"]:
+        issue["matched_texts"] = matched_texts.get(issue["file_path"], [])
+
+    # 6) Suggerimenti AI: in modalità differita quelli che richiedono l'LLM restano
+    # "pending" e vengono calcolati su richiesta (i primi in background)
+    _report(progress, "enriching", issues_found=len(compatibility["issues"]))
+    enriched_issues = enrich_with_llm_suggestions(
+        main_license, compatibility["issues"], {}, lazy=LLM_LAZY_ENRICHMENT
+    )
+    if LLM_LAZY_ENRICHMENT:
+        prefetch_issue_suggestions(main_license, enriched_issues)
 
     # 7) Controlla se è necessario un suggerimento di licenza
     needs_suggestion = needs_license_suggestion(main_license, enriched_issues)
@@ -196,6 +270,7 @@ def perform_initial_scan(owner: str, repo: str) -> AnalyzeResponse:
             reason=i.get("reason"),
             suggestion=i.get("suggestion"),
             licenses=i.get("licenses"),
+            suggestion_status=i.get("suggestion_status"),
             regenerated_code_path=i.get("regenerated_code_path"),
         )
         for i in enriched_issues
@@ -209,10 +284,68 @@ def perform_initial_scan(owner: str, repo: str) -> AnalyzeResponse:
     )
 
 
+def perform_issue_suggestion(
+    owner: str,
+    repo: str,
+    main_license: str,
+    issue: LicenseIssue
+) -> LicenseIssue:
+    """
+    Calcola il suggerimento di un singolo problema restituito da `/analyze` come "pending".
+
+    Il primo accesso interroga l'LLM; la risposta resta nella cache persistente e le
+    richieste successive per lo stesso problema vengono servite senza il modello.
+    Il file del problema viene cercato solo all'interno del repository indicato.
+
+    Args:
+        owner (str): Il proprietario del repository.
+        repo (str): Il nome del repository.
+        main_license (str): La licenza principale del progetto.
+        issue (LicenseIssue): Il problema di cui calcolare il suggerimento.
+
+    Returns:
+        LicenseIssue: Il problema con suggerimento e licenze alternative.
+
+    Raises:
+        ValueError: Se il repository non esiste o il file del problema è esterno al repository.
+    """
+    repo_path = get_existing_repo_path(owner, repo)
+    document_path = _resolve_repo_file(repo_path, issue.file_path)
+
+    enriched = enrich_issue(
+        main_license, issue.model_dump(), issue.regenerated_code_path,
+        document_path=document_path
+    )
+    return LicenseIssue(**enriched)
+
+
+def get_existing_repo_path(owner: str, repo: str) -> str:
+    """
+    Restituisce il percorso locale di un repository già clonato o caricato.
+
+    Args:
+        owner (str): Il proprietario del repository.
+        repo (str): Il nome del repository.
+
+    Returns:
+        str: Il percorso del repository nella directory di clonazione.
+
+    Raises:
+        ValueError: Se la directory del repository non esiste.
+    """
+    repo_path = os.path.join(CLONE_BASE_DIR, f"{owner}_{repo}")
+
+    if not os.path.exists(repo_path):
+        raise ValueError(f"Repository not found at {repo_path}. Please run initial scan first.")
+
+    return repo_path
+
+
 def perform_regeneration(
     owner: str,
     repo: str,
-    previous_analysis: AnalyzeResponse
+    previous_analysis: AnalyzeResponse,
+    progress: Optional[ProgressCallback] = None
 ) -> AnalyzeResponse:
     """
     Esegue il flusso di lavoro di rigenerazione del codice su un repository già analizzato.
@@ -227,6 +360,9 @@ def perform_regeneration(
         owner (str): Il proprietario del repository.
         repo (str): Il nome del repository.
         previous_analysis (AnalyzeResponse): Risultati dalla scansione iniziale.
+        progress (Optional[ProgressCallback]): Riceve la fase corrente ("regenerating",
+            "rescanning", "enriching") e i contatori `files_total`, `files_processed`,
+            `files_regenerated` e `issues_found`.
 
     Returns:
         AnalyzeResponse: Il risultato dell'analisi aggiornato contenente i percorsi del codice rigenerato.
@@ -234,23 +370,135 @@ def perform_regeneration(
     Raises:
         ValueError: Se la directory del repository non esiste.
     """
-    repo_path = os.path.join(CLONE_BASE_DIR, f"{owner}_{repo}")
-
-    if not os.path.exists(repo_path):
-        raise ValueError(f"Repository not found at {repo_path}. Please run initial scan first.")
-
-    main_license = previous_analysis.main_license
+    repo_path = get_existing_repo_path(owner, repo)
 
     # 1. Identifica e rigenera i file incompatibili
     regenerated_files_map = _regenerate_incompatible_files(
         repo_path,
-        main_license,
-        previous_analysis.issues
+        previous_analysis.main_license,
+        previous_analysis.issues,
+        progress=progress
+    )
+
+    return _finalize_regeneration(
+        owner, repo, repo_path, previous_analysis, regenerated_files_map, progress=progress
     )
 
+
+async def stream_regeneration(
+    owner: str,
+    repo: str,
+    previous_analysis: AnalyzeResponse
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Variante in streaming di `perform_regeneration`.
+
+    Rigenera i file incompatibili uno alla volta inoltrando i token del modello man mano
+    che vengono generati, poi esegue la nuova scansione e restituisce il risultato finale.
+    Se il consumatore smette di iterare (client disconnesso) la generazione in corso
+    viene interrotta e i file non ancora elaborati restano invariati.
+
+    Args:
+        owner (str): Il proprietario del repository.
+        repo (str): Il nome del repository.
+        previous_analysis (AnalyzeResponse): Risultati dalla scansione iniziale.
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: Coppie (evento, dati) tra:
+            - "file_start": inizio della rigenerazione di un file;
+            - "token": frammento di codice generato;
+            - "file_done": esito della rigenerazione di un file;
+            - "result": l'AnalyzeResponse finale serializzata.
+
+    Raises:
+        ValueError: Se la directory del repository non esiste.
+    """
+    repo_path = get_existing_repo_path(owner, repo)
+    main_license = previous_analysis.main_license
+    files_to_process = _files_to_regenerate(previous_analysis.issues)
+    regenerated_map = {}
+
+    for index, issue in enumerate(files_to_process):
+        fpath = issue.file_path
+        abs_path = _resolve_issue_path(repo_path, fpath)
+        if not os.path.exists(abs_path):
+            continue
+
+        yield "file_start", {"file_path": fpath, "index": index, "total": len(files_to_process)}
+
+        new_code = None
+        error = None
+        try:
+            original_content = await run_stage(IO, _read_source, abs_path)
+            licenses_str = issue.licenses if issue.licenses else DEFAULT_TARGET_LICENSES
+            cache_args = (original_content, main_license, issue.detected_license, licenses_str)
+
+            new_code = await run_stage(IO, get_cached_regenerated_code, *cache_args)
+            if new_code is not None:
+                # Codice già rigenerato per lo stesso contenuto: inviato in un unico frammento
+                yield "token", {"file_path": fpath, "text": new_code}
+            else:
+                parts = []
+                prompt = build_regeneration_prompt(*cache_args)
+                async for token in stream_ollama(
+                        OLLAMA_CODING_MODEL, prompt, timeout=120, priority=BULK
+                ):
+                    parts.append(token)
+                    yield "token", {"file_path": fpath, "text": token}
+
+                # La sintassi viene verificata prima di scrivere il file
+                new_code = await run_stage(
+                    CPU, clean_generated_code, "".join(parts), fpath, original_content
+                )
+                if new_code:
+                    await run_stage(IO, store_regenerated_code, *cache_args, new_code)
+                else:
+                    error = "Generated code failed validation"
+
+            if new_code:
+                await run_stage(IO, _write_source, abs_path, new_code)
+                regenerated_map[fpath] = new_code
+        # Ampia eccezione catturata intenzionalmente: un file non deve interrompere lo stream
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.exception("Streaming regeneration failed for %s", fpath)
+            error = str(e)
+
+        yield "file_done", {"file_path": fpath, "regenerated": new_code is not None, "error": error}
+
+    result = await run_stage(
+        IO, _finalize_regeneration, owner, repo, repo_path, previous_analysis, regenerated_map
+    )
+    yield "result", result.model_dump()
+
+
+def _finalize_regeneration(
+    owner: str,
+    repo: str,
+    repo_path: str,
+    previous_analysis: AnalyzeResponse,
+    regenerated_files_map: dict,
+    progress: Optional[ProgressCallback] = None
+) -> AnalyzeResponse:
+    """
+    Helper interno che completa la rigenerazione: nuova scansione, arricchimento e risposta.
+
+    Args:
+        owner (str): Il proprietario del repository.
+        repo (str): Il nome del repository.
+        repo_path (str): Percorso del repository.
+        previous_analysis (AnalyzeResponse): Risultati dalla scansione iniziale.
+        regenerated_files_map (dict): Mappa {file_path: new_content} dei file rigenerati.
+        progress (Optional[ProgressCallback]): Riceve la fase corrente e `issues_found`.
+
+    Returns:
+        AnalyzeResponse: Il risultato dell'analisi aggiornato.
+    """
+    main_license = previous_analysis.main_license
+
     # 2. Riesegue la scansione o Fallback
     if regenerated_files_map:
-        print("Re-running post-regeneration scan...")
+        logger.info("Re-running post-regeneration scan")
+        _report(progress, "rescanning")
         current_issues_dicts = _rescan_repository(
             repo_path,
             main_license,
@@ -261,6 +509,7 @@ def perform_regeneration(
         current_issues_dicts = [i.model_dump() for i in previous_analysis.issues]
 
     # 3. Arricchimento Finale
+    _report(progress, "enriching", issues_found=len(current_issues_dicts))
     enriched_issues = enrich_with_llm_suggestions(
         main_license,
         current_issues_dicts,
@@ -278,6 +527,7 @@ def perform_regeneration(
             reason=i.get("reason"),
             suggestion=i.get("suggestion"),
             licenses=i.get("licenses"),
+            suggestion_status=i.get("suggestion_status"),
             regenerated_code_path=i.get("regenerated_code_path"),
         )
         for i in enriched_issues
@@ -291,79 +541,267 @@ def perform_regeneration(
     )
 
 
+def _files_to_regenerate(issues: list[LicenseIssue]) -> list[LicenseIssue]:
+    """
+    Helper interno che seleziona i problemi di codice incompatibili da rigenerare.
+
+    Args:
+        issues (list[LicenseIssue]): Elenco dei problemi dalla scansione precedente.
+
+    Returns:
+        list[LicenseIssue]: I problemi incompatibili, esclusi documenti e avvisi, con un
+        solo problema per file: un file con più problemi viene rigenerato una sola volta.
+    """
+    return list({
+        issue.file_path: issue for issue in issues
+        if not issue.compatible and not issue.file_path.endswith(REGENERATION_IGNORE_SUFFIXES)
+    }.values())
+
+
+def _resolve_issue_path(repo_path: str, fpath: str) -> str:
+    """
+    Helper interno che risolve il percorso assoluto del file di un problema.
+
+    Args:
+        repo_path (str): Percorso del repository.
+        fpath (str): Il percorso del file riportato nel problema.
+
+    Returns:
+        str: Il percorso assoluto del file.
+    """
+    repo_name = os.path.basename(os.path.normpath(repo_path))
+    if fpath.startswith(f"{repo_name}/"):
+        return os.path.join(os.path.dirname(repo_path), fpath)
+    return os.path.join(repo_path, fpath)
+
+
+def _resolve_repo_file(repo_path: str, fpath: str) -> str:
+    """
+    Helper interno che risolve il file di un problema ricevuto dal client, verificando
+    che si trovi all'interno del repository.
+
+    Args:
+        repo_path (str): Percorso del repository.
+        fpath (str): Il percorso del file riportato nel problema.
+
+    Returns:
+        str: Il percorso reale del file.
+
+    Raises:
+        ValueError: Se il percorso è assoluto o esce dal repository (tramite ".." o
+            collegamenti simbolici).
+    """
+    real_repo = os.path.realpath(repo_path)
+    resolved = os.path.realpath(_resolve_issue_path(repo_path, fpath))
+    if os.path.isabs(fpath) or os.path.commonpath([real_repo, resolved]) != real_repo:
+        raise ValueError(f"Invalid file path: {fpath}")
+    return resolved
+
+
+def _read_source(abs_path: str) -> str:
+    """
+    Helper interno che legge il contenuto di un file sorgente.
+
+    Args:
+        abs_path (str): Il percorso assoluto del file.
+
+    Returns:
+        str: Il contenuto del file.
+    """
+    with open(abs_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def _write_source(abs_path: str, content: str) -> None:
+    """
+    Helper interno che sovrascrive un file sorgente con il codice rigenerato.
+
+    Args:
+        abs_path (str): Il percorso assoluto del file.
+        content (str): Il nuovo contenuto.
+    """
+    with open(abs_path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _regenerate_file(
+    repo_path: str,
+    main_license: str,
+    issue: LicenseIssue,
+    deadline: Optional[float] = None
+) -> Optional[str]:
+    """
+    Helper interno eseguito dal pool di rigenerazione per un singolo file.
+
+    Legge il file e chiede all'LLM il codice rigenerato, senza scriverlo: la scrittura
+    avviene nel thread chiamante, così i risultati arrivati oltre la scadenza non
+    modificano il repository.
+
+    Args:
+        repo_path (str): Percorso del repository.
+        main_license (str): La licenza di destinazione.
+        issue (LicenseIssue): Il problema relativo al file.
+        deadline (Optional[float]): Istante (`time.monotonic`) di scadenza del file, che
+            limita le richieste al modello (vedi `regenerate_code`).
+
+    Returns:
+        Optional[str]: Il codice rigenerato valido, o None in caso di fallimento.
+    """
+    fpath = issue.file_path
+
+    # Risolve il percorso assoluto
+    abs_path = _resolve_issue_path(repo_path, fpath)
+
+    if not os.path.exists(abs_path):
+        return None
+
+    try:
+        original_content = _read_source(abs_path)
+
+        # Assicura che licenses sia una stringa, non None
+        licenses_str = issue.licenses if issue.licenses else DEFAULT_TARGET_LICENSES
+
+        new_code = regenerate_code(
+            code_content=original_content,
+            main_license=main_license,
+            detected_license=issue.detected_license,
+            licenses=licenses_str,
+            file_path=fpath,
+            deadline=deadline
+        )
+
+        if new_code and len(new_code.strip()) > 10:
+            return new_code
+        logger.warning("Regeneration failed or invalid code for %s", fpath)
+
+    except OSError as e:
+        logger.warning("IO Error regenerating %s: %s", fpath, e)
+    # Ampia eccezione catturata intenzionalmente per evitare di interrompere il pool
+    # pylint: disable=broad-exception-caught
+    except Exception:
+        logger.exception("Unexpected error regenerating %s", fpath)
+    return None
+
+
 def _regenerate_incompatible_files(
     repo_path: str,
     main_license: str,
-    issues: list[LicenseIssue]
+    issues: list[LicenseIssue],
+    max_workers: Optional[int] = None,
+    file_deadline: Optional[float] = None,
+    total_budget: Optional[float] = None,
+    progress: Optional[ProgressCallback] = None
 ) -> dict:
     """
     Helper interno per identificare i file incompatibili e tentare la rigenerazione tramite LLM.
 
+    Al più `max_workers` file vengono rigenerati simultaneamente. Ogni file ha una propria
+    scadenza (misurata dall'avvio della sua elaborazione) e l'intera rigenerazione ha un
+    budget complessivo: allo scadere vengono restituiti i file completati fino a quel
+    momento, mentre quelli ancora in corso vengono abbandonati senza modificarli.
+    Un file abbandonato libera subito il proprio posto, così i file in coda non restano
+    bloccati fino all'esaurimento del budget: la sua richiesta al modello, limitata alla
+    stessa scadenza, termina in background liberando lo slot dello scheduler LLM senza
+    avviare altri tentativi, e il codice eventualmente prodotto non viene scritto.
+
     Args:
         repo_path (str): Percorso del repository.
         main_license (str): La licenza di destinazione.
         issues (list[LicenseIssue]): Elenco dei problemi dalla scansione precedente.
+        max_workers (Optional[int]): File rigenerati simultaneamente
+            (default `REGEN_FILE_CONCURRENCY`).
+        file_deadline (Optional[float]): Tempo massimo per singolo file in secondi
+            (default `REGEN_FILE_DEADLINE`).
+        total_budget (Optional[float]): Tempo massimo per l'intera rigenerazione in secondi
+            (default `REGEN_TOTAL_BUDGET`).
+        progress (Optional[ProgressCallback]): Riceve la fase "regenerating" con i file da
+            rigenerare, elaborati e rigenerati.
 
     Returns:
         dict: Una mappa {file_path: new_content} dei file rigenerati con successo.
     """
     regenerated_map = {}
 
-    # Filtra i file da ignorare (documenti, avvisi, ecc.)
-    ignore_suffixes = ('.md', '.txt', '.rst', 'THIRD-PARTY-NOTICE', 'NOTICE')
-
-    files_to_process = [
-        issue for issue in issues
-        if not issue.compatible and not issue.file_path.endswith(ignore_suffixes)
-    ]
+    files_to_process = _files_to_regenerate(issues)
 
     if not files_to_process:
         return {}
 
-    print(f"Found {len(files_to_process)} incompatible files to regenerate...")
-
-    for issue in files_to_process:
-        fpath = issue.file_path
-
-        # Risolve il percorso assoluto
-        repo_name = os.path.basename(os.path.normpath(repo_path))
-        if fpath.startswith(f"{repo_name}/"):
-            abs_path = os.path.join(os.path.dirname(repo_path), fpath)
-        else:
-            abs_path = os.path.join(repo_path, fpath)
-
-        if not os.path.exists(abs_path):
-            continue
-
-        try:
-            with open(abs_path, "r", encoding="utf-8", errors="ignore") as f:
-                original_content = f.read()
+    logger.info("Found %d incompatible files to regenerate", len(files_to_process))
+    processed = 0
+    _report(progress, "regenerating", files_total=len(files_to_process),
+            files_processed=0, files_regenerated=0)
+
+    max_workers = max(1, max_workers or REGEN_FILE_CONCURRENCY)
+    file_deadline = file_deadline or REGEN_FILE_DEADLINE
+    budget_end = time.monotonic() + (total_budget or REGEN_TOTAL_BUDGET)
+    queue = deque(files_to_process)
+    futures: Dict[Future, str] = {}
+    submitted_at: Dict[Future, float] = {}
+
+    # Un thread per file: i thread dei file abbandonati non occupano i posti di quelli in coda
+    executor = ThreadPoolExecutor(
+        max_workers=len(files_to_process),
+        thread_name_prefix="regen-file",
+    )
 
-            # Assicura che licenses sia una stringa, non None
-            licenses_str = issue.licenses if issue.licenses else "MIT, Apache-2.0, BSD-3-Clause"
+    def submit_next() -> Future:
+        """
+        Avvia la rigenerazione del primo file in coda.
+        """
+        issue = queue.popleft()
+        submitted = time.monotonic()
+        future = executor.submit(
+            _regenerate_file, repo_path, main_license, issue, submitted + file_deadline
+        )
+        futures[future] = issue.file_path
+        submitted_at[future] = submitted
+        return future
 
-            new_code = regenerate_code(
-                code_content=original_content,
-                main_license=main_license,
-                detected_license=issue.detected_license,
-                licenses=licenses_str
+    try:
+        pending: set[Future] = set()
+        while True:
+            now = time.monotonic()
+            for future in [f for f in pending if now - submitted_at[f] >= file_deadline]:
+                logger.warning("Regeneration of %s exceeded the %.0fs file deadline",
+                               futures[future], file_deadline)
+                pending.discard(future)
+                processed += 1
+                _report(progress, "regenerating", files_processed=processed,
+                        files_regenerated=len(regenerated_map))
+            if now >= budget_end:
+                if pending or queue:
+                    logger.warning("Regeneration budget exhausted: %d files left unprocessed",
+                                   len(pending) + len(queue))
+                break
+
+            while queue and len(pending) < max_workers:
+                pending.add(submit_next())
+            if not pending:
+                break
+
+            # Si risveglia al primo completamento o alla prossima scadenza
+            next_deadline = min([budget_end] + [submitted_at[f] + file_deadline for f in pending])
+            done, pending = wait(
+                pending, timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED
             )
 
-            if new_code and len(new_code.strip()) > 10:
-                with open(abs_path, "w", encoding="utf-8") as f:
-                    f.write(new_code)
-
-                regenerated_map[fpath] = new_code
-                print(f"Regenerated: {fpath} (Length: {len(new_code)})")
-            else:
-                print(f"Regeneration failed or invalid code for {fpath}")
-
-        except OSError as e:
-            print(f"IO Error regenerating {fpath}: {e}")
-        # Ampia eccezione catturata intenzionalmente per evitare di interrompere il ciclo
-        # pylint: disable=broad-exception-caught
-        except Exception as e:
-            print(f"Unexpected error regenerating {fpath}: {e}")
+            for future in done:
+                fpath = futures[future]
+                new_code = future.result()
+                processed += 1
+                if new_code is not None:
+                    try:
+                        _write_source(_resolve_issue_path(repo_path, fpath), new_code)
+                        regenerated_map[fpath] = new_code
+                        logger.info("Regenerated: %s (Length: %d)", fpath, len(new_code))
+                    except OSError as e:
+                        logger.warning("IO Error regenerating %s: %s", fpath, e)
+                _report(progress, "regenerating", files_processed=processed,
+                        files_regenerated=len(regenerated_map))
+    finally:
+        # I file abbandonati terminano in background senza modificare il repository
+        executor.shutdown(wait=False)
 
     return regenerated_map
 
@@ -387,7 +825,7 @@ def _rescan_repository(
     # Previene l'avviso di argomento non utilizzato (mantenuto per debug o future estensioni logiche)
     _ = regenerated_map
 
-    scan_raw = run_scancode(repo_path)
+    scan_raw = run_in_stage(SUBPROCESS, run_scancode, repo_path)
 
     # Rileva nuovamente il percorso della licenza per garantire l'accuratezza
     license_result = detect_main_license_scancode(scan_raw)
@@ -398,9 +836,9 @@ def _rescan_repository(
     else:
         path_license = None
 
-    llm_clean = filter_licenses(scan_raw, main_license, path_license)
+    llm_clean = run_in_stage(CPU, filter_licenses, scan_raw, main_license, path_license)
     file_licenses = extract_file_licenses(llm_clean)
 
-    compatibility = check_compatibility(main_license, file_licenses)
+    compatibility = run_in_stage(CPU, check_compatibility, main_license, file_licenses)
 
     return compatibility["issues"]
@@ -13,6 +13,7 @@ Nota: la logica è suddivisa in moduli separati:
 - parser_spdx: parser semplice per espressioni SPDX (AND/OR/WITH)
 - evaluator: valutazione tri-stato dell'albero (yes/no/conditional/unknown)
 - checker: funzione pubblica che orchestri il controllo per file
+- recommender: raccomandazione deterministica della licenza di progetto basata sulla matrice
 """
 
 from .checker import check_compatibility
@@ -4,9 +4,19 @@ Compatibility Utilities Module.
 Questo modulo fornisce funzioni di utilità per il parsing e la normalizzazione dei simboli di licenza
 per garantire coerenza in tutta l'applicazione. Agisce come livello di supporto prima
 della valutazione SPDX complessa.
+
+Entrambe le funzioni pubbliche sono memoizzate: `normalize_symbol` consulta prima una
+tabella di alias precalcolata e poi una cache LRU limitata, `extract_symbols` memorizza
+il risultato del parsing di `license_expression`. La tabella degli alias contiene i
+sinonimi noti e, registrate da `matrix` al caricamento tramite `register_aliases`, le
+licenze della matrice con le loro varianti ('+' e maiuscole/minuscole). Le statistiche
+di hit/miss sono disponibili tramite `get_cache_stats` (esposte da `/compatibility/cache`).
 """
 
-from typing import List, Dict
+import itertools
+import threading
+from functools import lru_cache
+from typing import Any, Iterable, List, Dict, Set, Tuple
 from license_expression import Licensing
 
 # Inizializza il parser delle licenze
@@ -28,6 +38,65 @@ _SYNONYMS: Dict[str, str] = {
     "EPL-2.0+": "EPL-2.0-or-later",
 }
 
+# Dimensioni massime delle cache di normalizzazione ed estrazione
+_NORMALIZE_CACHE_SIZE = 8192
+_EXTRACT_CACHE_SIZE = 4096
+
+
+def _symbol_variants(symbol: str) -> Set[str]:
+    """
+    Helper interno che elenca le grafie con cui un simbolo canonico può comparire.
+
+    Args:
+        symbol (str): Il simbolo canonico (es. "GPL-2.0-or-later WITH Classpath-exception-2.0").
+
+    Returns:
+        Set[str]: Il simbolo, la forma con '+' al posto di '-or-later', le clausole
+        'with'/'With' e le rispettive versioni in minuscolo.
+    """
+    variants = {symbol}
+    if "-or-later" in symbol:
+        variants.add(symbol.replace("-or-later", "+"))
+    for spelling in (" with ", " With "):
+        variants |= {variant.replace(" WITH ", spelling) for variant in variants}
+    variants |= {variant.lower() for variant in variants}
+    return variants
+
+
+def _build_alias_table(symbols: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    Precalcola la tabella degli alias per i sinonimi noti e i simboli indicati.
+
+    Per ogni sinonimo registra sia la forma con '+' sia la forma canonica '-or-later'; per
+    ogni simbolo anche le sue varianti (vedi `_symbol_variants`). Ogni voce contiene il
+    risultato della normalizzazione completa, così la ricerca nel dizionario restituisce
+    lo stesso valore di `_normalize_cached`.
+
+    Args:
+        symbols (Iterable[str]): Simboli canonici aggiuntivi (es. le licenze della matrice).
+
+    Returns:
+        Dict[str, str]: La mappa {forma_grezza: forma_canonica}.
+    """
+    table: Dict[str, str] = {}
+    for alias, canonical in _SYNONYMS.items():
+        table[alias] = canonical
+        table[canonical] = canonical
+    for symbol in symbols:
+        for variant in _symbol_variants(symbol):
+            if variant not in table:
+                # Normalizzazione senza passare dalla cache, per non alterarne le metriche
+                table[variant] = _normalize_cached.__wrapped__(variant)
+    return table
+
+
+# Contatore delle risoluzioni servite direttamente dalla tabella degli alias.
+# `next()` su itertools.count è atomico, quindi il percorso caldo non prende lock;
+# ogni lettura consuma a sua volta un valore, tenuto in `_alias_reads` per sottrarlo.
+_alias_hits = itertools.count()  # pylint: disable=invalid-name
+_alias_reads = 0  # pylint: disable=invalid-name
+_stats_lock = threading.Lock()
+
 
 def normalize_symbol(sym: str) -> str:
     """
@@ -40,6 +109,9 @@ def normalize_symbol(sym: str) -> str:
     - Conversione dei suffissi '+' in '-or-later'.
     - Risoluzione degli alias tramite un elenco di sinonimi predefinito.
 
+    Il risultato viene risolto dalla tabella degli alias precalcolata o da una cache LRU
+    limitata; la trasformazione vera e propria avviene solo al primo incontro del simbolo.
+
     Args:
         sym (str): Il simbolo della licenza grezzo o la stringa dell'espressione.
 
@@ -49,6 +121,25 @@ def normalize_symbol(sym: str) -> str:
     if not sym:
         return sym
 
+    alias = _ALIAS_TABLE.get(sym)
+    if alias is not None:
+        next(_alias_hits)
+        return alias
+
+    return _normalize_cached(sym)
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def _normalize_cached(sym: str) -> str:
+    """
+    Esegue la normalizzazione effettiva di un simbolo (memoizzata da `normalize_symbol`).
+
+    Args:
+        sym (str): Il simbolo della licenza grezzo, non vuoto.
+
+    Returns:
+        str: Il simbolo della licenza normalizzato.
+    """
     s = sym.strip()
 
     # Normalizza le variazioni di 'with' in 'WITH'
@@ -66,6 +157,27 @@ def normalize_symbol(sym: str) -> str:
     return _SYNONYMS.get(s, s)
 
 
+# Sinonimi noti, estesi con le licenze della matrice da `register_aliases`
+_ALIAS_TABLE: Dict[str, str] = _build_alias_table()
+
+
+def register_aliases(symbols: Iterable[str]) -> None:
+    """
+    Aggiunge alla tabella degli alias i simboli indicati e le loro varianti.
+
+    Chiamata da `matrix` con le licenze della matrice, così la normalizzazione dei
+    simboli più frequenti è una semplice ricerca nel dizionario. La tabella viene
+    sostituita in blocco: i lettori concorrenti vedono la versione precedente o quella nuova.
+
+    Args:
+        symbols (Iterable[str]): I simboli canonici.
+    """
+    global _ALIAS_TABLE  # pylint: disable=global-statement
+    table = _build_alias_table(symbols)
+    with _stats_lock:
+        _ALIAS_TABLE = {**_ALIAS_TABLE, **table}
+
+
 def extract_symbols(expr: str) -> List[str]:
     """
     Estrae i singoli simboli di licenza da un'espressione SPDX.
@@ -83,12 +195,73 @@ def extract_symbols(expr: str) -> List[str]:
     if not expr:
         return []
 
+    # Restituisce una nuova lista per non esporre il risultato condiviso in cache
+    return list(_extract_symbols_cached(expr))
+
+
+@lru_cache(maxsize=_EXTRACT_CACHE_SIZE)
+def _extract_symbols_cached(expr: str) -> Tuple[str, ...]:
+    """
+    Esegue il parsing con `license_expression` (memoizzato da `extract_symbols`).
+
+    Args:
+        expr (str): L'espressione di licenza SPDX non vuota.
+
+    Returns:
+        Tuple[str, ...]: I simboli di licenza identificati.
+    """
     try:
         tree = licensing.parse(expr, strict=False)
         # L'attributo 'symbols' contiene l'elenco degli identificatori di licenza trovati
-        return [str(sym) for sym in getattr(tree, "symbols", [])]
+        return tuple(str(sym) for sym in getattr(tree, "symbols", []))
 
     except Exception:  # pylint: disable=broad-exception-caught
         # Cattura intenzionalmente tutte le eccezioni per prevenire che errori di parsing
         # blocchino l'intero flusso di lavoro. Questa è un'utility di supporto, non un validatore.
-        return []
+        return ()
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Restituisce le metriche delle cache di normalizzazione ed estrazione dei simboli.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per "normalize_symbol" ed "extract_symbols" le chiavi
+        'hits', 'misses', 'size' e 'maxsize'; per "normalize_symbol" anche 'alias_hits'
+        (risoluzioni servite dalla tabella degli alias) e 'alias_table_size' (voci della
+        tabella).
+    """
+    global _alias_reads  # pylint: disable=global-statement
+    norm = _normalize_cached.cache_info()
+    extract = _extract_symbols_cached.cache_info()
+    with _stats_lock:
+        alias_hits = next(_alias_hits) - _alias_reads
+        _alias_reads += 1
+    return {
+        "normalize_symbol": {
+            "hits": norm.hits,
+            "misses": norm.misses,
+            "size": norm.currsize,
+            "maxsize": norm.maxsize,
+            "alias_hits": alias_hits,
+            "alias_table_size": len(_ALIAS_TABLE),
+        },
+        "extract_symbols": {
+            "hits": extract.hits,
+            "misses": extract.misses,
+            "size": extract.currsize,
+            "maxsize": extract.maxsize,
+        },
+    }
+
+
+def clear_caches() -> None:
+    """
+    Svuota le cache dei simboli e azzera le metriche.
+    """
+    global _alias_hits, _alias_reads  # pylint: disable=global-statement
+    _normalize_cached.cache_clear()
+    _extract_symbols_cached.cache_clear()
+    with _stats_lock:
+        _alias_hits = itertools.count()
+        _alias_reads = 0
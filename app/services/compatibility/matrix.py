@@ -27,7 +27,7 @@ try:
 except ImportError:
     resources = None
 
-from .compat_utils import normalize_symbol
+from .compat_utils import normalize_symbol, register_aliases
 
 # Percorso relativo al file della matrice all'interno del pacchetto (usato per la lettura dal filesystem)
 _MATRIXSEQEXPL_PATH = os.path.join(os.path.dirname(__file__), "matrixseqexpl.json")
@@ -256,6 +256,11 @@ def load_professional_matrix() -> CompatibilityMap:
 # Carica la matrice una volta a livello di modulo (Pattern Singleton)
 _PRO_MATRIX = load_professional_matrix()
 
+# Le licenze della matrice vengono normalizzate con una semplice ricerca nel dizionario
+register_aliases(
+    {main for main in _PRO_MATRIX} | {dep for row in _PRO_MATRIX.values() for dep in row}
+)
+
 
 def get_matrix() -> CompatibilityMap:
     """
@@ -13,19 +13,95 @@ Sintassi Supportata:
 Nota:
     Le clausole 'WITH' vengono collassate nel nodo `Leaf` durante la tokenizzazione
     per semplificare la logica di valutazione.
+
+    I nodi usano `__slots__` e sono internati (hash-consing): sotto-alberi identici
+    vengono condivisi tra espressioni diverse, riducendo le allocazioni sui grandi
+    insiemi di espressioni (es. file NOTICE aggregati).
 """
 
-from typing import List, Optional
+import re
+from typing import Any, List, Optional
 from .compat_utils import normalize_symbol
 
+# Tokenizer a singola regex: un simbolo (eventualmente seguito da "WITH <eccezione>",
+# case-insensitive) oppure una parentesi. Gli spazi bianchi vengono saltati da findall.
+_TOKEN_RE = re.compile(
+    r"(?P<sym>[^\s()]+)(?:\s+(?i:WITH)\s+(?P<exc>[^\s()]+))?|(?P<par>[()])"
+)
+
+# Tabella di hash-consing: (tipo, chiave) -> nodo condiviso.
+# Quando supera il limite viene svuotata: i nodi già creati restano validi e,
+# grazie all'uguaglianza strutturale, continuano a funzionare come chiavi di cache.
+_MAX_INTERNED = 65536
+_INTERNED: dict = {}
+
 
 class Node:  # pylint: disable=too-few-public-methods
     """
     Classe base astratta che rappresenta un nodo generico nell'AST dell'espressione SPDX.
+
+    I nodi concreti (Leaf, And, Or) sono immutabili e condivisi (hash-consing): due
+    sotto-alberi identici sono di norma lo stesso oggetto e, in ogni caso, sono uguali
+    e hanno lo stesso hash, quindi possono essere usati come chiavi di cache.
+    """
+
+    __slots__ = ()
+
+
+class _InternedNode(Node):  # pylint: disable=too-few-public-methods
     """
+    Base comune per i nodi internati: memorizza la chiave strutturale e il suo hash.
+    """
+
+    __slots__ = ("_key", "_hash")
 
+    _key: Any
+    _hash: int
 
-class Leaf(Node):  # pylint: disable=too-few-public-methods
+    @classmethod
+    def _intern(cls, key) -> "_InternedNode":
+        """
+        Restituisce il nodo condiviso per la chiave data, creandolo se necessario.
+
+        Args:
+            key: La chiave strutturale del nodo (valore o coppia di figli).
+
+        Returns:
+            _InternedNode: L'istanza condivisa.
+        """
+        table_key = (cls, key)
+        node = _INTERNED.get(table_key)
+        if node is None:
+            if len(_INTERNED) >= _MAX_INTERNED:
+                _INTERNED.clear()
+            node = object.__new__(cls)
+            object.__setattr__(node, "_key", key)
+            object.__setattr__(node, "_hash", hash(table_key))
+            _INTERNED[table_key] = node
+        return node
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        return type(self) is type(other) and self._key == other._key
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    # I nodi sono immutabili e condivisi: copiarli significa restituire lo stesso
+    # oggetto, mentre pickle li ricostruisce passando dal costruttore (e quindi
+    # dalla tabella di interning) tramite `__reduce__` delle sottoclassi.
+    def __copy__(self) -> "_InternedNode":
+        return self
+
+    def __deepcopy__(self, memo) -> "_InternedNode":
+        return self
+
+
+class Leaf(_InternedNode):  # pylint: disable=too-few-public-methods
     """
     Nodo foglia che rappresenta un singolo simbolo di licenza, potenzialmente includendo una clausola WITH.
 
@@ -33,55 +109,85 @@ class Leaf(Node):  # pylint: disable=too-few-public-methods
         value (str): La stringa della licenza normalizzata (es. "MIT" o "GPL-2.0 WITH Exception").
     """
 
-    def __init__(self, value: str):
+    __slots__ = ()
+
+    def __new__(cls, value: str):
         # Il valore viene normalizzato immediatamente alla creazione
-        self.value = normalize_symbol(value)
+        return cls._intern(normalize_symbol(value))
+
+    @property
+    def value(self) -> str:
+        """La stringa della licenza normalizzata."""
+        return self._key
+
+    def __reduce__(self):
+        return (type(self), (self._key,))
 
     def __repr__(self) -> str:
         return f"Leaf({self.value})"
 
 
-class And(Node):  # pylint: disable=too-few-public-methods
+class _BinaryNode(_InternedNode):  # pylint: disable=too-few-public-methods
     """
-    Nodo che rappresenta un'operazione logica AND tra due sotto-espressioni.
+    Base comune per gli operatori binari (And, Or).
 
     Attributes:
         left (Node): L'operando sinistro.
         right (Node): L'operando destro.
     """
 
-    def __init__(self, left: Node, right: Node):
-        self.left = left
-        self.right = right
+    __slots__ = ()
+
+    def __new__(cls, left: Node, right: Node):
+        return cls._intern((left, right))
+
+    @property
+    def left(self) -> Node:
+        """L'operando sinistro."""
+        return self._key[0]
+
+    @property
+    def right(self) -> Node:
+        """L'operando destro."""
+        return self._key[1]
+
+    def __reduce__(self):
+        return (type(self), self._key)
 
     def __repr__(self) -> str:
-        return f"And({self.left}, {self.right})"
+        return f"{type(self).__name__}({self.left}, {self.right})"
 
 
-class Or(Node):  # pylint: disable=too-few-public-methods
+class And(_BinaryNode):  # pylint: disable=too-few-public-methods
     """
-    Nodo che rappresenta un'operazione logica OR tra due sotto-espressioni.
+    Nodo che rappresenta un'operazione logica AND tra due sotto-espressioni.
 
     Attributes:
         left (Node): L'operando sinistro.
         right (Node): L'operando destro.
     """
 
-    def __init__(self, left: Node, right: Node):
-        self.left = left
-        self.right = right
+    __slots__ = ()
 
-    def __repr__(self) -> str:
-        return f"Or({self.left}, {self.right})"
+
+class Or(_BinaryNode):  # pylint: disable=too-few-public-methods
+    """
+    Nodo che rappresenta un'operazione logica OR tra due sotto-espressioni.
+
+    Attributes:
+        left (Node): L'operando sinistro.
+        right (Node): L'operando destro.
+    """
+
+    __slots__ = ()
 
 
 def _tokenize(expr: str) -> List[str]:
     """
     Tokenizza l'espressione in simboli, operatori e parentesi.
 
-    Esegue due passaggi:
-    1. Divide la stringa per spazi bianchi e parentesi.
-    2. Unisce i costrutti "WITH" in un singolo token (es. "A", "WITH", "B" -> "A WITH B").
+    Usa una singola regex compilata che riconosce parentesi e simboli, unendo
+    direttamente i costrutti "WITH" in un singolo token (es. "A with B" -> "A WITH B").
 
     Args:
         expr (str): La stringa dell'espressione SPDX grezza.
@@ -92,48 +198,10 @@ def _tokenize(expr: str) -> List[str]:
     if not expr:
         return []
 
-    s = expr.strip()
-    tokens: List[str] = []
-    buf: List[str] = []
-    i = 0
-
-    # Passaggio 1: Lexing di base
-    while i < len(s):
-        ch = s[i]
-
-        if ch in "()":
-            if buf:
-                tokens.append("".join(buf))
-                buf = []
-            tokens.append(ch)
-            i += 1
-        elif ch.isspace():
-            if buf:
-                tokens.append("".join(buf))
-                buf = []
-            i += 1
-        else:
-            buf.append(ch)
-            i += 1
-
-    if buf:
-        tokens.append("".join(buf))
-
-    # Passaggio 2: Unione delle clausole "WITH"
-    # Converte ["GPL", "WITH", "Exc"] in ["GPL WITH Exc"]
-    out: List[str] = []
-    i = 0
-    while i < len(tokens):
-        t = tokens[i]
-        # Controlla se il prossimo token è WITH e c'è un token dopo di esso
-        if i + 2 < len(tokens) and tokens[i + 1].upper() == "WITH":
-            out.append(f"{t} WITH {tokens[i + 2]}")
-            i += 3
-        else:
-            out.append(t)
-            i += 1
-
-    return out
+    return [
+        par or (f"{sym} WITH {exc}" if exc else sym)
+        for sym, exc, par in _TOKEN_RE.findall(expr)
+    ]
 
 
 def parse_spdx(expr: str) -> Optional[Node]:
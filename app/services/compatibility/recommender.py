@@ -0,0 +1,273 @@
+"""
+Deterministic License Recommender Module.
+
+Questo modulo fornisce un raccomandatore di licenze deterministico basato sulla matrice
+di compatibilità professionale. Viene usato come percorso veloce per `/suggest-license`:
+la maggior parte delle risposte può essere derivata dai flag dei requisiti e dalla matrice
+senza interrogare l'LLM.
+
+Logica:
+    1. Filtra le righe della matrice (licenze candidate per il progetto) mantenendo solo
+       quelle compatibili ("yes") con TUTTE le licenze già rilevate.
+    2. Ordina le candidate in base alla preferenza copyleft, alla concessione di brevetti
+       e alla permissività definita in `license_order_permissive.json`.
+
+Se i requisiti non possono essere soddisfatti in modo deterministico (es. modifica o
+distribuzione non consentite, nessuna candidata compatibile) la funzione restituisce None
+e il chiamante ripiega sull'LLM.
+
+`compatible_alternatives` applica lo stesso criterio alle licenze alternative proposte
+per i file in conflitto: le licenze che la licenza principale può includere secondo la
+matrice, ordinate per permissività.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.scanner.license_ranking import load_json_rank
+from .compat_utils import normalize_symbol
+from .matrix import get_matrix
+
+logger = logging.getLogger(__name__)
+
+# Licenze "note" considerate come possibili raccomandazioni, in ordine di preferenza.
+# Limitare il pool evita di suggerire licenze di nicchia presenti nella matrice (es. FSFULLRWD).
+_RECOMMENDABLE_LICENSES: Tuple[str, ...] = (
+    "MIT",
+    "Apache-2.0",
+    "BSD-3-Clause",
+    "BSD-2-Clause",
+    "MPL-2.0",
+    "LGPL-3.0-or-later",
+    "LGPL-2.1-or-later",
+    "EPL-2.0",
+    "GPL-3.0-or-later",
+    "GPL-3.0-only",
+    "GPL-2.0-or-later",
+    "GPL-2.0-only",
+    "AGPL-3.0-or-later",
+)
+
+# Famiglie copyleft identificate tramite prefisso dell'identificatore SPDX
+_STRONG_COPYLEFT_PREFIXES: Tuple[str, ...] = ("GPL-", "AGPL-", "EUPL-", "OSL-", "Sleepycat")
+_WEAK_COPYLEFT_PREFIXES: Tuple[str, ...] = (
+    "LGPL-", "MPL-", "EPL-", "CDDL-", "CPL-", "IPL-", "MS-RL",
+)
+
+# Licenze che contengono una concessione esplicita di brevetti
+_PATENT_GRANT_LICENSES = frozenset({
+    "Apache-2.0",
+    "MPL-2.0",
+    "LGPL-3.0-or-later",
+    "EPL-2.0",
+    "GPL-3.0-or-later",
+    "GPL-3.0-only",
+    "AGPL-3.0-or-later",
+})
+
+_MAX_ALTERNATIVES = 3
+
+# Ordine di permissività caricato in modo lazy (vedi _permissive_rank)
+_PERMISSIVE_ORDER: Optional[Dict[str, int]] = None
+
+
+def _permissive_rank() -> Dict[str, int]:
+    """
+    Restituisce la mappa {licenza: indice} dell'ordine di permissività.
+
+    Il file `license_order_permissive.json` viene letto una sola volta e memorizzato.
+    Le voci con annotazioni (es. "BSL-1.0 (Boost)") vengono ridotte all'identificatore SPDX.
+
+    Returns:
+        Dict[str, int]: Indice di permissività (0 = più permissiva).
+    """
+    global _PERMISSIVE_ORDER  # pylint: disable=global-statement
+    if _PERMISSIVE_ORDER is None:
+        try:
+            order = load_json_rank().get("license_order_permissive", [])
+        except (OSError, ValueError):
+            logger.exception("Unable to load the permissive license order")
+            order = []
+        _PERMISSIVE_ORDER = {
+            lic.split(" (", 1)[0]: idx for idx, lic in enumerate(order)
+        }
+    return _PERMISSIVE_ORDER
+
+
+def copyleft_class(license_id: str) -> str:
+    """
+    Classifica una licenza in base alla forza del copyleft.
+
+    Args:
+        license_id (str): L'identificatore SPDX della licenza.
+
+    Returns:
+        str: "strong", "weak" o "none".
+    """
+    if license_id.startswith(_WEAK_COPYLEFT_PREFIXES):
+        return "weak"
+    if license_id.startswith(_STRONG_COPYLEFT_PREFIXES):
+        return "strong"
+    return "none"
+
+
+def _is_compatible_with_all(candidate: str, detected: List[str]) -> bool:
+    """
+    Verifica che la licenza candidata possa includere tutte le licenze rilevate.
+
+    Args:
+        candidate (str): La licenza candidata per il progetto (riga della matrice).
+        detected (List[str]): Le licenze già presenti nel progetto (normalizzate).
+
+    Returns:
+        bool: True solo se la matrice riporta "yes" per ogni licenza rilevata.
+    """
+    row = get_matrix().get(candidate) or {}
+    return all(row.get(dep) == "yes" for dep in detected)
+
+
+def _score(license_id: str, requirements: Dict[str, Any]) -> Tuple[int, int, int, int]:
+    """
+    Calcola la chiave di ordinamento di una candidata (valori minori = migliore).
+
+    Componenti in ordine di priorità:
+    1. Corrispondenza con la preferenza copyleft richiesta.
+    2. Presenza della concessione di brevetti, se richiesta.
+    3. Permissività (solo se non è richiesto copyleft).
+    4. Preferenza generale tra le licenze raccomandabili.
+
+    Args:
+        license_id (str): La licenza candidata.
+        requirements (Dict[str, Any]): I requisiti dell'utente.
+
+    Returns:
+        Tuple[int, int, int, int]: La chiave di ordinamento.
+    """
+    copyleft = requirements.get("copyleft")
+    copyleft_miss = int(bool(copyleft) and copyleft_class(license_id) != copyleft)
+
+    patent_miss = int(
+        bool(requirements.get("patent_grant")) and license_id not in _PATENT_GRANT_LICENSES
+    )
+
+    ranks = _permissive_rank()
+    permissive = ranks.get(license_id, len(ranks)) if copyleft in (None, "none") else 0
+
+    return copyleft_miss, patent_miss, permissive, _RECOMMENDABLE_LICENSES.index(license_id)
+
+
+def _build_explanation(license_id: str, requirements: Dict[str, Any], detected: List[str]) -> str:
+    """
+    Costruisce una spiegazione leggibile per la raccomandazione deterministica.
+
+    Args:
+        license_id (str): La licenza raccomandata.
+        requirements (Dict[str, Any]): I requisiti dell'utente.
+        detected (List[str]): Le licenze già presenti nel progetto.
+
+    Returns:
+        str: La spiegazione della raccomandazione.
+    """
+    kind = {
+        "strong": "a strong copyleft license",
+        "weak": "a weak copyleft license",
+        "none": "a permissive license",
+    }[copyleft_class(license_id)]
+
+    parts = [
+        f"{license_id} is {kind} that allows commercial use, modification and distribution."
+    ]
+    copyleft = requirements.get("copyleft")
+    if copyleft and copyleft_class(license_id) != copyleft:
+        parts.append(
+            "No license matching the requested copyleft preference is compatible "
+            "with the licenses already present in the project."
+        )
+    if requirements.get("patent_grant"):
+        if license_id in _PATENT_GRANT_LICENSES:
+            parts.append("It includes an explicit patent grant.")
+        else:
+            parts.append("No compatible license with an explicit patent grant was found.")
+    if detected:
+        parts.append(
+            "According to the compatibility matrix it is compatible with all the licenses "
+            f"already present in the project ({', '.join(detected)})."
+        )
+    return " ".join(parts)
+
+
+def recommend_license(
+        requirements: Dict[str, Any],
+        detected_licenses: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Raccomanda una licenza in modo deterministico usando la matrice di compatibilità.
+
+    Args:
+        requirements (Dict[str, Any]): I requisiti dell'utente (vedi
+            `suggest_license_based_on_requirements`).
+        detected_licenses (Optional[List[str]]): Le licenze già rilevate nel progetto.
+
+    Returns:
+        Optional[Dict[str, Any]]: Un dizionario con le chiavi 'suggested_license',
+        'explanation' e 'alternatives', oppure None se la raccomandazione non può essere
+        derivata dalla matrice e serve l'LLM.
+    """
+    # Tutte le licenze open source presuppongono modifica e distribuzione: se non
+    # sono consentite la richiesta esce dal dominio della matrice.
+    if not requirements.get("modification", True) or not requirements.get("distribution", True):
+        return None
+
+    matrix = get_matrix()
+    if not matrix:
+        return None
+
+    detected = [normalize_symbol(lic) for lic in (detected_licenses or []) if lic]
+
+    candidates = [
+        lic for lic in _RECOMMENDABLE_LICENSES
+        if lic in matrix and _is_compatible_with_all(lic, detected)
+    ]
+    if not candidates:
+        return None
+
+    ranked = sorted(candidates, key=lambda lic: _score(lic, requirements))
+    best = ranked[0]
+
+    return {
+        "suggested_license": best,
+        "explanation": _build_explanation(best, requirements, detected),
+        "alternatives": ranked[1:1 + _MAX_ALTERNATIVES],
+    }
+
+
+def compatible_alternatives(
+        main_license: str,
+        detected_license: Optional[str] = None,
+        limit: int = _MAX_ALTERNATIVES
+) -> List[str]:
+    """
+    Calcola le licenze alternative compatibili con la licenza principale del progetto.
+
+    Sono le licenze raccomandabili che la riga della licenza principale nella matrice
+    marca come "yes", ordinate secondo `license_order_permissive.json` (più permissive
+    prima). La licenza rilevata nel file in conflitto viene esclusa.
+
+    Args:
+        main_license (str): La licenza principale del progetto.
+        detected_license (Optional[str]): La licenza del file in conflitto.
+        limit (int): Numero massimo di alternative restituite.
+
+    Returns:
+        List[str]: Le alternative ordinate; vuota se la licenza principale non è nella
+        matrice (il chiamante ripiega sull'LLM).
+    """
+    row = get_matrix().get(normalize_symbol(main_license or "")) or {}
+    excluded = normalize_symbol(detected_license or "")
+
+    candidates = [
+        lic for lic in _RECOMMENDABLE_LICENSES if row.get(lic) == "yes" and lic != excluded
+    ]
+    ranks = _permissive_rank()
+    candidates.sort(key=lambda lic: (ranks.get(lic, len(ranks)), _RECOMMENDABLE_LICENSES.index(lic)))
+    return candidates[:limit]
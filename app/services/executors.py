@@ -0,0 +1,224 @@
+"""
+Stage Executors Module.
+
+Questo modulo fornisce pool di thread dedicati per fase di elaborazione, al posto del
+pool condiviso di FastAPI/AnyIO, così una fase lenta non può esaurire i thread delle
+altre richieste:
+    - "cpu": elaborazioni in memoria (filtraggio dei risultati, compatibilità, validazione);
+    - "subprocess": processi esterni (ScanCode, git);
+    - "io": attese su rete e disco (orchestrazione di analisi e rigenerazione, chiamate
+      LLM degli endpoint, lettura/scrittura dei file, ZIP).
+
+La rigenerazione dei file e dei blocchi di codice mantiene i propri pool limitati
+(`REGEN_FILE_CONCURRENCY`, `REGEN_CHUNK_CONCURRENCY`), necessari per le scadenze per file,
+e l'arricchimento dei problemi il proprio (`LLM_ENRICHMENT_CONCURRENCY`): le loro chiamate
+LLM non compaiono quindi tra le attività del pool "io", ma restano regolate dallo
+scheduler LLM (vedi `/llm/scheduler`).
+
+Ogni pool ha una dimensione configurabile (`EXECUTOR_CPU_WORKERS`,
+`EXECUTOR_SUBPROCESS_WORKERS`, `EXECUTOR_IO_WORKERS`) e contatori di coda (attività in
+esecuzione e in attesa, completate, fallite, tempi di attesa) esposti da
+`get_executor_stats`.
+
+`run_in_stage` esegue una funzione nel pool di una fase attendendone il risultato (dai
+flussi sincroni); se il thread corrente appartiene già allo stesso pool la funzione viene
+eseguita direttamente, evitando attese circolari. `run_stage` è la variante per gli
+endpoint e i generatori asincroni. Il contesto (es. `llm_priority`) viene propagato al
+thread del pool.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.utility.config import (
+    EXECUTOR_CPU_WORKERS,
+    EXECUTOR_IO_WORKERS,
+    EXECUTOR_SUBPROCESS_WORKERS,
+)
+
+CPU = "cpu"
+SUBPROCESS = "subprocess"
+IO = "io"
+
+STAGES = (CPU, SUBPROCESS, IO)
+
+Result = TypeVar("Result")
+
+# Fase del pool a cui appartiene il thread corrente (assente fuori dai pool)
+_thread_stage = threading.local()
+
+
+class StageExecutor:
+    """
+    Pool di thread di una fase con contatori di coda.
+    """
+
+    def __init__(self, name: str, workers: int):
+        """
+        Inizializza il pool.
+
+        Args:
+            name (str): Il nome della fase.
+            workers (int): I thread del pool.
+        """
+        self.name = name
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=f"stage-{name}"
+        )
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queued = 0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "total_wait": 0.0,
+                       "max_wait": 0.0}
+
+    def submit(self, func: Callable[..., Result], *args: Any, **kwargs: Any) -> "Future[Result]":
+        """
+        Accoda una funzione nel pool.
+
+        Args:
+            func (Callable[..., Result]): La funzione.
+            *args (Any): Gli argomenti posizionali.
+            **kwargs (Any): Gli argomenti nominali.
+
+        Returns:
+            Future[Result]: Il risultato della funzione.
+        """
+        enqueued = time.monotonic()
+        context = contextvars.copy_context()
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._queued += 1
+
+        def task() -> Result:
+            wait = time.monotonic() - enqueued
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._stats["total_wait"] += wait
+                self._stats["max_wait"] = max(self._stats["max_wait"], wait)
+            _thread_stage.name = self.name
+            failed = False
+            try:
+                return context.run(func, *args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                _thread_stage.name = None
+                with self._lock:
+                    self._running -= 1
+                    self._stats["failed" if failed else "completed"] += 1
+
+        return self._executor.submit(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Restituisce i contatori di coda del pool.
+
+        Returns:
+            Dict[str, Any]: Thread, attività in esecuzione e in attesa, attività accodate,
+            completate e fallite, attesa media e massima in coda (secondi).
+        """
+        with self._lock:
+            stats = self._stats
+            started = stats["submitted"] - self._queued
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": self._queued,
+                "submitted": stats["submitted"],
+                "completed": stats["completed"],
+                "failed": stats["failed"],
+                "avg_wait": stats["total_wait"] / started if started else 0.0,
+                "max_wait": stats["max_wait"],
+            }
+
+
+_executors: Dict[str, StageExecutor] = {}
+_executors_lock = threading.Lock()
+
+_WORKERS = {CPU: EXECUTOR_CPU_WORKERS, SUBPROCESS: EXECUTOR_SUBPROCESS_WORKERS,
+            IO: EXECUTOR_IO_WORKERS}
+
+
+def get_stage_executor(stage: str) -> StageExecutor:
+    """
+    Restituisce il pool condiviso di una fase, creandolo al primo utilizzo.
+
+    Args:
+        stage (str): La fase (`CPU`, `SUBPROCESS` o `IO`).
+
+    Returns:
+        StageExecutor: Il pool.
+
+    Raises:
+        ValueError: Se la fase non esiste.
+    """
+    if stage not in _WORKERS:
+        raise ValueError(f"Unknown executor stage: {stage}")
+    with _executors_lock:
+        if stage not in _executors:
+            _executors[stage] = StageExecutor(stage, _WORKERS[stage])
+        return _executors[stage]
+
+
+def current_stage() -> Optional[str]:
+    """
+    Restituisce la fase del pool a cui appartiene il thread corrente.
+
+    Returns:
+        Optional[str]: La fase, o None fuori dai pool di fase.
+    """
+    return getattr(_thread_stage, "name", None)
+
+
+def run_in_stage(stage: str, func: Callable[..., Result], *args: Any, **kwargs: Any) -> Result:
+    """
+    Esegue una funzione nel pool di una fase e ne attende il risultato.
+
+    Args:
+        stage (str): La fase.
+        func (Callable[..., Result]): La funzione.
+        *args (Any): Gli argomenti posizionali.
+        **kwargs (Any): Gli argomenti nominali.
+
+    Returns:
+        Result: Il risultato della funzione (le eccezioni vengono propagate).
+    """
+    if current_stage() == stage:
+        return func(*args, **kwargs)
+    return get_stage_executor(stage).submit(func, *args, **kwargs).result()
+
+
+async def run_stage(stage: str, func: Callable[..., Result], *args: Any, **kwargs: Any) -> Result:
+    """
+    Variante asincrona di `run_in_stage` per endpoint e generatori asincroni.
+
+    Se il chiamante viene annullato (es. client disconnesso) la funzione prosegue nel pool.
+
+    Args:
+        stage (str): La fase.
+        func (Callable[..., Result]): La funzione.
+        *args (Any): Gli argomenti posizionali.
+        **kwargs (Any): Gli argomenti nominali.
+
+    Returns:
+        Result: Il risultato della funzione (le eccezioni vengono propagate).
+    """
+    return await asyncio.wrap_future(get_stage_executor(stage).submit(func, *args, **kwargs))
+
+
+def get_executor_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Restituisce i contatori di coda di tutti i pool di fase.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per fase ("cpu", "subprocess", "io"): thread,
+        attività in esecuzione e in attesa, contatori e attese in coda.
+    """
+    return {stage: get_stage_executor(stage).stats() for stage in STAGES}
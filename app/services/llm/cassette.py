@@ -0,0 +1,323 @@
+"""
+LLM Cassette Module.
+
+Questo modulo fornisce un backend alternativo a Ollama per le chiamate di generazione,
+così i benchmark e i test di carico della pipeline di analisi possono essere eseguiti
+senza un'istanza Ollama e con risultati riproducibili.
+
+Il backend si sceglie con `LLM_BACKEND`:
+    - "ollama" (default): nessuna cassetta, le richieste vanno a Ollama;
+    - "record": le richieste vanno a Ollama e le risposte vengono registrate;
+    - "replay": le risposte registrate vengono restituite senza contattare Ollama;
+    - "stub": vengono generate risposte deterministiche senza contattare Ollama.
+
+Le registrazioni sono salvate in un file JSON Lines (`LLM_CASSETTE_PATH`), una riga per
+richiesta distinta con il solo testo della risposta, indicizzata dall'hash SHA-256 di
+modello, prompt e formato richiesto. Nelle modalità "replay" e "stub" ogni risposta
+attende una latenza sintetica configurabile (`LLM_REPLAY_LATENCY` per chiamata più
+`LLM_REPLAY_TOKEN_LATENCY` per token stimato della risposta).
+
+Lo scheduler, il circuit breaker e la deduplicazione delle chiamate restano attivi:
+cambia solo il trasporto della richiesta.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.services.llm.prompt_budget import estimate_tokens
+from app.utility.config import (
+    LLM_BACKEND,
+    LLM_CASSETTE_PATH,
+    LLM_REPLAY_LATENCY,
+    LLM_REPLAY_TOKEN_LATENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+OLLAMA = "ollama"
+RECORD = "record"
+REPLAY = "replay"
+STUB = "stub"
+
+BACKEND_MODES = (OLLAMA, RECORD, REPLAY, STUB)
+
+_FENCED_CODE_RE = re.compile(r"```[^\n]*\n(.*?)\n```", re.DOTALL)
+_BATCH_ITEM_RE = re.compile(r"^(\d+)\. License:", re.MULTILINE)
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+class CassetteMiss(RuntimeError):
+    """
+    Sollevata in modalità "replay" quando la richiesta non è stata registrata.
+    """
+
+
+def cassette_key(payload: Dict[str, Any]) -> str:
+    """
+    Calcola la chiave di una richiesta di generazione.
+
+    Args:
+        payload (Dict[str, Any]): Il payload della richiesta a Ollama.
+
+    Returns:
+        str: L'hash SHA-256 di modello, prompt e formato richiesto.
+    """
+    material = json.dumps(
+        [payload.get("model") or "", payload.get("prompt") or "", payload.get("format")],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def stub_response(prompt: str) -> str:
+    """
+    Genera una risposta deterministica nel formato atteso dai prompt dell'applicazione.
+
+    Args:
+        prompt (str): Il prompt della richiesta.
+
+    Returns:
+        str: La risposta: il codice originale per la rigenerazione, il JSON per la
+        revisione dei documenti, per le raccomandazioni di licenza e per le licenze
+        alternative raggruppate, un elenco di licenze per quelle singole, o un
+        testo derivato dall'hash del prompt negli altri casi.
+    """
+    if "regenerated code" in prompt:
+        match = _FENCED_CODE_RE.search(prompt)
+        if match:
+            return match.group(1)
+    if '"advice"' in prompt:
+        return json.dumps({"advice": "Replace the component with one released under a compatible license."})
+    if '"suggested_license"' in prompt:
+        return json.dumps({
+            "suggested_license": "MIT",
+            "explanation": "Deterministic stub recommendation.",
+            "alternatives": ["Apache-2.0", "BSD-3-Clause"],
+        })
+    if '"results"' in prompt:
+        ids = [int(n) for n in _BATCH_ITEM_RE.findall(prompt)]
+        return json.dumps({"results": [{"id": i, "licenses": ["MIT", "Apache-2.0"]} for i in ids]})
+    if "License1, License2" in prompt:
+        return "MIT, Apache-2.0, BSD-3-Clause"
+    return f"Stub response {hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]}"
+
+
+def split_tokens(text: str) -> List[str]:
+    """
+    Divide una risposta in frammenti simili ai token inviati in streaming.
+
+    Args:
+        text (str): La risposta.
+
+    Returns:
+        List[str]: Le parole con gli spazi che le seguono (la concatenazione è il testo).
+    """
+    return _TOKEN_RE.findall(text)
+
+
+class LLMCassette:
+    """
+    Registra e riproduce le risposte di generazione di Ollama.
+    """
+
+    def __init__(
+            self,
+            mode: str,
+            path: str,
+            latency: float = 0.0,
+            token_latency: float = 0.0
+    ):
+        """
+        Carica le registrazioni esistenti (modalità "record" e "replay").
+
+        Args:
+            mode (str): `RECORD`, `REPLAY` o `STUB`.
+            path (str): Il file JSON Lines delle registrazioni.
+            latency (float): Latenza sintetica per chiamata (secondi).
+            token_latency (float): Latenza sintetica per token della risposta (secondi).
+
+        Raises:
+            ValueError: Se la modalità non è valida.
+        """
+        if mode not in (RECORD, REPLAY, STUB):
+            raise ValueError(f"Invalid LLM cassette mode: {mode}")
+        self.mode = mode
+        self.path = path
+        self.latency = latency
+        self.token_latency = token_latency
+        self._lock = threading.Lock()
+        self._responses: Dict[str, str] = {}
+        self._stats = {"hits": 0, "misses": 0, "recorded": 0, "stubbed": 0}
+        if mode != STUB:
+            self._load()
+
+    @property
+    def live(self) -> bool:
+        """
+        Indica se le richieste vanno ancora a Ollama (modalità "record").
+
+        Returns:
+            bool: True in modalità "record".
+        """
+        return self.mode == RECORD
+
+    def _load(self) -> None:
+        """
+        Legge le registrazioni dal file, se presente; le righe illeggibili vengono ignorate.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self._responses[entry["key"]] = entry["response"]
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Skipping malformed cassette line in %s", self.path)
+        logger.info("Loaded %d LLM responses from %s", len(self._responses), self.path)
+
+    def record(self, payload: Dict[str, Any], response: str) -> None:
+        """
+        Registra la risposta di una richiesta (solo in modalità "record").
+
+        Le richieste già registrate con la stessa risposta non vengono riscritte.
+
+        Args:
+            payload (Dict[str, Any]): Il payload della richiesta a Ollama.
+            response (str): Il testo generato.
+        """
+        if self.mode != RECORD:
+            return
+        key = cassette_key(payload)
+        with self._lock:
+            if self._responses.get(key) == response:
+                return
+            self._responses[key] = response
+            self._stats["recorded"] += 1
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                entry = {"key": key, "model": payload.get("model"), "response": response}
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def response_for(self, payload: Dict[str, Any]) -> str:
+        """
+        Restituisce la risposta registrata o generata, senza latenza.
+
+        Args:
+            payload (Dict[str, Any]): Il payload della richiesta a Ollama.
+
+        Returns:
+            str: Il testo della risposta.
+
+        Raises:
+            CassetteMiss: Se in modalità "replay" la richiesta non è stata registrata.
+        """
+        if self.mode == STUB:
+            with self._lock:
+                self._stats["stubbed"] += 1
+            return stub_response(payload.get("prompt") or "")
+        with self._lock:
+            response = self._responses.get(cassette_key(payload))
+            self._stats["hits" if response is not None else "misses"] += 1
+        if response is None:
+            raise CassetteMiss(
+                f"No recorded LLM response for model {payload.get('model')} in {self.path}"
+            )
+        return response
+
+    def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Simula una richiesta di generazione bloccante con la latenza sintetica.
+
+        Args:
+            payload (Dict[str, Any]): Il payload della richiesta a Ollama.
+
+        Returns:
+            Dict[str, Any]: Il corpo della risposta nel formato di Ollama.
+
+        Raises:
+            CassetteMiss: Se in modalità "replay" la richiesta non è stata registrata.
+        """
+        response = self.response_for(payload)
+        time.sleep(self.latency + self.token_latency * estimate_tokens(response))
+        return {"model": payload.get("model"), "response": response, "done": True}
+
+    def token_delays(self, payload: Dict[str, Any]) -> Iterator[tuple]:
+        """
+        Restituisce i frammenti di una risposta in streaming con l'attesa che li precede.
+
+        Args:
+            payload (Dict[str, Any]): Il payload della richiesta a Ollama.
+
+        Returns:
+            Iterator[tuple]: Coppie (attesa in secondi, frammento); la latenza per chiamata
+            precede il primo frammento.
+
+        Raises:
+            CassetteMiss: Se in modalità "replay" la richiesta non è stata registrata.
+        """
+        tokens = split_tokens(self.response_for(payload))
+        return (
+            ((self.latency if idx == 0 else 0.0) + self.token_latency * estimate_tokens(token),
+             token)
+            for idx, token in enumerate(tokens)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Restituisce modalità, numero di risposte disponibili e contatori.
+
+        Returns:
+            Dict[str, Any]: Modalità, risposte registrate, risposte trovate e mancanti,
+            nuove registrazioni e risposte generate.
+        """
+        with self._lock:
+            return {"mode": self.mode, "size": len(self._responses), **self._stats}
+
+
+_backend: Optional[LLMCassette] = None
+_backend_lock = threading.Lock()
+
+
+def get_llm_backend() -> Optional[LLMCassette]:
+    """
+    Restituisce la cassetta condivisa del processo, creandola al primo utilizzo.
+
+    Returns:
+        Optional[LLMCassette]: La cassetta, o None se `LLM_BACKEND` è "ollama".
+
+    Raises:
+        ValueError: Se `LLM_BACKEND` non è una modalità valida.
+    """
+    global _backend  # pylint: disable=global-statement
+    if LLM_BACKEND == OLLAMA:
+        return None
+    with _backend_lock:
+        if _backend is None:
+            if LLM_BACKEND not in BACKEND_MODES:
+                raise ValueError(
+                    f"Invalid LLM_BACKEND {LLM_BACKEND!r}: expected one of {', '.join(BACKEND_MODES)}"
+                )
+            _backend = LLMCassette(
+                LLM_BACKEND, LLM_CASSETTE_PATH, LLM_REPLAY_LATENCY, LLM_REPLAY_TOKEN_LATENCY
+            )
+            logger.warning("LLM backend in %s mode (cassette %s)", LLM_BACKEND, LLM_CASSETTE_PATH)
+        return _backend
+
+
+def reset_llm_backend() -> None:
+    """
+    Dimentica la cassetta condivisa; la successiva viene ricreata con la configurazione
+    corrente. Utile nei test.
+    """
+    global _backend  # pylint: disable=global-statement
+    with _backend_lock:
+        _backend = None
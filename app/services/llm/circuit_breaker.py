@@ -0,0 +1,283 @@
+"""
+LLM Circuit Breaker Module.
+
+Questo modulo protegge l'applicazione da un'istanza Ollama sovraccarica o non
+raggiungibile. Senza protezione ogni chiamata attende l'intero timeout HTTP (fino a
+240 secondi) e l'analisi resta bloccata con lei.
+
+Per ogni modello viene mantenuta una finestra scorrevole degli esiti delle ultime
+chiamate: errori e risposte più lente dello SLA di latenza contano come fallimenti. Lo
+SLA viene indicato dal chiamante per ogni chiamata (vedi `ollama_api`): i modelli hanno
+timeout diversi e una risposta lenta ma nei tempi previsti non deve aprire il circuito.
+Il circuito ha tre stati:
+    - "closed": le chiamate passano normalmente;
+    - "open": dopo troppi fallimenti nella finestra le chiamate vengono rifiutate subito
+      con `CircuitOpenError`, così i chiamanti passano ai risultati deterministici;
+    - "half_open": trascorso il periodo di apertura una sola chiamata di prova viene
+      lasciata passare; se riesce il circuito si richiude, altrimenti si riapre.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.utility.config import (
+    LLM_BREAKER_ENABLED,
+    LLM_BREAKER_WINDOW,
+    LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_FAILURE_RATE,
+    LLM_BREAKER_OPEN_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Sollevata quando una chiamata LLM viene rifiutata perché il circuito è aperto.
+    """
+
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    """
+    Calcola un percentile (metodo nearest-rank).
+
+    Args:
+        values (List[float]): I valori.
+        percent (float): Il percentile richiesto (0-100).
+
+    Returns:
+        Optional[float]: Il percentile, o None se non ci sono valori.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * percent / 100))
+    return ordered[rank - 1]
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker basato sul tasso di fallimento in una finestra scorrevole.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            window: int,
+            min_calls: int,
+            failure_rate: float,
+            latency_sla: float,
+            open_seconds: float
+    ):
+        """
+        Inizializza il circuito nello stato "closed".
+
+        Args:
+            name (str): Il nome del circuito (es. il modello), usato nei log.
+            window (int): Numero di chiamate recenti considerate.
+            min_calls (int): Chiamate minime nella finestra prima di poter aprire il circuito.
+            failure_rate (float): Frazione di fallimenti (0-1) che apre il circuito.
+            latency_sla (float): Latenza (secondi) oltre la quale una chiamata riuscita
+                conta come fallimento, se la chiamata non indica il proprio SLA; 0
+                disabilita il controllo.
+            open_seconds (float): Durata dell'apertura prima della chiamata di prova.
+        """
+        self.name = name
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.latency_sla = latency_sla
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        # Esiti recenti: (riuscita entro lo SLA, latenza in secondi o None per gli errori)
+        self._outcomes: Deque[Tuple[bool, Optional[float]]] = deque(maxlen=max(1, window))
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._counters = {"rejected": 0, "opened": 0, "failures": 0, "sla_breaches": 0}
+
+    def _open(self, reason: str) -> None:
+        """
+        Apre il circuito (da chiamare con il lock acquisito).
+
+        Args:
+            reason (str): Il motivo dell'apertura, per il log.
+        """
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._counters["opened"] += 1
+        logger.warning("LLM circuit %s opened: %s", self.name, reason)
+
+    def allow(self) -> None:
+        """
+        Autorizza una chiamata o la rifiuta subito se il circuito è aperto.
+
+        Ogni chiamata autorizzata va conclusa con `record_success`, `record_failure`
+        o `release`.
+
+        Raises:
+            CircuitOpenError: Se il circuito è aperto o una chiamata di prova è in corso.
+        """
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logger.info("LLM circuit %s half-open: sending probe request", self.name)
+                return
+            if self._state == CLOSED:
+                return
+            self._counters["rejected"] += 1
+        raise CircuitOpenError(f"LLM circuit for {self.name} is open: failing fast")
+
+    def record_success(self, latency: float, latency_sla: Optional[float] = None) -> None:
+        """
+        Registra una chiamata riuscita; oltre lo SLA di latenza conta come fallimento.
+
+        Args:
+            latency (float): La durata della chiamata in secondi.
+            latency_sla (Optional[float]): Lo SLA della chiamata in secondi (default quello
+                del circuito); 0 disabilita il controllo.
+        """
+        sla = self.latency_sla if latency_sla is None else latency_sla
+        if sla and latency > sla:
+            with self._lock:
+                self._counters["sla_breaches"] += 1
+            self._record(False, latency, f"latency {latency:.1f}s above SLA")
+        else:
+            self._record(True, latency, "")
+
+    def record_failure(self) -> None:
+        """
+        Registra una chiamata fallita (errore di rete, HTTP o del servizio).
+        """
+        with self._lock:
+            self._counters["failures"] += 1
+        self._record(False, None, "request failed")
+
+    def release(self) -> None:
+        """
+        Conclude una chiamata autorizzata senza esito (es. rifiutata dallo scheduler).
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _record(self, ok: bool, latency: Optional[float], reason: str) -> None:
+        """
+        Aggiorna la finestra e lo stato del circuito con l'esito di una chiamata.
+
+        Args:
+            ok (bool): Se la chiamata è riuscita entro lo SLA.
+            latency (Optional[float]): La latenza, o None per gli errori.
+            reason (str): Il motivo del fallimento, per il log.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    logger.info("LLM circuit %s closed: probe succeeded", self.name)
+                else:
+                    self._open(f"probe failed ({reason})")
+                self._outcomes.append((ok, latency))
+                return
+
+            self._outcomes.append((ok, latency))
+            if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+                return
+            failures = sum(1 for success, _ in self._outcomes if not success)
+            rate = failures / len(self._outcomes)
+            if rate >= self.failure_rate:
+                self._open(f"{failures}/{len(self._outcomes)} recent calls failed ({reason})")
+
+    def state(self) -> str:
+        """
+        Restituisce lo stato corrente del circuito.
+
+        Returns:
+            str: "closed", "open" o "half_open".
+        """
+        with self._lock:
+            return self._state
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Restituisce stato, tasso di fallimento e percentili di latenza della finestra.
+
+        Returns:
+            Dict[str, Any]: Stato, chiamate nella finestra, tasso di fallimento, latenze
+            p50/p95 (secondi) e contatori di rifiuti, aperture, errori e violazioni SLA.
+        """
+        with self._lock:
+            outcomes = list(self._outcomes)
+            latencies = [latency for _, latency in outcomes if latency is not None]
+            return {
+                "state": self._state,
+                "window_calls": len(outcomes),
+                "failure_rate": (
+                    sum(1 for ok, _ in outcomes if not ok) / len(outcomes) if outcomes else 0.0
+                ),
+                "latency_p50": _percentile(latencies, 50),
+                "latency_p95": _percentile(latencies, 95),
+                **self._counters,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> Optional[CircuitBreaker]:
+    """
+    Restituisce il circuito condiviso per un modello, creandolo al primo utilizzo.
+
+    Args:
+        name (str): Il nome del modello.
+
+    Returns:
+        Optional[CircuitBreaker]: Il circuito, o None se disabilitato (`LLM_BREAKER_ENABLED`).
+    """
+    if not LLM_BREAKER_ENABLED:
+        return None
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                window=LLM_BREAKER_WINDOW,
+                min_calls=LLM_BREAKER_MIN_CALLS,
+                failure_rate=LLM_BREAKER_FAILURE_RATE,
+                latency_sla=0,
+                open_seconds=LLM_BREAKER_OPEN_SECONDS,
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Restituisce le statistiche dei circuiti di tutti i modelli usati.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Le statistiche per modello.
+    """
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.stats() for name, breaker in breakers.items()}
+
+
+def reset_circuit_breakers() -> None:
+    """
+    Dimentica tutti i circuiti (i successivi ripartono chiusi); utile nei test.
+    """
+    with _breakers_lock:
+        _breakers.clear()
@@ -0,0 +1,157 @@
+"""
+Code Chunker Module.
+
+Questo modulo divide i file sorgente in blocchi (chunk) da rigenerare separatamente,
+così che i file grandi non superino la finestra di contesto del modello di coding.
+
+Strategie di divisione:
+    - Python (.py): tramite `ast`, un blocco per ogni definizione di primo livello
+      (funzioni e classi, decoratori inclusi); le istruzioni di modulo restano con il
+      blocco che le precede.
+    - Altri linguaggi: euristica basata sulle righe non indentate precedute da una riga
+      vuota e fuori da blocchi tra parentesi graffe.
+
+I blocchi adiacenti vengono poi accorpati fino a `max_chars` caratteri; un blocco
+singolo più grande del limite viene diviso per righe. La concatenazione dei blocchi
+restituisce sempre il sorgente originale.
+"""
+
+import ast
+import io
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Caratteri che, all'inizio di una riga, indicano la continuazione di un costrutto
+_CONTINUATION_PREFIXES = ("}", ")", "]", "*", "//", "#", "/*", "--", "<")
+
+
+def _python_boundaries(lines: List[str], code: str) -> List[int]:
+    """
+    Calcola gli indici di riga da cui iniziano le definizioni Python di primo livello.
+
+    Args:
+        lines (List[str]): Le righe del sorgente (con terminatori).
+        code (str): Il sorgente completo.
+
+    Returns:
+        List[int]: Gli indici (0-based) di inizio dei segmenti.
+
+    Raises:
+        SyntaxError: Se il sorgente non è Python valido.
+    """
+    tree = ast.parse(code)
+    boundaries = [0]
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+        # Commenti immediatamente precedenti appartengono alla definizione
+        while start > 0 and lines[start - 1].startswith("#"):
+            start -= 1
+        if start > boundaries[-1]:
+            boundaries.append(start)
+    return boundaries
+
+
+def _heuristic_boundaries(lines: List[str]) -> List[int]:
+    """
+    Calcola i punti di divisione per linguaggi diversi da Python.
+
+    Un nuovo segmento inizia su una riga non indentata, preceduta da una riga vuota e
+    fuori da qualsiasi blocco `{ ... }`.
+
+    Args:
+        lines (List[str]): Le righe del sorgente (con terminatori).
+
+    Returns:
+        List[int]: Gli indici (0-based) di inizio dei segmenti.
+    """
+    boundaries = [0]
+    depth = 0
+    for idx, line in enumerate(lines):
+        if (
+                idx > 0
+                and depth == 0
+                and line.strip()
+                and not line[0].isspace()
+                and not line.startswith(_CONTINUATION_PREFIXES)
+                and not lines[idx - 1].strip()
+        ):
+            boundaries.append(idx)
+        depth = max(0, depth + line.count("{") - line.count("}"))
+    return boundaries
+
+
+def _split_by_lines(segment: str, max_chars: int) -> List[str]:
+    """
+    Divide un segmento troppo grande in blocchi di righe consecutive.
+
+    Args:
+        segment (str): Il segmento da dividere.
+        max_chars (int): La dimensione massima di un blocco.
+
+    Returns:
+        List[str]: I blocchi (una singola riga più lunga del limite resta intera).
+    """
+    parts: List[str] = []
+    current = ""
+    for line in segment.splitlines(keepends=True):
+        if current and len(current) + len(line) > max_chars:
+            parts.append(current)
+            current = ""
+        current += line
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_source(code: str, file_path: str, max_chars: int) -> List[str]:
+    """
+    Divide un file sorgente in blocchi da rigenerare separatamente.
+
+    Args:
+        code (str): Il contenuto del file.
+        file_path (str): Il percorso del file (l'estensione sceglie la strategia).
+        max_chars (int): La dimensione massima indicativa di un blocco in caratteri.
+
+    Returns:
+        List[str]: I blocchi nell'ordine originale; `"".join(blocchi) == code`.
+    """
+    if len(code) <= max_chars:
+        return [code]
+
+    # Divide solo su "\n", come fa `ast` per i numeri di riga
+    lines = io.StringIO(code).readlines()
+    boundaries = None
+    if file_path.endswith(".py"):
+        try:
+            boundaries = _python_boundaries(lines, code)
+        except (SyntaxError, ValueError):
+            logger.debug("AST parsing failed for %s, using heuristic splitter", file_path)
+    if boundaries is None:
+        boundaries = _heuristic_boundaries(lines)
+
+    segments = [
+        "".join(lines[start:end])
+        for start, end in zip(boundaries, boundaries[1:] + [len(lines)])
+    ]
+
+    # Accorpa i segmenti adiacenti fino al limite; divide per righe quelli troppo grandi
+    chunks: List[str] = []
+    current = ""
+    for segment in segments:
+        if len(segment) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_split_by_lines(segment, max_chars))
+        elif current and len(current) + len(segment) > max_chars:
+            chunks.append(current)
+            current = segment
+        else:
+            current += segment
+    if current:
+        chunks.append(current)
+    return chunks
@@ -5,43 +5,76 @@ Questo modulo interagisce con l'LLM configurato (tramite Ollama) per riscrivere
 che è stato segnalato come violazione della compatibilità della licenza. Costruisce prompt specifici
 per garantire che il codice generato sia funzionalmente equivalente ma conforme
 alla licenza del progetto di destinazione.
+
+I file più grandi di `REGEN_CHUNK_MAX_CHARS` vengono divisi in blocchi a livello di
+funzioni/classi (vedi `code_chunker`), rigenerati in parallelo con tentativi ripetuti
+per blocco e una scadenza complessiva, e infine riassemblati.
+
+Il codice generato viene validato prima di essere restituito: oltre alla lunghezza
+minima, la sintassi viene verificata in base al linguaggio del file (vedi
+`code_validation`). Un file rigenerato con errori di sintassi viene richiesto di nuovo
+con l'errore riportato nel prompt (`REGEN_VALIDATION_RETRIES`); i blocchi non validi
+vengono ritentati. La sintassi viene richiesta solo se il codice originale la rispetta.
+
+Con una scadenza (`deadline`) il timeout di ogni richiesta al modello è limitato al tempo
+rimasto e dopo la scadenza non vengono avviati altri tentativi: una rigenerazione
+abbandonata libera lo slot dello scheduler LLM allo scadere invece di occuparlo fino
+al timeout della richiesta.
 """
 
+import hashlib
 import logging
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from app.services.llm.code_chunker import split_source
+from app.services.llm.code_validation import check_syntax
+from app.services.llm.llm_cache import cached_llm_call, get_llm_cache, make_cache_key
 from app.services.llm.ollama_api import call_ollama_qwen3_coder
+from app.services.llm.prompt_budget import prepare_code_content
+from app.utility.config import (
+    OLLAMA_CODING_MODEL,
+    REGEN_CHUNK_MAX_CHARS,
+    REGEN_CHUNK_CONCURRENCY,
+    REGEN_CHUNK_RETRIES,
+    REGEN_FILE_DEADLINE,
+    REGEN_VALIDATION_RETRIES,
+)
 
 logger = logging.getLogger(__name__)
 
+# Versioni dei template dei prompt di rigenerazione (invalidano la cache LLM se cambiano)
+REGENERATION_PROMPT_VERSION = "2"
+CHUNK_REGENERATION_PROMPT_VERSION = "3"
+# Spazio dei nomi del codice rigenerato e validato nella cache (indirizzata dal contenuto)
+REGENERATED_CODE_CACHE_VERSION = (
+    f"regenerated-code/{REGENERATION_PROMPT_VERSION}.{CHUNK_REGENERATION_PROMPT_VERSION}"
+)
 
-def regenerate_code(
+
+def build_regeneration_prompt(
     code_content: str,
     main_license: str,
     detected_license: str,
     licenses: str
-) -> Optional[str]:
+) -> str:
     """
-    Richiede all'LLM di rigenerare un blocco di codice sotto una licenza compatibile.
+    Costruisce il prompt di rigenerazione del codice.
 
-    Il prompt istruisce il modello a:
-    1. Analizzare il codice originale e la sua licenza incompatibile.
-    2. Riscrivere la logica per essere funzionalmente equivalente ma conforme alla
-       `main_license` (preferendo licenze permissive come MIT/Apache-2.0).
-    3. Assicurarsi che nessun codice originale limitato (copyleft forte) sia copiato
-       parola per parola per evitare problemi di licenza.
+    Il codice viene inserito senza spazi a fine riga né righe vuote ripetute.
 
     Args:
-        code_content (str): Il codice sorgente originale che viola la compatibilità della licenza.
-        main_license (str): La licenza principale del progetto (es. "MIT").
-        detected_license (str): La licenza rilevata nel codice originale (es. "GPL-3.0").
-        licenses (str): Una stringa che elenca le licenze compatibili da utilizzare come target.
+        code_content (str): Il codice sorgente originale.
+        main_license (str): La licenza principale del progetto.
+        detected_license (str): La licenza rilevata nel codice originale.
+        licenses (str): Le licenze compatibili da utilizzare come target.
 
     Returns:
-        Optional[str]: La stringa del codice sorgente pulita ed estratta pronta per essere salvata,
-        o None se la generazione fallisce.
+        str: Il prompt da inviare al modello di coding.
     """
+    code_content = prepare_code_content(code_content, "regeneration")
     # Construct the prompt split across multiple lines for readability and PEP8 compliance
-    prompt = (
+    return (
         f"You are a software licensing and refactoring expert. "
         f"The following code is currently under the license '{detected_license}', "
         f"which is incompatible with the project's main license '{main_license}'.\n"
@@ -59,32 +92,347 @@ def regenerate_code(
         f"extra verbal explanations. The code must be ready to be saved to a file."
     )
 
-    try:
-        response = call_ollama_qwen3_coder(prompt)
-        if not response:
-            return None
 
-        # Post-elaborazione: Pulisce la formattazione Markdown se presente
-        clean_response = response.strip()
+def regeneration_cache_inputs(
+    code_content: str,
+    main_license: str,
+    detected_license: str,
+    licenses: str
+) -> Dict[str, str]:
+    """
+    Restituisce gli input normalizzati del prompt di rigenerazione per la cache LLM.
 
-        if clean_response.startswith("```"):
-            # Divide per nuova riga per rimuovere la prima riga (es. ```python)
-            parts = clean_response.split("\n", 1)
-            if len(parts) > 1:
-                clean_response = parts[1]
+    Args:
+        code_content (str): Il codice sorgente originale.
+        main_license (str): La licenza principale del progetto.
+        detected_license (str): La licenza rilevata nel codice originale.
+        licenses (str): Le licenze compatibili da utilizzare come target.
 
-            # Rimuove i backtick di chiusura se presenti alla fine
-            if clean_response.endswith("```"):
-                clean_response = clean_response.rsplit("\n", 1)[0]
+    Returns:
+        Dict[str, str]: Gli input che identificano la richiesta.
+    """
+    return {
+        "code_sha256": hashlib.sha256(code_content.encode("utf-8")).hexdigest(),
+        "main_license": main_license,
+        "detected_license": detected_license,
+        "licenses": licenses,
+    }
 
-        clean_response = clean_response.strip()
 
-        # Valida il codice generato
-        if not validate_generated_code(clean_response):
-            logger.warning("Generated code failed validation")
-            return None
+def get_cached_regenerated_code(
+    code_content: str,
+    main_license: str,
+    detected_license: str,
+    licenses: str
+) -> Optional[str]:
+    """
+    Restituisce il codice già rigenerato e validato per gli stessi input, se presente.
+
+    La chiave dipende dall'hash del contenuto originale (non dal percorso), quindi anche
+    file identici in repository diversi (es. dipendenze incluse) condividono la voce.
+
+    Args:
+        code_content (str): Il codice sorgente originale.
+        main_license (str): La licenza principale del progetto.
+        detected_license (str): La licenza rilevata nel codice originale.
+        licenses (str): Le licenze compatibili da utilizzare come target.
+
+    Returns:
+        Optional[str]: Il codice rigenerato memorizzato, o None in caso di miss.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return None
+    key = make_cache_key(
+        OLLAMA_CODING_MODEL or "",
+        REGENERATED_CODE_CACHE_VERSION,
+        regeneration_cache_inputs(code_content, main_license, detected_license, licenses),
+    )
+    return cache.get(key)
+
+
+def store_regenerated_code(
+    code_content: str,
+    main_license: str,
+    detected_license: str,
+    licenses: str,
+    new_code: str
+) -> None:
+    """
+    Memorizza il codice rigenerato e validato per gli input indicati.
+
+    Args:
+        code_content (str): Il codice sorgente originale.
+        main_license (str): La licenza principale del progetto.
+        detected_license (str): La licenza rilevata nel codice originale.
+        licenses (str): Le licenze compatibili da utilizzare come target.
+        new_code (str): Il codice rigenerato, già validato.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return
+    key = make_cache_key(
+        OLLAMA_CODING_MODEL or "",
+        REGENERATED_CODE_CACHE_VERSION,
+        regeneration_cache_inputs(code_content, main_license, detected_license, licenses),
+    )
+    cache.set(key, OLLAMA_CODING_MODEL or "", new_code)
+
+
+def build_chunk_regeneration_prompt(
+    chunk: str,
+    index: int,
+    total: int,
+    main_license: str,
+    detected_license: str,
+    licenses: str
+) -> str:
+    """
+    Costruisce il prompt di rigenerazione per un singolo blocco di un file grande.
+
+    Args:
+        chunk (str): Il blocco di codice originale.
+        index (int): La posizione del blocco (0-based).
+        total (int): Il numero totale di blocchi del file.
+        main_license (str): La licenza principale del progetto.
+        detected_license (str): La licenza rilevata nel codice originale.
+        licenses (str): Le licenze compatibili da utilizzare come target.
+
+    Returns:
+        str: Il prompt da inviare al modello di coding.
+    """
+    chunk = prepare_code_content(chunk, f"regeneration chunk {index + 1}/{total}")
+    return (
+        f"You are a software licensing and refactoring expert. "
+        f"The following code is part {index + 1} of {total} of a source file currently "
+        f"under the license '{detected_license}', which is incompatible with the project's "
+        f"main license '{main_license}'.\n"
+        f"Rewrite ONLY this part so that it is functionally equivalent but can be released "
+        f"under a license compatible with one of these: {licenses}.\n"
+        f"Keep the same names, signatures and imports so that it still works together "
+        f"with the other parts of the file, which are rewritten separately.\n"
+        f"Ensure that the regenerated code does not contain parts copied from the "
+        f"original code to avoid licensing issues.\n\n"
+        f"Here is the original code:\n"
+        f"```\n{chunk}\n```\n\n"
+        f"Return ONLY the regenerated code, without markdown (```) and without "
+        f"extra verbal explanations."
+    )
+
+
+def build_syntax_repair_prompt(prompt: str, code: str, error: str) -> str:
+    """
+    Costruisce il prompt che chiede di correggere il codice rigenerato non valido.
+
+    Args:
+        prompt (str): Il prompt di rigenerazione originale.
+        code (str): Il codice rigenerato con errori di sintassi.
+        error (str): L'errore di sintassi.
+
+    Returns:
+        str: Il prompt originale seguito dal codice non valido e dall'errore.
+    """
+    return (
+        f"{prompt}\n\n"
+        f"Your previous answer is not valid code:\n"
+        f"```\n{code}\n```\n"
+        f"Syntax error: {error}\n\n"
+        f"Return ONLY the complete corrected code, without markdown (```) and without "
+        f"extra verbal explanations."
+    )
 
-        return clean_response
+
+def _strip_markdown_fences(response: str) -> str:
+    """
+    Rimuove gli eventuali delimitatori Markdown attorno al codice generato.
+
+    Args:
+        response (str): La risposta grezza del modello.
+
+    Returns:
+        str: Il codice senza delimitatori e spazi esterni.
+    """
+    # Post-elaborazione: Pulisce la formattazione Markdown se presente
+    clean_response = response.strip()
+
+    if clean_response.startswith("```"):
+        # Divide per nuova riga per rimuovere la prima riga (es. ```python)
+        parts = clean_response.split("\n", 1)
+        if len(parts) > 1:
+            clean_response = parts[1]
+
+        # Rimuove i backtick di chiusura se presenti alla fine
+        if clean_response.endswith("```"):
+            clean_response = clean_response.rsplit("\n", 1)[0]
+
+    return clean_response.strip()
+
+
+def clean_generated_code(
+    response: Optional[str],
+    file_path: str = "",
+    original: Optional[str] = None
+) -> Optional[str]:
+    """
+    Ripulisce la risposta del modello dalla formattazione Markdown e la valida.
+
+    Args:
+        response (Optional[str]): La risposta grezza del modello.
+        file_path (str): Il percorso del file (sceglie il controllo di sintassi).
+        original (Optional[str]): Il codice originale, se disponibile.
+
+    Returns:
+        Optional[str]: Il codice pronto per essere salvato, o None se non valido.
+    """
+    if not response:
+        return None
+
+    clean_response = _strip_markdown_fences(response)
+
+    # Valida il codice generato
+    error = generated_code_error(clean_response, file_path, original)
+    if error:
+        logger.warning("Generated code for %s failed validation: %s", file_path or "file", error)
+        return None
+
+    return clean_response
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    """
+    Helper interno che calcola il timeout di una richiesta al modello.
+
+    Args:
+        deadline (Optional[float]): Istante (`time.monotonic`) di scadenza, o None.
+
+    Returns:
+        Optional[float]: I secondi rimasti prima della scadenza, o None senza scadenza
+        (timeout predefinito della richiesta).
+    """
+    if deadline is None:
+        return None
+    return max(0.001, deadline - time.monotonic())
+
+
+def _expired(deadline: Optional[float]) -> bool:
+    """
+    Helper interno che indica se la scadenza è stata superata.
+
+    Args:
+        deadline (Optional[float]): Istante (`time.monotonic`) di scadenza, o None.
+
+    Returns:
+        bool: True se la scadenza esiste ed è stata superata.
+    """
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def regenerate_code(
+    code_content: str,
+    main_license: str,
+    detected_license: str,
+    licenses: str,
+    file_path: str = "",
+    deadline: Optional[float] = None
+) -> Optional[str]:
+    """
+    Richiede all'LLM di rigenerare un blocco di codice sotto una licenza compatibile.
+
+    Il prompt istruisce il modello a:
+    1. Analizzare il codice originale e la sua licenza incompatibile.
+    2. Riscrivere la logica per essere funzionalmente equivalente ma conforme alla
+       `main_license` (preferendo licenze permissive come MIT/Apache-2.0).
+    3. Assicurarsi che nessun codice originale limitato (copyleft forte) sia copiato
+       parola per parola per evitare problemi di licenza.
+
+    Args:
+        code_content (str): Il codice sorgente originale che viola la compatibilità della licenza.
+        main_license (str): La licenza principale del progetto (es. "MIT").
+        detected_license (str): La licenza rilevata nel codice originale (es. "GPL-3.0").
+        licenses (str): Una stringa che elenca le licenze compatibili da utilizzare come target.
+        file_path (str): Il percorso del file; l'estensione sceglie la strategia di divisione
+            per i file più grandi di `REGEN_CHUNK_MAX_CHARS`.
+        deadline (Optional[float]): Istante (`time.monotonic`) oltre il quale la
+            rigenerazione viene abbandonata (default nessuna scadenza; i file a blocchi
+            usano `REGEN_FILE_DEADLINE`).
+
+    Returns:
+        Optional[str]: La stringa del codice sorgente pulita ed estratta pronta per essere salvata,
+        o None se la generazione fallisce.
+    """
+    cached = get_cached_regenerated_code(code_content, main_license, detected_license, licenses)
+    if cached is not None:
+        logger.debug("Regenerated code cache hit for %s", file_path or "file")
+        return cached
+
+    if _expired(deadline):
+        return None
+
+    if len(code_content) > REGEN_CHUNK_MAX_CHARS:
+        new_code = regenerate_code_chunked(
+            code_content, main_license, detected_license, licenses, file_path,
+            deadline_seconds=_remaining(deadline)
+        )
+    else:
+        new_code = _regenerate_whole(
+            code_content, main_license, detected_license, licenses, file_path,
+            deadline=deadline
+        )
+
+    if new_code:
+        store_regenerated_code(code_content, main_license, detected_license, licenses, new_code)
+    return new_code
+
+
+def _regenerate_whole(
+    code_content: str,
+    main_license: str,
+    detected_license: str,
+    licenses: str,
+    file_path: str = "",
+    retries: Optional[int] = None,
+    deadline: Optional[float] = None
+) -> Optional[str]:
+    """
+    Rigenera un file con un unico prompt.
+
+    Se il codice generato non supera la validazione sintattica il modello viene
+    interrogato di nuovo con il codice non valido e l'errore, al massimo `retries` volte.
+
+    Args:
+        code_content (str): Il codice sorgente originale.
+        main_license (str): La licenza principale del progetto.
+        detected_license (str): La licenza rilevata nel codice originale.
+        licenses (str): Le licenze compatibili da utilizzare come target.
+        file_path (str): Il percorso del file (sceglie il controllo di sintassi).
+        retries (Optional[int]): Tentativi di correzione (default `REGEN_VALIDATION_RETRIES`).
+        deadline (Optional[float]): Istante (`time.monotonic`) oltre il quale non si
+            ritenta più; limita anche il timeout di ogni richiesta.
+
+    Returns:
+        Optional[str]: Il codice rigenerato e validato, o None se la generazione fallisce.
+    """
+    prompt = build_regeneration_prompt(code_content, main_license, detected_license, licenses)
+    retries = REGEN_VALIDATION_RETRIES if retries is None else max(0, retries)
+
+    try:
+        request = prompt
+        for attempt in range(retries + 1):
+            if _expired(deadline):
+                logger.warning("Regeneration of %s abandoned at its deadline", file_path or "file")
+                return None
+            code = _strip_markdown_fences(
+                call_ollama_qwen3_coder(request, timeout=_remaining(deadline)) or ""
+            )
+            error = generated_code_error(code, file_path, code_content)
+            if error is None:
+                return code
+            logger.warning("Regenerated %s failed validation (attempt %d): %s",
+                           file_path or "file", attempt + 1, error)
+            if not code:
+                continue
+            request = build_syntax_repair_prompt(prompt, code, error)
+        return None
 
     except Exception:  # pylint: disable=broad-exception-caught
         # La cattura ampia è intenzionale qui: agisce come fail-safe per prevenire
@@ -93,21 +441,201 @@ def regenerate_code(
         return None
 
 
-def validate_generated_code(code: str) -> bool:
+def _regenerate_chunk(
+    chunk: str,
+    index: int,
+    total: int,
+    main_license: str,
+    detected_license: str,
+    licenses: str,
+    retries: int,
+    deadline: float,
+    file_path: str = ""
+) -> Optional[str]:
+    """
+    Rigenera un singolo blocco, ritentando in caso di errore o risposta non valida.
+
+    In cache viene memorizzato solo il blocco validato, così un tentativo successivo
+    non riceve la stessa risposta non valida.
+
+    Args:
+        chunk (str): Il blocco di codice originale.
+        index (int): La posizione del blocco (0-based).
+        total (int): Il numero totale di blocchi del file.
+        main_license (str): La licenza principale del progetto.
+        detected_license (str): La licenza rilevata nel codice originale.
+        licenses (str): Le licenze compatibili da utilizzare come target.
+        retries (int): Numero di tentativi aggiuntivi dopo il primo.
+        deadline (float): Istante (`time.monotonic`) oltre il quale non si ritenta più;
+            limita anche il timeout di ogni richiesta.
+        file_path (str): Il percorso del file (sceglie il controllo di sintassi).
+
+    Returns:
+        Optional[str]: Il blocco rigenerato, o None se tutti i tentativi falliscono.
+    """
+    prompt = build_chunk_regeneration_prompt(
+        chunk, index, total, main_license, detected_license, licenses
+    )
+    inputs = regeneration_cache_inputs(chunk, main_license, detected_license, licenses)
+    inputs["chunk"] = f"{index + 1}/{total}"
+
+    def generate() -> str:
+        code = _strip_markdown_fences(
+            call_ollama_qwen3_coder(prompt, timeout=_remaining(deadline)) or ""
+        )
+        error = generated_code_error(code, file_path, chunk, min_length=1)
+        if error:
+            logger.warning("Regenerated chunk %d/%d of %s failed validation: %s",
+                           index + 1, total, file_path or "file", error)
+            return ""
+        return code
+
+    for attempt in range(retries + 1):
+        if time.monotonic() >= deadline:
+            break
+        try:
+            code = cached_llm_call(
+                OLLAMA_CODING_MODEL, CHUNK_REGENERATION_PROMPT_VERSION, inputs, generate
+            )
+            if code:
+                return code
+            logger.warning("Invalid regeneration for chunk %d/%d (attempt %d)",
+                           index + 1, total, attempt + 1)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Error regenerating chunk %d/%d (attempt %d)",
+                             index + 1, total, attempt + 1)
+    return None
+
+
+def regenerate_code_chunked(
+    code_content: str,
+    main_license: str,
+    detected_license: str,
+    licenses: str,
+    file_path: str = "",
+    max_chunk_chars: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    retries: Optional[int] = None,
+    deadline_seconds: Optional[float] = None
+) -> Optional[str]:
+    """
+    Rigenera un file grande dividendolo in blocchi rigenerati in parallelo.
+
+    Il file viene diviso a livello di funzioni/classi (`split_source`), ogni blocco viene
+    rigenerato in un pool di thread con tentativi ripetuti e i risultati vengono
+    riassemblati nell'ordine originale. Se anche un solo blocco fallisce o la scadenza
+    complessiva viene superata il file non viene rigenerato: un file parziale
+    mescolerebbe codice originale e rigenerato.
+
+    Args:
+        code_content (str): Il codice sorgente originale.
+        main_license (str): La licenza principale del progetto.
+        detected_license (str): La licenza rilevata nel codice originale.
+        licenses (str): Le licenze compatibili da utilizzare come target.
+        file_path (str): Il percorso del file (sceglie la strategia di divisione).
+        max_chunk_chars (Optional[int]): Dimensione massima di un blocco
+            (default `REGEN_CHUNK_MAX_CHARS`).
+        max_workers (Optional[int]): Blocchi rigenerati simultaneamente
+            (default `REGEN_CHUNK_CONCURRENCY`).
+        retries (Optional[int]): Tentativi aggiuntivi per blocco (default `REGEN_CHUNK_RETRIES`).
+        deadline_seconds (Optional[float]): Tempo massimo per l'intero file
+            (default `REGEN_FILE_DEADLINE`).
+
+    Returns:
+        Optional[str]: Il codice rigenerato e riassemblato, o None in caso di fallimento.
+    """
+    max_chunk_chars = max_chunk_chars or REGEN_CHUNK_MAX_CHARS
+    max_workers = max(1, max_workers or REGEN_CHUNK_CONCURRENCY)
+    retries = REGEN_CHUNK_RETRIES if retries is None else retries
+    deadline_seconds = deadline_seconds or REGEN_FILE_DEADLINE
+    deadline = time.monotonic() + deadline_seconds
+
+    chunks = split_source(code_content, file_path, max_chunk_chars)
+    logger.info("Regenerating %s in %d chunks", file_path or "file", len(chunks))
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(chunks)), thread_name_prefix="llm-regen-chunk"
+    )
+    try:
+        futures = [
+            executor.submit(
+                _regenerate_chunk, chunk, idx, len(chunks),
+                main_license, detected_license, licenses, retries, deadline, file_path
+            )
+            for idx, chunk in enumerate(chunks)
+        ]
+        _, not_done = wait(futures, timeout=deadline_seconds)
+        if not_done:
+            logger.warning("Chunked regeneration of %s exceeded the %.0fs deadline",
+                           file_path or "file", deadline_seconds)
+            return None
+        results: List[Optional[str]] = [future.result() for future in futures]
+    finally:
+        # I blocchi ancora in coda vengono annullati; quelli in corso terminano in background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if any(result is None for result in results):
+        logger.warning("Chunked regeneration of %s failed for %d chunks",
+                       file_path or "file", sum(result is None for result in results))
+        return None
+
+    reassembled = "\n\n".join(results)
+    error = generated_code_error(reassembled, file_path, code_content)
+    if error:
+        logger.warning("Generated code for %s failed validation: %s", file_path or "file", error)
+        return None
+    return reassembled
+
+
+def generated_code_error(
+    code: str,
+    file_path: str = "",
+    original: Optional[str] = None,
+    min_length: int = 11
+) -> Optional[str]:
     """
-    Valida il codice generato per assicurarsi che non sia vuoto e non troppo corto.
+    Descrive il motivo per cui il codice generato non è valido.
+
+    Il codice deve avere una lunghezza minima e una sintassi valida per il linguaggio
+    del file. Se il codice originale è indicato e non supera a sua volta il controllo di
+    sintassi (es. dialetti non supportati), viene verificata solo la lunghezza.
 
     Args:
         code (str): La stringa del codice generato.
+        file_path (str): Il percorso del file (sceglie il controllo di sintassi).
+        original (Optional[str]): Il codice originale, se disponibile.
+        min_length (int): Il numero minimo di caratteri (spazi esterni esclusi).
 
     Returns:
-        bool: True se il codice supera la validazione, False altrimenti.
+        Optional[str]: La descrizione dell'errore, o None se il codice è valido.
     """
     if not code or not isinstance(code, str):
-        return False
+        return "empty code"
 
-    stripped = code.strip()
-    if len(stripped) <= 10:  # Evita risposte molto brevi o vuote
-        return False
+    if len(code.strip()) < min_length:  # Evita risposte molto brevi o vuote
+        return "code too short"
+
+    error = check_syntax(code, file_path)
+    if error and original is not None and check_syntax(original, file_path):
+        return None
+    return error
+
+
+def validate_generated_code(
+    code: str,
+    file_path: str = "",
+    original: Optional[str] = None
+) -> bool:
+    """
+    Valida il codice generato per assicurarsi che non sia vuoto, non troppo corto e
+    sintatticamente valido per il linguaggio del file.
 
-    return True
+    Args:
+        code (str): La stringa del codice generato.
+        file_path (str): Il percorso del file (sceglie il controllo di sintassi).
+        original (Optional[str]): Il codice originale, se disponibile.
+
+    Returns:
+        bool: True se il codice supera la validazione, False altrimenti.
+    """
+    return generated_code_error(code, file_path, original) is None
@@ -0,0 +1,218 @@
+"""
+Code Validation Module.
+
+Questo modulo verifica la sintassi del codice rigenerato dall'LLM prima che venga
+scritto su disco, così la nuova scansione con ScanCode viene eseguita solo su file
+plausibilmente corretti.
+
+Il controllo dipende dall'estensione del file:
+    - Python (.py, .pyw, .pyi): analisi completa tramite `ast`;
+    - JSON (.json): analisi tramite `json`;
+    - linguaggi con sintassi simile al C (C, C++, Java, JavaScript, TypeScript, Go, Rust,
+      ecc.): bilanciamento di parentesi tonde, quadre e graffe fuori da stringhe e
+      commenti, che individua le generazioni troncate o incomplete;
+    - altre estensioni: nessun controllo sintattico.
+
+Altri linguaggi si aggiungono con `register_syntax_checker`. I controlli vengono eseguiti
+nel pool di fase "cpu" (vedi `app.services.executors`), che limita le analisi simultanee
+durante la rigenerazione parallela dei file insieme alle altre elaborazioni in memoria.
+"""
+
+import ast
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from app.services.executors import CPU, run_in_stage
+
+# Un controllo restituisce la descrizione dell'errore di sintassi, o None se il codice è valido
+SyntaxChecker = Callable[[str], Optional[str]]
+
+_PAIRS = {")": "(", "]": "[", "}": "{"}
+
+_checkers: Dict[str, SyntaxChecker] = {}
+_checkers_lock = threading.Lock()
+
+
+def check_python_syntax(code: str) -> Optional[str]:
+    """
+    Verifica la sintassi di un sorgente Python.
+
+    Args:
+        code (str): Il sorgente.
+
+    Returns:
+        Optional[str]: La descrizione dell'errore con la riga, o None se il sorgente è valido.
+    """
+    try:
+        ast.parse(code)
+    except SyntaxError as e:
+        return f"line {e.lineno}: {e.msg}"
+    except (ValueError, RecursionError, MemoryError) as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def check_json_syntax(code: str) -> Optional[str]:
+    """
+    Verifica la sintassi di un documento JSON.
+
+    Args:
+        code (str): Il documento.
+
+    Returns:
+        Optional[str]: La descrizione dell'errore con la riga, o None se il documento è valido.
+    """
+    try:
+        json.loads(code)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _skip_string(code: str, start: int, quote: str) -> int:
+    """
+    Restituisce l'indice successivo alla fine di una stringa letterale.
+
+    Args:
+        code (str): Il sorgente.
+        start (int): L'indice della virgoletta di apertura.
+        quote (str): La virgoletta di apertura.
+
+    Returns:
+        int: L'indice dopo la virgoletta di chiusura, o -1 se la stringa non viene chiusa.
+    """
+    i = start + 1
+    while i < len(code):
+        char = code[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        # Solo i template literal (`) possono proseguire su più righe
+        if char == "\n" and quote != "`":
+            return -1
+        i += 1
+    return -1
+
+
+def make_delimiter_checker(quotes: str = "\"'`") -> SyntaxChecker:
+    """
+    Crea un controllo del bilanciamento delle parentesi per linguaggi simili al C.
+
+    Stringhe (anche multilinea tra tripli doppi apici) e commenti (`//` e `/* */`)
+    vengono ignorati.
+
+    Args:
+        quotes (str): I caratteri che delimitano stringhe letterali nel linguaggio.
+
+    Returns:
+        SyntaxChecker: Il controllo.
+    """
+    def check(code: str) -> Optional[str]:
+        stack = []
+        line = 1
+        i = 0
+        while i < len(code):
+            char = code[i]
+            if char == "\n":
+                line += 1
+            elif code.startswith("//", i):
+                end = code.find("\n", i)
+                i = len(code) if end == -1 else end
+                continue
+            elif code.startswith("/*", i):
+                end = code.find("*/", i + 2)
+                if end == -1:
+                    return f"line {line}: unterminated comment"
+                line += code.count("\n", i, end)
+                i = end + 2
+                continue
+            elif code.startswith('"""', i) and '"' in quotes:
+                # Stringhe multilinea (Java, Kotlin, Swift, Scala)
+                end = code.find('"""', i + 3)
+                if end == -1:
+                    return f"line {line}: unterminated string"
+                line += code.count("\n", i, end)
+                i = end + 3
+                continue
+            elif char in quotes:
+                end = _skip_string(code, i, char)
+                if end == -1:
+                    return f"line {line}: unterminated string"
+                line += code.count("\n", i, end)
+                i = end
+                continue
+            elif char in "([{":
+                stack.append((char, line))
+            elif char in _PAIRS:
+                if not stack or stack[-1][0] != _PAIRS[char]:
+                    return f"line {line}: unexpected '{char}'"
+                stack.pop()
+            i += 1
+        if stack:
+            char, opened = stack[-1]
+            return f"line {opened}: '{char}' is never closed"
+        return None
+
+    return check
+
+
+def register_syntax_checker(extensions: Iterable[str], checker: SyntaxChecker) -> None:
+    """
+    Registra il controllo di sintassi per una o più estensioni.
+
+    Args:
+        extensions (Iterable[str]): Le estensioni (es. ".rb"), senza distinzione tra
+            maiuscole e minuscole; sostituiscono eventuali controlli già registrati.
+        checker (SyntaxChecker): Il controllo.
+    """
+    with _checkers_lock:
+        for extension in extensions:
+            _checkers[extension.lower()] = checker
+
+
+def get_syntax_checker(file_path: str) -> Optional[SyntaxChecker]:
+    """
+    Restituisce il controllo di sintassi per l'estensione del file.
+
+    Args:
+        file_path (str): Il percorso del file.
+
+    Returns:
+        Optional[SyntaxChecker]: Il controllo, o None se l'estensione non ne ha uno.
+    """
+    extension = os.path.splitext(file_path or "")[1].lower()
+    with _checkers_lock:
+        return _checkers.get(extension)
+
+
+def check_syntax(code: str, file_path: str) -> Optional[str]:
+    """
+    Verifica la sintassi del codice nel pool di fase "cpu".
+
+    Args:
+        code (str): Il codice.
+        file_path (str): Il percorso del file (sceglie il controllo dall'estensione).
+
+    Returns:
+        Optional[str]: La descrizione dell'errore di sintassi, o None se il codice è valido
+        o l'estensione non ha un controllo.
+    """
+    checker = get_syntax_checker(file_path)
+    if checker is None:
+        return None
+    return run_in_stage(CPU, checker, code)
+
+
+register_syntax_checker((".py", ".pyw", ".pyi"), check_python_syntax)
+register_syntax_checker((".json",), check_json_syntax)
+register_syntax_checker(
+    (".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh", ".java", ".cs", ".js", ".mjs", ".cjs",
+     ".jsx", ".ts", ".tsx", ".go", ".scala", ".kt", ".kts", ".swift"),
+    make_delimiter_checker(),
+)
+# In Rust l'apice indica anche i lifetime ('a): solo le stringhe tra doppi apici
+register_syntax_checker((".rs",), make_delimiter_checker('"'))
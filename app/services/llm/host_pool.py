@@ -0,0 +1,290 @@
+"""
+Ollama Host Pool Module.
+
+Questo modulo distribuisce le richieste LLM su più istanze Ollama (`OLLAMA_HOSTS`), così
+il throughput dell'arricchimento e della rigenerazione cresce con il numero di macchine.
+
+Per ogni istanza vengono tracciati:
+    - le richieste in corso, usate per il bilanciamento: ogni richiesta va all'istanza
+      con meno richieste in corso (a parità, quella che ne ha servite meno);
+    - lo stato di salute: un'istanza non raggiungibile viene esclusa per
+      `OLLAMA_HOST_RETRY_SECONDS` secondi, poi la richiesta successiva la riprova;
+    - i modelli installati: le istanze senza il modello richiesto vengono escluse.
+
+Ogni modello usa tutte le istanze del pool, oppure solo quelle indicate nella lista del
+modello (`OLLAMA_CODING_HOSTS`, `OLLAMA_GENERAL_HOSTS`).
+
+Il modulo conserva solo lo stato: le richieste HTTP, il failover e le verifiche delle
+istanze sono in `ollama_api`. Senza `OLLAMA_HOSTS` il pool non viene creato e le
+richieste usano `OLLAMA_URL`.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.utility.config import (
+    OLLAMA_HOSTS,
+    OLLAMA_CODING_HOSTS,
+    OLLAMA_GENERAL_HOSTS,
+    OLLAMA_CODING_MODEL,
+    OLLAMA_GENERAL_MODEL,
+    OLLAMA_HOST_RETRY_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaHostUnavailable(RuntimeError):
+    """
+    Sollevata quando nessuna istanza del pool può servire il modello richiesto.
+    """
+
+
+class OllamaHost:
+    """
+    Un'istanza Ollama del pool con i relativi endpoint e contatori.
+    """
+
+    def __init__(self, base_url: str):
+        """
+        Args:
+            base_url (str): L'URL base dell'istanza (es. "http://gpu1:11434").
+        """
+        self.base_url = base_url.rstrip("/")
+        self.generate_url = f"{self.base_url}/api/generate"
+        self.tags_url = f"{self.base_url}/api/tags"
+        self.pull_url = f"{self.base_url}/api/pull"
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.down_until = 0.0
+        self.last_error: Optional[str] = None
+        # Modelli installati, significativi solo dopo la prima verifica dell'istanza
+        self.models: Set[str] = set()
+        self.checked = False
+
+    def has_model(self, model_name: str) -> Optional[bool]:
+        """
+        Indica se il modello è installato sull'istanza.
+
+        Args:
+            model_name (str): Il nome del modello.
+
+        Returns:
+            Optional[bool]: True o False, oppure None se l'istanza non è ancora stata verificata.
+        """
+        if not self.checked:
+            return None
+        return model_name in self.models or f"{model_name}:latest" in self.models
+
+
+class HostPool:
+    """
+    Pool di istanze Ollama con bilanciamento sulle richieste in corso.
+    """
+
+    def __init__(
+            self,
+            hosts: Iterable[str],
+            model_hosts: Optional[Dict[str, List[str]]] = None,
+            retry_seconds: float = 15.0
+    ):
+        """
+        Args:
+            hosts (Iterable[str]): Gli URL base delle istanze usate da tutti i modelli.
+            model_hosts (Optional[Dict[str, List[str]]]): Per modello, gli URL base delle
+                sole istanze da usare.
+            retry_seconds (float): Esclusione di un'istanza non raggiungibile (secondi).
+        """
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, OllamaHost] = {}
+        self._default: List[OllamaHost] = [self._host(url) for url in hosts]
+        self._by_model: Dict[str, List[OllamaHost]] = {
+            model: [self._host(url) for url in urls]
+            for model, urls in (model_hosts or {}).items() if model and urls
+        }
+
+    def _host(self, url: str) -> OllamaHost:
+        """
+        Restituisce l'istanza con l'URL indicato, creandola se necessario.
+
+        Args:
+            url (str): L'URL base dell'istanza.
+
+        Returns:
+            OllamaHost: L'istanza (una sola per URL, anche se presente in più liste).
+        """
+        host = OllamaHost(url)
+        return self._hosts.setdefault(host.base_url, host)
+
+    def hosts_for(self, model_name: Optional[str]) -> List[OllamaHost]:
+        """
+        Restituisce le istanze configurate per un modello.
+
+        Args:
+            model_name (Optional[str]): Il nome del modello.
+
+        Returns:
+            List[OllamaHost]: Le istanze della lista del modello, o tutte quelle del pool.
+        """
+        return list(self._by_model.get(model_name or "") or self._default or self._hosts.values())
+
+    def is_up(self, host: OllamaHost) -> bool:
+        """
+        Indica se l'istanza può ricevere richieste (non esclusa per errori recenti).
+
+        Args:
+            host (OllamaHost): L'istanza.
+
+        Returns:
+            bool: True se l'istanza non è esclusa.
+        """
+        with self._lock:
+            return time.monotonic() >= host.down_until
+
+    def acquire(self, model_name: Optional[str], exclude: Iterable[OllamaHost] = ()) -> OllamaHost:
+        """
+        Sceglie l'istanza per una richiesta e ne incrementa le richieste in corso.
+
+        Vengono scartate le istanze escluse per errori recenti e quelle senza il modello;
+        tra le rimanenti vince quella con meno richieste in corso. Ogni istanza ottenuta
+        va restituita con `release`.
+
+        Args:
+            model_name (Optional[str]): Il modello richiesto.
+            exclude (Iterable[OllamaHost]): Istanze già tentate per questa richiesta.
+
+        Returns:
+            OllamaHost: L'istanza scelta.
+
+        Raises:
+            OllamaHostUnavailable: Se nessuna istanza può servire il modello.
+        """
+        excluded = set(map(id, exclude))
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                host for host in self.hosts_for(model_name)
+                if id(host) not in excluded
+                and now >= host.down_until
+                and host.has_model(model_name or "") is not False
+            ]
+            if not candidates:
+                raise OllamaHostUnavailable(f"No Ollama host available for model {model_name}")
+            host = min(candidates, key=lambda h: (h.outstanding, h.requests))
+            host.outstanding += 1
+            host.requests += 1
+            return host
+
+    def release(self, host: OllamaHost) -> None:
+        """
+        Conclude una richiesta assegnata all'istanza.
+
+        Args:
+            host (OllamaHost): L'istanza restituita da `acquire`.
+        """
+        with self._lock:
+            host.outstanding -= 1
+
+    def mark_down(self, host: OllamaHost, reason: str) -> None:
+        """
+        Esclude un'istanza non raggiungibile per `retry_seconds` secondi.
+
+        Args:
+            host (OllamaHost): L'istanza.
+            reason (str): Il motivo, per il log e le statistiche.
+        """
+        with self._lock:
+            host.failures += 1
+            host.down_until = time.monotonic() + self.retry_seconds
+            host.last_error = reason
+        logger.warning("Ollama host %s marked down for %.0fs: %s",
+                       host.base_url, self.retry_seconds, reason)
+
+    def update_models(self, host: OllamaHost, models: Iterable[str]) -> None:
+        """
+        Registra una verifica riuscita dell'istanza con i modelli installati.
+
+        Args:
+            host (OllamaHost): L'istanza.
+            models (Iterable[str]): I nomi dei modelli installati.
+        """
+        with self._lock:
+            host.models = set(models)
+            host.checked = True
+            host.down_until = 0.0
+            host.last_error = None
+
+    def mark_model_missing(self, host: OllamaHost, model_name: str) -> None:
+        """
+        Registra che il modello non è disponibile sull'istanza (es. risposta 404).
+
+        Args:
+            host (OllamaHost): L'istanza.
+            model_name (str): Il nome del modello.
+        """
+        with self._lock:
+            host.models.difference_update({model_name, f"{model_name}:latest"})
+            host.checked = True
+        logger.warning("Model %s is not available on Ollama host %s", model_name, host.base_url)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Restituisce lo stato delle istanze del pool.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Per ogni istanza: disponibilità, richieste in corso
+            e totali, errori, ultimo errore e modelli installati (None se non verificati).
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                url: {
+                    "up": now >= host.down_until,
+                    "outstanding": host.outstanding,
+                    "requests": host.requests,
+                    "failures": host.failures,
+                    "last_error": host.last_error,
+                    "models": sorted(host.models) if host.checked else None,
+                }
+                for url, host in self._hosts.items()
+            }
+
+
+def _build_pool() -> Optional[HostPool]:
+    """
+    Crea il pool dalla configurazione.
+
+    Returns:
+        Optional[HostPool]: Il pool, o None se non sono configurate istanze.
+    """
+    model_hosts = {OLLAMA_CODING_MODEL: OLLAMA_CODING_HOSTS, OLLAMA_GENERAL_MODEL: OLLAMA_GENERAL_HOSTS}
+    if not OLLAMA_HOSTS and not any(model_hosts.values()):
+        return None
+    return HostPool(OLLAMA_HOSTS, model_hosts, retry_seconds=OLLAMA_HOST_RETRY_SECONDS)
+
+
+_pool = _build_pool()
+
+
+def get_host_pool() -> Optional[HostPool]:
+    """
+    Restituisce il pool di istanze Ollama del processo.
+
+    Returns:
+        Optional[HostPool]: Il pool, o None se è configurata una sola istanza (`OLLAMA_URL`).
+    """
+    return _pool
+
+
+def get_host_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Restituisce lo stato delle istanze del pool.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Lo stato per istanza (vuoto senza pool).
+    """
+    return _pool.stats() if _pool is not None else {}
@@ -0,0 +1,137 @@
+"""
+Shared HTTP Client Module.
+
+Questo modulo fornisce i client HTTP condivisi usati per comunicare con Ollama:
+- una `requests.Session` sincrona per le chiamate dai thread (endpoint sincroni e pool
+  di arricchimento);
+- un `httpx.AsyncClient` per il codice asincrono (es. streaming).
+
+Entrambi mantengono un pool di connessioni keep-alive, evitando di aprire una nuova
+connessione TCP per ogni prompt. Dimensione dei pool e timeout sono configurabili
+tramite variabili d'ambiente (vedi `app.utility.config`).
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.utility.config import (
+    OLLAMA_HTTP_POOL_CONNECTIONS,
+    OLLAMA_HTTP_POOL_MAXSIZE,
+    OLLAMA_HTTP_KEEPALIVE_EXPIRY,
+    OLLAMA_CONNECT_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def request_timeout(read_timeout: float) -> Tuple[float, float]:
+    """
+    Costruisce il timeout (connessione, lettura) per una richiesta sincrona.
+
+    Args:
+        read_timeout (float): Il timeout di lettura in secondi.
+
+    Returns:
+        Tuple[float, float]: La coppia di timeout accettata da `requests`.
+    """
+    return OLLAMA_CONNECT_TIMEOUT, read_timeout
+
+
+def async_request_timeout(read_timeout: float) -> httpx.Timeout:
+    """
+    Costruisce il timeout per una richiesta asincrona.
+
+    Per le risposte in streaming il timeout di lettura si applica a ogni singolo chunk,
+    non all'intera generazione.
+
+    Args:
+        read_timeout (float): Il timeout di lettura in secondi.
+
+    Returns:
+        httpx.Timeout: Il timeout accettato da `httpx`.
+    """
+    return httpx.Timeout(read_timeout, connect=OLLAMA_CONNECT_TIMEOUT)
+
+
+def get_http_session() -> requests.Session:
+    """
+    Restituisce la sessione HTTP sincrona condivisa, creandola al primo utilizzo.
+
+    Returns:
+        requests.Session: La sessione con pool di connessioni keep-alive.
+    """
+    global _session  # pylint: disable=global-statement
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=OLLAMA_HTTP_POOL_CONNECTIONS,
+                pool_maxsize=OLLAMA_HTTP_POOL_MAXSIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Restituisce il client HTTP asincrono condiviso per l'event loop corrente.
+
+    Un `httpx.AsyncClient` è legato all'event loop su cui è stato usato: se il loop
+    cambia (es. test o `asyncio.run` successivi) viene creato un nuovo client.
+
+    Returns:
+        httpx.AsyncClient: Il client con pool di connessioni keep-alive.
+    """
+    global _async_client, _async_client_loop  # pylint: disable=global-statement
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+            _async_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=OLLAMA_HTTP_POOL_MAXSIZE,
+                    max_keepalive_connections=OLLAMA_HTTP_POOL_MAXSIZE,
+                    keepalive_expiry=OLLAMA_HTTP_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(None, connect=OLLAMA_CONNECT_TIMEOUT),
+            )
+            _async_client_loop = loop
+        return _async_client
+
+
+def close_http_clients() -> None:
+    """
+    Chiude la sessione sincrona condivisa e dimentica il client asincrono.
+
+    Il client asincrono va chiuso dal proprio event loop (vedi `aclose_http_clients`);
+    qui viene solo rilasciato il riferimento.
+    """
+    global _session, _async_client, _async_client_loop  # pylint: disable=global-statement
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _async_client = None
+        _async_client_loop = None
+
+
+async def aclose_http_clients() -> None:
+    """
+    Chiude entrambi i client condivisi dall'event loop dell'applicazione.
+    """
+    client = _async_client
+    if client is not None and not client.is_closed:
+        await client.aclose()
+    close_http_clients()
@@ -3,44 +3,66 @@ License Recommender Module.
 
 Questo modulo fornisce raccomandazioni di licenza basate sull'intelligenza artificiale in base ai requisiti
 e ai vincoli dell'utente. Viene utilizzato quando non viene rilevata alcuna licenza principale.
+
+La risposta dell'LLM è vincolata allo schema di `LicenseSuggestionResponse` e validata
+(vedi `structured_output`); le risposte non valide vengono corrette con un numero limitato
+di tentativi prima di ricadere sulla raccomandazione di ripiego.
 """
 
-import json
 import logging
-from typing import Dict, List
-
-from app.services.llm.ollama_api import call_ollama_deepseek
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.models.schemas import LicenseSuggestionResponse
+from app.services.executors import IO, run_stage
+from app.services.llm.circuit_breaker import CircuitOpenError
+from app.services.llm.ollama_api import call_ollama_deepseek, stream_ollama
+from app.services.llm.scheduler import INTERACTIVE, llm_priority
+from app.services.llm.structured_output import (
+    StructuredOutputError,
+    generate_structured,
+    parse_structured,
+)
+from app.utility.config import OLLAMA_GENERAL_MODEL
+from app.services.compatibility.recommender import recommend_license
 
 logger = logging.getLogger(__name__)
 
 
-def suggest_license_based_on_requirements(
+def deterministic_license_suggestion(
         requirements: Dict[str, any],
         detected_licenses: List[str] = None
-) -> Dict[str, any]:
+) -> Optional[Dict[str, any]]:
+    """
+    Percorso veloce: raccomandazione deterministica basata sulla matrice.
+
+    Viene usato solo se non sono presenti requisiti aggiuntivi in testo libero, che
+    richiedono l'interpretazione dell'LLM.
+
+    Args:
+        requirements (Dict[str, any]): I requisiti dell'utente.
+        detected_licenses (List[str]): Le licenze già rilevate nel progetto.
 
+    Returns:
+        Optional[Dict[str, any]]: La raccomandazione, o None se serve l'LLM.
     """
-    Suggerisce una licenza appropriata in base ai requisiti forniti dall'utente.
+    if (requirements.get("additional_requirements") or "").strip():
+        return None
+    return recommend_license(requirements, detected_licenses)
 
-    Questa funzione prende i requisiti dell'utente (uso commerciale, modifica, distribuzione,
-    concessione di brevetti, ecc.) e chiede all'LLM di raccomandare la licenza più adatta.
+
+def build_license_suggestion_prompt(
+        requirements: Dict[str, any],
+        detected_licenses: List[str] = None
+) -> str:
+    """
+    Costruisce il prompt di raccomandazione della licenza per l'LLM.
 
     Args:
-        requirements (Dict[str, any]): Dizionario contenente i requisiti dell'utente:
-            - commercial_use (bool): Se l'uso commerciale è richiesto
-            - modification (bool): Se la modifica è consentita
-            - distribution (bool): Se la distribuzione è consentita
-            - patent_grant (bool): Se la concessione di brevetti è necessaria
-            - trademark_use (bool): Se l'uso del marchio è necessario
-            - liability (bool): Se la protezione dalla responsabilità è necessaria
-            - copyleft (str): Preferenza copyleft ("strong", "weak", "none")
-            - additional_requirements (str): Eventuali requisiti aggiuntivi in testo libero
+        requirements (Dict[str, any]): I requisiti dell'utente.
+        detected_licenses (List[str]): Le licenze già rilevate nel progetto.
 
     Returns:
-        Dict[str, any]: Un dizionario contenente:
-            - suggested_license (str): La licenza raccomandata
-            - explanation (str): Spiegazione della raccomandazione
-            - alternatives (List[str]): Opzioni di licenza alternative
+        str: Il prompt da inviare al modello generico.
     """
     # Costruisce la descrizione dei requisiti
     req_parts = []
@@ -88,7 +110,7 @@ def suggest_license_based_on_requirements(
         detected_text = ", ".join(detected_licenses)
         requirements_text += f"\n\n### EXISTING LICENSES IN PROJECT\n{detected_text}\n\n**IMPORTANT**: The recommended license MUST be compatible with ALL existing licenses listed above. If incompatible, choose an alternative that ensures compatibility."
 
-    prompt = f"""### ROLE
+    return f"""### ROLE
 You are an expert in open source software licensing. Your task is to recommend
 the most appropriate license for a software project based on the user's requirements.
 
@@ -112,36 +134,70 @@ Just the raw JSON object in this exact format:
 
 Respond ONLY with the JSON object, nothing else."""
 
-    response = ""
-    try:
-        response = call_ollama_deepseek(prompt)
-
-        # Clean up response (remove markdown code blocks if present)
-        response = response.strip() if response else ""
-        if not response:
-            logger.error("LLM response is empty or None.")
-            raise ValueError("Empty response from LLM")
-        if response.startswith("```json"):
-            response = response[7:]
-        if response.startswith("```"):
-            response = response[3:]
-        if response.endswith("```"):
-            response = response[:-3]
-        response = response.strip()
-
-        # Analizza la risposta JSON
-        result = json.loads(response)
 
-        return {
-            "suggested_license": result.get("suggested_license", "MIT"),
-            "explanation": result.get("explanation", "Unable to generate explanation"),
-            "alternatives": result.get("alternatives", ["Apache-2.0", "BSD-3-Clause"])
-        }
+LICENSE_SUGGESTION_OUTPUT = "license_suggestion"
 
-    except (json.JSONDecodeError, ValueError) as e:
-        logger.error("Failed to parse LLM response as JSON: %s", e)
-        logger.debug("Raw response: %s", response)
 
+def _structured_call(prompt: str, schema: Dict[str, Any]) -> str:
+    """
+    Interroga il modello generico vincolando la risposta allo schema JSON indicato.
+
+    Args:
+        prompt (str): Il prompt di input.
+        schema (Dict[str, Any]): Lo schema JSON della risposta.
+
+    Returns:
+        str: La risposta grezza dell'LLM.
+    """
+    return call_ollama_deepseek(prompt, response_format=schema)
+
+
+def parse_license_suggestion(response: Optional[str]) -> Dict[str, any]:
+    """
+    Valida la risposta JSON dell'LLM con la raccomandazione di licenza.
+
+    Args:
+        response (Optional[str]): La risposta grezza dell'LLM.
+
+    Returns:
+        Dict[str, any]: Un dizionario con 'suggested_license', 'explanation' e 'alternatives'.
+
+    Raises:
+        StructuredOutputError: Se la risposta è vuota, non è JSON o non rispetta lo schema
+            di `LicenseSuggestionResponse` (sottoclasse di ValueError).
+    """
+    return _suggestion_dict(parse_structured(response, LicenseSuggestionResponse))
+
+
+def _suggestion_dict(result: LicenseSuggestionResponse) -> Dict[str, any]:
+    """
+    Converte la risposta validata nel dizionario restituito dal servizio.
+
+    Args:
+        result (LicenseSuggestionResponse): La risposta validata dell'LLM.
+
+    Returns:
+        Dict[str, any]: Un dizionario con 'suggested_license', 'explanation' e 'alternatives'.
+    """
+    return {
+        "suggested_license": result.suggested_license,
+        "explanation": result.explanation,
+        "alternatives": result.alternatives or [],
+    }
+
+
+def fallback_license_suggestion(parse_error: bool) -> Dict[str, any]:
+    """
+    Restituisce la raccomandazione di ripiego (MIT) quando l'LLM non produce un risultato.
+
+    Args:
+        parse_error (bool): True se la risposta dell'LLM non era un JSON valido,
+            False per qualsiasi altro errore.
+
+    Returns:
+        Dict[str, any]: La raccomandazione di ripiego.
+    """
+    if parse_error:
         # Fallback a MIT come default sicuro
         return {
             "suggested_license": "MIT",
@@ -150,17 +206,157 @@ Respond ONLY with the JSON object, nothing else."""
                            "with minimal restrictions.",
             "alternatives": ["Apache-2.0", "BSD-3-Clause", "ISC"]
         }
+    return {
+        "suggested_license": "MIT",
+        "explanation": "An error occurred during analysis. MIT License is suggested as a safe "
+                       "default permissive license.",
+        "alternatives": ["Apache-2.0", "BSD-3-Clause"]
+    }
+
+
+def degraded_license_suggestion(
+        requirements: Dict[str, any],
+        detected_licenses: List[str] = None
+) -> Dict[str, any]:
+    """
+    Raccomandazione dalla matrice quando l'LLM non è disponibile (circuito aperto).
+
+    I requisiti aggiuntivi in testo libero non possono essere interpretati: la
+    spiegazione lo segnala all'utente.
+
+    Args:
+        requirements (Dict[str, any]): I requisiti dell'utente.
+        detected_licenses (List[str]): Le licenze già rilevate nel progetto.
+
+    Returns:
+        Dict[str, any]: La raccomandazione deterministica, o quella di ripiego (MIT) se la
+        matrice non produce un risultato.
+    """
+    result = recommend_license(requirements, detected_licenses)
+    if not result:
+        return fallback_license_suggestion(parse_error=False)
+    return {
+        **result,
+        "explanation": (
+            f"{result['explanation']} Note: the AI service is temporarily unavailable, "
+            f"so the additional requirements were not evaluated."
+        ),
+    }
+
+
+def suggest_license_based_on_requirements(
+        requirements: Dict[str, any],
+        detected_licenses: List[str] = None
+) -> Dict[str, any]:
+
+    """
+    Suggerisce una licenza appropriata in base ai requisiti forniti dall'utente.
+
+    Questa funzione prende i requisiti dell'utente (uso commerciale, modifica, distribuzione,
+    concessione di brevetti, ecc.) e chiede all'LLM di raccomandare la licenza più adatta.
+
+    Se non sono presenti requisiti aggiuntivi in testo libero, la raccomandazione viene
+    prima calcolata in modo deterministico dalla matrice di compatibilità
+    (vedi `recommend_license`); l'LLM viene interrogato solo se questo percorso veloce
+    non produce un risultato.
+
+    Args:
+        requirements (Dict[str, any]): Dizionario contenente i requisiti dell'utente:
+            - commercial_use (bool): Se l'uso commerciale è richiesto
+            - modification (bool): Se la modifica è consentita
+            - distribution (bool): Se la distribuzione è consentita
+            - patent_grant (bool): Se la concessione di brevetti è necessaria
+            - trademark_use (bool): Se l'uso del marchio è necessario
+            - liability (bool): Se la protezione dalla responsabilità è necessaria
+            - copyleft (str): Preferenza copyleft ("strong", "weak", "none")
+            - additional_requirements (str): Eventuali requisiti aggiuntivi in testo libero
+
+    Returns:
+        Dict[str, any]: Un dizionario contenente:
+            - suggested_license (str): La licenza raccomandata
+            - explanation (str): Spiegazione della raccomandazione
+            - alternatives (List[str]): Opzioni di licenza alternative
+    """
+    fast_result = deterministic_license_suggestion(requirements, detected_licenses)
+    if fast_result:
+        return fast_result
+
+    prompt = build_license_suggestion_prompt(requirements, detected_licenses)
+
+    try:
+        # Un utente è in attesa della risposta: precedenza sul lavoro in blocco
+        with llm_priority(INTERACTIVE):
+            result = generate_structured(
+                LICENSE_SUGGESTION_OUTPUT, prompt, LicenseSuggestionResponse, call=_structured_call
+            )
+        return _suggestion_dict(result)
+
+    except StructuredOutputError as e:
+        logger.error("LLM license suggestion does not match the schema: %s", e)
+
+        return fallback_license_suggestion(parse_error=True)
+
+    except CircuitOpenError:
+        logger.warning("LLM circuit open, using the deterministic license recommendation")
+        return degraded_license_suggestion(requirements, detected_licenses)
 
     except Exception as e:
         logger.exception("Error during license suggestion: %s", e)
 
-        # Fallback
-        return {
-            "suggested_license": "MIT",
-            "explanation": "An error occurred during analysis. MIT License is suggested as a safe "
-                           "default permissive license.",
-            "alternatives": ["Apache-2.0", "BSD-3-Clause"]
-        }
+        return fallback_license_suggestion(parse_error=False)
+
+
+async def stream_license_suggestion(
+        requirements: Dict[str, any],
+        detected_licenses: List[str] = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Variante in streaming di `suggest_license_based_on_requirements`.
+
+    Il percorso veloce deterministico produce subito il risultato; altrimenti i token
+    dell'LLM vengono inoltrati man mano e la risposta completa viene validata alla fine.
+    Una risposta non valida viene corretta con chiamate bloccanti (senza streaming).
+
+    Args:
+        requirements (Dict[str, any]): I requisiti dell'utente.
+        detected_licenses (List[str]): Le licenze già rilevate nel progetto.
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: Coppie (evento, dati): "token" con il frammento di
+        testo generato e infine "result" con la raccomandazione.
+    """
+    fast_result = deterministic_license_suggestion(requirements, detected_licenses)
+    if fast_result:
+        yield "result", fast_result
+        return
+
+    prompt = build_license_suggestion_prompt(requirements, detected_licenses)
+
+    schema = LicenseSuggestionResponse.model_json_schema()
+    parts = []
+    try:
+        async for token in stream_ollama(
+                OLLAMA_GENERAL_MODEL, prompt, timeout=240, response_format=schema
+        ):
+            parts.append(token)
+            yield "token", {"text": token}
+        with llm_priority(INTERACTIVE):
+            validated = await run_stage(
+                IO, generate_structured, LICENSE_SUGGESTION_OUTPUT, prompt, LicenseSuggestionResponse,
+                call=_structured_call, response="".join(parts),
+            )
+        result = _suggestion_dict(validated)
+    except StructuredOutputError as e:
+        logger.error("Streamed LLM license suggestion does not match the schema: %s", e)
+        result = fallback_license_suggestion(parse_error=True)
+    except CircuitOpenError:
+        logger.warning("LLM circuit open, using the deterministic license recommendation")
+        result = degraded_license_suggestion(requirements, detected_licenses)
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Error during streamed license suggestion")
+        result = fallback_license_suggestion(parse_error=False)
+
+    yield "result", result
 
 
 def needs_license_suggestion(main_license: str, issues: List[Dict]) -> bool:
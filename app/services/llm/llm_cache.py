@@ -0,0 +1,271 @@
+"""
+LLM Answer Cache Module.
+
+Questo modulo fornisce una cache persistente (SQLite) per le risposte dell'LLM.
+Molte richieste ripetono la stessa domanda al modello (es. licenze alternative per la
+stessa coppia licenza rilevata / licenza principale), sia all'interno della stessa analisi
+sia tra analisi successive: la cache permette di risolverle senza interrogare Ollama.
+
+Ogni voce è identificata da un hash SHA-256 di:
+    - nome del modello,
+    - versione del template del prompt (da incrementare quando il prompt cambia),
+    - input normalizzati del prompt.
+
+La cache è limitata sia nel tempo (TTL) sia nella dimensione (numero massimo di voci,
+con rimozione delle voci usate meno di recente).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Callable, Dict, Optional
+
+from app.utility.config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_CACHE_MAX_ENTRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS llm_answers ("
+    "key TEXT PRIMARY KEY, "
+    "model TEXT NOT NULL, "
+    "response TEXT NOT NULL, "
+    "created_at REAL NOT NULL, "
+    "accessed_at REAL NOT NULL)"
+)
+
+
+def make_cache_key(model: str, template_version: str, inputs: Dict[str, Any]) -> str:
+    """
+    Calcola la chiave di cache per una richiesta all'LLM.
+
+    Args:
+        model (str): Il nome del modello interrogato.
+        template_version (str): La versione del template del prompt.
+        inputs (Dict[str, Any]): Gli input normalizzati del prompt (serializzabili in JSON).
+
+    Returns:
+        str: L'hash esadecimale SHA-256 che identifica la richiesta.
+    """
+    payload = json.dumps(
+        {"model": model, "template": template_version, "inputs": inputs},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMAnswerCache:
+    """
+    Cache persistente delle risposte LLM, limitata per TTL e numero di voci.
+
+    Ogni operazione apre una connessione SQLite dedicata: la cache può quindi essere
+    usata in sicurezza dai thread del pool di arricchimento e da più processi worker.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        """
+        Inizializza la cache creando il file e lo schema se necessario.
+
+        Args:
+            path (str): Il percorso del file SQLite.
+            ttl_seconds (float): La durata di validità di una voce in secondi.
+            max_entries (int): Il numero massimo di voci conservate.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Apre una nuova connessione al database della cache.
+
+        Returns:
+            sqlite3.Connection: La connessione aperta.
+        """
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def _count(self, stat: str, amount: int = 1) -> None:
+        """
+        Incrementa un contatore statistico in modo thread-safe.
+
+        Args:
+            stat (str): Il nome del contatore.
+            amount (int): L'incremento.
+        """
+        with self._lock:
+            self._stats[stat] += amount
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Restituisce la risposta memorizzata per la chiave, se presente e non scaduta.
+
+        Args:
+            key (str): La chiave calcolata con `make_cache_key`.
+
+        Returns:
+            Optional[str]: La risposta memorizzata, o None in caso di miss.
+        """
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM llm_answers WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_answers WHERE key = ?", (key,))
+                    row = None
+                if row is not None:
+                    conn.execute(
+                        "UPDATE llm_answers SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+        except sqlite3.Error:
+            logger.warning("LLM cache lookup failed", exc_info=True)
+            row = None
+
+        self._count("hits" if row is not None else "misses")
+        return row[0] if row is not None else None
+
+    def set(self, key: str, model: str, response: str) -> None:
+        """
+        Memorizza una risposta ed elimina le voci usate meno di recente oltre il limite.
+
+        Args:
+            key (str): La chiave calcolata con `make_cache_key`.
+            model (str): Il nome del modello (conservato per diagnostica).
+            response (str): La risposta dell'LLM.
+        """
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_answers "
+                    "(key, model, response, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now),
+                )
+                evicted = conn.execute(
+                    "DELETE FROM llm_answers WHERE key IN ("
+                    "SELECT key FROM llm_answers ORDER BY accessed_at DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+        except sqlite3.Error:
+            logger.warning("LLM cache write failed", exc_info=True)
+            return
+
+        self._count("writes")
+        if evicted > 0:
+            self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        """
+        Rimuove tutte le voci e azzera le statistiche.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM llm_answers")
+        with self._lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Restituisce le statistiche di utilizzo della cache.
+
+        Returns:
+            Dict[str, int]: Contatori di hit, miss, scritture, rimozioni e numero di voci.
+        """
+        with closing(self._connect()) as conn:
+            size = conn.execute("SELECT COUNT(*) FROM llm_answers").fetchone()[0]
+        with self._lock:
+            return {**self._stats, "size": size}
+
+
+_cache: Optional[LLMAnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMAnswerCache]:
+    """
+    Restituisce l'istanza condivisa della cache, creandola al primo utilizzo.
+
+    Returns:
+        Optional[LLMAnswerCache]: La cache, o None se disabilitata o non inizializzabile.
+    """
+    global _cache  # pylint: disable=global-statement
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = LLMAnswerCache(
+                    LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES
+                )
+            except (OSError, sqlite3.Error):
+                logger.exception("Unable to initialise the LLM cache at %s", LLM_CACHE_PATH)
+                return None
+        return _cache
+
+
+def reset_llm_cache() -> None:
+    """
+    Dimentica l'istanza condivisa della cache (il file su disco non viene modificato).
+
+    L'istanza successiva viene ricreata con la configurazione corrente; utile nei test.
+    """
+    global _cache  # pylint: disable=global-statement
+    with _cache_lock:
+        _cache = None
+
+
+def cached_llm_call(
+        model: str,
+        template_version: str,
+        inputs: Dict[str, Any],
+        call: Callable[[], str]
+) -> str:
+    """
+    Esegue una chiamata LLM passando prima dalla cache persistente.
+
+    Le risposte vuote e le eccezioni non vengono memorizzate, così un errore transitorio
+    del modello non viene riproposto alle analisi successive.
+
+    Args:
+        model (str): Il nome del modello interrogato.
+        template_version (str): La versione del template del prompt.
+        inputs (Dict[str, Any]): Gli input normalizzati del prompt.
+        call (Callable[[], str]): La funzione che interroga effettivamente l'LLM.
+
+    Returns:
+        str: La risposta memorizzata o quella appena ottenuta dall'LLM.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return call()
+
+    key = make_cache_key(model or "", template_version, inputs)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.debug("LLM cache hit for model %s", model)
+        return cached
+
+    response = call()
+    if response:
+        cache.set(key, model or "", response)
+    return response
+
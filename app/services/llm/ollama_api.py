@@ -4,26 +4,96 @@ Ollama API Integration Module.
 Questo modulo fornisce funzioni helper di basso livello per interagire con l'API LLM di Ollama.
 Gestisce il ciclo di vita del servizio Ollama (avvio, controllo stato), la gestione dei modelli
 (controllo installazione, pull) ed esegue prompt contro modelli specifici (coding vs general).
+
+Oltre alle chiamate bloccanti, `stream_ollama` consuma la generazione in streaming
+(un chunk JSON per riga) e restituisce i token man mano che arrivano.
+
+Tutte le richieste HTTP passano per la sessione condivisa con pool di connessioni
+keep-alive (vedi `http_client`).
+
+Lo stato di prontezza (servizio attivo e modello installato) viene memorizzato con un TTL:
+entro il TTL i prompt non eseguono alcun controllo aggiuntivo, dopo la scadenza lo stato
+viene aggiornato in background e viene invalidato solo in caso di errori di connessione.
+
+Le chiamate bloccanti identiche (stesso modello e stesso prompt) eseguite in contemporanea
+vengono unificate ("single-flight"): solo la prima raggiunge Ollama, le altre attendono e
+ricevono lo stesso risultato (o la stessa eccezione).
+
+Ogni richiesta di generazione occupa uno slot dello scheduler LLM (vedi `scheduler`),
+che dà la precedenza alle richieste interattive rispetto al lavoro in blocco.
+
+All'avvio dell'applicazione i modelli configurati possono essere scaricati e caricati
+in memoria (`start_model_warmup`); tutte le richieste indicano `keep_alive` così i
+modelli restano caricati tra una richiesta e l'altra.
+
+Le richieste di generazione passano per il circuit breaker del modello (vedi
+`circuit_breaker`): dopo ripetuti errori o violazioni dello SLA di latenza le chiamate
+falliscono subito con `CircuitOpenError` invece di attendere il timeout HTTP.
+
+Con più istanze Ollama configurate (`OLLAMA_HOSTS`, vedi `host_pool`) ogni richiesta va
+all'istanza con meno richieste in corso; se l'istanza non è raggiungibile, non ha il
+modello (404) o è sovraccarica (503) la richiesta passa all'istanza successiva. La
+verifica di prontezza controlla i modelli installati su ogni istanza.
+
+Con `LLM_BACKEND` diverso da "ollama" le risposte vengono registrate o servite da una
+cassetta (vedi `cassette`): nelle modalità "replay" e "stub" Ollama non viene mai
+contattato, mentre scheduler, circuit breaker e deduplicazione restano attivi.
+
+Le chiamate che richiedono una risposta JSON possono indicare lo schema atteso
+(`response_format`), inoltrato a Ollama nel parametro `format` per vincolare la
+generazione (vedi `structured_output`).
 """
 
+import asyncio
+import hashlib
 import json
 import os
 import subprocess
+import threading
 import time
 import logging
+from concurrent.futures import Future
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import httpx
 import requests
 
+from app.services.executors import IO, run_stage
+from app.services.llm.cassette import LLMCassette, get_llm_backend
+from app.services.llm.circuit_breaker import get_circuit_breaker
+from app.services.llm.host_pool import HostPool, OllamaHost, OllamaHostUnavailable, get_host_pool
+from app.services.llm.scheduler import (
+    INTERACTIVE,
+    LLMSchedulerBusy,
+    current_priority,
+    get_llm_scheduler,
+)
+from app.services.llm.http_client import (
+    async_request_timeout,
+    get_async_http_client,
+    get_http_session,
+    request_timeout,
+)
 from app.utility.config import (
     OLLAMA_URL,
     OLLAMA_GENERAL_MODEL,
     OLLAMA_HOST_VERSION,
     OLLAMA_CODING_MODEL,
     OLLAMA_HOST_TAGS,
-    MINIMAL_JSON_BASE_DIR
+    OLLAMA_READINESS_TTL,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_WARMUP_TIMEOUT,
+    MINIMAL_JSON_BASE_DIR,
+    LLM_BREAKER_CODING_LATENCY_SLA,
+    LLM_BREAKER_GENERAL_LATENCY_SLA,
 )
 
 logger = logging.getLogger(__name__)
 
+# Risposte dopo le quali una richiesta passa a un'altra istanza del pool
+# (modello non presente, istanza sovraccarica)
+_FAILOVER_STATUS_CODES = (404, 503)
+
 
 def _is_ollama_running(timeout: float = 2.0) -> bool:
     """
@@ -38,7 +108,7 @@ def _is_ollama_running(timeout: float = 2.0) -> bool:
         bool: True se il servizio risponde, False altrimenti.
     """
     try:
-        requests.get(f"{OLLAMA_HOST_VERSION}", timeout=timeout)
+        get_http_session().get(f"{OLLAMA_HOST_VERSION}", timeout=timeout)
         return True
     except requests.RequestException:
         return False
@@ -92,7 +162,7 @@ def _is_model_installed(model_name: str) -> bool:
     """
     try:
         # L'endpoint di solito restituisce un JSON con un elenco "models"
-        res = requests.get(f"{OLLAMA_HOST_TAGS}", timeout=3).json()
+        res = get_http_session().get(f"{OLLAMA_HOST_TAGS}", timeout=3).json()
         models = [m.get("name") for m in res.get("models", []) if m.get("name")]
         return model_name in models
     except (requests.RequestException, ValueError, KeyError):
@@ -119,6 +189,192 @@ def _pull_model(model_name: str, timeout: int = 600) -> None:
         logger.exception("Error pulling model: %s", model_name)
 
 
+def _refresh_pool_hosts(pool: HostPool, model_name: str) -> bool:
+    """
+    Verifica le istanze del pool e i modelli installati su ciascuna.
+
+    Le istanze raggiungibili aggiornano l'elenco dei modelli installati, quelle non
+    raggiungibili vengono escluse temporaneamente.
+
+    Args:
+        pool (HostPool): Il pool di istanze.
+        model_name (str): Il modello di cui verificare le istanze.
+
+    Returns:
+        bool: True se almeno un'istanza raggiungibile ha il modello installato.
+    """
+    available = False
+    for host in pool.hosts_for(model_name):
+        try:
+            res = get_http_session().get(host.tags_url, timeout=3).json()
+        except (requests.RequestException, ValueError) as e:
+            pool.mark_down(host, str(e))
+            continue
+        pool.update_models(host, (m.get("name") for m in res.get("models", []) if m.get("name")))
+        available = available or bool(host.has_model(model_name))
+    return available
+
+
+def _pull_model_on_host(host: OllamaHost, model_name: str, timeout: int = 600) -> None:
+    """
+    Scarica un modello su un'istanza del pool tramite l'API di Ollama.
+
+    Args:
+        host (OllamaHost): L'istanza.
+        model_name (str): Il nome del modello da scaricare.
+        timeout (int): Tempo massimo di attesa per il completamento del download.
+    """
+    try:
+        get_http_session().post(
+            host.pull_url, json={"model": model_name, "stream": False},
+            timeout=request_timeout(timeout),
+        ).raise_for_status()
+    except requests.RequestException:
+        logger.exception("Error pulling model %s on %s", model_name, host.base_url)
+
+
+def _ensure_model_on_pool(pool: HostPool, model_name: str, pull_if_needed: bool) -> None:
+    """
+    Garantisce che almeno un'istanza raggiungibile del pool abbia il modello.
+
+    Se nessuna istanza lo ha, il modello viene scaricato sulle istanze raggiungibili.
+    Le istanze non vengono mai avviate: sono servizi remoti.
+
+    Args:
+        pool (HostPool): Il pool di istanze.
+        model_name (str): Il nome del modello.
+        pull_if_needed (bool): Se True, scarica il modello quando manca ovunque.
+
+    Raises:
+        RuntimeError: Se nessuna istanza raggiungibile ha (o può scaricare) il modello.
+    """
+    if _refresh_pool_hosts(pool, model_name):
+        return
+    if not pull_if_needed:
+        raise RuntimeError(f"Model {model_name} is not installed on any Ollama host.")
+    for host in pool.hosts_for(model_name):
+        if pool.is_up(host):
+            _pull_model_on_host(host, model_name)
+    if not _refresh_pool_hosts(pool, model_name):
+        raise RuntimeError(f"Model {model_name} could not be installed on any Ollama host.")
+
+
+class _ReadinessCache:
+    """
+    Memorizza i modelli per cui Ollama è stato verificato come pronto.
+
+    Per ogni modello conserva l'istante dell'ultima verifica riuscita. Lo stato è:
+    - "fresh": verificato entro il TTL, nessun controllo necessario;
+    - "stale": verificato in passato ma oltre il TTL, si aggiorna in background;
+    - "unknown": mai verificato o invalidato, serve un controllo sincrono.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        """
+        Args:
+            ttl_seconds (float): La durata di validità di una verifica in secondi.
+        """
+        self.ttl_seconds = ttl_seconds
+        self._verified_at: Dict[str, float] = {}
+        self._refreshing: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+    def status(self, model_name: str) -> str:
+        """
+        Restituisce lo stato di prontezza memorizzato per il modello.
+
+        Args:
+            model_name (str): Il nome del modello.
+
+        Returns:
+            str: "fresh", "stale" o "unknown".
+        """
+        with self._lock:
+            verified_at = self._verified_at.get(model_name)
+        if verified_at is None:
+            return "unknown"
+        if time.monotonic() - verified_at <= self.ttl_seconds:
+            return "fresh"
+        return "stale"
+
+    def mark_ready(self, model_name: str) -> None:
+        """
+        Registra una verifica riuscita per il modello.
+
+        Args:
+            model_name (str): Il nome del modello.
+        """
+        with self._lock:
+            self._verified_at[model_name] = time.monotonic()
+
+    def invalidate(self, model_name: Optional[str] = None) -> None:
+        """
+        Dimentica lo stato di un modello, o di tutti se `model_name` è None.
+
+        Args:
+            model_name (Optional[str]): Il modello da invalidare.
+        """
+        with self._lock:
+            if model_name is None:
+                self._verified_at.clear()
+            else:
+                self._verified_at.pop(model_name, None)
+
+    def refresh_in_background(self, model_name: str) -> None:
+        """
+        Avvia (al massimo una volta per modello) la verifica asincrona della prontezza.
+
+        Args:
+            model_name (str): Il nome del modello da verificare.
+        """
+        with self._lock:
+            running = self._refreshing.get(model_name)
+            if running is not None and running.is_alive():
+                return
+            thread = threading.Thread(
+                target=self._refresh,
+                args=(model_name,),
+                name=f"ollama-readiness-{model_name}",
+                daemon=True,
+            )
+            self._refreshing[model_name] = thread
+        thread.start()
+
+    def _refresh(self, model_name: str) -> None:
+        """
+        Verifica servizio e modello senza avviare né scaricare nulla.
+
+        Se la verifica fallisce lo stato viene invalidato: la chiamata successiva
+        eseguirà il controllo sincrono completo (con avvio e pull se necessari).
+
+        Args:
+            model_name (str): Il nome del modello da verificare.
+        """
+        pool = get_host_pool()
+        if pool is not None:
+            ready = _refresh_pool_hosts(pool, model_name)
+        else:
+            ready = _is_ollama_running() and _is_model_installed(model_name)
+        if ready:
+            self.mark_ready(model_name)
+        else:
+            logger.warning("Background readiness check failed for model %s", model_name)
+            self.invalidate(model_name)
+
+
+_readiness = _ReadinessCache(OLLAMA_READINESS_TTL)
+
+
+def invalidate_ollama_readiness(model_name: Optional[str] = None) -> None:
+    """
+    Invalida lo stato di prontezza memorizzato di Ollama.
+
+    Args:
+        model_name (Optional[str]): Il modello da invalidare; se None invalida tutti i modelli.
+    """
+    _readiness.invalidate(model_name)
+
+
 def ensure_ollama_ready(
         model_name: str,
         start_if_needed: bool = True,
@@ -127,6 +383,12 @@ def ensure_ollama_ready(
     """
     Orchestratore per garantire che Ollama sia in esecuzione e che il modello richiesto sia disponibile.
 
+    Il risultato viene memorizzato per `OLLAMA_READINESS_TTL` secondi. Uno stato scaduto
+    non blocca la chiamata: viene aggiornato in background mentre il prompt procede.
+
+    Con il pool di istanze vengono verificati i modelli installati su ogni istanza; le
+    istanze remote non vengono avviate.
+
     Args:
         model_name (str): Il nome del modello di destinazione.
         start_if_needed (bool): Se True, tenta di avviare il server se non è attivo.
@@ -135,6 +397,19 @@ def ensure_ollama_ready(
     Raises:
         RuntimeError: Se il servizio non può essere avviato o il modello è mancante.
     """
+    status = _readiness.status(model_name)
+    if status == "fresh":
+        return
+    if status == "stale":
+        _readiness.refresh_in_background(model_name)
+        return
+
+    pool = get_host_pool()
+    if pool is not None:
+        _ensure_model_on_pool(pool, model_name, pull_if_needed)
+        _readiness.mark_ready(model_name)
+        return
+
     if not _is_ollama_running():
         if not start_if_needed or not _start_ollama():
             raise RuntimeError("Ollama is not running and could not be started.")
@@ -144,8 +419,447 @@ def ensure_ollama_ready(
             raise RuntimeError(f"Model {model_name} is not installed.")
         _pull_model(model_name)
 
+    _readiness.mark_ready(model_name)
+
+
+class _ModelWarmup:
+    """
+    Stato del warm-up dei modelli configurati.
 
-def call_ollama_qwen3_coder(prompt: str) -> str:
+    Per ogni modello conserva lo stato ("pending", "loading", "ready", "failed") e i
+    dettagli dell'ultimo tentativo (durata del caricamento o errore).
+    """
+
+    def __init__(self):
+        """
+        Inizializza lo stato vuoto (nessun warm-up avviato).
+        """
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict[str, Any]] = {}
+
+    def set(self, model_name: str, state: str, **details: Any) -> None:
+        """
+        Aggiorna lo stato di un modello.
+
+        Args:
+            model_name (str): Il nome del modello.
+            state (str): Il nuovo stato.
+            **details (Any): Dettagli aggiuntivi (es. `load_seconds`, `error`).
+        """
+        with self._lock:
+            self._states[model_name] = {"state": state, **details}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Restituisce una copia dello stato corrente.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Lo stato per modello.
+        """
+        with self._lock:
+            return {model: dict(info) for model, info in self._states.items()}
+
+    def clear(self) -> None:
+        """
+        Dimentica lo stato di tutti i modelli.
+        """
+        with self._lock:
+            self._states.clear()
+
+
+_warmup = _ModelWarmup()
+
+
+def configured_models() -> List[str]:
+    """
+    Restituisce i modelli configurati (coding e generico), senza duplicati.
+
+    Returns:
+        List[str]: I nomi dei modelli configurati.
+    """
+    return list(dict.fromkeys(m for m in (OLLAMA_CODING_MODEL, OLLAMA_GENERAL_MODEL) if m))
+
+
+def warm_up_model(model_name: str) -> bool:
+    """
+    Scarica (se necessario) e carica in memoria un modello.
+
+    Una richiesta di generazione con prompt vuoto fa caricare il modello a Ollama senza
+    generare testo; `keep_alive` stabilisce per quanto resta in memoria. Con il pool il
+    modello viene caricato su ogni istanza raggiungibile che lo ha installato.
+
+    Args:
+        model_name (str): Il modello da preparare.
+
+    Returns:
+        bool: True se il modello è stato caricato, False in caso di errore.
+    """
+    _warmup.set(model_name, "loading")
+    start = time.monotonic()
+    payload = {"model": model_name, "prompt": "", "stream": False, "keep_alive": OLLAMA_KEEP_ALIVE}
+    try:
+        ensure_ollama_ready(model_name=model_name)
+        pool = get_host_pool()
+        if pool is None:
+            _post_generate(payload, timeout=OLLAMA_WARMUP_TIMEOUT)
+        else:
+            _load_model_on_pool(pool, payload)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Warm-up of model %s failed: %s", model_name, e)
+        _warmup.set(model_name, "failed", error=str(e))
+        return False
+
+    load_seconds = round(time.monotonic() - start, 3)
+    logger.info("Model %s warmed up in %.1fs", model_name, load_seconds)
+    _warmup.set(model_name, "ready", load_seconds=load_seconds, keep_alive=OLLAMA_KEEP_ALIVE)
+    return True
+
+
+def _load_model_on_pool(pool: HostPool, payload: Dict) -> None:
+    """
+    Carica un modello su tutte le istanze del pool raggiungibili che lo hanno installato.
+
+    Args:
+        pool (HostPool): Il pool di istanze.
+        payload (Dict): La richiesta di generazione con prompt vuoto.
+
+    Raises:
+        RuntimeError: Se il modello non è stato caricato su alcuna istanza.
+    """
+    model_name = payload["model"]
+    loaded = 0
+    for host in pool.hosts_for(model_name):
+        if not pool.is_up(host) or not host.has_model(model_name):
+            continue
+        try:
+            get_http_session().post(
+                host.generate_url, json=payload, timeout=request_timeout(OLLAMA_WARMUP_TIMEOUT)
+            ).raise_for_status()
+        except requests.RequestException as e:
+            logger.warning("Warm-up of model %s on %s failed: %s", model_name, host.base_url, e)
+            continue
+        loaded += 1
+    if not loaded:
+        raise RuntimeError(f"Model {model_name} could not be loaded on any Ollama host")
+
+
+def start_model_warmup() -> Optional[threading.Thread]:
+    """
+    Avvia in background il warm-up dei modelli configurati.
+
+    L'avvio dell'applicazione non attende il caricamento: lo stato è consultabile con
+    `get_model_warmup_status`.
+
+    Returns:
+        Optional[threading.Thread]: Il thread avviato, o None se Ollama o i modelli
+        non sono configurati o se il backend LLM non usa Ollama ("replay", "stub").
+    """
+    models = configured_models()
+    backend = get_llm_backend()
+    if models and _is_offline(backend):
+        # Nessun modello da caricare: le risposte arrivano dalla cassetta
+        for model_name in models:
+            _warmup.set(model_name, "ready", load_seconds=0.0, backend=backend.mode)
+        return None
+    if not (OLLAMA_URL or get_host_pool()) or not models:
+        logger.info("Ollama warm-up skipped: URL or models not configured")
+        return None
+
+    for model_name in models:
+        _warmup.set(model_name, "pending")
+
+    def run() -> None:
+        for model_name in models:
+            warm_up_model(model_name)
+
+    thread = threading.Thread(target=run, name="ollama-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_model_warmup_status() -> Dict[str, Any]:
+    """
+    Restituisce lo stato di caricamento dei modelli configurati.
+
+    Returns:
+        Dict[str, Any]: `ready` (True se tutti i modelli sono caricati) e `models`
+        con lo stato di ciascun modello ("not_started" se il warm-up non è stato avviato).
+    """
+    states = _warmup.snapshot()
+    models = {
+        model_name: states.get(model_name, {"state": "not_started"})
+        for model_name in configured_models()
+    }
+    ready = bool(models) and all(info["state"] == "ready" for info in models.values())
+    return {"ready": ready, "models": models}
+
+
+def _post_generate(payload: Dict, timeout: float) -> requests.Response:
+    """
+    Invia la richiesta di generazione a Ollama.
+
+    In caso di errore di connessione lo stato di prontezza del modello viene invalidato,
+    così la chiamata successiva verifica di nuovo (ed eventualmente riavvia) il servizio.
+    Con il pool di istanze la richiesta passa all'istanza successiva (vedi
+    `_post_generate_pool`).
+
+    Args:
+        payload (Dict): Il payload della richiesta (modello, prompt, opzioni).
+        timeout (float): Il timeout di lettura della richiesta in secondi.
+
+    Returns:
+        requests.Response: La risposta HTTP con stato di successo.
+
+    Raises:
+        requests.ConnectionError: Se Ollama non è raggiungibile.
+        requests.HTTPError: Se l'API restituisce uno stato 4xx/5xx.
+        OllamaHostUnavailable: Se nessuna istanza del pool può servire il modello.
+    """
+    pool = get_host_pool()
+    if pool is not None:
+        return _post_generate_pool(pool, payload, timeout)
+    try:
+        resp = get_http_session().post(
+            OLLAMA_URL, json=payload, timeout=request_timeout(timeout)
+        )
+    except requests.ConnectionError:
+        _readiness.invalidate(payload.get("model"))
+        raise
+    resp.raise_for_status()
+    return resp
+
+
+def _post_generate_pool(pool: HostPool, payload: Dict, timeout: float) -> requests.Response:
+    """
+    Invia la richiesta di generazione all'istanza del pool con meno richieste in corso.
+
+    Se l'istanza non è raggiungibile viene esclusa temporaneamente; se non ha il modello
+    (404) o è sovraccarica (503) la richiesta passa all'istanza successiva. I timeout di
+    lettura non vengono ritentati: la generazione potrebbe essere ancora in corso.
+
+    Args:
+        pool (HostPool): Il pool di istanze.
+        payload (Dict): Il payload della richiesta (modello, prompt, opzioni).
+        timeout (float): Il timeout di lettura della richiesta in secondi.
+
+    Returns:
+        requests.Response: La risposta HTTP con stato di successo.
+
+    Raises:
+        requests.ConnectionError: Se nessuna istanza è raggiungibile.
+        requests.HTTPError: Se l'ultima istanza tentata restituisce uno stato 4xx/5xx.
+        OllamaHostUnavailable: Se nessuna istanza può servire il modello.
+    """
+    model_name = payload.get("model")
+    tried: List[OllamaHost] = []
+    last_error: Optional[requests.RequestException] = None
+    while True:
+        try:
+            host = pool.acquire(model_name, exclude=tried)
+        except OllamaHostUnavailable:
+            _readiness.invalidate(model_name)
+            if last_error is not None:
+                raise last_error
+            raise
+        tried.append(host)
+        try:
+            resp = get_http_session().post(
+                host.generate_url, json=payload, timeout=request_timeout(timeout)
+            )
+        except requests.ConnectionError as e:
+            pool.mark_down(host, str(e))
+            last_error = e
+            continue
+        finally:
+            pool.release(host)
+        try:
+            resp.raise_for_status()
+        except requests.HTTPError as e:
+            if resp.status_code not in _FAILOVER_STATUS_CODES:
+                raise
+            if resp.status_code == 404:
+                pool.mark_model_missing(host, model_name)
+            last_error = e
+            continue
+        return resp
+
+
+class _SingleFlight:
+    """
+    Unifica le chiamate identiche in corso nello stesso processo.
+
+    Il primo chiamante per una chiave esegue la funzione; quelli che arrivano mentre è
+    in corso attendono il suo risultato invece di ripetere la richiesta. La chiave viene
+    rilasciata al termine, quindi le chiamate successive vengono eseguite di nuovo.
+    """
+
+    def __init__(self):
+        """
+        Inizializza il registro delle chiamate in corso.
+        """
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[str, str], Future] = {}
+
+    def do(self, key: Tuple[str, str], fn: Callable[[], Any]) -> Any:
+        """
+        Esegue `fn` oppure attende la chiamata identica già in corso.
+
+        Args:
+            key (Tuple[str, str]): La chiave che identifica la chiamata.
+            fn (Callable[[], Any]): La funzione da eseguire se nessuna chiamata è in corso.
+
+        Returns:
+            Any: Il risultato della chiamata condivisa.
+
+        Raises:
+            Exception: L'eccezione sollevata dalla chiamata condivisa.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            logger.debug("Joining in-flight Ollama request for model %s", key[0])
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def in_flight(self) -> int:
+        """
+        Restituisce il numero di chiamate distinte attualmente in corso.
+
+        Returns:
+            int: Il numero di chiavi registrate.
+        """
+        with self._lock:
+            return len(self._calls)
+
+
+_single_flight = _SingleFlight()
+
+
+def _is_offline(backend: Optional[LLMCassette]) -> bool:
+    """
+    Indica se la cassetta sostituisce Ollama (modalità "replay" e "stub").
+
+    Args:
+        backend (Optional[LLMCassette]): La cassetta configurata, o None.
+
+    Returns:
+        bool: True se Ollama non deve essere contattato.
+    """
+    return backend is not None and not backend.live
+
+
+def _latency_sla(model_name: str, timeout: float) -> float:
+    """
+    Restituisce lo SLA di latenza di una chiamata per il circuit breaker del modello.
+
+    Args:
+        model_name (str): Il modello interrogato.
+        timeout (float): Il timeout della richiesta in secondi.
+
+    Returns:
+        float: Lo SLA configurato per il modello (`LLM_BREAKER_CODING_LATENCY_SLA`,
+        `LLM_BREAKER_GENERAL_LATENCY_SLA`) o, se non configurato, il timeout della richiesta.
+    """
+    configured = {
+        OLLAMA_CODING_MODEL: LLM_BREAKER_CODING_LATENCY_SLA,
+        OLLAMA_GENERAL_MODEL: LLM_BREAKER_GENERAL_LATENCY_SLA,
+    }.get(model_name)
+    return configured or timeout
+
+
+def _generate(
+        model_name: str,
+        prompt: str,
+        timeout: float,
+        response_format: Optional[Dict[str, Any]] = None
+) -> Dict:
+    """
+    Esegue un prompt bloccante, unificando le richieste identiche in corso.
+
+    La richiesta occupa uno slot dello scheduler con la priorità del contesto del
+    chiamante (vedi `llm_priority`).
+
+    Args:
+        model_name (str): Il modello da interrogare.
+        prompt (str): Il prompt di input.
+        timeout (float): Il timeout di lettura della richiesta in secondi.
+        response_format (Optional[Dict[str, Any]]): Lo schema JSON della risposta, o None
+            per una risposta in testo libero.
+
+    Returns:
+        Dict: Il corpo JSON della risposta di Ollama (condiviso, da non modificare).
+
+    Raises:
+        LLMSchedulerBusy: Se lo scheduler rifiuta la richiesta.
+        CircuitOpenError: Se il circuito del modello è aperto.
+        CassetteMiss: Se in modalità "replay" il prompt non è stato registrato.
+    """
+    priority = current_priority()
+
+    def run() -> Dict:
+        backend = get_llm_backend()
+        breaker = get_circuit_breaker(model_name or "")
+        if breaker is not None:
+            breaker.allow()
+        try:
+            if not _is_offline(backend):
+                ensure_ollama_ready(model_name=model_name)
+            payload = {
+                "model": model_name,
+                "prompt": prompt,
+                "stream": False,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+            }
+            if response_format is not None:
+                payload["format"] = response_format
+            with get_llm_scheduler().slot(priority):
+                # La latenza misurata esclude l'attesa in coda nello scheduler
+                start = time.monotonic()
+                if _is_offline(backend):
+                    data = backend.generate(payload)
+                else:
+                    data = _post_generate(payload, timeout=timeout).json()
+                    if backend is not None:
+                        backend.record(payload, data.get("response", ""))
+        except LLMSchedulerBusy:
+            if breaker is not None:
+                breaker.release()
+            raise
+        except Exception:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+        if breaker is not None:
+            breaker.record_success(time.monotonic() - start, _latency_sla(model_name, timeout))
+        return data
+
+    material = prompt
+    if response_format is not None:
+        material += json.dumps(response_format, sort_keys=True)
+    key = (model_name or "", hashlib.sha256(material.encode("utf-8")).hexdigest())
+    return _single_flight.do(key, run)
+
+
+def call_ollama_qwen3_coder(prompt: str, timeout: Optional[float] = None) -> str:
     """
     Esegue un prompt contro il modello specifico per il coding (es. Qwen).
 
@@ -155,6 +869,8 @@ def call_ollama_qwen3_coder(prompt: str) -> str:
 
     Args:
         prompt (str): Le istruzioni per la generazione del codice.
+        timeout (Optional[float]): Timeout della richiesta in secondi (default 120), es.
+            il tempo rimasto prima della scadenza del file.
 
     Returns:
         str: La risposta di testo generata.
@@ -162,17 +878,7 @@ def call_ollama_qwen3_coder(prompt: str) -> str:
     Raises:
         requests.HTTPError: Se l'API restituisce uno stato 4xx/5xx.
     """
-    ensure_ollama_ready(model_name=OLLAMA_CODING_MODEL)
-
-    payload = {
-        "model": OLLAMA_CODING_MODEL,
-        "prompt": prompt,
-        "stream": False,
-    }
-
-    resp = requests.post(OLLAMA_URL, json=payload, timeout=120)
-    resp.raise_for_status()
-    data = resp.json()
+    data = _generate(OLLAMA_CODING_MODEL, prompt, timeout=timeout or 120)
 
     # Salva output di debug
     os.makedirs(MINIMAL_JSON_BASE_DIR, exist_ok=True)
@@ -184,7 +890,7 @@ def call_ollama_qwen3_coder(prompt: str) -> str:
     return data.get("response", "")
 
 
-def call_ollama_deepseek(prompt: str) -> str:
+def call_ollama_deepseek(prompt: str, response_format: Optional[Dict[str, Any]] = None) -> str:
     """
     Esegue un prompt contro il modello generico (es. DeepSeek).
 
@@ -196,6 +902,8 @@ def call_ollama_deepseek(prompt: str) -> str:
 
     Args:
         prompt (str): Il prompt di input.
+        response_format (Optional[Dict[str, Any]]): Lo schema JSON della risposta, o None
+            per una risposta in testo libero.
 
     Returns:
         str: La stringa di risposta pulita.
@@ -203,18 +911,8 @@ def call_ollama_deepseek(prompt: str) -> str:
     Raises:
         requests.HTTPError: Se l'API restituisce uno stato 4xx/5xx.
     """
-    ensure_ollama_ready(model_name=OLLAMA_GENERAL_MODEL)
-
-    payload = {
-        "model": OLLAMA_GENERAL_MODEL,
-        "prompt": prompt,
-        "stream": False,
-    }
-
     # Timeout più alto per modelli generali che potrebbero essere più prolissi/lenti
-    resp = requests.post(OLLAMA_URL, json=payload, timeout=240)
-    resp.raise_for_status()
-    data = resp.json()
+    data = _generate(OLLAMA_GENERAL_MODEL, prompt, timeout=240, response_format=response_format)
 
     # Salva output di debug
     os.makedirs(MINIMAL_JSON_BASE_DIR, exist_ok=True)
@@ -229,3 +927,195 @@ def call_ollama_deepseek(prompt: str) -> str:
     data_clean = response.replace("```json", "").replace("```", "")
 
     return data_clean
+
+
+@asynccontextmanager
+async def _open_generate_stream(payload: Dict, timeout: float) -> AsyncIterator[httpx.Response]:
+    """
+    Apre la risposta in streaming di una richiesta di generazione.
+
+    Con il pool di istanze viene scelta l'istanza con meno richieste in corso; il
+    failover avviene solo prima dell'inizio della risposta (connessione rifiutata, 404
+    o 503), mai dopo che i token hanno iniziato ad arrivare.
+
+    Args:
+        payload (Dict): Il payload della richiesta (con `"stream": True`).
+        timeout (float): Il timeout di lettura di ogni chunk in secondi.
+
+    Yields:
+        httpx.Response: La risposta con stato di successo, da leggere riga per riga.
+
+    Raises:
+        httpx.ConnectError: Se nessuna istanza è raggiungibile.
+        httpx.HTTPStatusError: Se l'API restituisce uno stato 4xx/5xx.
+        OllamaHostUnavailable: Se nessuna istanza del pool può servire il modello.
+    """
+    client = get_async_http_client()
+    pool = get_host_pool()
+    if pool is None:
+        async with client.stream(
+                "POST", OLLAMA_URL, json=payload, timeout=async_request_timeout(timeout)
+        ) as resp:
+            resp.raise_for_status()
+            yield resp
+        return
+
+    model_name = payload.get("model")
+    tried: List[OllamaHost] = []
+    last_error: Optional[httpx.HTTPError] = None
+    while True:
+        try:
+            host = pool.acquire(model_name, exclude=tried)
+        except OllamaHostUnavailable:
+            if last_error is not None:
+                raise last_error
+            raise
+        tried.append(host)
+        started = False
+        try:
+            async with client.stream(
+                    "POST", host.generate_url, json=payload, timeout=async_request_timeout(timeout)
+            ) as resp:
+                if resp.status_code in _FAILOVER_STATUS_CODES:
+                    if resp.status_code == 404:
+                        pool.mark_model_missing(host, model_name)
+                    last_error = httpx.HTTPStatusError(
+                        f"Ollama host {host.base_url} returned {resp.status_code}",
+                        request=resp.request, response=resp,
+                    )
+                    continue
+                resp.raise_for_status()
+                started = True
+                yield resp
+                return
+        except httpx.ConnectError as e:
+            if started:
+                raise
+            pool.mark_down(host, str(e))
+            last_error = e
+        finally:
+            pool.release(host)
+
+
+async def _stream_chunks(payload: Dict, timeout: float) -> AsyncIterator[Dict]:
+    """
+    Restituisce i chunk JSON di una generazione in streaming.
+
+    Nelle modalità "replay" e "stub" i chunk vengono prodotti dalla cassetta con la
+    latenza sintetica; in modalità "record" la risposta completa viene registrata.
+
+    Args:
+        payload (Dict): Il payload della richiesta (con `"stream": True`).
+        timeout (float): Il timeout di lettura di ogni chunk in secondi.
+
+    Yields:
+        Dict: I chunk nel formato di Ollama (`response`, `done`, `error`).
+    """
+    backend = get_llm_backend()
+    if _is_offline(backend):
+        for delay, token in backend.token_delays(payload):
+            await asyncio.sleep(delay)
+            yield {"response": token, "done": False}
+        yield {"response": "", "done": True}
+        return
+
+    parts: List[str] = []
+    async with _open_generate_stream(payload, timeout) as resp:
+        async for line in resp.aiter_lines():
+            if not line.strip():
+                continue
+            chunk = json.loads(line)
+            parts.append(chunk.get("response", ""))
+            if backend is not None and chunk.get("done") and not chunk.get("error"):
+                backend.record(payload, "".join(parts))
+            yield chunk
+
+
+async def stream_ollama(
+        model_name: str,
+        prompt: str,
+        timeout: float = 240,
+        priority: str = INTERACTIVE,
+        response_format: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """
+    Esegue un prompt in modalità streaming e restituisce i token man mano che arrivano.
+
+    Ollama invia un oggetto JSON per riga; la generazione termina con `"done": true`.
+    Se il consumatore smette di iterare (es. client SSE disconnesso) la risposta HTTP
+    viene chiusa e Ollama interrompe la generazione.
+
+    Args:
+        model_name (str): Il modello da interrogare.
+        prompt (str): Il prompt di input.
+        timeout (float): Il timeout di lettura di ogni chunk in secondi.
+        priority (str): La classe dello scheduler LLM (default interattiva).
+        response_format (Optional[Dict[str, Any]]): Lo schema JSON della risposta, o None
+            per una risposta in testo libero.
+
+    Yields:
+        str: I frammenti di testo generati.
+
+    Raises:
+        httpx.HTTPStatusError: Se l'API restituisce uno stato 4xx/5xx.
+        RuntimeError: Se Ollama segnala un errore durante la generazione.
+        LLMSchedulerBusy: Se lo scheduler rifiuta la richiesta.
+        CircuitOpenError: Se il circuito del modello è aperto.
+        CassetteMiss: Se in modalità "replay" il prompt non è stato registrato.
+    """
+    breaker = get_circuit_breaker(model_name or "")
+    if breaker is not None:
+        breaker.allow()
+    # Il circuito registra un solo esito: il tempo al primo token o l'errore
+    recorded = False
+    scheduler = get_llm_scheduler()
+    acquired = False
+    try:
+        if not _is_offline(get_llm_backend()):
+            await run_stage(IO, ensure_ollama_ready, model_name)
+
+        payload = {
+            "model": model_name,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+        }
+        if response_format is not None:
+            payload["format"] = response_format
+
+        await scheduler.acquire_async(priority)
+        acquired = True
+        start = time.monotonic()
+        async with aclosing(_stream_chunks(payload, timeout)) as chunks:
+            async for chunk in chunks:
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama streaming error: {chunk['error']}")
+                if breaker is not None and not recorded:
+                    breaker.record_success(
+                        time.monotonic() - start, _latency_sla(model_name, timeout)
+                    )
+                    recorded = True
+                token = chunk.get("response", "")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    break
+    except httpx.ConnectError:
+        _readiness.invalidate(model_name)
+        if breaker is not None and not recorded:
+            breaker.record_failure()
+            recorded = True
+        raise
+    except LLMSchedulerBusy:
+        raise
+    except Exception:
+        if breaker is not None and not recorded:
+            breaker.record_failure()
+            recorded = True
+        raise
+    finally:
+        if breaker is not None and not recorded:
+            # Consumatore disconnesso o richiesta rifiutata prima di un esito
+            breaker.release()
+        if acquired:
+            scheduler.release(priority)
@@ -0,0 +1,311 @@
+"""
+Prompt Budget Module.
+
+Questo modulo limita la dimensione dei contenuti inseriti nei prompt LLM (documenti da
+rivedere, codice da rigenerare) prima dell'invio a Ollama.
+
+Il numero di token viene stimato dalla lunghezza del testo (circa 4 caratteri per token).
+I contenuti vengono:
+    1. compattati: spazi a fine riga e righe vuote consecutive vengono rimossi; nei
+       documenti anche i commenti HTML che non menzionano licenze;
+    2. solo per i documenti, se ancora oltre il budget, ridotti alle regioni rilevanti per
+       la licenza (testo individuato dalla scansione o righe con parole chiave di licenza)
+       con alcune righe di contesto, più l'inizio del file. Le parti omesse sono
+       segnalate da un marcatore.
+
+Il codice non viene mai tagliato: i file grandi sono già divisi in blocchi (vedi
+`code_chunker`). I token risparmiati vengono registrati a ogni chiamata e accumulati
+nelle statistiche di processo (vedi `get_prompt_budget_stats`).
+"""
+
+import logging
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.utility.config import LLM_PROMPT_TOKEN_BUDGET, LLM_PROMPT_CONTEXT_LINES
+
+logger = logging.getLogger(__name__)
+
+# Caratteri medi per token usati nella stima
+CHARS_PER_TOKEN = 4
+
+# Righe che menzionano una licenza, un copyright o le tipiche clausole legali
+_LICENSE_LINE_RE = re.compile(
+    r"licen[cs]|copyright|spdx|\(c\)|©|warrant|redistribut|permission is hereby|"
+    r"trademark|notice|released under|public domain|\b(?:a|l)?gpl|\bgnu\b|\bbsd\b|"
+    r"apache|mozilla|creative commons",
+    re.IGNORECASE,
+)
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+# Lunghezza minima di una riga del testo individuato dalla scansione per essere cercata
+_MIN_SNIPPET_LINE = 8
+# Spazio riservato a ogni marcatore di righe omesse
+_MARKER_ALLOWANCE = 40
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "tokens_before": 0, "tokens_after": 0, "trimmed": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Stima il numero di token di un testo.
+
+    Args:
+        text (str): Il testo da stimare.
+
+    Returns:
+        int: Il numero stimato di token.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_whitespace(text: str) -> str:
+    """
+    Rimuove gli spazi a fine riga e riduce le righe vuote consecutive a una sola.
+
+    L'indentazione viene conservata.
+
+    Args:
+        text (str): Il testo da compattare.
+
+    Returns:
+        str: Il testo compattato.
+    """
+    stripped = "\n".join(line.rstrip() for line in text.splitlines())
+    return _BLANK_RUN_RE.sub("\n\n", stripped).strip("\n")
+
+
+def _strip_html_comments(text: str) -> str:
+    """
+    Rimuove i commenti HTML che non menzionano licenze o copyright.
+
+    Args:
+        text (str): Il documento.
+
+    Returns:
+        str: Il documento senza i commenti irrilevanti.
+    """
+    return _HTML_COMMENT_RE.sub(
+        lambda m: m.group(0) if _LICENSE_LINE_RE.search(m.group(0)) else "", text
+    )
+
+
+def _normalize_line(line: str) -> str:
+    """
+    Normalizza una riga per il confronto con il testo individuato dalla scansione.
+
+    Args:
+        line (str): La riga.
+
+    Returns:
+        str: La riga in minuscolo con gli spazi ridotti a uno.
+    """
+    return " ".join(line.lower().split())
+
+
+def _relevant_lines(lines: List[str], snippets: Iterable[str]) -> List[int]:
+    """
+    Individua le righe rilevanti per la licenza.
+
+    Args:
+        lines (List[str]): Le righe del documento.
+        snippets (Iterable[str]): I testi individuati dalla scansione.
+
+    Returns:
+        List[int]: Gli indici delle righe rilevanti, in ordine.
+    """
+    snippet_lines: Set[str] = {
+        normalized
+        for snippet in snippets
+        for normalized in map(_normalize_line, (snippet or "").splitlines())
+        if len(normalized) >= _MIN_SNIPPET_LINE
+    }
+    return [
+        idx for idx, line in enumerate(lines)
+        if _LICENSE_LINE_RE.search(line) or _normalize_line(line) in snippet_lines
+    ]
+
+
+def _render(lines: List[str], kept: Set[int]) -> str:
+    """
+    Ricompone le righe conservate segnalando le parti omesse.
+
+    Args:
+        lines (List[str]): Le righe del documento.
+        kept (Set[int]): Gli indici delle righe conservate.
+
+    Returns:
+        str: Il documento ridotto.
+    """
+    parts: List[str] = []
+    omitted = 0
+    for idx, line in enumerate(lines):
+        if idx in kept:
+            if omitted:
+                parts.append(f"[... {omitted} lines omitted ...]")
+                omitted = 0
+            parts.append(line)
+        else:
+            omitted += 1
+    if omitted:
+        parts.append(f"[... {omitted} lines omitted ...]")
+    return "\n".join(parts)
+
+
+def fit_to_budget(
+        text: str,
+        max_tokens: int,
+        relevant_snippets: Optional[Iterable[str]] = None,
+        context_lines: Optional[int] = None
+) -> str:
+    """
+    Riduce un documento al budget di token conservando le regioni rilevanti.
+
+    Vengono conservate, finché il budget lo consente e in quest'ordine: le prime righe
+    del documento, le righe rilevanti per la licenza con `context_lines` righe di
+    contesto per lato, e infine le righe successive all'inizio del documento.
+
+    Args:
+        text (str): Il documento (già compattato).
+        max_tokens (int): Il budget di token del contenuto.
+        relevant_snippets (Optional[Iterable[str]]): I testi individuati dalla scansione.
+        context_lines (Optional[int]): Righe di contesto attorno a ogni regione rilevante
+            (default `LLM_PROMPT_CONTEXT_LINES`).
+
+    Returns:
+        str: Il documento entro il budget (invariato se già entro il budget).
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if context_lines is None:
+        context_lines = LLM_PROMPT_CONTEXT_LINES
+
+    budget_chars = max_tokens * CHARS_PER_TOKEN
+    lines = text.splitlines()
+    kept: Set[int] = set()
+    # Spazio per il marcatore finale delle righe omesse
+    used = _MARKER_ALLOWANCE
+
+    def keep(window: Iterable[int]) -> bool:
+        nonlocal used
+        new = [idx for idx in window if idx not in kept]
+        if not new:
+            return True
+        cost = sum(len(lines[idx]) + 1 for idx in new)
+        # Una nuova regione non adiacente a quelle conservate aggiunge un marcatore
+        if new[0] - 1 not in kept and new[-1] + 1 not in kept:
+            cost += _MARKER_ALLOWANCE
+        if used + cost > budget_chars:
+            return False
+        kept.update(new)
+        used += cost
+        return True
+
+    keep(range(min(len(lines), context_lines + 1)))
+    for idx in _relevant_lines(lines, relevant_snippets or ()):
+        keep(range(max(0, idx - context_lines), min(len(lines), idx + context_lines + 1)))
+    for idx in range(len(lines)):
+        if not keep((idx,)):
+            break
+
+    if not kept:
+        # Nessuna riga entra nel budget (es. file minificati): taglio netto
+        return text[:budget_chars]
+    return _render(lines, kept)
+
+
+def _record(label: str, before: str, after: str, trimmed: bool = False) -> None:
+    """
+    Registra i token risparmiati da una chiamata e aggiorna le statistiche.
+
+    Args:
+        label (str): Il nome del contenuto (es. il percorso del file).
+        before (str): Il contenuto originale.
+        after (str): Il contenuto inserito nel prompt.
+        trimmed (bool): Se il contenuto è stato ridotto al budget.
+    """
+    tokens_before = estimate_tokens(before)
+    tokens_after = estimate_tokens(after)
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["tokens_before"] += tokens_before
+        _stats["tokens_after"] += tokens_after
+        _stats["trimmed"] += int(trimmed)
+    logger.info(
+        "Prompt content %s: ~%d -> ~%d tokens (%d saved%s)",
+        label, tokens_before, tokens_after, tokens_before - tokens_after,
+        ", trimmed to budget" if trimmed else "",
+    )
+
+
+def prepare_document_content(
+        text: str,
+        label: str = "",
+        relevant_snippets: Optional[Iterable[str]] = None,
+        max_tokens: Optional[int] = None
+) -> str:
+    """
+    Prepara un documento per il prompt: compattazione e riduzione al budget.
+
+    Args:
+        text (str): Il contenuto del documento.
+        label (str): Il nome del contenuto usato nel log (es. il percorso del file).
+        relevant_snippets (Optional[Iterable[str]]): I testi individuati dalla scansione,
+            da conservare in via prioritaria.
+        max_tokens (Optional[int]): Il budget di token (default `LLM_PROMPT_TOKEN_BUDGET`);
+            0 disabilita la riduzione.
+
+    Returns:
+        str: Il contenuto da inserire nel prompt.
+    """
+    if max_tokens is None:
+        max_tokens = LLM_PROMPT_TOKEN_BUDGET
+    compacted = compact_whitespace(_strip_html_comments(text))
+    content = compacted
+    if max_tokens > 0:
+        content = fit_to_budget(compacted, max_tokens, relevant_snippets)
+    _record(label, text, content, trimmed=content != compacted)
+    return content
+
+
+def prepare_code_content(code: str, label: str = "") -> str:
+    """
+    Prepara il codice per il prompt di rigenerazione (solo compattazione degli spazi).
+
+    Commenti e testo non vengono rimossi: il modello deve conoscere l'intero
+    comportamento del codice da riscrivere.
+
+    Args:
+        code (str): Il codice sorgente.
+        label (str): Il nome del contenuto usato nel log.
+
+    Returns:
+        str: Il codice da inserire nel prompt.
+    """
+    content = compact_whitespace(code)
+    _record(label, code, content)
+    return content
+
+
+def get_prompt_budget_stats() -> Dict[str, int]:
+    """
+    Restituisce le statistiche cumulative dei contenuti preparati per i prompt.
+
+    Returns:
+        Dict[str, int]: Chiamate, token stimati prima e dopo, token risparmiati e numero
+        di contenuti ridotti al budget.
+    """
+    with _stats_lock:
+        return {**_stats, "tokens_saved": _stats["tokens_before"] - _stats["tokens_after"]}
+
+
+def reset_prompt_budget_stats() -> None:
+    """
+    Azzera le statistiche cumulative; utile nei test.
+    """
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,294 @@
+"""
+LLM Request Scheduler Module.
+
+Questo modulo regola l'accesso a Ollama tra richieste di priorità diverse:
+- "interactive": richieste con un utente in attesa (es. `/suggest-license`, streaming);
+- "bulk": lavoro in blocco (arricchimento dei problemi, rigenerazione del codice).
+
+Ogni classe ha un limite di richieste simultanee e una coda di lunghezza massima.
+Quando uno slot si libera viene servita prima la classe interattiva; il limite della
+classe bulk inferiore al numero totale di slot riserva sempre capacità agli utenti
+interattivi. Le richieste oltre la coda, o in attesa oltre il timeout della classe,
+vengono rifiutate subito con `LLMSchedulerBusy`.
+
+La classe delle chiamate bloccanti viene letta dal contesto corrente (vedi
+`llm_priority`); in assenza di indicazioni le richieste sono considerate "bulk".
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from app.utility.config import (
+    LLM_SCHEDULER_SLOTS,
+    LLM_INTERACTIVE_CONCURRENCY,
+    LLM_BULK_CONCURRENCY,
+    LLM_INTERACTIVE_QUEUE_SIZE,
+    LLM_BULK_QUEUE_SIZE,
+    LLM_INTERACTIVE_QUEUE_TIMEOUT,
+    LLM_BULK_QUEUE_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Classi di priorità, dalla più alta alla più bassa
+PRIORITY_CLASSES = (INTERACTIVE, BULK)
+
+_current_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "llm_priority", default=BULK
+)
+
+
+class LLMSchedulerBusy(RuntimeError):
+    """
+    Sollevata quando una richiesta LLM viene rifiutata per coda piena o attesa eccessiva.
+    """
+
+
+class LLMScheduler:
+    """
+    Scheduler a priorità con limiti di concorrenza e code limitate per classe.
+    """
+
+    def __init__(
+            self,
+            total_slots: int,
+            limits: Dict[str, int],
+            queue_sizes: Dict[str, int],
+            queue_timeouts: Dict[str, float]
+    ):
+        """
+        Inizializza lo scheduler.
+
+        Args:
+            total_slots (int): Richieste LLM simultanee complessive.
+            limits (Dict[str, int]): Richieste simultanee massime per classe.
+            queue_sizes (Dict[str, int]): Richieste in attesa massime per classe.
+            queue_timeouts (Dict[str, float]): Attesa massima in coda per classe (secondi).
+        """
+        self.total_slots = max(1, total_slots)
+        self.limits = {p: max(1, limits[p]) for p in PRIORITY_CLASSES}
+        self.queue_sizes = dict(queue_sizes)
+        self.queue_timeouts = dict(queue_timeouts)
+        self._cond = threading.Condition()
+        self._queues: Dict[str, deque] = {p: deque() for p in PRIORITY_CLASSES}
+        self._running = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self._stats = {
+            p: {"started": 0, "completed": 0, "rejected": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for p in PRIORITY_CLASSES
+        }
+
+    def _can_start(self, priority: str, ticket: object) -> bool:
+        """
+        Indica se la richiesta in testa alla coda della classe può essere avviata.
+
+        Args:
+            priority (str): La classe della richiesta.
+            ticket (object): Il segnaposto della richiesta nella coda.
+
+        Returns:
+            bool: True se la richiesta può occupare uno slot.
+        """
+        if self._queues[priority][0] is not ticket:
+            return False
+        if sum(self._running.values()) >= self.total_slots:
+            return False
+        if self._running[priority] >= self.limits[priority]:
+            return False
+        # Le classi più prioritarie con richieste in attesa avviabili hanno la precedenza
+        for higher in PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority)]:
+            if self._queues[higher] and self._running[higher] < self.limits[higher]:
+                return False
+        return True
+
+    def acquire(self, priority: str) -> None:
+        """
+        Attende uno slot per una richiesta della classe indicata.
+
+        Args:
+            priority (str): La classe della richiesta (`INTERACTIVE` o `BULK`).
+
+        Raises:
+            LLMSchedulerBusy: Se la coda è piena o l'attesa supera il timeout della classe.
+        """
+        start = time.monotonic()
+        deadline = start + self.queue_timeouts[priority]
+        with self._cond:
+            queue = self._queues[priority]
+            if len(queue) >= self.queue_sizes[priority]:
+                self._stats[priority]["rejected"] += 1
+                logger.warning("Rejecting %s LLM request: queue is full", priority)
+                raise LLMSchedulerBusy(f"LLM {priority} queue is full ({len(queue)} waiting)")
+
+            ticket = object()
+            queue.append(ticket)
+            try:
+                while not self._can_start(priority, ticket):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats[priority]["rejected"] += 1
+                        logger.warning("Rejecting %s LLM request: queue timeout", priority)
+                        raise LLMSchedulerBusy(
+                            f"LLM {priority} request waited more than "
+                            f"{self.queue_timeouts[priority]:.0f}s for a slot"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                queue.remove(ticket)
+                # Chi era in coda dietro questa richiesta può ora essere avviabile
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self._running[priority] += 1
+            stats = self._stats[priority]
+            stats["started"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def release(self, priority: str) -> None:
+        """
+        Libera lo slot occupato da una richiesta della classe indicata.
+
+        Args:
+            priority (str): La classe della richiesta.
+        """
+        with self._cond:
+            self._running[priority] -= 1
+            self._stats[priority]["completed"] += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: str) -> Iterator[None]:
+        """
+        Occupa uno slot per la durata del blocco `with`.
+
+        Args:
+            priority (str): La classe della richiesta.
+
+        Yields:
+            None: Lo slot è occupato all'interno del blocco.
+        """
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    async def acquire_async(self, priority: str) -> None:
+        """
+        Variante asincrona di `acquire`: l'attesa avviene in un thread separato.
+
+        Se il chiamante viene annullato durante l'attesa, lo slot eventualmente ottenuto
+        in seguito viene rilasciato subito.
+
+        Args:
+            priority (str): La classe della richiesta.
+
+        Raises:
+            LLMSchedulerBusy: Se la coda è piena o l'attesa supera il timeout della classe.
+        """
+        # Future non legato all'event loop: l'attesa prosegue anche se il loop termina
+        waiter: Future = Future()
+        waiter.set_running_or_notify_cancel()
+
+        def wait_for_slot() -> None:
+            try:
+                self.acquire(priority)
+            except BaseException as exc:  # pylint: disable=broad-exception-caught
+                waiter.set_exception(exc)
+            else:
+                waiter.set_result(None)
+
+        def release_orphaned_slot(future: Future) -> None:
+            if future.exception() is None:
+                self.release(priority)
+
+        threading.Thread(target=wait_for_slot, name="llm-scheduler-wait", daemon=True).start()
+        try:
+            await asyncio.shield(asyncio.wrap_future(waiter))
+        except asyncio.CancelledError:
+            waiter.add_done_callback(release_orphaned_slot)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Restituisce lo stato delle code e i contatori per classe.
+
+        Returns:
+            Dict[str, Any]: Slot totali e, per ogni classe, richieste in esecuzione e in
+            coda, limiti, richieste avviate/completate/rifiutate e attese (secondi).
+        """
+        with self._cond:
+            classes = {}
+            for priority in PRIORITY_CLASSES:
+                stats = self._stats[priority]
+                classes[priority] = {
+                    "running": self._running[priority],
+                    "queued": len(self._queues[priority]),
+                    "limit": self.limits[priority],
+                    "queue_size": self.queue_sizes[priority],
+                    "started": stats["started"],
+                    "completed": stats["completed"],
+                    "rejected": stats["rejected"],
+                    "avg_wait": stats["total_wait"] / stats["started"] if stats["started"] else 0.0,
+                    "max_wait": stats["max_wait"],
+                }
+            return {"total_slots": self.total_slots, "classes": classes}
+
+
+_scheduler = LLMScheduler(
+    LLM_SCHEDULER_SLOTS,
+    limits={INTERACTIVE: LLM_INTERACTIVE_CONCURRENCY, BULK: LLM_BULK_CONCURRENCY},
+    queue_sizes={INTERACTIVE: LLM_INTERACTIVE_QUEUE_SIZE, BULK: LLM_BULK_QUEUE_SIZE},
+    queue_timeouts={INTERACTIVE: LLM_INTERACTIVE_QUEUE_TIMEOUT, BULK: LLM_BULK_QUEUE_TIMEOUT},
+)
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Restituisce lo scheduler condiviso del processo.
+
+    Returns:
+        LLMScheduler: L'istanza condivisa.
+    """
+    return _scheduler
+
+
+def current_priority() -> str:
+    """
+    Restituisce la classe di priorità del contesto corrente.
+
+    Returns:
+        str: `INTERACTIVE` o `BULK` (default).
+    """
+    return _current_priority.get()
+
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """
+    Imposta la classe di priorità delle chiamate LLM eseguite nel blocco `with`.
+
+    Il valore vale per il thread (o task) corrente: i pool di thread avviati all'interno
+    del blocco non lo ereditano e restano "bulk".
+
+    Args:
+        priority (str): La classe da applicare (`INTERACTIVE` o `BULK`).
+
+    Yields:
+        None: La priorità è attiva all'interno del blocco.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
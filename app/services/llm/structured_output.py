@@ -0,0 +1,212 @@
+"""
+LLM Structured Output Module.
+
+Questo modulo richiede all'LLM risposte JSON vincolate a uno schema e le valida con i
+modelli Pydantic (vedi `app.models.schemas`), al posto dell'analisi di testo libero.
+
+Lo schema JSON del modello viene inoltrato a Ollama nel parametro `format`, che vincola
+la generazione; la risposta viene comunque validata, perché i modelli possono produrre
+valori fuori schema o risposte troncate. Se la validazione fallisce, il prompt viene
+ripetuto al massimo `LLM_STRUCTURED_RETRIES` volte con la risposta non valida e l'errore
+di validazione, così il modello può correggerla.
+
+Per ogni tipo di risposta (`label`) vengono contate le chiamate, le risposte valide al
+primo tentativo, quelle corrette, i tentativi di correzione e i fallimenti definitivi.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.services.llm.ollama_api import call_ollama_deepseek
+from app.utility.config import LLM_STRUCTURED_RETRIES
+
+logger = logging.getLogger(__name__)
+
+OutputModel = TypeVar("OutputModel", bound=BaseModel)
+
+# Lunghezza massima della risposta non valida riportata nel prompt di correzione
+_MAX_ECHOED_CHARS = 2000
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+class StructuredOutputError(ValueError):
+    """
+    Sollevata quando la risposta dell'LLM non rispetta lo schema richiesto.
+    """
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    """
+    Riassume gli errori di validazione in una riga per il log e il prompt di correzione.
+
+    Args:
+        error (ValidationError): L'errore sollevato da Pydantic.
+
+    Returns:
+        str: Gli errori nel formato "campo: messaggio", separati da punto e virgola.
+    """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'response'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def parse_structured(response: Optional[str], output_model: Type[OutputModel]) -> OutputModel:
+    """
+    Valida una risposta JSON dell'LLM con il modello indicato.
+
+    Vengono tollerati i blocchi di codice Markdown e il testo attorno all'oggetto JSON.
+
+    Args:
+        response (Optional[str]): La risposta grezza dell'LLM.
+        output_model (Type[OutputModel]): Il modello Pydantic della risposta.
+
+    Returns:
+        OutputModel: La risposta validata.
+
+    Raises:
+        StructuredOutputError: Se la risposta è vuota, non è JSON o non rispetta lo schema.
+    """
+    text = (response or "").replace("```json", "").replace("```", "").strip()
+    if not text:
+        raise StructuredOutputError("Empty response from LLM")
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start:end + 1]
+    try:
+        return output_model.model_validate_json(text)
+    except ValidationError as e:
+        raise StructuredOutputError(_format_validation_error(e)) from e
+
+
+def build_repair_prompt(prompt: str, response: Optional[str], error: str) -> str:
+    """
+    Costruisce il prompt che chiede al modello di correggere una risposta non valida.
+
+    Args:
+        prompt (str): Il prompt originale.
+        response (Optional[str]): La risposta non valida.
+        error (str): L'errore di validazione.
+
+    Returns:
+        str: Il prompt originale seguito dalla risposta non valida e dall'errore.
+    """
+    return (
+        f"{prompt}\n\n"
+        "### PREVIOUS ANSWER (INVALID)\n"
+        f"{(response or '')[:_MAX_ECHOED_CHARS]}\n\n"
+        "### VALIDATION ERROR\n"
+        f"{error}\n\n"
+        "Respond again with ONLY a JSON object that matches the required schema, "
+        "without markdown (```) and without any additional text."
+    )
+
+
+def _count(label: str, **increments: int) -> None:
+    """
+    Aggiorna i contatori di un tipo di risposta.
+
+    Args:
+        label (str): Il tipo di risposta.
+        **increments (int): Gli incrementi per contatore.
+    """
+    with _stats_lock:
+        counters = _stats.setdefault(label, {
+            "calls": 0, "valid_first_try": 0, "repaired": 0, "repair_attempts": 0, "failed": 0,
+        })
+        for name, value in increments.items():
+            counters[name] += value
+
+
+def _default_call(prompt: str, schema: Dict[str, Any]) -> str:
+    """
+    Interroga il modello generico con lo schema JSON della risposta.
+
+    Args:
+        prompt (str): Il prompt di input.
+        schema (Dict[str, Any]): Lo schema JSON della risposta.
+
+    Returns:
+        str: La risposta grezza dell'LLM.
+    """
+    return call_ollama_deepseek(prompt, response_format=schema)
+
+
+def generate_structured(
+        label: str,
+        prompt: str,
+        output_model: Type[OutputModel],
+        call: Callable[[str, Dict[str, Any]], str] = _default_call,
+        retries: Optional[int] = None,
+        response: Optional[str] = None
+) -> OutputModel:
+    """
+    Interroga l'LLM con lo schema di `output_model` e valida la risposta.
+
+    Se la risposta non è valida il modello viene interrogato di nuovo con il prompt di
+    correzione, al massimo `retries` volte. Le eccezioni della chiamata (es.
+    `CircuitOpenError`) vengono propagate senza ulteriori tentativi.
+
+    Args:
+        label (str): Il tipo di risposta, per le metriche e il log.
+        prompt (str): Il prompt di input.
+        output_model (Type[OutputModel]): Il modello Pydantic della risposta.
+        call (Callable[[str, Dict[str, Any]], str]): La funzione che interroga l'LLM con
+            prompt e schema JSON.
+        retries (Optional[int]): I tentativi di correzione (default `LLM_STRUCTURED_RETRIES`).
+        response (Optional[str]): La risposta al prompt già ottenuta (es. in streaming);
+            se indicata, il primo tentativo non interroga l'LLM.
+
+    Returns:
+        OutputModel: La risposta validata.
+
+    Raises:
+        StructuredOutputError: Se nessun tentativo produce una risposta valida.
+    """
+    schema = output_model.model_json_schema()
+    retries = LLM_STRUCTURED_RETRIES if retries is None else max(0, retries)
+    _count(label, calls=1)
+
+    if response is None:
+        response = call(prompt, schema)
+    attempt = 0
+    while True:
+        try:
+            result = parse_structured(response, output_model)
+        except StructuredOutputError as e:
+            if attempt >= retries:
+                _count(label, failed=1)
+                logger.error("Invalid %s output after %d repair attempts: %s", label, attempt, e)
+                raise
+            attempt += 1
+            _count(label, repair_attempts=1)
+            logger.warning("Invalid %s output, asking the model to repair it: %s", label, e)
+            response = call(build_repair_prompt(prompt, response, str(e)), schema)
+            continue
+        _count(label, **({"repaired": 1} if attempt else {"valid_first_try": 1}))
+        return result
+
+
+def get_structured_output_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Restituisce i contatori delle risposte strutturate per tipo di risposta.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Per tipo: chiamate, risposte valide al primo tentativo,
+        risposte corrette, tentativi di correzione e fallimenti.
+    """
+    with _stats_lock:
+        return {label: dict(counters) for label, counters in _stats.items()}
+
+
+def reset_structured_output_stats() -> None:
+    """
+    Azzera i contatori delle risposte strutturate. Utile nei test.
+    """
+    with _stats_lock:
+        _stats.clear()
@@ -5,26 +5,130 @@ Questo modulo orchestra la generazione di suggerimenti basati su AI per risolver
 conflitti di compatibilità delle licenze. Si interfaccia con l'LLM per:
 1. Suggerire licenze alternative compatibili per i file di codice.
 2. Rivedere file di documentazione o avvisi per raccomandare azioni di conformità.
+
+Le chiamate LLM dei problemi incompatibili vengono eseguite in parallelo con un limite
+di concorrenza configurabile e un timeout per singola chiamata; i risultati vengono
+riassemblati nell'ordine originale dei problemi.
+
+Le richieste di licenze alternative per i file di codice vengono raggruppate: tutte le
+tuple distinte (licenza rilevata, licenza principale, motivo) vengono inviate in un unico
+prompt strutturato che richiede una risposta JSON. Le tuple per cui la risposta non è
+valida ricadono sulle chiamate singole.
+
+Le risposte JSON (prompt raggruppati e revisione dei documenti) sono vincolate allo schema
+dei modelli di `app.models.schemas` e validate (vedi `structured_output`): le risposte
+non valide vengono corrette con un numero limitato di tentativi.
+
+In modalità deterministica (default, `LLM_DETERMINISTIC_ALTERNATIVES`) le licenze
+alternative per i file di codice vengono calcolate dalla matrice di compatibilità (vedi
+`compatible_alternatives`) senza interrogare l'LLM, che resta riservato alla revisione
+dei documenti e alle licenze principali assenti dalla matrice.
+
+Le risposte dell'LLM sono memorizzate nella cache persistente (vedi `llm_cache`): i file
+con la stessa coppia (licenza rilevata, licenza principale) vengono risolti senza
+interrogare nuovamente il modello, anche tra analisi diverse.
+
+In modalità differita (`lazy=True`, usata da `/analyze`) i problemi che richiederebbero
+l'LLM vengono restituiti con stato "pending": il suggerimento viene calcolato al primo
+accesso tramite `enrich_issue` (e poi servito dalla cache), mentre i primi problemi in
+attesa vengono pre-calcolati in background (vedi `prefetch_issue_suggestions`).
 """
 
+import asyncio
+import hashlib
 import os
-import re
 import logging
-from typing import List, Dict, Optional
-
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Coroutine, List, Dict, Optional, Tuple
+
+from app.models.schemas import BatchSuggestionOutput, DocumentReviewOutput
+from app.services.compatibility.compat_utils import normalize_symbol
+from app.services.compatibility.recommender import compatible_alternatives
+from app.services.executors import IO, run_stage
+from app.services.llm.circuit_breaker import CircuitOpenError
+from app.services.llm.llm_cache import cached_llm_call, get_llm_cache, make_cache_key
 from app.services.llm.ollama_api import call_ollama_deepseek
-from app.utility.config import CLONE_BASE_DIR
+from app.services.llm.prompt_budget import prepare_document_content
+from app.services.llm.scheduler import INTERACTIVE, llm_priority
+from app.services.llm.structured_output import StructuredOutputError, generate_structured
+from app.utility.config import (
+    CLONE_BASE_DIR,
+    OLLAMA_GENERAL_MODEL,
+    LLM_ENRICHMENT_CONCURRENCY,
+    LLM_ENRICHMENT_CALL_TIMEOUT,
+    LLM_SUGGESTION_BATCH_SIZE,
+    LLM_DETERMINISTIC_ALTERNATIVES,
+    LLM_PREFETCH_ISSUES,
+)
 
 logger = logging.getLogger(__name__)
 
 # Estensioni e nomi dei file considerati come documentazione/avvisi
 DOCUMENT_EXTENSIONS = ('.md', '.txt', '.rst', 'THIRD-PARTY-NOTICE', 'NOTICE')
 
+# Versioni dei template dei prompt: vanno incrementate a ogni modifica del testo del prompt
+# per invalidare le risposte memorizzate nella cache LLM.
+SUGGESTION_PROMPT_VERSION = "1"
+REVIEW_PROMPT_VERSION = "3"
+
+# Tipi di risposta strutturata, per le metriche di validazione
+BATCH_SUGGESTION_OUTPUT = "batch_suggestion"
+DOCUMENT_REVIEW_OUTPUT = "document_review"
+
+# Stato del suggerimento di un problema: calcolato o in attesa del primo accesso
+SUGGESTION_READY = "ready"
+SUGGESTION_PENDING = "pending"
+
+# Problemi grezzi in attesa (con i dati interni della scansione, es. 'matched_texts'),
+# indicizzati per (licenza principale, file, licenza rilevata)
+_MAX_PENDING_ISSUES = 4096
+_pending_issues: "OrderedDict[Tuple[str, str, str], Dict]" = OrderedDict()
+_pending_lock = threading.Lock()
+
+
+def _structured_call(prompt: str, schema: Dict[str, Any]) -> str:
+    """
+    Interroga il modello generico vincolando la risposta allo schema JSON indicato.
+
+    Args:
+        prompt (str): Il prompt di input.
+        schema (Dict[str, Any]): Lo schema JSON della risposta.
+
+    Returns:
+        str: La risposta grezza dell'LLM.
+    """
+    return call_ollama_deepseek(prompt, response_format=schema)
+
+
+def _suggestion_cache_inputs(detected_license: str, main_spdx: str) -> Dict[str, str]:
+    """
+    Restituisce gli input normalizzati della richiesta di licenze alternative per la cache.
+
+    Sono condivisi dalle chiamate singole e da quelle raggruppate, così una risposta
+    ottenuta in un modo viene riutilizzata anche nell'altro.
+
+    Args:
+        detected_license (str): La licenza rilevata nel file.
+        main_spdx (str): La licenza principale del progetto.
+
+    Returns:
+        Dict[str, str]: Gli input che identificano la richiesta.
+    """
+    return {
+        "detected_license": normalize_symbol(detected_license or ""),
+        "main_spdx": normalize_symbol(main_spdx or ""),
+    }
+
 
 def ask_llm_for_suggestions(issue: Dict[str, str], main_spdx: str) -> str:
     """
     Interroga l'LLM per un elenco di licenze alternative compatibili con il progetto.
 
+    La risposta dipende solo dalla coppia (licenza rilevata, licenza principale): viene
+    quindi memorizzata in cache con questa coppia normalizzata come chiave.
+
     Args:
         issue (Dict[str, str]): Il dizionario del problema contenente 'file_path',
             'detected_license' e 'reason'.
@@ -44,28 +148,216 @@ def ask_llm_for_suggestions(issue: Dict[str, str], main_spdx: str) -> str:
         f"Respond exactly in the following format: 'License1, License2, License3'"
     )
 
-    suggestion = call_ollama_deepseek(prompt)
+    suggestion = cached_llm_call(
+        OLLAMA_GENERAL_MODEL,
+        SUGGESTION_PROMPT_VERSION,
+        _suggestion_cache_inputs(issue["detected_license"], main_spdx),
+        lambda: call_ollama_deepseek(prompt),
+    )
     return suggestion
 
 
-def review_document(issue: Dict[str, str], main_spdx: str, licenses: str) -> Optional[str]:
+def _build_batch_prompt(main_spdx: str, items: List[Tuple[str, str]]) -> str:
+    """
+    Costruisce il prompt che richiede le licenze alternative per più conflitti insieme.
+
+    Args:
+        main_spdx (str): La licenza principale del progetto.
+        items (List[Tuple[str, str]]): Le coppie distinte (licenza rilevata, motivo).
+
+    Returns:
+        str: Il prompt con i conflitti numerati a partire da 1.
+    """
+    conflicts = "\n".join(
+        f"{idx}. License: '{detected}'. Reason for the conflict: {reason}"
+        for idx, (detected, reason) in enumerate(items, start=1)
+    )
+    return (
+        f"You are a software license expert. The project is released under the license "
+        f"{main_spdx}. Files in the project are released under the following licenses, "
+        f"which are incompatible with {main_spdx}:\n"
+        f"{conflicts}\n\n"
+        f"For EACH numbered conflict, provide **ONLY** alternative licenses compatible with "
+        f"the license {main_spdx} that could be adopted to resolve the conflict. "
+        f"**DO NOT** provide analysis, explanations, headers, or additional text.\n"
+        f"Respond ONLY with a JSON object, without markdown (```), in this exact format:\n"
+        f'{{"results": [{{"id": 1, "licenses": ["License1", "License2", "License3"]}}]}}'
+    )
+
+
+def _batch_answers(output: BatchSuggestionOutput, count: int) -> Dict[int, str]:
+    """
+    Estrae le risposte per conflitto dalla risposta raggruppata validata.
+
+    Le voci con id fuori intervallo, duplicate o senza licenze vengono ignorate: i
+    relativi conflitti ricadono sulle chiamate singole.
+
+    Args:
+        output (BatchSuggestionOutput): La risposta validata dell'LLM.
+        count (int): Il numero di conflitti inviati nel prompt.
+
+    Returns:
+        Dict[int, str]: Mappa {id del conflitto (da 1): licenze separate da virgole}.
+    """
+    answers: Dict[int, str] = {}
+    for entry in output.results:
+        if not 1 <= entry.id <= count or entry.id in answers:
+            continue
+        licenses = ", ".join(lic.strip() for lic in entry.licenses if lic.strip())
+        if licenses:
+            answers[entry.id] = licenses
+    return answers
+
+
+def ask_llm_for_suggestions_batch(
+        main_spdx: str,
+        items: List[Tuple[str, str]]
+) -> Dict[Tuple[str, str], str]:
+    """
+    Interroga l'LLM con un unico prompt per le licenze alternative di più conflitti.
+
+    Args:
+        main_spdx (str): La licenza principale del progetto.
+        items (List[Tuple[str, str]]): Le coppie distinte (licenza rilevata, motivo).
+
+    Returns:
+        Dict[Tuple[str, str], str]: Le licenze alternative per ogni coppia a cui l'LLM ha
+        risposto correttamente; le coppie assenti vanno richieste singolarmente.
+    """
+    try:
+        output = generate_structured(
+            BATCH_SUGGESTION_OUTPUT,
+            _build_batch_prompt(main_spdx, items),
+            BatchSuggestionOutput,
+            call=_structured_call,
+        )
+    except StructuredOutputError:
+        return {}
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Batched LLM suggestion call failed")
+        return {}
+
+    parsed = _batch_answers(output, len(items))
+    if len(parsed) < len(items):
+        logger.warning(
+            "Batched LLM response covered %d of %d conflicts", len(parsed), len(items)
+        )
+    return {items[item_id - 1]: licenses for item_id, licenses in parsed.items()}
+
+
+def _batch_code_suggestions(
+        main_spdx: str,
+        issues: List[Dict],
+        batch_size: int,
+        max_concurrency: int,
+        call_timeout: float
+) -> Dict[Tuple[str, str], str]:
+    """
+    Risolve le licenze alternative dei file di codice tramite cache e prompt raggruppati.
+
+    Args:
+        main_spdx (str): La licenza principale del progetto.
+        issues (List[Dict]): I problemi incompatibili dei file di codice.
+        batch_size (int): Numero massimo di conflitti per prompt.
+        max_concurrency (int): Numero massimo di prompt raggruppati simultanei.
+        call_timeout (float): Timeout in secondi per ogni prompt raggruppato.
+
+    Returns:
+        Dict[Tuple[str, str], str]: Le licenze alternative per coppia (licenza rilevata,
+        motivo). Le coppie assenti vanno risolte con le chiamate singole.
+    """
+    distinct = list(dict.fromkeys((i["detected_license"], i.get("reason") or "") for i in issues))
+
+    answers: Dict[Tuple[str, str], str] = {}
+    cache = get_llm_cache()
+
+    def cache_key(detected: str) -> str:
+        return make_cache_key(
+            OLLAMA_GENERAL_MODEL,
+            SUGGESTION_PROMPT_VERSION,
+            _suggestion_cache_inputs(detected, main_spdx),
+        )
+
+    if cache is not None:
+        for item in distinct:
+            cached = cache.get(cache_key(item[0]))
+            if cached is not None:
+                answers[item] = cached
+
+    missing = [item for item in distinct if item not in answers]
+    # Un solo conflitto non trae vantaggio dal raggruppamento
+    if len(missing) < 2:
+        return answers
+
+    chunks = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_concurrency, len(chunks)), thread_name_prefix="llm-batch"
+    )
+    try:
+        futures = [executor.submit(ask_llm_for_suggestions_batch, main_spdx, c) for c in chunks]
+        done, not_done = wait(futures, timeout=call_timeout)
+        if not_done:
+            logger.warning("%d batched LLM calls timed out after %.1fs", len(not_done), call_timeout)
+        for future in done:
+            for item, licenses in future.result().items():
+                answers[item] = licenses
+                if cache is not None:
+                    cache.set(cache_key(item[0]), OLLAMA_GENERAL_MODEL or "", licenses)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return answers
+
+
+def _contained_path(base_dir: str, file_path: str) -> Optional[str]:
+    """
+    Risolve il percorso di un file all'interno di una directory.
+
+    Args:
+        base_dir (str): La directory che deve contenere il file.
+        file_path (str): Il percorso relativo del file.
+
+    Returns:
+        Optional[str]: Il percorso reale del file, o None se è assoluto o esce dalla
+        directory (anche tramite ".." o collegamenti simbolici).
+    """
+    base = os.path.realpath(base_dir)
+    resolved = os.path.realpath(os.path.join(base, file_path))
+    if os.path.isabs(file_path) or os.path.commonpath([base, resolved]) != base:
+        return None
+    return resolved
+
+
+def review_document(
+        issue: Dict[str, str],
+        main_spdx: str,
+        licenses: str,
+        document_path: Optional[str] = None
+) -> Optional[str]:
     """
     Rivede un file di documentazione per suggerire la gestione delle menzioni di licenza.
 
     Legge il contenuto del file e chiede all'LLM un consiglio pragmatico (es.
-    "Richiedi dual-licensing", "Aggiorna l'avviso").
+    "Richiedi dual-licensing", "Aggiorna l'avviso"). Il documento viene compattato e
+    ridotto al budget di token del prompt, conservando il testo individuato dalla
+    scansione ('matched_texts', se presente) e le righe che menzionano licenze.
 
     Args:
         issue (Dict[str, str]): Il dizionario del problema contenente 'file_path' e 'detected_license'.
         main_spdx (str): La licenza principale del progetto.
         licenses (str): Un elenco di licenze alternative identificate in precedenza (opzionale).
+        document_path (Optional[str]): Il percorso del documento già verificato dal
+            chiamante; in assenza viene risolto sotto `CLONE_BASE_DIR`.
 
     Returns:
         Optional[str]: Il consiglio operativo estratto dalla risposta dell'LLM,
         o None se la lettura fallisce o non viene trovato alcun consiglio.
     """
     file_path = issue["file_path"]
-    abs_path = os.path.join(CLONE_BASE_DIR, file_path)
+    abs_path = document_path or _contained_path(CLONE_BASE_DIR, file_path)
+    if abs_path is None:
+        logger.warning("Refusing to read document outside the clone directory: %s", file_path)
+        return None
 
     try:
         with open(abs_path, "r", encoding="utf-8") as f:
@@ -75,6 +367,9 @@ def review_document(issue: Dict[str, str], main_spdx: str, licenses: str) -> Opt
         return None
 
     logger.info("Reviewing document: %s", file_path)
+    document_content = prepare_document_content(
+        document_content, file_path, issue.get("matched_texts")
+    )
 
     prompt = (
         "### ROLE\n"
@@ -93,26 +388,30 @@ def review_document(issue: Dict[str, str], main_spdx: str, licenses: str) -> Opt
         "'Release under X license instead of Y').\n"
         "3. Be direct and pragmatic.\n\n"
         "### OUTPUT FORMAT (MANDATORY)\n"
-        "Your response must STRICTLY follow this format, without markdown (```) "
-        "and without any additional text:\n"
-        "<advice>Your operational suggestion here.</advice>"
+        "Respond ONLY with a JSON object, without markdown (```) "
+        "and without any additional text, in this exact format:\n"
+        '{"advice": "Your operational suggestion here."}'
     )
 
-    try:
-        response = call_ollama_deepseek(prompt)
-        if not response:
-            return None
+    inputs = {
+        "detected_license": normalize_symbol(issue["detected_license"] or ""),
+        "main_spdx": normalize_symbol(main_spdx or ""),
+        "licenses": licenses,
+        "content_sha256": hashlib.sha256(document_content.encode("utf-8")).hexdigest(),
+    }
 
-        # Estrae il contenuto all'interno dei tag <advice>
-        match = re.search(r"<advice>(.*?)</advice>", response, re.DOTALL | re.IGNORECASE)
+    def ask() -> str:
+        output = generate_structured(
+            DOCUMENT_REVIEW_OUTPUT, prompt, DocumentReviewOutput, call=_structured_call
+        )
+        return output.advice.strip()
 
-        if match:
-            return match.group(1).strip()
+    try:
+        # In cache viene memorizzato il solo consiglio validato
+        return cached_llm_call(OLLAMA_GENERAL_MODEL, REVIEW_PROMPT_VERSION, inputs, ask) or None
 
-        # Fallback se il modello ignora i tag
-        logger.warning(
-            "Warning: <advice> tag format not found in response for %s", file_path
-        )
+    except StructuredOutputError:
+        logger.warning("No valid advice in the LLM response for %s", file_path)
         return None
 
     except Exception:  # pylint: disable=broad-exception-caught
@@ -120,108 +419,479 @@ def review_document(issue: Dict[str, str], main_spdx: str, licenses: str) -> Opt
         return None
 
 
+def _ask_llm_for_issue(
+        issue: Dict,
+        main_spdx: str,
+        document_path: Optional[str] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Esegue la chiamata LLM necessaria per un singolo problema incompatibile.
+
+    Se il circuito dell'LLM è aperto, le alternative dei file di codice vengono calcolate
+    dalla matrice di compatibilità.
+
+    Args:
+        issue (Dict): Il problema incompatibile.
+        main_spdx (str): La licenza principale del progetto.
+        document_path (Optional[str]): Il percorso verificato del documento (vedi
+            `review_document`).
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: La coppia (licenze alternative, consiglio sul
+        documento). Per i file di codice il consiglio è None; per i documenti le licenze
+        sono una stringa vuota poiché non vengono richieste alternative.
+    """
+    if issue["file_path"].endswith(DOCUMENT_EXTENSIONS):
+        # Passiamo una stringa di licenze vuota qui poiché non abbiamo chiesto alternative
+        # per questo file specifico
+        return "", review_document(issue, main_spdx, "", document_path=document_path)
+
+    # È un file di codice: chiedi licenze alternative
+    try:
+        return ask_llm_for_suggestions(issue, main_spdx), None
+    except CircuitOpenError:
+        # LLM sovraccarico: ripiega sulle alternative della matrice senza attendere
+        logger.warning("LLM circuit open, using matrix alternatives for %s", issue["file_path"])
+        return ", ".join(compatible_alternatives(main_spdx, issue["detected_license"])), None
+
+
+async def _gather_llm_results(
+        main_spdx: str,
+        issues: List[Dict],
+        max_concurrency: int,
+        call_timeout: float
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Esegue le chiamate LLM per i problemi dati con concorrenza limitata.
+
+    Ogni chiamata gira in un thread del pool dedicato; il semaforo limita le chiamate
+    in corso e il timeout parte solo quando la chiamata viene effettivamente avviata.
+    Le chiamate scadute o fallite producono un risultato vuoto senza interrompere le altre.
+    Il pool ha un thread per problema: una chiamata scaduta libera subito il semaforo e
+    il suo thread, che prosegue in background, non ritarda l'avvio dei problemi in coda.
+
+    Args:
+        main_spdx (str): La licenza principale del progetto.
+        issues (List[Dict]): I problemi incompatibili da arricchire.
+        max_concurrency (int): Numero massimo di chiamate LLM simultanee.
+        call_timeout (float): Timeout in secondi per ogni singola chiamata.
+
+    Returns:
+        List[Tuple[Optional[str], Optional[str]]]: I risultati nello stesso ordine dei problemi.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # Un thread per problema: i thread delle chiamate scadute non occupano quelli in coda
+    executor = ThreadPoolExecutor(max_workers=len(issues), thread_name_prefix="llm-enrich")
+
+    async def run_one(issue: Dict) -> Tuple[Optional[str], Optional[str]]:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(executor, _ask_llm_for_issue, issue, main_spdx),
+                    timeout=call_timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "LLM call for %s timed out after %.1fs", issue["file_path"], call_timeout
+                )
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Un errore su un singolo problema non deve bloccare l'intera analisi
+                logger.exception("LLM enrichment failed for %s", issue["file_path"])
+            return "", None
+
+    try:
+        return await asyncio.gather(*(run_one(issue) for issue in issues))
+    finally:
+        # Non attende i thread delle chiamate scadute: termineranno in background
+        executor.shutdown(wait=False)
+
+
+def _run_coroutine_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Esegue una coroutine da codice sincrono, in un event loop dedicato.
+
+    Args:
+        coro (Coroutine): La coroutine da eseguire.
+
+    Returns:
+        Any: Il risultato della coroutine.
+
+    Raises:
+        RuntimeError: Se il thread corrente ha già un event loop attivo: attenderne il
+            risultato lo bloccherebbe per l'intero arricchimento (usare
+            `enrich_with_llm_suggestions_async`).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    coro.close()
+    raise RuntimeError(
+        "LLM enrichment cannot block a running event loop: "
+        "await enrich_with_llm_suggestions_async instead"
+    )
+
+
+def _build_suggestion_text(
+        issue: Dict,
+        licenses_list_str: Optional[str],
+        doc_advice: Optional[str]
+) -> str:
+    """
+    Costruisce il testo del suggerimento per un problema.
+
+    Args:
+        issue (Dict): Il problema grezzo.
+        licenses_list_str (Optional[str]): Le licenze alternative suggerite dall'LLM (file di codice).
+        doc_advice (Optional[str]): Il consiglio dell'LLM sul documento (file di documentazione).
+
+    Returns:
+        str: Il testo del suggerimento.
+    """
+    file_path = issue["file_path"]
+    detected_license = issue["detected_license"]
+
+    # Caso 1: Il file è compatibile
+    if issue.get("compatible"):
+        return "The file is compatible with the project's main license. No action needed."
+
+    if issue.get("compatible") is None:
+        # Gestisce stati "condizionali" o sconosciuti codificati nel testo del motivo
+        reason_text = issue.get("reason", "")
+        if "Outcome: conditional" in reason_text or "Outcome: unknown" in reason_text:
+            # User requested this specific suggestion for conditional/unknown outcomes
+            return "License unavailable in Matrix for check compatibility."
+        return (
+            "The repository main license could not be determined, please click on the toggle 'Get Suggestion' to choose a main license."
+        )
+
+    # Caso 2: File Incompatibile
+    # Standard suggestion templates
+    sugg_change_license = (
+        f"1§ Consider changing the project's main license to adopt "
+        f"the license '{detected_license}' (or a compatible one) to resolve the conflict."
+    )
+    sugg_find_alternative = (
+        f"2§ Look for an alternative component or a different library that implements "
+        f"the logic of '{file_path}' but is released under a license compatible with "
+        f"the project's current license."
+    )
+
+    if not file_path.endswith(DOCUMENT_EXTENSIONS):
+        return (
+            f"{sugg_change_license}\n"
+            f"{sugg_find_alternative}\n"
+            f"3§ Here are some alternative compatible licenses you might consider: "
+            f"{licenses_list_str}"
+        )
+
+    # If review returns None, fallback to generic suggestion, otherwise append advice
+    advice_part = doc_advice if doc_advice else "Check document manually."
+    return (
+        f"{sugg_change_license}\n"
+        f"{sugg_find_alternative}\n"
+        f"3§ {advice_part}"
+    )
+
+
 def enrich_with_llm_suggestions(
         main_spdx: str,
         issues: List[Dict],
-        regenerated_map: Optional[Dict[str, str]] = None
+        regenerated_map: Optional[Dict[str, str]] = None,
+        max_concurrency: Optional[int] = None,
+        call_timeout: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        deterministic: Optional[bool] = None,
+        lazy: bool = False
 ) -> List[Dict]:
     """
     Arricchisce l'elenco dei problemi con suggerimenti generati dall'AI e licenze alternative.
 
     Per ogni problema:
     - Se compatibile: Aggiunge un messaggio "Nessuna azione necessaria".
-    - Se incompatibile (Codice): Interroga l'LLM per licenze alternative.
+    - Se incompatibile (Codice): In modalità deterministica calcola le licenze alternative
+      dalla matrice; altrimenti (o se la licenza principale non è nella matrice) interroga
+      l'LLM, raggruppando i conflitti distinti in prompt JSON da al massimo `batch_size` voci.
     - Se incompatibile (Documenti): Rivede il documento per un consiglio specifico.
 
+    Le chiamate LLM vengono eseguite in parallelo (al massimo `max_concurrency` alla volta),
+    ognuna con il proprio timeout; una chiamata scaduta o fallita produce il suggerimento
+    generico senza interrompere le altre.
+    Da un thread con un event loop attivo va usata `enrich_with_llm_suggestions_async`.
+
     Args:
         main_spdx (str): La licenza principale del progetto.
         issues (List[Dict]): L'elenco dei dizionari di problemi grezzi.
         regenerated_map (Optional[Dict[str, str]]): Una mappa dei percorsi dei file ai
             percorsi del codice rigenerato (se presenti).
+        max_concurrency (Optional[int]): Limite di chiamate LLM simultanee
+            (default `LLM_ENRICHMENT_CONCURRENCY`).
+        call_timeout (Optional[float]): Timeout in secondi per ogni chiamata LLM
+            (default `LLM_ENRICHMENT_CALL_TIMEOUT`).
+        batch_size (Optional[int]): Numero massimo di conflitti per prompt raggruppato
+            (default `LLM_SUGGESTION_BATCH_SIZE`); 0 o 1 disabilita il raggruppamento.
+        deterministic (Optional[bool]): Se calcolare le alternative dalla matrice invece
+            di interrogare l'LLM (default `LLM_DETERMINISTIC_ALTERNATIVES`).
+        lazy (bool): Se non interrogare l'LLM: i problemi che lo richiederebbero vengono
+            restituiti con stato "pending" e suggerimento vuoto (vedi `enrich_issue`).
 
     Returns:
         List[Dict]: L'elenco dei problemi arricchiti con i campi 'suggestion', 'licenses',
-        e 'regenerated_code_path'.
+        'suggestion_status' e 'regenerated_code_path'.
     """
     if regenerated_map is None:
         regenerated_map = {}
 
+    max_concurrency = max(1, max_concurrency or LLM_ENRICHMENT_CONCURRENCY)
+    call_timeout = call_timeout or LLM_ENRICHMENT_CALL_TIMEOUT
+    if batch_size is None:
+        batch_size = LLM_SUGGESTION_BATCH_SIZE
+    if deterministic is None:
+        deterministic = LLM_DETERMINISTIC_ALTERNATIVES
+
+    # Solo i problemi incompatibili richiedono una chiamata LLM
+    llm_issues = [issue for issue in issues if issue.get("compatible") is False]
+
+    llm_results: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+
+    # Alternative dalla matrice: nessuna chiamata LLM per i file di codice
+    if deterministic:
+        for issue in llm_issues:
+            if issue["file_path"].endswith(DOCUMENT_EXTENSIONS):
+                continue
+            alternatives = compatible_alternatives(main_spdx, issue["detected_license"])
+            if alternatives:
+                llm_results[id(issue)] = (", ".join(alternatives), None)
+        llm_issues = [issue for issue in llm_issues if id(issue) not in llm_results]
+
+    # Modalità differita: nessuna chiamata LLM, i problemi restanti restano in attesa
+    pending = set()
+    if lazy:
+        for issue in llm_issues:
+            _remember_pending(main_spdx, issue)
+            pending.add(id(issue))
+        llm_issues = []
+
+    # I file di codice vengono prima risolti con prompt raggruppati
+    if batch_size > 1:
+        code_issues = [i for i in llm_issues if not i["file_path"].endswith(DOCUMENT_EXTENSIONS)]
+        batch_answers = _batch_code_suggestions(
+            main_spdx, code_issues, batch_size, max_concurrency, call_timeout
+        )
+        for issue in code_issues:
+            licenses = batch_answers.get((issue["detected_license"], issue.get("reason") or ""))
+            if licenses is not None:
+                llm_results[id(issue)] = (licenses, None)
+
+    # Documenti e conflitti non risolti dal raggruppamento: chiamate singole concorrenti
+    single_issues = [issue for issue in llm_issues if id(issue) not in llm_results]
+    if single_issues:
+        results = _run_coroutine_sync(_gather_llm_results(
+            main_spdx, single_issues, max_concurrency, call_timeout
+        ))
+        llm_results.update(
+            (id(issue), result) for issue, result in zip(single_issues, results)
+        )
+
     enriched = []
 
     for issue in issues:
         file_path = issue["file_path"]
-        detected_license = issue["detected_license"]
 
-        # Reset licenses string for each issue to avoid scope leaking
-        licenses_list_str = ""
+        if id(issue) in pending:
+            enriched.append(_enriched_issue(
+                issue, None, None, regenerated_map.get(file_path), pending=True
+            ))
+            continue
 
-        # Standard suggestion templates
-        sugg_change_license = (
-            f"1§ Consider changing the project's main license to adopt "
-            f"the license '{detected_license}' (or a compatible one) to resolve the conflict."
-        )
-        sugg_find_alternative = (
-            f"2§ Look for an alternative component or a different library that implements "
-            f"the logic of '{file_path}' but is released under a license compatible with "
-            f"the project's current license."
-        )
+        # Risultato della chiamata LLM (solo per i problemi incompatibili)
+        licenses_list_str, doc_advice = llm_results.get(id(issue), ("", None))
+        enriched.append(_enriched_issue(
+            issue, licenses_list_str, doc_advice, regenerated_map.get(file_path)
+        ))
+
+    return enriched
 
-        suggestion_text = ""
-
-        # Caso 1: Il file è compatibile
-        if issue.get("compatible"):
-            suggestion_text = (
-                "The file is compatible with the project's main license. No action needed."
-            )
-
-        elif issue.get("compatible") is None:
-            # Gestisce stati "condizionali" o sconosciuti codificati nel testo del motivo
-            reason_text = issue.get("reason", "")
-            if "Outcome: conditional" in reason_text or "Outcome: unknown" in reason_text:
-                # User requested this specific suggestion for conditional/unknown outcomes
-                suggestion_text = "License unavailable in Matrix for check compatibility."
-            else:
-                suggestion_text = (
-                    "The repository main license could not be determined, please click on the toggle 'Get Suggestion' to choose a main license."
-                )
 
-        # Caso 2: File Incompatibile
+async def enrich_with_llm_suggestions_async(
+        main_spdx: str,
+        issues: List[Dict],
+        **kwargs: Any
+) -> List[Dict]:
+    """
+    Variante asincrona di `enrich_with_llm_suggestions` per chi ha un event loop attivo.
+
+    L'arricchimento viene eseguito nel pool di fase "io", senza bloccare l'event loop
+    del chiamante.
+
+    Args:
+        main_spdx (str): La licenza principale del progetto.
+        issues (List[Dict]): L'elenco dei dizionari di problemi grezzi.
+        **kwargs (Any): Gli altri argomenti di `enrich_with_llm_suggestions`.
+
+    Returns:
+        List[Dict]: L'elenco dei problemi arricchiti.
+    """
+    return await run_stage(IO, enrich_with_llm_suggestions, main_spdx, issues, **kwargs)
+
+
+def _pending_key(main_spdx: str, issue: Dict) -> Tuple[str, str, str]:
+    """
+    Restituisce la chiave di un problema nel registro dei problemi in attesa.
+
+    Args:
+        main_spdx (str): La licenza principale del progetto.
+        issue (Dict): Il problema.
+
+    Returns:
+        Tuple[str, str, str]: La terna (licenza principale, file, licenza rilevata).
+    """
+    return main_spdx or "", issue["file_path"], issue["detected_license"] or ""
+
+
+def _remember_pending(main_spdx: str, issue: Dict) -> None:
+    """
+    Conserva il problema grezzo in attesa, rimuovendo i più vecchi oltre il limite.
+
+    Args:
+        main_spdx (str): La licenza principale del progetto.
+        issue (Dict): Il problema grezzo.
+    """
+    with _pending_lock:
+        key = _pending_key(main_spdx, issue)
+        _pending_issues[key] = issue
+        _pending_issues.move_to_end(key)
+        while len(_pending_issues) > _MAX_PENDING_ISSUES:
+            _pending_issues.popitem(last=False)
+
+
+def _enriched_issue(
+        issue: Dict,
+        licenses_list_str: Optional[str],
+        doc_advice: Optional[str],
+        regenerated_code_path: Optional[str],
+        pending: bool = False
+) -> Dict:
+    """
+    Costruisce il dizionario arricchito finale di un problema.
+
+    Args:
+        issue (Dict): Il problema grezzo.
+        licenses_list_str (Optional[str]): Le licenze alternative suggerite.
+        doc_advice (Optional[str]): Il consiglio dell'LLM sul documento.
+        regenerated_code_path (Optional[str]): Il percorso del codice rigenerato.
+        pending (bool): Se il suggerimento è in attesa del primo accesso.
+
+    Returns:
+        Dict: Il problema con i campi 'suggestion', 'licenses', 'suggestion_status' e
+        'regenerated_code_path'.
+    """
+    return {
+        "file_path": issue["file_path"],
+        "detected_license": issue["detected_license"],
+        "compatible": issue["compatible"],
+        "reason": issue["reason"],
+        "suggestion": None if pending else _build_suggestion_text(
+            issue, licenses_list_str, doc_advice
+        ),
+        "licenses": None if pending else licenses_list_str,
+        "suggestion_status": SUGGESTION_PENDING if pending else SUGGESTION_READY,
+        "regenerated_code_path": regenerated_code_path,
+    }
+
+
+def enrich_issue(
+        main_spdx: str,
+        issue: Dict,
+        regenerated_code_path: Optional[str] = None,
+        deterministic: Optional[bool] = None,
+        document_path: Optional[str] = None
+) -> Dict:
+    """
+    Calcola il suggerimento di un singolo problema (es. uno restituito come "pending").
+
+    La chiamata LLM viene eseguita con priorità interattiva nel thread corrente e la
+    risposta resta nella cache persistente: gli accessi successivi allo stesso problema
+    non interrogano più il modello. I dati interni della scansione (es. 'matched_texts')
+    vengono recuperati dal registro dei problemi in attesa, se presenti.
+
+    Args:
+        main_spdx (str): La licenza principale del progetto.
+        issue (Dict): Il problema con 'file_path', 'detected_license', 'compatible' e 'reason'.
+        regenerated_code_path (Optional[str]): Il percorso del codice rigenerato, se presente.
+        deterministic (Optional[bool]): Se calcolare le alternative dalla matrice invece
+            di interrogare l'LLM (default `LLM_DETERMINISTIC_ALTERNATIVES`).
+        document_path (Optional[str]): Il percorso verificato del file del problema, letto
+            se si tratta di un documento.
+
+    Returns:
+        Dict: Il problema arricchito, con stato "ready".
+    """
+    if deterministic is None:
+        deterministic = LLM_DETERMINISTIC_ALTERNATIVES
+    with _pending_lock:
+        issue = {**_pending_issues.get(_pending_key(main_spdx, issue), {}), **issue}
+
+    licenses_list_str, doc_advice = "", None
+    if issue.get("compatible") is False:
+        alternatives = []
+        if deterministic and not issue["file_path"].endswith(DOCUMENT_EXTENSIONS):
+            alternatives = compatible_alternatives(main_spdx, issue["detected_license"])
+        if alternatives:
+            licenses_list_str = ", ".join(alternatives)
         else:
-            is_document = file_path.endswith(DOCUMENT_EXTENSIONS)
+            try:
+                with llm_priority(INTERACTIVE):
+                    licenses_list_str, doc_advice = _ask_llm_for_issue(
+                        issue, main_spdx, document_path=document_path
+                    )
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("LLM enrichment failed for %s", issue["file_path"])
 
-            if not is_document:
-                # È un file di codice: chiedi licenze alternative
-                licenses_list_str = ask_llm_for_suggestions(issue, main_spdx)
+    return _enriched_issue(issue, licenses_list_str, doc_advice, regenerated_code_path)
 
-                suggestion_text = (
-                    f"{sugg_change_license}\n"
-                    f"{sugg_find_alternative}\n"
-                    f"3§ Here are some alternative compatible licenses you might consider: "
-                    f"{licenses_list_str}"
-                )
-            else:
-                # Passiamo una stringa di licenze vuota qui poiché non abbiamo chiesto alternative
-                # per questo file specifico
-                doc_advice = review_document(issue, main_spdx, licenses_list_str)
-
-                # If review returns None, fallback to generic suggestion, otherwise append advice
-                advice_part = doc_advice if doc_advice else "Check document manually."
-
-                suggestion_text = (
-                    f"{sugg_change_license}\n"
-                    f"{sugg_find_alternative}\n"
-                    f"3§ {advice_part}"
-                )
 
-        # Costruisce il dizionario arricchito finale
-        enriched.append({
-            "file_path": file_path,
-            "detected_license": detected_license,
-            "compatible": issue["compatible"],
-            "reason": issue["reason"],
-            "suggestion": suggestion_text,
-            "licenses": licenses_list_str,
-            "regenerated_code_path": regenerated_map.get(file_path),
-        })
+def prefetch_issue_suggestions(
+        main_spdx: str,
+        enriched_issues: List[Dict],
+        limit: Optional[int] = None
+) -> Optional[threading.Thread]:
+    """
+    Pre-calcola in background i suggerimenti dei primi problemi in attesa.
 
-    return enriched
+    I risultati popolano la cache LLM, così il successivo `enrich_issue` sugli stessi
+    problemi risponde senza attendere il modello. Le chiamate restano a priorità "bulk".
+
+    Args:
+        main_spdx (str): La licenza principale del progetto.
+        enriched_issues (List[Dict]): I problemi restituiti da `enrich_with_llm_suggestions`.
+        limit (Optional[int]): Numero massimo di problemi da pre-calcolare
+            (default `LLM_PREFETCH_ISSUES`); 0 disabilita il pre-calcolo.
+
+    Returns:
+        Optional[threading.Thread]: Il thread avviato, o None se non c'è nulla da fare.
+    """
+    if limit is None:
+        limit = LLM_PREFETCH_ISSUES
+    pending = [i for i in enriched_issues if i.get("suggestion_status") == SUGGESTION_PENDING]
+    if limit <= 0 or not pending:
+        return None
+
+    with _pending_lock:
+        targets = [
+            {**_pending_issues.get(_pending_key(main_spdx, i), {}), **i} for i in pending[:limit]
+        ]
+    logger.info("Prefetching LLM suggestions for %d of %d pending issues",
+                len(targets), len(pending))
+
+    def run() -> None:
+        try:
+            enrich_with_llm_suggestions(main_spdx, targets)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Background prefetch of LLM suggestions failed")
+
+    thread = threading.Thread(target=run, name="llm-prefetch", daemon=True)
+    thread.start()
+    return thread
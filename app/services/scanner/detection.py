@@ -291,3 +291,26 @@ def extract_file_licenses(scancode_data: Dict[str, Any]) -> Dict[str, str]:
             results[path] = " OR ".join(unique_spdx)
 
     return results
+
+
+def extract_file_matched_texts(scancode_data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Estrae, per ogni file, i testi individuati da ScanCode come dichiarazioni di licenza.
+
+    Servono a conservare le regioni rilevanti quando il contenuto del file viene ridotto
+    per un prompt LLM (vedi `prompt_budget`).
+
+    Args:
+        scancode_data (Dict[str, Any]): L'output JSON di ScanCode (filtrato).
+
+    Returns:
+        Dict[str, List[str]]: Un dizionario che mappa i percorsi dei file ai testi individuati.
+    """
+    results = {}
+
+    for file_entry in scancode_data.get("files", []):
+        texts = [m["matched_text"] for m in file_entry.get("matches", []) if m.get("matched_text")]
+        if texts:
+            results[file_entry.get("path")] = texts
+
+    return results
@@ -16,6 +16,19 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_list(name: str) -> list:
+    """
+    Legge una variabile d'ambiente con valori separati da virgola.
+
+    Args:
+        name (str): Il nome della variabile.
+
+    Returns:
+        list: I valori non vuoti, senza spazi attorno.
+    """
+    return [value.strip() for value in os.getenv(name, "").split(",") if value.strip()]
+
 # ==============================================================================
 # AUTENTICAZIONE
 # ==============================================================================
@@ -29,6 +42,116 @@ OLLAMA_CODING_MODEL = os.getenv("OLLAMA_CODING_MODEL")
 OLLAMA_GENERAL_MODEL = os.getenv("OLLAMA_GENERAL_MODEL")
 OLLAMA_HOST_VERSION = os.getenv("OLLAMA_HOST_VERSION")
 OLLAMA_HOST_TAGS = os.getenv("OLLAMA_HOST_TAGS")
+# Pool di istanze Ollama (URL base separati da virgola, es. "http://gpu1:11434,http://gpu2:11434"):
+# se impostato sostituisce OLLAMA_URL e ogni richiesta va all'istanza con meno richieste in
+# corso; le liste per modello limitano un modello a un sottoinsieme delle istanze
+OLLAMA_HOSTS = _env_list("OLLAMA_HOSTS")
+OLLAMA_CODING_HOSTS = _env_list("OLLAMA_CODING_HOSTS")
+OLLAMA_GENERAL_HOSTS = _env_list("OLLAMA_GENERAL_HOSTS")
+# Esclusione (secondi) di un'istanza non raggiungibile prima di un nuovo tentativo
+OLLAMA_HOST_RETRY_SECONDS = float(os.getenv("OLLAMA_HOST_RETRY_SECONDS", "15"))
+# Validità (secondi) dello stato di prontezza memorizzato (servizio attivo e modello installato)
+OLLAMA_READINESS_TTL = float(os.getenv("OLLAMA_READINESS_TTL", "60"))
+# Permanenza in memoria dei modelli dopo l'ultima richiesta (formato Ollama, es. "30m", "-1")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Download e caricamento dei modelli configurati all'avvio dell'applicazione
+OLLAMA_WARMUP_ON_STARTUP = os.getenv("OLLAMA_WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Timeout (secondi) del caricamento di un modello durante il warm-up
+OLLAMA_WARMUP_TIMEOUT = float(os.getenv("OLLAMA_WARMUP_TIMEOUT", "600"))
+
+# ==============================================================================
+# PRESTAZIONI LLM
+# ==============================================================================
+# Numero massimo di chiamate LLM concorrenti durante l'arricchimento dei problemi
+LLM_ENRICHMENT_CONCURRENCY = int(os.getenv("LLM_ENRICHMENT_CONCURRENCY", "4"))
+# Timeout (secondi) di ogni singola chiamata LLM durante l'arricchimento
+LLM_ENRICHMENT_CALL_TIMEOUT = float(os.getenv("LLM_ENRICHMENT_CALL_TIMEOUT", "240"))
+# Numero massimo di conflitti di licenza per prompt raggruppato (0 o 1 disabilita)
+LLM_SUGGESTION_BATCH_SIZE = int(os.getenv("LLM_SUGGESTION_BATCH_SIZE", "25"))
+# Licenze alternative dei file di codice calcolate dalla matrice di compatibilità invece
+# che dall'LLM (l'LLM resta usato per i documenti e le licenze assenti dalla matrice)
+LLM_DETERMINISTIC_ALTERNATIVES = os.getenv(
+    "LLM_DETERMINISTIC_ALTERNATIVES", "true"
+).lower() in ("1", "true", "yes")
+# /analyze restituisce subito i problemi che richiedono l'LLM con suggerimento "pending"
+# (calcolato su richiesta) e pre-calcola in background i primi N (0 disabilita)
+LLM_LAZY_ENRICHMENT = os.getenv("LLM_LAZY_ENRICHMENT", "true").lower() in ("1", "true", "yes")
+LLM_PREFETCH_ISSUES = int(os.getenv("LLM_PREFETCH_ISSUES", "5"))
+# Cache persistente delle risposte LLM (durata in secondi e numero massimo di voci)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+# Rigenerazione a blocchi dei file grandi: dimensione massima di un blocco (caratteri),
+# blocchi simultanei e tentativi aggiuntivi per blocco
+REGEN_CHUNK_MAX_CHARS = int(os.getenv("REGEN_CHUNK_MAX_CHARS", "6000"))
+REGEN_CHUNK_CONCURRENCY = int(os.getenv("REGEN_CHUNK_CONCURRENCY", "4"))
+REGEN_CHUNK_RETRIES = int(os.getenv("REGEN_CHUNK_RETRIES", "2"))
+# Rigenerazione dei file: file simultanei, scadenza per file e budget complessivo (secondi)
+REGEN_FILE_CONCURRENCY = int(os.getenv("REGEN_FILE_CONCURRENCY", "2"))
+REGEN_FILE_DEADLINE = float(os.getenv("REGEN_FILE_DEADLINE", "600"))
+REGEN_TOTAL_BUDGET = float(os.getenv("REGEN_TOTAL_BUDGET", "1800"))
+# Validazione sintattica del codice rigenerato: rigenerazioni aggiuntive con l'errore di
+# sintassi quando il codice non è valido
+REGEN_VALIDATION_RETRIES = int(os.getenv("REGEN_VALIDATION_RETRIES", "1"))
+# Budget stimato (token) dei documenti inseriti nei prompt (0 disabilita la riduzione)
+# e righe di contesto conservate attorno alle regioni rilevanti per la licenza
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "3000"))
+LLM_PROMPT_CONTEXT_LINES = int(os.getenv("LLM_PROMPT_CONTEXT_LINES", "3"))
+# Scheduler delle richieste LLM: slot complessivi verso Ollama e, per le classi
+# "interactive" e "bulk", richieste simultanee, lunghezza della coda e attesa massima (secondi)
+LLM_SCHEDULER_SLOTS = int(os.getenv("LLM_SCHEDULER_SLOTS", "4"))
+LLM_INTERACTIVE_CONCURRENCY = int(os.getenv("LLM_INTERACTIVE_CONCURRENCY", "4"))
+LLM_BULK_CONCURRENCY = int(os.getenv("LLM_BULK_CONCURRENCY", "3"))
+LLM_INTERACTIVE_QUEUE_SIZE = int(os.getenv("LLM_INTERACTIVE_QUEUE_SIZE", "16"))
+LLM_BULK_QUEUE_SIZE = int(os.getenv("LLM_BULK_QUEUE_SIZE", "256"))
+LLM_INTERACTIVE_QUEUE_TIMEOUT = float(os.getenv("LLM_INTERACTIVE_QUEUE_TIMEOUT", "30"))
+LLM_BULK_QUEUE_TIMEOUT = float(os.getenv("LLM_BULK_QUEUE_TIMEOUT", "600"))
+# Circuit breaker delle chiamate LLM: chiamate recenti considerate, minimo di chiamate e
+# frazione di fallimenti (errori o latenza oltre lo SLA) che apre il circuito, SLA di
+# latenza per modello in secondi (0 usa il timeout delle richieste del modello: 120 per il
+# modello di coding, 240 per quello generico), durata dell'apertura prima della chiamata
+# di prova (secondi)
+LLM_BREAKER_ENABLED = os.getenv("LLM_BREAKER_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_CODING_LATENCY_SLA = float(os.getenv("LLM_BREAKER_CODING_LATENCY_SLA", "0"))
+LLM_BREAKER_GENERAL_LATENCY_SLA = float(os.getenv("LLM_BREAKER_GENERAL_LATENCY_SLA", "0"))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+# Backend delle chiamate di generazione: "ollama" (default), "record" (Ollama con
+# registrazione delle risposte), "replay" (risposte registrate) o "stub" (risposte
+# deterministiche); le ultime due non contattano Ollama e attendono una latenza sintetica
+# (secondi per chiamata e per token della risposta)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama").strip().lower()
+LLM_REPLAY_LATENCY = float(os.getenv("LLM_REPLAY_LATENCY", "0"))
+LLM_REPLAY_TOKEN_LATENCY = float(os.getenv("LLM_REPLAY_TOKEN_LATENCY", "0"))
+# Output strutturato: tentativi di correzione quando la risposta JSON dell'LLM non rispetta
+# lo schema richiesto (0 = nessuna correzione)
+LLM_STRUCTURED_RETRIES = int(os.getenv("LLM_STRUCTURED_RETRIES", "1"))
+# Pool di connessioni HTTP keep-alive verso Ollama (host distinti, connessioni per host)
+OLLAMA_HTTP_POOL_CONNECTIONS = int(os.getenv("OLLAMA_HTTP_POOL_CONNECTIONS", "4"))
+OLLAMA_HTTP_POOL_MAXSIZE = int(os.getenv("OLLAMA_HTTP_POOL_MAXSIZE", "16"))
+# Durata (secondi) delle connessioni inattive nel pool asincrono e timeout di connessione
+OLLAMA_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_HTTP_KEEPALIVE_EXPIRY", "30"))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+
+# ==============================================================================
+# JOB DI ANALISI
+# ==============================================================================
+# Job di analisi e rigenerazione eseguiti simultaneamente, job in attesa massimi e
+# permanenza (secondi) dei job terminati prima della rimozione dal registro
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+# ==============================================================================
+# POOL DI THREAD PER FASE
+# ==============================================================================
+# Thread dei pool dedicati alle elaborazioni in memoria (filtraggio, compatibilità),
+# ai processi esterni (ScanCode, git) e alle attese su rete e disco (LLM, file)
+EXECUTOR_CPU_WORKERS = int(os.getenv("EXECUTOR_CPU_WORKERS") or os.cpu_count() or 2)
+EXECUTOR_SUBPROCESS_WORKERS = int(os.getenv("EXECUTOR_SUBPROCESS_WORKERS", "2"))
+EXECUTOR_IO_WORKERS = int(os.getenv("EXECUTOR_IO_WORKERS", "32"))
 
 # ==============================================================================
 # STRUMENTI ESTERNI
@@ -50,4 +173,10 @@ os.makedirs(OUTPUT_BASE_DIR, exist_ok=True)
 # Definizione robusta di MINIMAL_JSON_BASE_DIR
 # Se non definita in .env, viene creata dentro OUTPUT_BASE_DIR per garantire consistenza
 MINIMAL_JSON_BASE_DIR = os.getenv("MINIMAL_JSON_BASE_DIR") or os.path.join(OUTPUT_BASE_DIR, "minimal_scans")
-os.makedirs(MINIMAL_JSON_BASE_DIR, exist_ok=True)
\ No newline at end of file
+os.makedirs(MINIMAL_JSON_BASE_DIR, exist_ok=True)
+
+# File SQLite della cache persistente delle risposte LLM
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or os.path.join(OUTPUT_BASE_DIR, "llm_cache.sqlite3")
+
+# File JSON Lines delle risposte LLM registrate (LLM_BACKEND=record/replay)
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH") or os.path.join(OUTPUT_BASE_DIR, "llm_cassette.jsonl")
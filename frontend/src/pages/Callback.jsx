@@ -62,6 +62,7 @@ const Callback = () => {
     const [filterState, setFilterState] = useState(2); // 1: Compatible, 2: All, 3: Incompatible
     const [showLicenseSuggestionForm, setShowLicenseSuggestionForm] = useState(false);
     const [licenseSuggestion, setLicenseSuggestion] = useState(null);
+    const [loadingSuggestions, setLoadingSuggestions] = useState({}); // file_path -> true durante il calcolo
 
     // Progresso simulato per l'analisi
     const [progressStep, setProgressStep] = useState(0);
@@ -147,6 +148,28 @@ const Callback = () => {
         }
     };
 
+    // 3b. Suggerimento AI su richiesta per i problemi restituiti come "pending"
+    const handleIssueSuggestion = async (issue) => {
+        if (!analysisData) return;
+
+        setLoadingSuggestions((prev) => ({ ...prev, [issue.file_path]: true }));
+        try {
+            const response = await axios.post(`${API_BASE_URL}/api/issues/suggestion`, {
+                repository: analysisData.repository,
+                main_license: analysisData.main_license,
+                issue
+            });
+            setAnalysisData((prev) => ({
+                ...prev,
+                issues: prev.issues.map(i => (i.file_path === issue.file_path ? response.data : i))
+            }));
+        } catch (err) {
+            console.error("Issue suggestion failed:", err);
+        } finally {
+            setLoadingSuggestions((prev) => ({ ...prev, [issue.file_path]: false }));
+        }
+    };
+
     // 4. Gestione Download
     const handleDownload = async () => {
         if (!cloneData) return;
@@ -565,6 +588,19 @@ const Callback = () => {
                                                                 }
                                                             </div>
                                                         )}
+                                                        {issue.suggestion_status === 'pending' && !isComparisonMode && (
+                                                            <button
+                                                                onClick={() => handleIssueSuggestion(issue)}
+                                                                className="glass-button"
+                                                                disabled={!!loadingSuggestions[issue.file_path]}
+                                                                style={{ padding: '0.5rem 1rem', fontSize: '0.9rem', marginBottom: '1rem', background: 'rgba(100, 108, 255, 0.2)' }}
+                                                            >
+                                                                <span style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
+                                                                    <Lightbulb size={16} />
+                                                                    {loadingSuggestions[issue.file_path] ? 'Generating AI Suggestion...' : 'Get AI Suggestion'}
+                                                                </span>
+                                                            </button>
+                                                        )}
                                                         {issue.regenerated_code_path && (
                                                             <div style={{ marginTop: '1rem' }}>
                                                                 <div style={{ display: 'flex', alignItems: 'center', gap: '0.5rem', marginBottom: '0.5rem' }}>
@@ -60,6 +60,7 @@ def patch_config_variables(tmp_path):
     """
     test_clone_dir = str(tmp_path / "test_clones")
     test_output_dir = str(tmp_path / "test_output")
+    test_minimal_dir = os.path.join(test_output_dir, "minimal_scans")
 
     # Create test directories
     os.makedirs(test_clone_dir, exist_ok=True)
@@ -71,10 +72,63 @@ def patch_config_variables(tmp_path):
             patch("app.services.analysis_workflow.CLONE_BASE_DIR", test_clone_dir), \
             patch("app.services.llm.suggestion.CLONE_BASE_DIR", test_clone_dir), \
             patch("app.services.github.github_client.CLONE_BASE_DIR", test_clone_dir), \
-            patch("app.services.downloader.download_service.CLONE_BASE_DIR", test_clone_dir):
+            patch("app.services.downloader.download_service.CLONE_BASE_DIR", test_clone_dir), \
+            patch("app.services.scanner.detection.OUTPUT_BASE_DIR", test_output_dir), \
+            patch("app.services.scanner.filter.MINIMAL_JSON_BASE_DIR", test_minimal_dir), \
+            patch("app.services.llm.ollama_api.MINIMAL_JSON_BASE_DIR", test_minimal_dir):
         yield test_clone_dir
 
 
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(tmp_path, monkeypatch):
+    """
+    Fixture "autouse" che fornisce a ogni test una cache LLM persistente vuota.
+
+    Le risposte mockate dell'LLM cambiano da test a test: senza isolamento una risposta
+    memorizzata da un test verrebbe restituita a quelli successivi.
+
+    Argomenti:
+        tmp_path: fixture di pytest che fornisce una directory temporanea unica.
+        monkeypatch: fixture di pytest per applicare patch.
+    """
+    from app.services.llm import llm_cache
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite3"))
+    llm_cache.reset_llm_cache()
+    yield
+    llm_cache.reset_llm_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_ollama_readiness():
+    """
+    Fixture "autouse" che azzera lo stato di prontezza di Ollama memorizzato.
+
+    Garantisce che ogni test di `ensure_ollama_ready` esegua i controlli mockati invece
+    di riutilizzare lo stato lasciato da un test precedente.
+    """
+    from app.services.llm import ollama_api
+
+    ollama_api.invalidate_ollama_readiness()
+    yield
+    ollama_api.invalidate_ollama_readiness()
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_circuit_breakers():
+    """
+    Fixture "autouse" che riparte da circuiti LLM chiusi in ogni test.
+
+    Evita che i fallimenti simulati da un test aprano il circuito e facciano fallire
+    subito le chiamate dei test successivi.
+    """
+    from app.services.llm import circuit_breaker
+
+    circuit_breaker.reset_circuit_breakers()
+    yield
+    circuit_breaker.reset_circuit_breakers()
+
+
 @pytest.fixture(autouse=True)
 def _default_patches(monkeypatch, complex_matrix_data):
     """
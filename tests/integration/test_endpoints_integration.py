@@ -21,6 +21,7 @@ from unittest.mock import patch, AsyncMock, MagicMock
 from fastapi.testclient import TestClient
 from urllib.parse import urlparse, parse_qs
 from app.main import app
+from app.models.schemas import AnalyzeResponse
 
 client = TestClient(app)
 
@@ -262,6 +263,75 @@ def test_regenerate_bad_repo_string(mock_regen):
     assert response.status_code == 400
 
 
+def test_issue_suggestion_returns_ready_issue():
+    """
+    Verifica che /api/issues/suggestion calcoli il suggerimento di un problema "pending"
+    passando al servizio la licenza principale e il problema ricevuto.
+    """
+    issue = {
+        "file_path": "owner_repo/NOTICE",
+        "detected_license": "GPL-3.0",
+        "compatible": False,
+        "reason": "conflict",
+        "suggestion_status": "pending",
+    }
+    ready = {**issue, "suggestion": "3§ Ask for dual licensing", "licenses": "",
+             "suggestion_status": "ready"}
+
+    with patch("app.controllers.analysis.perform_issue_suggestion", return_value=ready) as mock_svc:
+        response = client.post("/api/issues/suggestion", json={
+            "repository": "owner/repo", "main_license": "MIT", "issue": issue,
+        })
+        bad = client.post("/api/issues/suggestion", json={
+            "repository": "invalid", "main_license": "MIT", "issue": issue,
+        })
+
+    assert response.status_code == 200
+    assert response.json()["suggestion_status"] == "ready"
+    assert mock_svc.call_args.args[:3] == ("owner", "repo", "MIT")
+    assert mock_svc.call_args.args[3].file_path == "owner_repo/NOTICE"
+    assert bad.status_code == 400
+
+
+@pytest.mark.parametrize("file_path", ["ABSOLUTE", "owner_repo/../../secret/NOTICE.txt"])
+def test_issue_suggestion_rejects_files_outside_repository(tmp_path, file_path):
+    """
+    Verifica che /api/issues/suggestion rifiuti con 400 i percorsi assoluti o che escono
+    dal repository, senza leggere il file né interrogare l'LLM.
+    """
+    clones = tmp_path / "clones"
+    (clones / "owner_repo").mkdir(parents=True)
+    secret = tmp_path / "secret" / "NOTICE.txt"
+    secret.parent.mkdir()
+    secret.write_text("top secret")
+    if file_path == "ABSOLUTE":
+        file_path = str(secret)
+    issue = {"file_path": file_path, "detected_license": "GPL-3.0", "compatible": False,
+             "suggestion_status": "pending"}
+
+    with patch("app.services.analysis_workflow.CLONE_BASE_DIR", str(clones)), \
+            patch("app.services.llm.suggestion.call_ollama_deepseek") as mock_llm:
+        response = client.post("/api/issues/suggestion", json={
+            "repository": "owner/repo", "main_license": "MIT", "issue": issue,
+        })
+
+    assert response.status_code == 400
+    assert "Invalid file path" in response.json()["detail"]
+    mock_llm.assert_not_called()
+
+
+def test_issue_suggestion_missing_repository():
+    """
+    Verifica che un repository inesistente restituisca 400 invece di 500.
+    """
+    issue = {"file_path": "NOTICE", "detected_license": "GPL-3.0", "compatible": False}
+    response = client.post("/api/issues/suggestion", json={
+        "repository": "ghost/missing", "main_license": "MIT", "issue": issue,
+    })
+
+    assert response.status_code == 400
+
+
 # ==================================================================================
 #                                TESTS: DOWNLOAD
 # ==================================================================================
@@ -787,6 +857,270 @@ def test_upload_zip_internal_error(mock_upload_zip):
     assert "Internal Error" in response.json()["detail"]
 
 
+# ==================================================================================
+#                                STREAMING (SSE)
+# ==================================================================================
+
+def _parse_sse(text):
+    """Estrae la lista di coppie (evento, dati) da un corpo text/event-stream."""
+    import json
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_suggest_license_stream_sse():
+    """
+    Testa l'endpoint /api/suggest-license/stream: gli eventi del servizio vengono
+    inoltrati come server-sent events.
+    """
+    async def fake_events(requirements, detected_licenses):
+        yield "token", {"text": "{"}
+        yield "result", {"suggested_license": "MIT", "explanation": "x", "alternatives": []}
+
+    payload = {"owner": "u", "repo": "r", "commercial_use": True}
+    with patch("app.controllers.analysis.stream_license_suggestion", side_effect=fake_events):
+        response = client.post("/api/suggest-license/stream", json=payload)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["token", "result"]
+    assert events[-1][1]["suggested_license"] == "MIT"
+
+
+def test_regenerate_stream_sse_error_event():
+    """
+    Testa l'endpoint /api/regenerate/stream: un errore durante lo stream viene
+    riportato come evento "error" finale.
+    """
+    async def failing_events(owner, repo, previous_analysis):
+        yield "file_start", {"file_path": "a.py", "index": 0, "total": 1}
+        raise RuntimeError("boom")
+
+    payload = {"repository": "u/r", "main_license": "MIT", "issues": []}
+    with patch("app.controllers.analysis.get_existing_repo_path", return_value="/tmp/u_r"), \
+            patch("app.controllers.analysis.stream_regeneration", side_effect=failing_events):
+        response = client.post("/api/regenerate/stream", json=payload)
+
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["file_start", "error"]
+    assert "boom" in events[-1][1]["detail"]
+
+
+def test_regenerate_stream_missing_repo():
+    """
+    Testa che /api/regenerate/stream restituisca 400 prima di aprire lo stream se il
+    repository non esiste.
+    """
+    payload = {"repository": "u/missing", "main_license": "MIT", "issues": []}
+    response = client.post("/api/regenerate/stream", json=payload)
+
+    assert response.status_code == 400
+
+
+def test_llm_scheduler_status():
+    """
+    Testa che /api/llm/scheduler esponga la profondità delle code per entrambe le classi.
+    """
+    response = client.get("/api/llm/scheduler")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_slots"] >= 1
+    assert set(body["classes"]) == {"interactive", "bulk"}
+    assert {"running", "queued", "rejected"} <= set(body["classes"]["bulk"])
+
+
+def test_llm_ready_reports_model_state():
+    """
+    Testa che /api/llm/ready restituisca 503 finché i modelli non sono caricati e 200 dopo.
+    """
+    loading = {"ready": False, "models": {"coder": {"state": "loading"}}}
+    ready = {"ready": True, "models": {"coder": {"state": "ready", "load_seconds": 1.5}}}
+
+    with patch("app.controllers.analysis.get_model_warmup_status", side_effect=[loading, ready]):
+        first = client.get("/api/llm/ready")
+        second = client.get("/api/llm/ready")
+
+    assert first.status_code == 503
+    assert first.json() == loading
+    assert second.status_code == 200
+    assert second.json()["models"]["coder"]["state"] == "ready"
+
+
+
+def test_llm_circuit_reports_breaker_state():
+    """
+    Testa che /api/llm/circuit esponga lo stato dei circuit breaker per modello.
+    """
+    stats = {"coder": {"state": "open", "failure_rate": 0.8, "latency_p95": 95.0}}
+
+    with patch("app.controllers.analysis.get_circuit_breaker_stats", return_value=stats):
+        response = client.get("/api/llm/circuit")
+
+    assert response.status_code == 200
+    assert response.json() == stats
+
+
+def test_llm_hosts_reports_pool_state():
+    """
+    Testa che /api/llm/hosts esponga lo stato delle istanze Ollama del pool.
+    """
+    stats = {"http://gpu1:11434": {"up": False, "outstanding": 0, "models": None}}
+
+    with patch("app.controllers.analysis.get_host_pool_stats", return_value=stats):
+        response = client.get("/api/llm/hosts")
+
+    assert response.status_code == 200
+    assert response.json() == stats
+
+
+def test_llm_structured_reports_validation_counters():
+    """
+    Testa che /api/llm/structured esponga i contatori di validazione delle risposte JSON.
+    """
+    stats = {"license_suggestion": {"calls": 3, "valid_first_try": 2, "repaired": 1,
+                                    "repair_attempts": 1, "failed": 0}}
+
+    with patch("app.controllers.analysis.get_structured_output_stats", return_value=stats):
+        response = client.get("/api/llm/structured")
+
+    assert response.status_code == 200
+    assert response.json() == stats
+
+# ==================================================================================
+#                                JOB DI ANALISI
+# ==================================================================================
+
+def _wait_job(job_id):
+    """Interroga /api/jobs/{job_id} finché il job non termina."""
+    import time
+    for _ in range(500):
+        body = client.get(f"/api/jobs/{job_id}").json()
+        if body["status"] in ("succeeded", "failed"):
+            return body
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_analysis_job_returns_id_and_result():
+    """
+    Testa che /api/jobs/analyze restituisca subito 202 con l'identificativo del job e che
+    il risultato sia disponibile interrogando lo stato.
+    """
+    def fake_scan(owner, repo, progress=None):
+        progress("scanning")
+        progress("filtering", files_scanned=4)
+        return AnalyzeResponse(repository=f"{owner}/{repo}", main_license="MIT", issues=[])
+
+    with patch("app.controllers.analysis.get_existing_repo_path", return_value="/tmp/u_r"), \
+            patch("app.services.analysis_jobs.perform_initial_scan", side_effect=fake_scan):
+        response = client.post("/api/jobs/analyze", json={"owner": "u", "repo": "r"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.json()["events_url"] == f"/api/jobs/{job_id}/events"
+        body = _wait_job(job_id)
+
+    assert body["status"] == "succeeded"
+    assert body["progress"]["files_scanned"] == 4
+    assert body["result"]["repository"] == "u/r"
+
+
+def test_regeneration_job_events_stream():
+    """
+    Testa che /api/jobs/{job_id}/events inoltri stato, avanzamento ed errore del job.
+    """
+    def failing_regeneration(owner, repo, previous_analysis, progress=None):
+        progress("regenerating", files_total=1, files_processed=0, files_regenerated=0)
+        raise RuntimeError("boom")
+
+    payload = {"repository": "u/r", "main_license": "MIT", "issues": []}
+    with patch("app.controllers.analysis.get_existing_repo_path", return_value="/tmp/u_r"), \
+            patch("app.services.analysis_jobs.perform_regeneration",
+                  side_effect=failing_regeneration):
+        job_id = client.post("/api/jobs/regenerate", json=payload).json()["job_id"]
+        response = client.get(f"/api/jobs/{job_id}/events")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["status", "status", "progress", "error"]
+    assert events[2][1]["files_total"] == 1
+    assert events[-1][1] == {"detail": "boom"}
+
+
+def test_jobs_one_active_job_per_repository():
+    """
+    Testa che un secondo invio per un repository con un job attivo restituisca lo stesso
+    job (stesso tipo) o 409 (tipo diverso).
+    """
+    import threading
+    release = threading.Event()
+
+    def blocking_scan(owner, repo, progress=None):
+        release.wait(5)
+        return AnalyzeResponse(repository=f"{owner}/{repo}", main_license="MIT", issues=[])
+
+    payload = {"repository": "u/busy", "main_license": "MIT", "issues": []}
+    with patch("app.controllers.analysis.get_existing_repo_path", return_value="/tmp/u_busy"), \
+            patch("app.services.analysis_jobs.perform_initial_scan", side_effect=blocking_scan):
+        first = client.post("/api/jobs/analyze", json={"owner": "u", "repo": "busy"})
+        second = client.post("/api/jobs/analyze", json={"owner": "u", "repo": " busy "})
+        conflict = client.post("/api/jobs/regenerate", json=payload)
+        release.set()
+        _wait_job(first.json()["job_id"])
+
+    assert second.status_code == 202
+    assert second.json()["job_id"] == first.json()["job_id"]
+    assert conflict.status_code == 409
+    assert first.json()["job_id"] in conflict.json()["detail"]
+
+
+def test_jobs_reject_missing_repo_and_unknown_job():
+    """
+    Testa che i job non vengano accodati per repository inesistenti e che un job
+    sconosciuto restituisca 404.
+    """
+    assert client.post("/api/jobs/analyze", json={"owner": "u", "repo": "missing"}).status_code == 400
+    assert client.post("/api/jobs/analyze", json={"owner": "u"}).status_code == 400
+    assert client.get("/api/jobs/unknown").status_code == 404
+    assert client.get("/api/jobs/unknown/events").status_code == 404
+    assert set(client.get("/api/jobs").json()["jobs"]) == {"queued", "running", "succeeded", "failed"}
+
+def test_analyze_runs_in_io_stage_and_executors_report_queues():
+    """
+    Testa che /api/analyze venga eseguito nel pool di fase "io" invece che nel pool
+    condiviso di FastAPI e che /api/executors esponga le code per fase.
+    """
+    import threading
+    threads = []
+
+    def fake_scan(owner, repo):
+        threads.append(threading.current_thread().name)
+        return AnalyzeResponse(repository=f"{owner}/{repo}", main_license="MIT", issues=[])
+
+    with patch("app.controllers.analysis.perform_initial_scan", side_effect=fake_scan):
+        response = client.post("/api/analyze", json={"owner": "u", "repo": "r"})
+
+    assert response.status_code == 200
+    assert threads[0].startswith("stage-io")
+    stats = client.get("/api/executors").json()
+    assert set(stats) == {"cpu", "subprocess", "io"}
+    assert stats["io"]["completed"] >= 1
+
+def test_compatibility_cache_reports_symbol_cache_metrics():
+    """
+    Testa che /api/compatibility/cache esponga le metriche delle cache dei simboli.
+    """
+    response = client.get("/api/compatibility/cache")
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert set(stats) == {"normalize_symbol", "extract_symbols"}
+    assert stats["normalize_symbol"]["alias_table_size"] > 0
+
 # ==================================================================================
 #                                ROOT ENDPOINT TEST
 # ==================================================================================
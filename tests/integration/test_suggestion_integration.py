@@ -81,6 +81,7 @@ class TestLicenseSuggestionEndpoint:
             "distribution": True,
             "patent_grant": False,
             "copyleft": "none",
+            "additional_requirements": "Must be OSI approved",
             "detected_licenses": ["Apache-2.0", "MIT"]
         }
 
@@ -143,6 +144,7 @@ class TestLicenseSuggestionEndpoint:
             "repo": "test_repo",
             "commercial_use": True,
             "copyleft": "none",
+            "additional_requirements": "Must be OSI approved",
             "detected_licenses": []
         }
 
@@ -11,6 +11,7 @@ contro vulnerabilità comuni come:
 - Esposizione di dati sensibili
 """
 
+import asyncio
 import os
 import zipfile
 import pytest
@@ -53,7 +54,7 @@ class TestPathTraversal:
             mock_clone.return_value = Mock(success=False, error="Invalid path")
 
             with pytest.raises(HTTPException) as exc_info:
-                clone_repository({"owner": malicious_owner, "repo": malicious_repo})
+                asyncio.run(clone_repository({"owner": malicious_owner, "repo": malicious_repo}))
 
             assert exc_info.value.status_code in [400, 500]
 
@@ -126,7 +127,7 @@ class TestInputValidation:
     def test_clone_repository_invalid_input(self, invalid_payload):
         """Verifica che input non validi vengano rifiutati."""
         with pytest.raises(HTTPException) as exc_info:
-            clone_repository(invalid_payload)
+            asyncio.run(clone_repository(invalid_payload))
 
         assert exc_info.value.status_code == 400
         assert "required" in str(exc_info.value.detail).lower()
@@ -140,7 +141,7 @@ class TestInputValidation:
     def test_analyze_invalid_input(self, invalid_payload):
         """Verifica che l'endpoint di analisi validi correttamente gli input."""
         with pytest.raises(HTTPException) as exc_info:
-            run_analysis(invalid_payload)
+            asyncio.run(run_analysis(invalid_payload))
 
         assert exc_info.value.status_code == 400
 
@@ -157,7 +158,7 @@ class TestInputValidation:
             mock_clone.return_value = Mock(success=False, error="Invalid input")
 
             try:
-                clone_repository(malicious_input)
+                asyncio.run(clone_repository(malicious_input))
             except HTTPException:
                 pass  # Errore atteso
 
@@ -171,7 +172,7 @@ class TestInputValidation:
         )
 
         with pytest.raises(HTTPException) as exc_info:
-            regenerate_analysis(invalid_analysis)
+            asyncio.run(regenerate_analysis(invalid_analysis))
 
         assert exc_info.value.status_code == 400
         assert "format" in str(exc_info.value.detail).lower()
@@ -198,7 +199,7 @@ class TestFileUploadSecurity:
         mock_file.file = BytesIO(b"malicious content")
 
         with pytest.raises(HTTPException) as exc_info:
-            upload_zip(owner="test", repo="test", uploaded_file=mock_file)
+            asyncio.run(upload_zip(owner="test", repo="test", uploaded_file=mock_file))
 
         assert exc_info.value.status_code == 400
         assert "zip" in str(exc_info.value.detail).lower()
@@ -210,7 +211,7 @@ class TestFileUploadSecurity:
         mock_file.file = BytesIO(b"This is not a valid ZIP file")
 
         with pytest.raises((HTTPException, zipfile.BadZipFile)):
-            upload_zip(owner="test", repo="test", uploaded_file=mock_file)
+            asyncio.run(upload_zip(owner="test", repo="test", uploaded_file=mock_file))
 
     def test_upload_zip_bomb(self, tmp_path):
         """Verifica la protezione contro ZIP bomb (compressione eccessiva)."""
@@ -368,7 +369,7 @@ class TestSensitiveDataExposure:
             )
 
             with pytest.raises(HTTPException) as exc_info:
-                clone_repository({"owner": "test", "repo": "test"})
+                asyncio.run(clone_repository({"owner": "test", "repo": "test"}))
 
             # L'errore dovrebbe essere generico o sanificato
             str(exc_info.value.detail)
@@ -440,7 +441,7 @@ class TestDoSProtection:
             mock_clone.return_value = Mock(success=False, error="Invalid")
 
             with pytest.raises(HTTPException):
-                clone_repository({"owner": very_long_name, "repo": "test"})
+                asyncio.run(clone_repository({"owner": very_long_name, "repo": "test"}))
 
     def test_nested_zip_extraction(self, tmp_path):
         """Verifica la protezione contro ZIP annidati eccessivamente."""
@@ -552,7 +553,7 @@ class TestIntegrationSecurity:
                 mock_clone.return_value = Mock(success=False, error="Invalid")
 
                 try:
-                    clone_repository(payload)
+                    asyncio.run(clone_repository(payload))
                 except HTTPException as e:
                     assert e.status_code in [400, 500]
                 except Exception:
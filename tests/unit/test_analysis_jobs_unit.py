@@ -0,0 +1,193 @@
+"""
+Analysis Jobs Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.analysis_jobs`.
+Verifica che analisi e rigenerazioni vengano eseguite come job in un pool dedicato, con
+stato interrogabile ed eventi di avanzamento, senza bloccare il chiamante.
+
+La suite copre:
+1. Esecuzione: Stati, avanzamento, risultato ed errori.
+2. Coda: Rifiuto oltre la coda massima, un solo job attivo per repository e rimozione
+   dei job scaduti.
+3. Eventi: Flusso degli eventi fino al termine del job.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.models.schemas import AnalyzeResponse
+from app.services.analysis_jobs import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_SUCCEEDED,
+    JobConflict,
+    JobManager,
+    JobQueueFull,
+    stream_job_events,
+)
+
+
+def _analysis(owner, repo, progress=None):
+    """
+    Simula `perform_initial_scan` notificando due fasi.
+    """
+    progress("scanning")
+    progress("enriching", files_scanned=3, issues_found=0)
+    return AnalyzeResponse(repository=f"{owner}/{repo}", main_license="MIT", issues=[])
+
+
+def _wait_finished(job, timeout=5.0):
+    """
+    Attende il termine di un job.
+    """
+    end = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < end, "job did not finish"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def manager():
+    """
+    Registro dei job con un solo job simultaneo e coda di due job.
+    """
+    return JobManager(workers=1, queue_size=2, retention_seconds=60)
+
+# ==================================================================================
+#                                TEST: ESECUZIONE
+# ==================================================================================
+
+def test_job_records_progress_and_result(manager):
+    """
+    Verifica che il job registri avanzamento e risultato e che gli eventi seguano
+    l'ordine di esecuzione.
+    """
+    job = manager.submit("analysis", "u/r", _analysis, "u", "r")
+    _wait_finished(job)
+
+    snapshot = job.snapshot()
+    assert snapshot["status"] == JOB_SUCCEEDED
+    assert snapshot["progress"] == {"stage": JOB_SUCCEEDED, "files_scanned": 3, "issues_found": 0}
+    assert snapshot["result"]["repository"] == "u/r"
+    events, finished = job.events_since(0)
+    assert finished
+    assert [name for name, _ in events] == ["status", "status", "progress", "progress", "result"]
+    assert events[3][1] == {"stage": "enriching", "files_scanned": 3, "issues_found": 0}
+    assert manager.get(job.id) is job
+
+
+def test_failed_job_reports_error(manager):
+    """
+    Verifica che un'eccezione del flusso termini il job con l'errore.
+    """
+    def failing(progress=None):
+        raise ValueError("Repository not found")
+
+    job = manager.submit("analysis", "u/r", failing)
+    _wait_finished(job)
+
+    assert job.status == JOB_FAILED
+    assert job.snapshot()["error"] == "Repository not found"
+    assert job.events_since(0)[0][-1] == ("error", {"detail": "Repository not found"})
+
+# ==================================================================================
+#                                TEST: CODA
+# ==================================================================================
+
+def test_queue_is_bounded(manager):
+    """
+    Verifica che, con il pool occupato, i job oltre la coda massima vengano rifiutati.
+    """
+    release = threading.Event()
+
+    def blocking(progress=None):
+        release.wait(5)
+        return AnalyzeResponse(repository="u/r", main_license="MIT", issues=[])
+
+    running = manager.submit("analysis", "u/r0", blocking)
+    while running.status == JOB_QUEUED:
+        time.sleep(0.01)
+    queued = [manager.submit("analysis", f"u/r{i}", blocking) for i in (1, 2)]
+
+    with pytest.raises(JobQueueFull):
+        manager.submit("analysis", "u/r3", blocking)
+    assert manager.stats()["jobs"] == {"queued": 2, "running": 1, "succeeded": 0, "failed": 0}
+
+    release.set()
+    for job in [running, *queued]:
+        _wait_finished(job)
+    assert manager.stats()["jobs"]["succeeded"] == 3
+
+
+def test_one_active_job_per_repository(manager):
+    """
+    Verifica che un secondo invio per un repository con un job attivo restituisca quel
+    job (stesso tipo) o venga rifiutato (tipo diverso), e che a job terminato se ne
+    possa accodare uno nuovo.
+    """
+    release = threading.Event()
+    calls = []
+
+    def blocking(progress=None):
+        calls.append(1)
+        release.wait(5)
+        return AnalyzeResponse(repository="u/r", main_license="MIT", issues=[])
+
+    first = manager.submit("analysis", "u/r", blocking)
+    assert manager.submit("analysis", "u/r", blocking) is first
+    with pytest.raises(JobConflict) as exc:
+        manager.submit("regeneration", "u/r", blocking)
+    assert exc.value.job is first
+    assert manager.stats()["jobs"]["queued"] + manager.stats()["jobs"]["running"] == 1
+
+    release.set()
+    _wait_finished(first)
+    second = manager.submit("regeneration", "u/r", blocking)
+    _wait_finished(second)
+    assert second is not first
+    assert len(calls) == 2
+
+
+def test_finished_jobs_expire():
+    """
+    Verifica che i job terminati vengano rimossi dopo la permanenza configurata.
+    """
+    manager = JobManager(workers=1, queue_size=1, retention_seconds=0)
+    job = manager.submit("analysis", "u/r", _analysis, "u", "r")
+    _wait_finished(job)
+    job.finished_at -= 1
+
+    assert manager.get(job.id) is None
+
+# ==================================================================================
+#                                TEST: EVENTI
+# ==================================================================================
+
+def test_stream_delivers_all_events_until_finished(manager):
+    """
+    Verifica che lo stream ripeta gli eventi già avvenuti e termini con il risultato.
+    """
+    release = threading.Event()
+
+    def gated(progress=None):
+        progress("scanning")
+        release.wait(5)
+        return AnalyzeResponse(repository="u/r", main_license="MIT", issues=[])
+
+    job = manager.submit("analysis", "u/r", gated)
+
+    async def collect():
+        events = []
+        async for name, data in stream_job_events(job, poll_interval=0.01):
+            events.append((name, data))
+            if name == "progress":
+                release.set()
+        return events
+
+    events = asyncio.run(collect())
+
+    assert [name for name, _ in events] == ["status", "status", "progress", "result"]
+    assert events[-1][1]["main_license"] == "MIT"
@@ -14,7 +14,10 @@ La suite copre:
 5. Riesame Post-Rigenerazione: Validazione dello stato del repository dopo le modifiche al codice.
 """
 
+import asyncio
 import os
+import threading
+import time
 import tempfile
 import os
 import json
@@ -31,9 +34,12 @@ from app.services.analysis_workflow import (
     perform_initial_scan,
     perform_regeneration,
     _regenerate_incompatible_files,
-    _rescan_repository
+    _rescan_repository,
+    stream_regeneration,
+    DEFAULT_TARGET_LICENSES
 )
 from app.models.schemas import AnalyzeResponse, LicenseIssue
+from app.services.llm.code_generator import store_regenerated_code
 
 # ==================================================================================
 #                                     FIXTURES
@@ -264,6 +270,36 @@ def test_perform_initial_scan_flow(tmp_path):
         assert response.main_license == "MIT"
 
 
+def test_perform_initial_scan_reports_progress(tmp_path):
+    """
+    Verifica che la scansione iniziale notifichi le fasi con i file scansionati e i
+    problemi trovati.
+    """
+    owner, repo = "scan", "progress"
+    base_dir = tmp_path / "clones"
+    (base_dir / f"{owner}_{repo}").mkdir(parents=True)
+    issues = [{"file_path": "a.py", "detected_license": "GPL-3.0", "compatible": False}]
+    reports = []
+
+    with patch("app.services.analysis_workflow.CLONE_BASE_DIR", str(base_dir)), \
+            patch("app.services.analysis_workflow.run_scancode",
+                  return_value={"files": [{"path": "a.py"}, {"path": "b.py"}]}), \
+            patch("app.services.analysis_workflow.detect_main_license_scancode", return_value="MIT"), \
+            patch("app.services.analysis_workflow.filter_licenses", return_value={}), \
+            patch("app.services.analysis_workflow.extract_file_licenses", return_value={}), \
+            patch("app.services.analysis_workflow.check_compatibility", return_value={"issues": issues}), \
+            patch("app.services.analysis_workflow.enrich_with_llm_suggestions", return_value=issues), \
+            patch("app.services.analysis_workflow.prefetch_issue_suggestions"):
+        perform_initial_scan(owner, repo,
+                             progress=lambda stage, **counters: reports.append((stage, counters)))
+
+    assert [stage for stage, _ in reports] == [
+        "scanning", "filtering", "checking_compatibility", "enriching"
+    ]
+    assert reports[1][1] == {"files_scanned": 2}
+    assert reports[3][1] == {"issues_found": 1}
+
+
 def test_perform_initial_scan_repo_not_found(tmp_path):
     """
     Valida la gestione degli errori quando si tenta di scansionare un repository inesistente.
@@ -709,9 +745,10 @@ def test_regenerate_incompatible_files_os_error_handling(tmp_path):
     assert len(result) == 0
 
 
-def test_regenerate_incompatible_files_general_exception(tmp_path):
+def test_regenerate_incompatible_files_general_exception(tmp_path, caplog):
     """
-    Testa il blocco di cattura dell'eccezione generica nel ciclo di rigenerazione.
+    Testa il blocco di cattura dell'eccezione generica nel ciclo di rigenerazione,
+    che viene registrata nel log insieme al file coinvolto.
     """
     repo_path = tmp_path / "owner_repo"
     repo_path.mkdir()
@@ -725,6 +762,132 @@ def test_regenerate_incompatible_files_general_exception(tmp_path):
 
     # Dovrebbe catturare l'eccezione e restituire un risultato vuoto
     assert len(result) == 0
+    assert "Unexpected error regenerating fail.py" in caplog.text
+
+def _write_incompatible_files(repo_path, names):
+    """
+    Crea i file indicati e restituisce i relativi problemi di licenza incompatibili.
+    """
+    for name in names:
+        (repo_path / name).write_text(f"# original {name}")
+    return [LicenseIssue(file_path=name, detected_license="GPL", compatible=False) for name in names]
+
+
+def test_regenerate_incompatible_files_runs_in_parallel(tmp_path):
+    """
+    Verifica che più file vengano rigenerati contemporaneamente dal pool di worker.
+    """
+    repo_path = tmp_path / "owner_repo"
+    repo_path.mkdir()
+    issues = _write_incompatible_files(repo_path, ["a.py", "b.py"])
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fake_regenerate(**kwargs):
+        barrier.wait()  # Fallisce se i due file non sono in elaborazione insieme
+        return f"# regenerated {kwargs['file_path']}"
+
+    with patch("app.services.analysis_workflow.regenerate_code", side_effect=fake_regenerate):
+        result = _regenerate_incompatible_files(str(repo_path), "MIT", issues, max_workers=2)
+
+    assert set(result) == {"a.py", "b.py"}
+    assert (repo_path / "b.py").read_text() == "# regenerated b.py"
+
+
+def test_regenerate_incompatible_files_file_deadline(tmp_path):
+    """
+    Verifica che un file oltre la propria scadenza venga abbandonato senza modificarlo,
+    mentre gli altri file vengono comunque rigenerati.
+    """
+    repo_path = tmp_path / "owner_repo"
+    repo_path.mkdir()
+    issues = _write_incompatible_files(repo_path, ["slow.py", "fast.py"])
+    release = threading.Event()
+
+    def fake_regenerate(**kwargs):
+        if kwargs["file_path"] == "slow.py":
+            release.wait(5)
+        return f"# regenerated {kwargs['file_path']}"
+
+    try:
+        with patch("app.services.analysis_workflow.regenerate_code", side_effect=fake_regenerate):
+            result = _regenerate_incompatible_files(
+                str(repo_path), "MIT", issues, max_workers=2, file_deadline=0.2
+            )
+    finally:
+        release.set()
+
+    assert list(result) == ["fast.py"]
+    assert (repo_path / "slow.py").read_text() == "# original slow.py"
+
+
+def test_regenerate_incompatible_files_deadline_frees_slot_for_queued_files(tmp_path):
+    """
+    Verifica che un file bloccato oltre la propria scadenza liberi il posto nel pool,
+    così i file in coda vengono rigenerati prima dell'esaurimento del budget.
+    """
+    repo_path = tmp_path / "owner_repo"
+    repo_path.mkdir()
+    issues = _write_incompatible_files(repo_path, ["hang.py", "queued1.py", "queued2.py"])
+    release = threading.Event()
+    remaining = []
+
+    def fake_regenerate(**kwargs):
+        # La scadenza del file limita le richieste al modello
+        remaining.append(kwargs["deadline"] - time.monotonic())
+        if kwargs["file_path"] == "hang.py":
+            release.wait(5)
+        return f"# regenerated {kwargs['file_path']}"
+
+    try:
+        with patch("app.services.analysis_workflow.regenerate_code", side_effect=fake_regenerate):
+            start = time.monotonic()
+            result = _regenerate_incompatible_files(
+                str(repo_path), "MIT", issues, max_workers=1, file_deadline=0.2,
+                total_budget=3
+            )
+            elapsed = time.monotonic() - start
+    finally:
+        release.set()
+
+    assert set(result) == {"queued1.py", "queued2.py"}
+    assert elapsed < 2
+    assert all(0 < left <= 0.2 for left in remaining)
+    assert (repo_path / "queued2.py").read_text() == "# regenerated queued2.py"
+    assert (repo_path / "hang.py").read_text() == "# original hang.py"
+
+
+def test_regenerate_incompatible_files_budget_returns_partial_results(tmp_path):
+    """
+    Verifica che, esaurito il budget complessivo, vengano restituiti i file completati
+    e che i file rimasti in coda non vengano elaborati.
+    """
+    repo_path = tmp_path / "owner_repo"
+    repo_path.mkdir()
+    issues = _write_incompatible_files(repo_path, ["first.py", "second.py", "third.py"])
+    release = threading.Event()
+
+    def fake_regenerate(**kwargs):
+        if kwargs["file_path"] != "first.py":
+            release.wait(5)
+        return f"# regenerated {kwargs['file_path']}"
+
+    try:
+        with patch("app.services.analysis_workflow.regenerate_code",
+                   side_effect=fake_regenerate) as mock_regen:
+            start = time.monotonic()
+            result = _regenerate_incompatible_files(
+                str(repo_path), "MIT", issues, max_workers=1, total_budget=0.3
+            )
+            elapsed = time.monotonic() - start
+            calls = mock_regen.call_count
+    finally:
+        release.set()
+
+    assert list(result) == ["first.py"]
+    assert elapsed < 2
+    assert calls == 2  # "third.py" era ancora in coda ed è stato annullato
+    assert (repo_path / "third.py").read_text() == "# original third.py"
+
 
 class TestIntegrationScanner:
     """
@@ -833,3 +996,120 @@ class TestIntegrationCodeGeneratorFileSystem:
                 assert new_content == "# MIT License\n\ndef hello():\n    print('Hello MIT')\n"
                 assert new_content != original_content
 
+
+def test_stream_regeneration_forwards_tokens_and_writes_file(tmp_path):
+    """
+    Verifica che `stream_regeneration` inoltri i token del modello per ogni file,
+    salvi il codice rigenerato e termini con l'evento "result".
+    """
+    repo_path = tmp_path / "owner_repo"
+    (repo_path / "src").mkdir(parents=True)
+    (repo_path / "src" / "a.py").write_text("old code")
+
+    previous = AnalyzeResponse(
+        repository="owner/repo",
+        main_license="MIT",
+        issues=[LicenseIssue(file_path="src/a.py", detected_license="GPL-3.0", compatible=False)],
+    )
+
+    async def fake_stream(*_args, **_kwargs):
+        for chunk in ("```python\n", "print('regenerated code')\n", "```"):
+            yield chunk
+
+    async def collect():
+        return [event async for event in stream_regeneration("owner", "repo", previous)]
+
+    final = AnalyzeResponse(repository="owner/repo", main_license="MIT", issues=[])
+    with patch("app.services.analysis_workflow.CLONE_BASE_DIR", str(tmp_path)), \
+            patch("app.services.analysis_workflow.stream_ollama", side_effect=fake_stream), \
+            patch("app.services.analysis_workflow._finalize_regeneration",
+                  return_value=final) as mock_finalize:
+        events = asyncio.run(collect())
+
+    names = [name for name, _ in events]
+    assert names == ["file_start", "token", "token", "token", "file_done", "result"]
+    assert events[4][1]["regenerated"] is True
+    assert (repo_path / "src" / "a.py").read_text() == "print('regenerated code')"
+    assert mock_finalize.call_args[0][4] == {"src/a.py": "print('regenerated code')"}
+
+
+def test_stream_regeneration_uses_regenerated_code_cache(tmp_path):
+    """
+    Verifica che lo streaming riutilizzi il codice già rigenerato per lo stesso contenuto
+    senza interrogare il modello.
+    """
+    repo_path = tmp_path / "owner_repo"
+    repo_path.mkdir()
+    (repo_path / "a.py").write_text("old code")
+    store_regenerated_code("old code", "MIT", "GPL-3.0", DEFAULT_TARGET_LICENSES,
+                           "print('cached code')")
+
+    previous = AnalyzeResponse(
+        repository="owner/repo",
+        main_license="MIT",
+        issues=[LicenseIssue(file_path="a.py", detected_license="GPL-3.0", compatible=False)],
+    )
+
+    async def collect():
+        return [event async for event in stream_regeneration("owner", "repo", previous)]
+
+    final = AnalyzeResponse(repository="owner/repo", main_license="MIT", issues=[])
+    with patch("app.services.analysis_workflow.CLONE_BASE_DIR", str(tmp_path)), \
+            patch("app.services.analysis_workflow.stream_ollama") as mock_stream, \
+            patch("app.services.analysis_workflow._finalize_regeneration", return_value=final):
+        events = asyncio.run(collect())
+
+    mock_stream.assert_not_called()
+    assert events[1] == ("token", {"file_path": "a.py", "text": "print('cached code')"})
+    assert (repo_path / "a.py").read_text() == "print('cached code')"
+
+
+def test_stream_regeneration_regenerates_each_file_once(tmp_path):
+    """
+    Verifica che un file con più problemi venga rigenerato e scritto una sola volta.
+    """
+    repo_path = tmp_path / "owner_repo"
+    repo_path.mkdir()
+    (repo_path / "a.py").write_text("old code")
+
+    previous = AnalyzeResponse(
+        repository="owner/repo",
+        main_license="MIT",
+        issues=[
+            LicenseIssue(file_path="a.py", detected_license="GPL-3.0", compatible=False),
+            LicenseIssue(file_path="a.py", detected_license="AGPL-3.0", compatible=False),
+        ],
+    )
+
+    async def fake_stream(*_args, **_kwargs):
+        yield "print('regenerated code')"
+
+    async def collect():
+        return [event async for event in stream_regeneration("owner", "repo", previous)]
+
+    final = AnalyzeResponse(repository="owner/repo", main_license="MIT", issues=[])
+    with patch("app.services.analysis_workflow.CLONE_BASE_DIR", str(tmp_path)), \
+            patch("app.services.analysis_workflow.stream_ollama",
+                  side_effect=fake_stream) as mock_stream, \
+            patch("app.services.analysis_workflow._finalize_regeneration", return_value=final):
+        events = asyncio.run(collect())
+
+    assert [name for name, _ in events].count("file_start") == 1
+    assert events[0][1]["total"] == 1
+    assert mock_stream.call_count == 1
+
+
+def test_stream_regeneration_missing_repo(tmp_path):
+    """
+    Verifica che `stream_regeneration` sollevi ValueError se il repository non esiste.
+    """
+    previous = AnalyzeResponse(repository="owner/repo", main_license="MIT", issues=[])
+
+    async def consume():
+        async for _ in stream_regeneration("owner", "missing", previous):
+            pass
+
+    with patch("app.services.analysis_workflow.CLONE_BASE_DIR", str(tmp_path)):
+        with pytest.raises(ValueError):
+            asyncio.run(consume())
+
@@ -0,0 +1,256 @@
+"""
+LLM Cassette Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.cassette` e per il suo
+utilizzo in `app.services.llm.ollama_api`.
+Verifica che le risposte di Ollama possano essere registrate, riprodotte senza Ollama con
+una latenza sintetica, oppure generate in modo deterministico.
+
+La suite copre:
+1. Registrazione: Scrittura delle risposte e riproduzione da file.
+2. Riproduzione: Latenza sintetica, streaming e richieste non registrate.
+3. Stub: Risposte deterministiche nei formati attesi dai prompt.
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.services.llm import cassette, ollama_api
+from app.services.llm.cassette import (
+    RECORD,
+    REPLAY,
+    STUB,
+    CassetteMiss,
+    LLMCassette,
+    cassette_key,
+    split_tokens,
+    stub_response,
+)
+from app.services.llm.code_generator import build_regeneration_prompt
+from app.services.llm.license_recommender import suggest_license_based_on_requirements
+
+
+@pytest.fixture
+def use_backend(tmp_path):
+    """
+    Restituisce una funzione che attiva una cassetta per `ollama_api`.
+    """
+    patchers = [patch("app.services.llm.ollama_api.MINIMAL_JSON_BASE_DIR", str(tmp_path))]
+
+    def activate(mode, latency=0.0, token_latency=0.0):
+        backend = LLMCassette(mode, str(tmp_path / "cassette.jsonl"), latency, token_latency)
+        patchers.append(patch("app.services.llm.ollama_api.get_llm_backend", return_value=backend))
+        patchers[-1].start()
+        return backend
+
+    patchers[0].start()
+    yield activate
+    for patcher in patchers:
+        patcher.stop()
+
+
+def _stream(prompt):
+    """
+    Consuma `stream_ollama` e restituisce i frammenti ricevuti.
+    """
+    async def consume():
+        return [token async for token in ollama_api.stream_ollama("model", prompt)]
+    return asyncio.run(consume())
+
+# ==================================================================================
+#                                TEST: REGISTRAZIONE
+# ==================================================================================
+
+@patch("app.services.llm.ollama_api.ensure_ollama_ready")
+@patch("app.services.llm.ollama_api._post_generate")
+def test_record_then_replay_without_ollama(mock_post, mock_ensure, use_backend, tmp_path):
+    """
+    Verifica che in modalità "record" le risposte vengano salvate e che una cassetta in
+    modalità "replay" le restituisca senza contattare Ollama.
+    """
+    mock_post.return_value.json.return_value = {"response": "MIT", "context": [1, 2, 3]}
+    recorder = use_backend(RECORD)
+
+    assert ollama_api.call_ollama_deepseek("prompt") == "MIT"
+    ollama_api.call_ollama_deepseek("prompt")
+
+    lines = (tmp_path / "cassette.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["response"] == "MIT"
+    assert "context" not in lines[0]
+    assert recorder.stats()["recorded"] == 1
+
+    mock_post.reset_mock()
+    mock_ensure.reset_mock()
+    player = LLMCassette(REPLAY, str(tmp_path / "cassette.jsonl"))
+    with patch("app.services.llm.ollama_api.get_llm_backend", return_value=player):
+        assert ollama_api.call_ollama_deepseek("prompt") == "MIT"
+
+    mock_post.assert_not_called()
+    mock_ensure.assert_not_called()
+    assert player.stats()["hits"] == 1
+
+
+def test_cassette_key_depends_on_model_prompt_and_format():
+    """
+    Verifica che la chiave ignori le opzioni di trasporto ma distingua modello, prompt
+    e formato richiesto.
+    """
+    base = {"model": "m", "prompt": "p", "stream": False, "keep_alive": "30m"}
+
+    assert cassette_key(base) == cassette_key({**base, "stream": True, "keep_alive": "-1"})
+    assert cassette_key(base) != cassette_key({**base, "model": "other"})
+    assert cassette_key(base) != cassette_key({**base, "format": "json"})
+
+
+def test_malformed_cassette_lines_are_skipped(tmp_path):
+    """
+    Verifica che le righe illeggibili del file vengano ignorate al caricamento.
+    """
+    path = tmp_path / "cassette.jsonl"
+    entry = {"key": cassette_key({"model": "m", "prompt": "p"}), "response": "ok"}
+    path.write_text("not json\n" + json.dumps(entry) + "\n", encoding="utf-8")
+
+    player = LLMCassette(REPLAY, str(path))
+
+    assert player.response_for({"model": "m", "prompt": "p"}) == "ok"
+
+# ==================================================================================
+#                                TEST: RIPRODUZIONE
+# ==================================================================================
+
+def test_replay_applies_synthetic_latency(tmp_path):
+    """
+    Verifica la latenza sintetica per chiamata e per token.
+    """
+    path = tmp_path / "cassette.jsonl"
+    payload = {"model": "m", "prompt": "p"}
+    path.write_text(json.dumps({"key": cassette_key(payload), "response": "x" * 40}) + "\n",
+                    encoding="utf-8")
+    player = LLMCassette(REPLAY, str(path), latency=0.1, token_latency=0.01)
+
+    start = time.monotonic()
+    data = player.generate(payload)
+
+    assert data["response"] == "x" * 40
+    assert time.monotonic() - start >= 0.2
+
+
+def test_replay_miss_raises(use_backend):
+    """
+    Verifica che una richiesta non registrata sollevi `CassetteMiss` in modalità "replay".
+    """
+    player = use_backend(REPLAY)
+
+    with pytest.raises(CassetteMiss):
+        ollama_api.call_ollama_deepseek("never recorded")
+
+    assert player.stats()["misses"] == 1
+
+
+def test_stream_replay_yields_recorded_tokens(use_backend):
+    """
+    Verifica che lo streaming riproduca la risposta registrata a frammenti.
+    """
+    player = use_backend(REPLAY)
+    player._responses[cassette_key({"model": "model", "prompt": "p"})] = "Use the MIT license."
+
+    tokens = _stream("p")
+
+    assert len(tokens) == 4
+    assert "".join(tokens) == "Use the MIT license."
+
+
+@patch("app.services.llm.ollama_api.ensure_ollama_ready")
+def test_stream_record_saves_full_response(_mock_ensure, use_backend, tmp_path):
+    """
+    Verifica che in modalità "record" lo streaming registri la risposta completa.
+    """
+    recorder = use_backend(RECORD)
+    lines = [json.dumps({"response": "MIT "}), json.dumps({"response": "license", "done": True})]
+
+    class FakeResponse:
+        async def aiter_lines(self):
+            for line in lines:
+                yield line
+
+    class FakeStream:
+        async def __aenter__(self):
+            return FakeResponse()
+
+        async def __aexit__(self, *_args):
+            return False
+
+    with patch("app.services.llm.ollama_api._open_generate_stream", return_value=FakeStream()):
+        assert "".join(_stream("p")) == "MIT license"
+
+    assert recorder.response_for({"model": "model", "prompt": "p"}) == "MIT license"
+
+# ==================================================================================
+#                                TEST: STUB
+# ==================================================================================
+
+@patch("app.services.llm.ollama_api.ensure_ollama_ready")
+@patch("app.services.llm.ollama_api._post_generate")
+def test_stub_license_suggestion_runs_offline(mock_post, mock_ensure, use_backend):
+    """
+    Verifica che in modalità "stub" la raccomandazione passi per l'intera pipeline senza
+    contattare Ollama e con una risposta valida.
+    """
+    use_backend(STUB)
+
+    with patch("app.services.llm.license_recommender.deterministic_license_suggestion",
+               return_value=None):
+        result = suggest_license_based_on_requirements({"additional_requirements": "OSI"})
+
+    assert result["suggested_license"] == "MIT"
+    assert result["alternatives"] == ["Apache-2.0", "BSD-3-Clause"]
+    mock_post.assert_not_called()
+    mock_ensure.assert_not_called()
+
+
+def test_stub_responses_match_prompt_formats():
+    """
+    Verifica le risposte deterministiche per la rigenerazione e per le licenze
+    alternative raggruppate.
+    """
+    code = "def add(a, b):\n    return a + b"
+    prompt = build_regeneration_prompt(code, "MIT", "GPL-3.0", "MIT, Apache-2.0")
+    batch = '1. License: \'GPL\'. Reason\n2. License: \'AGPL\'. Reason\n{"results": []}'
+
+    assert stub_response(prompt) == code
+    assert json.loads(stub_response(batch))["results"][1] == {"id": 2, "licenses": ["MIT", "Apache-2.0"]}
+    assert stub_response("other") == stub_response("other")
+    assert "".join(split_tokens("a  b\nc")) == "a  b\nc"
+
+
+def test_offline_warmup_marks_models_ready(use_backend):
+    """
+    Verifica che senza Ollama il warm-up segni subito i modelli come pronti.
+    """
+    use_backend(STUB)
+    ollama_api._warmup.clear()
+
+    with patch("app.services.llm.ollama_api.OLLAMA_CODING_MODEL", "coder"), \
+            patch("app.services.llm.ollama_api.OLLAMA_GENERAL_MODEL", "general"):
+        assert ollama_api.start_model_warmup() is None
+        status = ollama_api.get_model_warmup_status()
+
+    assert status["ready"] is True
+    assert status["models"]["coder"]["backend"] == STUB
+    ollama_api._warmup.clear()
+
+
+def test_invalid_backend_mode_is_rejected():
+    """
+    Verifica che una modalità `LLM_BACKEND` non valida venga segnalata.
+    """
+    cassette.reset_llm_backend()
+    with patch("app.services.llm.cassette.LLM_BACKEND", "replya"):
+        with pytest.raises(ValueError):
+            cassette.get_llm_backend()
+    cassette.reset_llm_backend()
@@ -0,0 +1,279 @@
+"""
+LLM Circuit Breaker Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.circuit_breaker`.
+Verifica che le chiamate LLM falliscano subito quando Ollama è sovraccarico o non
+raggiungibile e che il circuito si richiuda quando il servizio torna disponibile.
+
+La suite copre:
+1. Apertura: Tasso di fallimento, violazioni dello SLA e minimo di chiamate.
+2. Recupero: Chiamata di prova nello stato "half_open".
+3. Metriche: Percentili di latenza e contatori.
+4. Integrazione: Chiamate a Ollama rifiutate senza richieste HTTP.
+"""
+
+import time
+from unittest.mock import patch, mock_open
+
+import pytest
+import requests
+
+from app.services.llm import ollama_api
+from app.services.llm.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_circuit_breaker,
+    get_circuit_breaker_stats,
+)
+
+
+def _breaker(window=10, min_calls=4, failure_rate=0.5, latency_sla=1.0, open_seconds=60.0):
+    """
+    Crea un circuito con parametri ridotti per i test.
+    """
+    return CircuitBreaker(
+        "test-model",
+        window=window,
+        min_calls=min_calls,
+        failure_rate=failure_rate,
+        latency_sla=latency_sla,
+        open_seconds=open_seconds,
+    )
+
+
+def _call(breaker, ok=True, latency=0.1):
+    """
+    Simula una chiamata autorizzata dal circuito e ne registra l'esito.
+    """
+    breaker.allow()
+    if ok:
+        breaker.record_success(latency)
+    else:
+        breaker.record_failure()
+
+# ==================================================================================
+#                                TEST: APERTURA
+# ==================================================================================
+
+def test_opens_when_failure_rate_is_reached():
+    """
+    Verifica che il circuito si apra al raggiungimento del tasso di fallimento e che le
+    chiamate successive vengano rifiutate subito.
+    """
+    breaker = _breaker()
+    _call(breaker)
+    _call(breaker)
+    _call(breaker, ok=False)
+    assert breaker.state() == CLOSED
+
+    _call(breaker, ok=False)
+
+    assert breaker.state() == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_does_not_open_below_min_calls():
+    """
+    Verifica che pochi errori iniziali non aprano il circuito prima del minimo di chiamate.
+    """
+    breaker = _breaker(min_calls=4)
+    for _ in range(3):
+        _call(breaker, ok=False)
+
+    assert breaker.state() == CLOSED
+
+
+def test_slow_successes_count_as_failures():
+    """
+    Verifica che le risposte oltre lo SLA di latenza contino come fallimenti.
+    """
+    breaker = _breaker(latency_sla=1.0)
+    for _ in range(4):
+        _call(breaker, latency=5.0)
+
+    assert breaker.state() == OPEN
+    assert breaker.stats()["sla_breaches"] == 4
+    assert breaker.stats()["failures"] == 0
+
+
+def test_zero_sla_disables_latency_check():
+    """
+    Verifica che con SLA pari a 0 le risposte lente non aprano il circuito.
+    """
+    breaker = _breaker(latency_sla=0)
+    for _ in range(4):
+        _call(breaker, latency=500.0)
+
+    assert breaker.state() == CLOSED
+
+
+def test_call_sla_overrides_breaker_sla():
+    """
+    Verifica che lo SLA indicato dalla chiamata prevalga su quello del circuito.
+    """
+    breaker = _breaker(latency_sla=1.0)
+    for _ in range(4):
+        breaker.allow()
+        breaker.record_success(100.0, latency_sla=120.0)
+
+    assert breaker.state() == CLOSED
+    assert breaker.stats()["sla_breaches"] == 0
+
+# ==================================================================================
+#                                TEST: RECUPERO
+# ==================================================================================
+
+def _opened_breaker():
+    """
+    Crea un circuito già aperto con periodo di apertura nullo.
+    """
+    breaker = _breaker(open_seconds=0)
+    for _ in range(4):
+        _call(breaker, ok=False)
+    assert breaker.state() == OPEN
+    return breaker
+
+
+def test_half_open_allows_single_probe():
+    """
+    Verifica che, trascorso il periodo di apertura, passi una sola chiamata di prova.
+    """
+    breaker = _opened_breaker()
+
+    breaker.allow()
+
+    assert breaker.state() == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_successful_probe_closes_circuit():
+    """
+    Verifica che una chiamata di prova riuscita richiuda il circuito.
+    """
+    breaker = _opened_breaker()
+
+    _call(breaker)
+
+    assert breaker.state() == CLOSED
+    breaker.allow()
+
+
+def test_failed_probe_reopens_circuit():
+    """
+    Verifica che una chiamata di prova fallita riapra il circuito.
+    """
+    breaker = _opened_breaker()
+
+    _call(breaker, ok=False)
+
+    assert breaker.state() == OPEN
+    assert breaker.stats()["opened"] == 2
+
+
+def test_released_probe_lets_next_call_through():
+    """
+    Verifica che una chiamata di prova conclusa senza esito non blocchi il circuito.
+    """
+    breaker = _opened_breaker()
+    breaker.allow()
+
+    breaker.release()
+
+    breaker.allow()
+    assert breaker.state() == HALF_OPEN
+
+# ==================================================================================
+#                          TEST: METRICHE E INTEGRAZIONE
+# ==================================================================================
+
+def test_stats_report_latency_percentiles():
+    """
+    Verifica i percentili di latenza e il tasso di fallimento della finestra.
+    """
+    breaker = _breaker(latency_sla=0, min_calls=100)
+    for latency in range(1, 11):
+        _call(breaker, latency=float(latency))
+    _call(breaker, ok=False)
+
+    stats = breaker.stats()
+
+    assert stats["window_calls"] == 10
+    assert stats["latency_p50"] == 6.0
+    assert stats["latency_p95"] == 10.0
+    assert stats["failure_rate"] == pytest.approx(0.1)
+
+
+@patch("app.services.llm.circuit_breaker.LLM_BREAKER_ENABLED", False)
+def test_disabled_breaker_is_not_created():
+    """
+    Verifica che con il circuit breaker disabilitato non venga creato alcun circuito.
+    """
+    assert get_circuit_breaker("model") is None
+    assert not get_circuit_breaker_stats()
+
+
+@patch("app.services.llm.circuit_breaker.LLM_BREAKER_OPEN_SECONDS", 60)
+@patch("app.services.llm.circuit_breaker.LLM_BREAKER_MIN_CALLS", 2)
+@patch("app.services.llm.circuit_breaker.LLM_BREAKER_FAILURE_RATE", 0.5)
+@patch("app.services.llm.ollama_api.ensure_ollama_ready")
+@patch("app.services.llm.ollama_api._post_generate")
+@patch("app.services.llm.ollama_api.os.makedirs")
+@patch("builtins.open", new_callable=mock_open)
+def test_open_circuit_skips_ollama_requests(_mock_file, _mock_makedirs, mock_post, _mock_ensure):
+    """
+    Verifica che, dopo ripetuti errori di Ollama, le chiamate falliscano subito senza
+    inviare richieste HTTP.
+    """
+    mock_post.side_effect = requests.ConnectionError("refused")
+    for prompt in ("a", "b"):
+        with pytest.raises(requests.ConnectionError):
+            ollama_api.call_ollama_deepseek(prompt)
+
+    start = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        ollama_api.call_ollama_deepseek("c")
+
+    assert time.monotonic() - start < 0.5
+    assert mock_post.call_count == 2
+    stats = get_circuit_breaker_stats()[ollama_api.OLLAMA_GENERAL_MODEL or ""]
+    assert stats["state"] == OPEN
+    assert stats["failures"] == 2
+
+
+@patch("app.services.llm.circuit_breaker.LLM_BREAKER_MIN_CALLS", 2)
+@patch("app.services.llm.circuit_breaker.LLM_BREAKER_FAILURE_RATE", 0.5)
+@patch("app.services.llm.ollama_api.ensure_ollama_ready")
+@patch("app.services.llm.ollama_api._post_generate")
+@patch("app.services.llm.ollama_api.os.makedirs")
+@patch("builtins.open", new_callable=mock_open)
+def test_slow_successful_calls_within_model_timeout_keep_circuit_closed(
+        _mock_file, _mock_makedirs, mock_post, _mock_ensure):
+    """
+    Verifica che le risposte lente ma entro il timeout del modello (es. 100 secondi per il
+    modello di coding, 200 per quello generico) non contino come fallimenti.
+    """
+    mock_post.return_value.json.return_value = {"response": "ok", "done": True}
+    clock = iter(range(0, 10_000, 100))
+
+    with patch("app.services.llm.ollama_api.time") as mock_time:
+        mock_time.monotonic.side_effect = lambda: float(next(clock))
+        for prompt in ("a", "b", "c"):
+            assert ollama_api.call_ollama_qwen3_coder(prompt) == "ok"
+        # Ogni chiamata dura 200 secondi: entro i 240 del modello generico
+        mock_time.monotonic.side_effect = lambda: float(next(clock)) * 2
+        assert ollama_api.call_ollama_deepseek("d") == "ok"
+
+    stats = get_circuit_breaker_stats()
+    latencies = sorted(
+        latency for breaker in stats.values() for latency in (breaker["latency_p50"],
+                                                              breaker["latency_p95"])
+    )
+    assert latencies[0] == 100.0 and latencies[-1] == 200.0
+    assert all(breaker["state"] == CLOSED for breaker in stats.values())
+    assert all(breaker["sla_breaches"] == 0 for breaker in stats.values())
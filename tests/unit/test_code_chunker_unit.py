@@ -0,0 +1,113 @@
+"""
+Code Chunker Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.code_chunker`.
+Verifica la divisione dei file sorgente in blocchi da rigenerare separatamente.
+
+La suite copre:
+1. Python: Divisione ai confini delle definizioni di primo livello tramite `ast`.
+2. Altri linguaggi: Divisione euristica fuori dai blocchi tra parentesi graffe.
+3. Robustezza: Ricostruzione senza perdite e fallback in caso di errori di sintassi.
+"""
+
+from app.services.llm.code_chunker import split_source
+
+PYTHON_SOURCE = (
+    "import os\n"
+    "\n"
+    "\n"
+    "# helper commentato\n"
+    "@staticmethod\n"
+    "def first():\n"
+    "    return os.getcwd()\n"
+    "\n"
+    "\n"
+    "class Second:\n"
+    "    def method(self):\n"
+    "        return 2\n"
+    "\n"
+    "\n"
+    "def third():\n"
+    "    return 3\n"
+)
+
+JS_SOURCE = (
+    "const a = 1;\n"
+    "\n"
+    "function one() {\n"
+    "\n"
+    "  return a;\n"
+    "}\n"
+    "\n"
+    "function two() {\n"
+    "  return 2;\n"
+    "}\n"
+)
+
+
+def test_small_source_is_single_chunk():
+    """
+    Verifica che un file entro il limite non venga diviso.
+    """
+    assert split_source(PYTHON_SOURCE, "m.py", 10_000) == [PYTHON_SOURCE]
+
+
+def test_python_split_on_top_level_definitions():
+    """
+    Verifica che i blocchi Python inizino sulle definizioni di primo livello, includendo
+    decoratori e commenti precedenti, e che la concatenazione restituisca l'originale.
+    """
+    chunks = split_source(PYTHON_SOURCE, "m.py", 80)
+
+    assert "".join(chunks) == PYTHON_SOURCE
+    assert chunks[0] == "import os\n\n\n"
+    assert chunks[1].startswith("# helper commentato\n@staticmethod\ndef first")
+    assert chunks[2].startswith("class Second:")
+    assert chunks[3].startswith("def third")
+
+
+def test_adjacent_segments_are_merged_up_to_limit():
+    """
+    Verifica che segmenti piccoli adiacenti vengano accorpati nello stesso blocco.
+    """
+    chunks = split_source(PYTHON_SOURCE, "m.py", 100)
+
+    assert "".join(chunks) == PYTHON_SOURCE
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert len(chunks) < 4
+
+
+def test_heuristic_split_outside_braces():
+    """
+    Verifica che per i linguaggi diversi da Python la divisione avvenga solo fuori dai
+    blocchi `{ ... }`, anche in presenza di righe vuote interne.
+    """
+    chunks = split_source(JS_SOURCE, "m.js", 40)
+
+    assert "".join(chunks) == JS_SOURCE
+    assert any(chunk.startswith("function one() {\n\n  return a;\n}") for chunk in chunks)
+    assert any(chunk.startswith("function two()") for chunk in chunks)
+
+
+def test_python_syntax_error_falls_back_to_heuristic():
+    """
+    Verifica che un file `.py` non valido venga comunque diviso senza perdite.
+    """
+    source = "def broken(:\n    pass\n\n" + PYTHON_SOURCE
+
+    chunks = split_source(source, "broken.py", 40)
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == source
+
+
+def test_oversized_segment_is_split_by_lines():
+    """
+    Verifica che una singola definizione più grande del limite venga divisa per righe.
+    """
+    source = "def big():\n" + "".join(f"    x{i} = {i}\n" for i in range(50))
+
+    chunks = split_source(source, "big.py", 100)
+
+    assert "".join(chunks) == source
+    assert all(len(chunk) <= 100 for chunk in chunks)
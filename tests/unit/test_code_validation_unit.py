@@ -0,0 +1,178 @@
+"""
+Code Validation Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.code_validation` e per la
+validazione sintattica del codice rigenerato in `app.services.llm.code_generator`.
+Verifica che il codice con errori di sintassi venga rifiutato o corretto prima di
+essere scritto su disco.
+
+La suite copre:
+1. Controlli: Python, JSON, linguaggi simili al C e controlli registrati.
+2. Rigenerazione: Prompt di correzione, blocchi non validi e codice originale non valido.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.services.executors import CPU, current_stage
+from app.services.llm import code_validation
+from app.services.llm.code_generator import (
+    _regenerate_chunk,
+    _regenerate_whole,
+    clean_generated_code,
+    validate_generated_code,
+)
+from app.services.llm.code_validation import (
+    check_syntax,
+    get_syntax_checker,
+    make_delimiter_checker,
+    register_syntax_checker,
+)
+
+# ==================================================================================
+#                                TEST: CONTROLLI
+# ==================================================================================
+
+def test_python_syntax_errors_are_reported_with_line():
+    """
+    Verifica che un sorgente Python troncato venga rifiutato indicando la riga.
+    """
+    assert check_syntax("def add(a, b):\n    return a + b\n", "pkg/math.py") is None
+    assert check_syntax("def add(a, b):\n    return (a +\n", "pkg/math.py").startswith("line ")
+
+
+def test_json_syntax_is_checked():
+    """
+    Verifica il controllo dei documenti JSON.
+    """
+    assert check_syntax('{"name": "pkg"}', "package.json") is None
+    assert check_syntax('{"name": ', "package.json")
+
+
+@pytest.mark.parametrize("code", [
+    "int main() {\n  printf(\"}\");  // }\n  return 0;\n}\n",
+    "/* { */\nconst s = `a\n{b`;\nfunction f(x) { return [x]; }\n",
+    "val text = \"\"\"\n  {\n\"\"\"\nfun f() {}\n",
+])
+def test_delimiter_checker_ignores_strings_and_comments(code):
+    """
+    Verifica che le parentesi in stringhe e commenti non vengano conteggiate.
+    """
+    assert make_delimiter_checker()(code) is None
+
+
+@pytest.mark.parametrize("code, message", [
+    ("function f() {\n  return [1, 2;\n}\n", "unexpected '}'"),
+    ("class A {\n  void f() {\n", "never closed"),
+    ("const s = \"open;\n", "unterminated string"),
+])
+def test_delimiter_checker_rejects_truncated_code(code, message):
+    """
+    Verifica che il codice troncato o con parentesi non bilanciate venga rifiutato.
+    """
+    assert message in make_delimiter_checker()(code)
+
+
+def test_rust_lifetimes_are_not_strings():
+    """
+    Verifica che in Rust l'apice dei lifetime non apra una stringa.
+    """
+    assert check_syntax("fn first<'a>(s: &'a str) -> &'a str {\n    s\n}\n", "lib.rs") is None
+
+
+def test_unknown_extensions_are_not_checked_and_checkers_are_pluggable():
+    """
+    Verifica che le estensioni senza controllo siano accettate e che sia possibile
+    registrare nuovi controlli.
+    """
+    assert check_syntax("end end end", "script.rb") is None
+
+    with patch.dict(code_validation._checkers):
+        register_syntax_checker([".RB"], lambda code: "unbalanced end" if "end end" in code else None)
+        assert get_syntax_checker("lib/script.rb") is not None
+        assert check_syntax("end end end", "script.rb") == "unbalanced end"
+
+    assert get_syntax_checker("script.rb") is None
+
+
+def test_checks_run_on_cpu_stage():
+    """
+    Verifica che i controlli vengano eseguiti nel pool di fase "cpu".
+    """
+    stages = []
+
+    with patch.dict(code_validation._checkers):
+        register_syntax_checker([".rb"], lambda code: stages.append(current_stage()))
+        check_syntax("puts 1", "script.rb")
+
+    assert stages == [CPU]
+
+# ==================================================================================
+#                                TEST: RIGENERAZIONE
+# ==================================================================================
+
+def test_validate_generated_code_checks_syntax_by_language():
+    """
+    Verifica che la validazione rifiuti il codice Python non valido solo per i file Python.
+    """
+    broken = "def broken(:\n    return 1\n"
+
+    assert validate_generated_code(broken, "a.py") is False
+    assert validate_generated_code(broken, "a.txt") is True
+    assert clean_generated_code(f"```python\n{broken}```", "a.py") is None
+
+
+def test_invalid_original_disables_syntax_check():
+    """
+    Verifica che, se il codice originale non rispetta la sintassi (es. Python 2), il
+    codice generato venga valutato solo sulla lunghezza.
+    """
+    python2 = "print 'hello world'\n"
+
+    assert validate_generated_code(python2, "legacy.py", original=python2) is True
+
+
+def test_invalid_regeneration_is_repaired_with_error():
+    """
+    Verifica che un file rigenerato con errori di sintassi venga richiesto di nuovo con
+    il codice non valido e l'errore nel prompt.
+    """
+    responses = ["def add(a, b:\n    return a + b\n", "def add(a, b):\n    return a + b\n"]
+    with patch("app.services.llm.code_generator.call_ollama_qwen3_coder",
+               side_effect=responses) as mock_call:
+        result = _regenerate_whole("def add(x, y):\n    return x + y\n", "MIT", "GPL-3.0",
+                                   "MIT", file_path="add.py", retries=1)
+
+    assert result == responses[1].strip()
+    repair_prompt = mock_call.call_args_list[1].args[0]
+    assert responses[0].strip() in repair_prompt
+    assert "Syntax error: line" in repair_prompt
+
+
+def test_regeneration_gives_up_after_repairs():
+    """
+    Verifica che, esauriti i tentativi di correzione, il file non venga rigenerato.
+    """
+    with patch("app.services.llm.code_generator.call_ollama_qwen3_coder",
+               return_value="def add(a, b:\n    pass\n") as mock_call:
+        result = _regenerate_whole("def add(x, y):\n    return x + y\n", "MIT", "GPL-3.0",
+                                   "MIT", file_path="add.py", retries=2)
+
+    assert result is None
+    assert mock_call.call_count == 3
+
+
+def test_invalid_chunk_is_retried_without_cached_response():
+    """
+    Verifica che un blocco non valido non venga memorizzato e che il tentativo
+    successivo interroghi di nuovo il modello.
+    """
+    responses = ["def a(:\n", "def a():\n    return 1\n"]
+    with patch("app.services.llm.code_generator.call_ollama_qwen3_coder",
+               side_effect=responses) as mock_call:
+        result = _regenerate_chunk("def a():\n    return 0\n", 0, 2, "MIT", "GPL", "MIT",
+                                   retries=1, deadline=float("inf"), file_path="a.py")
+
+    assert result == "def a():\n    return 1"
+    assert mock_call.call_count == 2
@@ -11,8 +11,11 @@ La suite copre:
 3. Gestione dei casi limite: Robustezza contro input nulli, stringhe vuote ed espressioni malformate.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from app.services.compatibility import compat_utils as cu
+from app.services.compatibility.matrix import get_matrix
 
 # ==================================================================================
 #                                     FIXTURE
@@ -262,3 +265,108 @@ def test_extract_symbols_complex_expression():
     syms = cu.extract_symbols(expr)
     expected = {"MIT", "Apache-2.0", "BSD-2-Clause", "BSD-3-Clause"}
     assert expected.issubset(set(syms))
+
+
+# ==================================================================================
+#                           TEST: CACHE E METRICHE
+# ==================================================================================
+
+def test_normalize_symbol_uses_alias_table_and_cache():
+    """
+    Verifica che i sinonimi noti vengano risolti dalla tabella degli alias e che i simboli
+    ripetuti vengano serviti dalla cache LRU, con metriche di hit/miss coerenti.
+    """
+    cu.clear_caches()
+
+    assert cu.normalize_symbol("GPL-2.0+") == "GPL-2.0-or-later"
+    assert cu.get_cache_stats()["normalize_symbol"]["alias_hits"] == 1
+
+    assert cu.normalize_symbol(" CustomLicense with exc ") == "CustomLicense WITH exc"
+    assert cu.normalize_symbol(" CustomLicense with exc ") == "CustomLicense WITH exc"
+
+    stats = cu.get_cache_stats()["normalize_symbol"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["size"] == 1
+
+
+def test_alias_table_covers_matrix_licenses_and_variants():
+    """
+    Verifica che le licenze della matrice e le loro varianti ('+', clausole 'with',
+    minuscole) vengano risolte dalla tabella degli alias, con lo stesso risultato della
+    normalizzazione completa.
+    """
+    symbol = next(main for main in get_matrix() if "-or-later" in main)
+    variants = {symbol, symbol.replace("-or-later", "+"), symbol.lower()}
+    cu.clear_caches()
+
+    for variant in variants:
+        assert cu.normalize_symbol(variant) == cu._normalize_cached.__wrapped__(variant)
+
+    stats = cu.get_cache_stats()["normalize_symbol"]
+    assert stats["alias_hits"] == len(variants)
+    assert stats["misses"] == 0
+
+
+def test_register_aliases_adds_with_variants():
+    """
+    Verifica che le clausole 'with' scritte in minuscolo vengano risolte dalla tabella.
+    """
+    cu.register_aliases(["Custom-1.0 WITH Custom-exception"])
+    cu.clear_caches()
+
+    assert cu.normalize_symbol("Custom-1.0 with Custom-exception") == "Custom-1.0 WITH Custom-exception"
+    assert cu.get_cache_stats()["normalize_symbol"]["alias_hits"] == 1
+
+
+def test_alias_hits_are_counted_across_threads():
+    """
+    Verifica che il contatore degli alias non perda incrementi con chiamate concorrenti.
+    """
+    cu.clear_caches()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: [cu.normalize_symbol("GPL-2.0+") for _ in range(1000)],
+                          range(8)))
+
+    assert cu.get_cache_stats()["normalize_symbol"]["alias_hits"] == 8000
+
+
+def test_alias_hits_do_not_take_the_stats_lock(monkeypatch):
+    """
+    Verifica che le risoluzioni dalla tabella degli alias non acquisiscano il lock
+    globale e che letture ripetute delle metriche non alterino il contatore.
+    """
+    cu.clear_caches()
+
+    class _ForbiddenLock:
+        def __enter__(self):
+            raise AssertionError("normalize_symbol must not take the stats lock")
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(cu, "_stats_lock", _ForbiddenLock())
+    for _ in range(3):
+        cu.normalize_symbol("GPL-2.0+")
+    monkeypatch.undo()
+
+    assert cu.get_cache_stats()["normalize_symbol"]["alias_hits"] == 3
+    assert cu.get_cache_stats()["normalize_symbol"]["alias_hits"] == 3
+
+
+def test_extract_symbols_cached_returns_independent_lists():
+    """
+    Verifica che `extract_symbols` memorizzi il parsing e restituisca ogni volta una nuova
+    lista, così che le modifiche del chiamante non alterino la cache.
+    """
+    cu.clear_caches()
+
+    first = cu.extract_symbols("MIT OR Apache-2.0")
+    first.append("tampered")
+    second = cu.extract_symbols("MIT OR Apache-2.0")
+
+    assert "tampered" not in second
+    stats = cu.get_cache_stats()["extract_symbols"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
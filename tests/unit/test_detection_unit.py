@@ -21,7 +21,8 @@ from unittest.mock import patch, MagicMock, mock_open
 from app.services.scanner.detection import (
     run_scancode,
     detect_main_license_scancode,
-    extract_file_licenses
+    extract_file_licenses,
+    extract_file_matched_texts
 )
 
 
@@ -900,3 +901,22 @@ class TestExtractFileLicenses:
         # Dovrebbe essere vuoto perché non ci sono ID SPDX validi estratti
         assert result == {}
 
+    def test_extract_file_matched_texts(self):
+        """
+        Testa che i testi individuati vengano raccolti per file, ignorando quelli vuoti.
+        """
+        data = {
+            "files": [
+                {
+                    "path": "NOTICE",
+                    "matches": [
+                        {"license_spdx": "GPL-3.0", "matched_text": "GNU General Public License"},
+                        {"license_spdx": "MIT", "matched_text": ""}
+                    ]
+                },
+                {"path": "src/empty.py", "matches": [{"license_spdx": "MIT"}]}
+            ]
+        }
+
+        result = extract_file_matched_texts(data)
+        assert result == {"NOTICE": ["GNU General Public License"]}
@@ -0,0 +1,143 @@
+"""
+Stage Executors Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.executors`.
+Verifica che il lavoro bloccante venga eseguito nei pool dedicati per fase, con
+contatori di coda, propagazione del contesto e senza attese circolari.
+
+La suite copre:
+1. Esecuzione: Thread del pool, eccezioni, contesto e variante asincrona.
+2. Metriche: Attività in coda, in esecuzione, completate e fallite.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.services import executors
+from app.services.executors import (
+    CPU,
+    IO,
+    StageExecutor,
+    current_stage,
+    get_executor_stats,
+    get_stage_executor,
+    run_in_stage,
+    run_stage,
+)
+from app.services.llm.scheduler import INTERACTIVE, current_priority, llm_priority
+
+# ==================================================================================
+#                                TEST: ESECUZIONE
+# ==================================================================================
+
+def test_run_in_stage_uses_stage_thread():
+    """
+    Verifica che la funzione venga eseguita in un thread del pool della fase.
+    """
+    name, stage = run_in_stage(CPU, lambda: (threading.current_thread().name, current_stage()))
+
+    assert name.startswith("stage-cpu")
+    assert stage == CPU
+    assert current_stage() is None
+
+
+def test_exceptions_are_propagated():
+    """
+    Verifica che le eccezioni della funzione arrivino al chiamante.
+    """
+    def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        run_in_stage(IO, failing)
+
+
+def test_nested_same_stage_runs_inline():
+    """
+    Verifica che una chiamata nella stessa fase da un thread del pool venga eseguita
+    direttamente, senza attendere un thread libero (pool di un solo thread).
+    """
+    single = StageExecutor("single", 1)
+
+    def outer():
+        return run_in_stage("single", lambda: threading.current_thread().name)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(executors._executors, "single", single)
+        mp.setitem(executors._WORKERS, "single", 1)
+        inner_thread = single.submit(outer).result(timeout=5)
+
+    assert inner_thread.startswith("stage-single")
+
+
+def test_context_is_propagated():
+    """
+    Verifica che il contesto del chiamante (es. la priorità LLM) valga nel pool.
+    """
+    with llm_priority(INTERACTIVE):
+        priority = run_in_stage(IO, current_priority)
+
+    assert priority == INTERACTIVE
+
+
+def test_run_stage_async():
+    """
+    Verifica la variante asincrona per endpoint e generatori.
+    """
+    assert asyncio.run(run_stage(CPU, sum, [1, 2, 3])) == 6
+
+
+def test_unknown_stage_is_rejected():
+    """
+    Verifica che una fase inesistente sollevi `ValueError`.
+    """
+    with pytest.raises(ValueError):
+        get_stage_executor("gpu")
+
+# ==================================================================================
+#                                TEST: METRICHE
+# ==================================================================================
+
+def test_queue_metrics():
+    """
+    Verifica i contatori di coda con il pool occupato.
+    """
+    pool = StageExecutor("metrics", 1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+
+    first = pool.submit(blocking)
+    started.wait(5)
+    second = pool.submit(blocking)
+    failing = pool.submit(lambda: 1 / 0)
+
+    busy = pool.stats()
+    assert (busy["running"], busy["queued"], busy["submitted"]) == (1, 2, 3)
+
+    release.set()
+    first.result(timeout=5)
+    second.result(timeout=5)
+    with pytest.raises(ZeroDivisionError):
+        failing.result(timeout=5)
+
+    idle = pool.stats()
+    assert (idle["running"], idle["queued"]) == (0, 0)
+    assert (idle["completed"], idle["failed"]) == (2, 1)
+    assert idle["max_wait"] > 0
+    assert idle["max_wait"] >= idle["avg_wait"]
+
+
+def test_stats_cover_all_stages():
+    """
+    Verifica che le statistiche espongano tutte le fasi con i relativi thread.
+    """
+    stats = get_executor_stats()
+
+    assert set(stats) == {"cpu", "subprocess", "io"}
+    assert all(pool["workers"] >= 1 for pool in stats.values())
@@ -0,0 +1,317 @@
+"""
+Ollama Host Pool Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.host_pool` e per il
+bilanciamento delle richieste in `app.services.llm.ollama_api`.
+Le istanze Ollama sono simulate da server HTTP locali che rispondono agli endpoint
+`/api/tags`, `/api/generate` (anche in streaming) e `/api/pull`.
+
+La suite copre:
+1. Selezione: Richieste in corso, rotazione a parità di carico e liste per modello.
+2. Salute: Esclusione temporanea delle istanze non raggiungibili e modelli mancanti.
+3. Integrazione: Distribuzione, failover e streaming con più server locali.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from app.services.llm import ollama_api
+from app.services.llm.host_pool import HostPool, OllamaHostUnavailable
+from app.services.llm.scheduler import BULK, INTERACTIVE, LLMScheduler
+
+MODEL = "stub-model"
+
+
+class _StubOllama:
+    """
+    Server HTTP locale che simula un'istanza Ollama.
+    """
+
+    def __init__(self, models=(MODEL,), delay=0.0):
+        self.models = set(models)
+        self.delay = delay
+        self.barrier = None
+        self.generated = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """
+            Gestisce le richieste dell'API Ollama simulata.
+            """
+
+            def log_message(self, *_args):
+                pass
+
+            def _send(self, status, body):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                models = [{"name": name} for name in sorted(stub.models)]
+                self._send(200, json.dumps({"models": models}))
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path == "/api/pull":
+                    stub.models.add(payload["model"])
+                    self._send(200, json.dumps({"status": "success"}))
+                    return
+                if payload["model"] not in stub.models:
+                    self._send(404, json.dumps({"error": "model not found"}))
+                    return
+                with stub.lock:
+                    stub.generated += 1
+                if stub.barrier:
+                    stub.barrier.wait(5)
+                threading.Event().wait(stub.delay)
+                if payload.get("stream"):
+                    lines = [{"response": "from "}, {"response": stub.url, "done": True}]
+                    self._send(200, "\n".join(json.dumps(line) for line in lines) + "\n")
+                else:
+                    self._send(200, json.dumps({"response": stub.url, "done": True}))
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _closed_port_url():
+    """
+    Restituisce l'URL di una porta locale senza server in ascolto.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def stubs():
+    """
+    Avvia due istanze Ollama simulate e le chiude al termine del test.
+    """
+    servers = [_StubOllama(delay=0.2), _StubOllama(delay=0.2)]
+    yield servers
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def use_pool(tmp_path):
+    """
+    Restituisce una funzione che attiva un pool di istanze per `ollama_api`.
+    """
+    patchers = []
+
+    def activate(pool):
+        for target, value in (("get_host_pool", lambda: pool),
+                              ("MINIMAL_JSON_BASE_DIR", str(tmp_path)),
+                              ("OLLAMA_GENERAL_MODEL", MODEL)):
+            patcher = patch(f"app.services.llm.ollama_api.{target}", value)
+            patcher.start()
+            patchers.append(patcher)
+        return pool
+
+    yield activate
+    for patcher in patchers:
+        patcher.stop()
+
+# ==================================================================================
+#                                TEST: SELEZIONE
+# ==================================================================================
+
+def test_acquire_prefers_least_outstanding_host():
+    """
+    Verifica che la richiesta vada all'istanza con meno richieste in corso.
+    """
+    pool = HostPool(["http://a", "http://b"])
+    first = pool.acquire(MODEL)
+    second = pool.acquire(MODEL)
+
+    assert {first.base_url, second.base_url} == {"http://a", "http://b"}
+
+    pool.release(second)
+    assert pool.acquire(MODEL) is second
+
+
+def test_acquire_rotates_hosts_when_idle():
+    """
+    Verifica che, senza richieste in corso, le istanze vengano usate a rotazione.
+    """
+    pool = HostPool(["http://a", "http://b"])
+    used = []
+    for _ in range(4):
+        host = pool.acquire(MODEL)
+        used.append(host.base_url)
+        pool.release(host)
+
+    assert used.count("http://a") == 2
+    assert used.count("http://b") == 2
+
+
+def test_model_host_lists_restrict_pool():
+    """
+    Verifica che la lista di un modello limiti le istanze usate per quel modello.
+    """
+    pool = HostPool(["http://a", "http://b/"], {"coder": ["http://b"]})
+
+    assert [h.base_url for h in pool.hosts_for("coder")] == ["http://b"]
+    assert len(pool.hosts_for("general")) == 2
+    assert set(pool.stats()) == {"http://a", "http://b"}
+
+# ==================================================================================
+#                                TEST: SALUTE
+# ==================================================================================
+
+def test_down_host_is_skipped_until_retry():
+    """
+    Verifica che un'istanza non raggiungibile venga esclusa fino allo scadere
+    dell'esclusione.
+    """
+    pool = HostPool(["http://a", "http://b"], retry_seconds=60)
+    down = pool.hosts_for(MODEL)[0]
+    pool.mark_down(down, "refused")
+
+    for _ in range(3):
+        host = pool.acquire(MODEL)
+        assert host is not down
+        pool.release(host)
+
+    down.down_until = 0.0
+    assert pool.is_up(down)
+    assert pool.stats()["http://a"]["failures"] == 1
+
+
+def test_hosts_without_model_are_excluded():
+    """
+    Verifica che le istanze verificate senza il modello non ricevano richieste e che
+    senza istanze disponibili venga sollevato `OllamaHostUnavailable`.
+    """
+    pool = HostPool(["http://a", "http://b"])
+    host_a, host_b = pool.hosts_for(MODEL)
+    pool.update_models(host_a, ["other"])
+    pool.update_models(host_b, [f"{MODEL}:latest"])
+
+    assert pool.acquire(MODEL) is host_b
+
+    pool.mark_model_missing(host_b, MODEL)
+    with pytest.raises(OllamaHostUnavailable):
+        pool.acquire(MODEL)
+
+# ==================================================================================
+#                         TEST: INTEGRAZIONE CON SERVER LOCALI
+# ==================================================================================
+
+def test_concurrent_calls_are_spread_across_hosts(stubs, use_pool):
+    """
+    Verifica che chiamate simultanee vengano distribuite su entrambe le istanze.
+    """
+    use_pool(HostPool([s.url for s in stubs]))
+    # Ogni richiesta resta in corso finché non sono arrivate tutte e quattro
+    barrier = threading.Barrier(4)
+    for stub in stubs:
+        stub.barrier = barrier
+    scheduler = LLMScheduler(4, limits={INTERACTIVE: 4, BULK: 4},
+                             queue_sizes={INTERACTIVE: 4, BULK: 4},
+                             queue_timeouts={INTERACTIVE: 5.0, BULK: 5.0})
+
+    with patch("app.services.llm.ollama_api.get_llm_scheduler", return_value=scheduler), \
+            ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(ollama_api.call_ollama_deepseek,
+                                    [f"prompt {n}" for n in range(4)]))
+
+    assert set(results) == {s.url for s in stubs}
+    assert [s.generated for s in stubs] == [2, 2]
+
+
+def test_unreachable_host_fails_over(stubs, use_pool):
+    """
+    Verifica che una richiesta verso un'istanza non raggiungibile passi a un'altra
+    istanza e che quella non raggiungibile venga esclusa.
+    """
+    dead = _closed_port_url()
+    pool = use_pool(HostPool([dead, stubs[0].url], retry_seconds=60))
+
+    # Senza verifica preliminare l'errore emerge durante la generazione
+    with patch("app.services.llm.ollama_api.ensure_ollama_ready"):
+        results = [ollama_api.call_ollama_deepseek(f"prompt {n}") for n in range(3)]
+
+    assert results == [stubs[0].url] * 3
+    stats = pool.stats()
+    assert stats[dead]["up"] is False
+    assert stats[dead]["requests"] == 1
+
+
+def test_readiness_tracks_installed_models_per_host(stubs, use_pool):
+    """
+    Verifica che la verifica di prontezza registri i modelli di ogni istanza e che le
+    richieste vadano solo alle istanze con il modello.
+    """
+    stubs[0].models = {"other"}
+    pool = use_pool(HostPool([s.url for s in stubs]))
+
+    for n in range(3):
+        assert ollama_api.call_ollama_deepseek(f"prompt {n}") == stubs[1].url
+
+    assert pool.stats()[stubs[0].url]["models"] == ["other"]
+    assert stubs[0].generated == 0
+
+
+def test_missing_model_response_fails_over(stubs, use_pool):
+    """
+    Verifica che una risposta 404 (modello assente) porti la richiesta su un'altra
+    istanza e aggiorni i modelli dell'istanza.
+    """
+    stubs[0].models = set()
+    pool = use_pool(HostPool([s.url for s in stubs]))
+
+    with patch("app.services.llm.ollama_api.ensure_ollama_ready"):
+        results = [ollama_api.call_ollama_deepseek(f"prompt {n}") for n in range(2)]
+
+    assert results == [stubs[1].url] * 2
+    assert pool.stats()[stubs[0].url]["models"] == []
+
+
+def test_model_is_pulled_when_missing_everywhere(stubs, use_pool):
+    """
+    Verifica che un modello assente da tutte le istanze venga scaricato su quelle
+    raggiungibili.
+    """
+    for stub in stubs:
+        stub.models = set()
+    use_pool(HostPool([s.url for s in stubs]))
+
+    ollama_api.ensure_ollama_ready(MODEL)
+
+    assert all(MODEL in stub.models for stub in stubs)
+
+
+def test_stream_fails_over_before_first_token(stubs, use_pool):
+    """
+    Verifica che lo streaming passi a un'altra istanza se la prima non è raggiungibile.
+    """
+    use_pool(HostPool([_closed_port_url(), stubs[1].url]))
+
+    async def consume():
+        return [token async for token in ollama_api.stream_ollama(MODEL, "prompt")]
+
+    with patch("app.services.llm.ollama_api.ensure_ollama_ready"):
+        tokens = asyncio.run(consume())
+
+    assert "".join(tokens) == f"from {stubs[1].url}"
@@ -0,0 +1,86 @@
+"""
+Shared HTTP Client Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.http_client`.
+Verifica che i client HTTP verso Ollama siano condivisi e configurati con un pool
+di connessioni keep-alive.
+
+La suite copre:
+1. Sessione sincrona: Riutilizzo dell'istanza e dimensione del pool.
+2. Client asincrono: Riutilizzo all'interno dello stesso event loop.
+3. Integrazione: Uso della sessione condivisa da parte di `ollama_api`.
+"""
+
+import asyncio
+from unittest.mock import patch, mock_open
+
+import pytest
+
+from app.services.llm import http_client, ollama_api
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    """
+    Garantisce che ogni test parta senza client condivisi.
+    """
+    http_client.close_http_clients()
+    yield
+    http_client.close_http_clients()
+
+
+def test_http_session_is_shared_and_pooled():
+    """
+    Verifica che la sessione sia unica e monti un adattatore con il pool configurato.
+    """
+    session = http_client.get_http_session()
+
+    assert http_client.get_http_session() is session
+    adapter = session.get_adapter("http://mock-ollama:11434")
+    assert adapter._pool_maxsize == http_client.OLLAMA_HTTP_POOL_MAXSIZE
+
+
+def test_close_http_clients_recreates_session():
+    """
+    Verifica che dopo la chiusura venga creata una nuova sessione.
+    """
+    first = http_client.get_http_session()
+    http_client.close_http_clients()
+
+    assert http_client.get_http_session() is not first
+
+
+def test_async_client_is_shared_per_event_loop():
+    """
+    Verifica che il client asincrono sia riutilizzato nello stesso event loop e
+    ricreato per un loop diverso.
+    """
+    async def get_twice():
+        first = http_client.get_async_http_client()
+        second = http_client.get_async_http_client()
+        assert first is second
+        await http_client.aclose_http_clients()
+        return first
+
+    first_loop_client = asyncio.run(get_twice())
+    second_loop_client = asyncio.run(get_twice())
+
+    assert first_loop_client is not second_loop_client
+
+
+@patch('app.services.llm.ollama_api.ensure_ollama_ready')
+@patch('app.services.llm.ollama_api.os.makedirs')
+@patch('builtins.open', new_callable=mock_open)
+def test_ollama_calls_use_shared_session(_mock_file, _mock_makedirs, _mock_ensure):
+    """
+    Verifica che `call_ollama_deepseek` usi la sessione condivisa con timeout
+    (connessione, lettura).
+    """
+    session = http_client.get_http_session()
+
+    with patch.object(session, "post") as mock_post:
+        mock_post.return_value.json.return_value = {"response": "MIT"}
+        assert ollama_api.call_ollama_deepseek("prompt") == "MIT"
+
+    _, kwargs = mock_post.call_args
+    assert kwargs["timeout"] == (http_client.OLLAMA_CONNECT_TIMEOUT, 240)
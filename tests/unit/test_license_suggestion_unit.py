@@ -1,9 +1,25 @@
+import asyncio
 from unittest.mock import patch
+from app.services.llm.circuit_breaker import CircuitOpenError
 from app.services.llm.license_recommender import (
     suggest_license_based_on_requirements,
+    stream_license_suggestion,
     needs_license_suggestion
 )
 
+
+def _collect_events(requirements, detected_licenses=None):
+    """Consuma lo stream di `stream_license_suggestion` e restituisce la lista di eventi."""
+    async def collect():
+        return [event async for event in stream_license_suggestion(requirements, detected_licenses)]
+    return asyncio.run(collect())
+
+
+async def _fake_stream(*chunks):
+    """Generatore asincrono che simula i token in streaming dell'LLM."""
+    for chunk in chunks:
+        yield chunk
+
 class TestLicenseRecommenderService:
     """
     Test unitari per la logica del servizio license_recommender.
@@ -51,7 +67,8 @@ class TestLicenseRecommenderService:
             "patent_grant": False,
             "trademark_use": False,
             "liability": False,
-            "copyleft": "none"
+            "copyleft": "none",
+            "additional_requirements": "Must be OSI approved"
         }
         result = suggest_license_based_on_requirements(requirements)
         assert result["suggested_license"] == "MIT"
@@ -74,7 +91,8 @@ class TestLicenseRecommenderService:
             "commercial_use": True,
             "modification": True,
             "distribution": True,
-            "copyleft": "none"
+            "copyleft": "none",
+            "additional_requirements": "Must be OSI approved"
         }
         detected_licenses = ["Apache-2.0", "MIT", "BSD-3-Clause"]
 
@@ -100,7 +118,8 @@ class TestLicenseRecommenderService:
         '''
         requirements = {
             "commercial_use": True,
-            "copyleft": "none"
+            "copyleft": "none",
+            "additional_requirements": "Must be OSI approved"
         }
         result = suggest_license_based_on_requirements(requirements, detected_licenses=None)
         assert result["suggested_license"] == "MIT"
@@ -119,7 +138,8 @@ class TestLicenseRecommenderService:
             "commercial_use": True,
             "modification": True,
             "distribution": True,
-            "copyleft": "none"
+            "copyleft": "none",
+            "additional_requirements": "Must be OSI approved"
         }
         result = suggest_license_based_on_requirements(requirements)
         # Deve restituire MIT come fallback
@@ -141,8 +161,111 @@ class TestLicenseRecommenderService:
         requirements = {
             "commercial_use": True,
             "patent_grant": True,
-            "copyleft": "none"
+            "copyleft": "none",
+            "additional_requirements": "Must be OSI approved"
         }
         result = suggest_license_based_on_requirements(requirements)
         assert result["suggested_license"] == "Apache-2.0"
 
+
+    @patch('app.services.llm.license_recommender.call_ollama_deepseek')
+    def test_suggest_license_matrix_fast_path_skips_llm(self, mock_llm):
+        """
+        Test del percorso veloce deterministico: senza requisiti aggiuntivi in testo libero
+        la raccomandazione viene derivata dalla matrice e l'LLM non viene interrogato.
+        """
+        requirements = {
+            "commercial_use": True,
+            "modification": True,
+            "distribution": True,
+            "patent_grant": True,
+            "copyleft": "none"
+        }
+        result = suggest_license_based_on_requirements(requirements, detected_licenses=["MIT"])
+        assert result["suggested_license"] == "Apache-2.0"
+        assert len(result["alternatives"]) > 0
+        mock_llm.assert_not_called()
+
+    @patch('app.services.llm.license_recommender.recommend_license', return_value=None)
+    @patch('app.services.llm.license_recommender.call_ollama_deepseek')
+    def test_suggest_license_matrix_fast_path_fallback_to_llm(self, mock_llm, mock_recommend):
+        """
+        Test del fallback: se la matrice non produce una raccomandazione viene interrogato l'LLM.
+        """
+        mock_llm.return_value = '{"suggested_license": "GPL-3.0", "explanation": "x", "alternatives": []}'
+        result = suggest_license_based_on_requirements({"copyleft": "strong"})
+        assert result["suggested_license"] == "GPL-3.0"
+        mock_recommend.assert_called_once()
+        mock_llm.assert_called_once()
+
+    @patch('app.services.llm.license_recommender.stream_ollama')
+    def test_stream_license_suggestion_fast_path(self, mock_stream):
+        """
+        Test dello streaming con il percorso veloce: viene emesso solo l'evento finale
+        e l'LLM non viene interrogato.
+        """
+        events = _collect_events({"copyleft": "none", "patent_grant": True}, ["MIT"])
+
+        assert [name for name, _ in events] == ["result"]
+        assert events[0][1]["suggested_license"] == "Apache-2.0"
+        mock_stream.assert_not_called()
+
+    @patch('app.services.llm.license_recommender.stream_ollama')
+    def test_stream_license_suggestion_forwards_tokens(self, mock_stream):
+        """
+        Test dello streaming tramite LLM: i token vengono inoltrati man mano e la
+        risposta completa viene analizzata nell'evento finale.
+        """
+        mock_stream.return_value = _fake_stream(
+            '{"suggested_license": "LGPL-3.0", ', '"explanation": "x", "alternatives": []}'
+        )
+
+        events = _collect_events({"copyleft": "weak", "additional_requirements": "OSI"})
+
+        assert [name for name, _ in events] == ["token", "token", "result"]
+        assert events[0][1]["text"].startswith('{"suggested_license"')
+        assert events[-1][1]["suggested_license"] == "LGPL-3.0"
+
+    @patch('app.services.llm.license_recommender.call_ollama_deepseek', return_value="still not json")
+    @patch('app.services.llm.license_recommender.stream_ollama')
+    def test_stream_license_suggestion_invalid_json_fallback(self, mock_stream, mock_llm):
+        """
+        Test dello streaming con risposta non valida: dopo il tentativo di correzione
+        l'evento finale contiene il fallback MIT.
+        """
+        mock_stream.return_value = _fake_stream("not json")
+
+        events = _collect_events({"copyleft": "weak", "additional_requirements": "OSI"})
+
+        assert events[-1] == ("result", events[-1][1])
+        assert events[-1][1]["suggested_license"] == "MIT"
+        mock_llm.assert_called_once()
+
+
+    @patch('app.services.llm.license_recommender.call_ollama_deepseek')
+    def test_suggest_license_open_circuit_uses_matrix(self, mock_llm):
+        """
+        Test con il circuito LLM aperto: la raccomandazione viene derivata dalla matrice e
+        la spiegazione segnala che i requisiti aggiuntivi non sono stati valutati.
+        """
+        mock_llm.side_effect = CircuitOpenError("open")
+
+        result = suggest_license_based_on_requirements(
+            {"copyleft": "strong", "additional_requirements": "OSI approved"}
+        )
+
+        assert result["suggested_license"] == "GPL-3.0-or-later"
+        assert "temporarily unavailable" in result["explanation"]
+
+    @patch('app.services.llm.license_recommender.stream_ollama')
+    def test_stream_license_suggestion_open_circuit_uses_matrix(self, mock_stream):
+        """
+        Test dello streaming con il circuito LLM aperto: l'evento finale contiene la
+        raccomandazione deterministica.
+        """
+        mock_stream.side_effect = CircuitOpenError("open")
+
+        events = _collect_events({"copyleft": "none", "additional_requirements": "OSI"}, ["MIT"])
+
+        assert [name for name, _ in events] == ["result"]
+        assert "temporarily unavailable" in events[0][1]["explanation"]
@@ -0,0 +1,178 @@
+"""
+LLM Answer Cache Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.llm_cache`.
+Valida la cache persistente delle risposte LLM e la sua integrazione con i
+suggerimenti di licenza.
+
+La suite copre:
+1. Chiavi di cache: Dipendenza da modello, versione del template e input.
+2. Limiti: Scadenza per TTL e rimozione LRU oltre il numero massimo di voci.
+3. Persistenza: Riutilizzo delle risposte tra istanze diverse della cache.
+4. Integrazione: Deduplicazione delle chiamate per la stessa coppia di licenze.
+5. Codice rigenerato: Riutilizzo del codice validato per contenuti identici.
+"""
+
+from unittest.mock import patch, MagicMock
+
+from app.services.llm import llm_cache
+from app.services.llm.llm_cache import LLMAnswerCache, cached_llm_call, make_cache_key
+from app.services.llm.code_generator import regenerate_code, get_cached_regenerated_code
+from app.services.llm.suggestion import ask_llm_for_suggestions
+
+# ==================================================================================
+#                              TEST: CHIAVI E LIMITI
+# ==================================================================================
+
+def test_make_cache_key_depends_on_all_components():
+    """
+    Verifica che la chiave cambi con modello, versione del template e input, ma non
+    con l'ordine delle chiavi degli input.
+    """
+    base = make_cache_key("m", "1", {"a": "MIT", "b": "GPL-3.0-only"})
+
+    assert base == make_cache_key("m", "1", {"b": "GPL-3.0-only", "a": "MIT"})
+    assert base != make_cache_key("other", "1", {"a": "MIT", "b": "GPL-3.0-only"})
+    assert base != make_cache_key("m", "2", {"a": "MIT", "b": "GPL-3.0-only"})
+    assert base != make_cache_key("m", "1", {"a": "MIT", "b": "Apache-2.0"})
+
+
+def test_cache_ttl_expiry(tmp_path):
+    """
+    Verifica che una voce scaduta venga trattata come miss e rimossa.
+    """
+    cache = LLMAnswerCache(str(tmp_path / "c.sqlite3"), ttl_seconds=60, max_entries=10)
+
+    with patch("app.services.llm.llm_cache.time.time", return_value=1000.0):
+        cache.set("k", "m", "MIT, Apache-2.0")
+    with patch("app.services.llm.llm_cache.time.time", return_value=1030.0):
+        assert cache.get("k") == "MIT, Apache-2.0"
+    with patch("app.services.llm.llm_cache.time.time", return_value=1100.0):
+        assert cache.get("k") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """
+    Verifica che, superato il limite di voci, venga rimossa quella usata meno di recente.
+    """
+    cache = LLMAnswerCache(str(tmp_path / "c.sqlite3"), ttl_seconds=float("inf"), max_entries=2)
+
+    with patch("app.services.llm.llm_cache.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+        cache.set("a", "m", "A")
+        cache.set("b", "m", "B")
+        cache.get("a")  # "a" diventa la voce usata più di recente
+        cache.set("c", "m", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_persists_across_instances(tmp_path):
+    """
+    Verifica che le risposte sopravvivano alla ricreazione della cache (nuovo processo).
+    """
+    path = str(tmp_path / "c.sqlite3")
+    LLMAnswerCache(path, ttl_seconds=3600, max_entries=10).set("k", "m", "cached")
+
+    assert LLMAnswerCache(path, ttl_seconds=3600, max_entries=10).get("k") == "cached"
+
+# ==================================================================================
+#                              TEST: CHIAMATE CACHED
+# ==================================================================================
+
+def test_cached_llm_call_skips_empty_responses():
+    """
+    Verifica che le risposte vuote non vengano memorizzate.
+    """
+    call = MagicMock(side_effect=["", "MIT"])
+
+    assert cached_llm_call("m", "1", {"x": 1}, call) == ""
+    assert cached_llm_call("m", "1", {"x": 1}, call) == "MIT"
+    assert cached_llm_call("m", "1", {"x": 1}, call) == "MIT"
+    assert call.call_count == 2
+
+
+def test_cached_llm_call_disabled():
+    """
+    Verifica che con la cache disabilitata l'LLM venga sempre interrogato.
+    """
+    call = MagicMock(return_value="MIT")
+
+    with patch.object(llm_cache, "LLM_CACHE_ENABLED", False):
+        cached_llm_call("m", "1", {"x": 1}, call)
+        cached_llm_call("m", "1", {"x": 1}, call)
+
+    assert call.call_count == 2
+
+
+def test_ask_llm_for_suggestions_reuses_same_license_pair():
+    """
+    Verifica che file diversi con la stessa coppia di licenze producano una sola
+    chiamata all'LLM.
+    """
+    issues = [
+        {"file_path": "a.py", "detected_license": "GPL-3.0-only", "reason": "r"},
+        {"file_path": "b.py", "detected_license": " GPL-3.0-only ", "reason": "other"},
+    ]
+
+    with patch("app.services.llm.suggestion.call_ollama_deepseek",
+               return_value="MIT, Apache-2.0") as mock_call:
+        results = [ask_llm_for_suggestions(issue, "MIT") for issue in issues]
+        other = ask_llm_for_suggestions(
+            {"file_path": "c.py", "detected_license": "AGPL-3.0-only", "reason": "r"}, "MIT"
+        )
+
+    assert results == ["MIT, Apache-2.0", "MIT, Apache-2.0"]
+    assert other == "MIT, Apache-2.0"
+    assert mock_call.call_count == 2
+
+# ==================================================================================
+#                              TEST: CODICE RIGENERATO
+# ==================================================================================
+
+def test_regenerate_code_reuses_validated_output_for_identical_content():
+    """
+    Verifica che file identici (anche con percorsi diversi) vengano rigenerati una sola
+    volta e che il codice memorizzato sia quello già ripulito e validato.
+    """
+    with patch("app.services.llm.code_generator.call_ollama_qwen3_coder",
+               return_value="```python\nprint('regenerated')\n```") as mock_call:
+        first = regenerate_code("old code", "MIT", "GPL-3.0", "MIT", file_path="a/x.py")
+        second = regenerate_code("old code", "MIT", "GPL-3.0", "MIT", file_path="vendor/x.py")
+
+    assert first == second == "print('regenerated')"
+    assert mock_call.call_count == 1
+    assert get_cached_regenerated_code("old code", "MIT", "GPL-3.0", "MIT") == first
+
+
+def test_regenerate_code_cache_key_depends_on_inputs():
+    """
+    Verifica che licenza principale e contenuto diversi producano nuove rigenerazioni.
+    """
+    with patch("app.services.llm.code_generator.call_ollama_qwen3_coder",
+               return_value="print('regenerated')") as mock_call:
+        regenerate_code("old code", "MIT", "GPL-3.0", "MIT")
+        regenerate_code("old code", "Apache-2.0", "GPL-3.0", "MIT")
+        regenerate_code("other code", "MIT", "GPL-3.0", "MIT")
+
+    assert mock_call.call_count == 3
+
+
+def test_regenerate_code_does_not_cache_invalid_output():
+    """
+    Verifica che un output non valido non venga memorizzato.
+    """
+    with patch("app.services.llm.code_generator.REGEN_VALIDATION_RETRIES", 0), \
+            patch("app.services.llm.code_generator.call_ollama_qwen3_coder",
+                  side_effect=["short", "print('regenerated')"]) as mock_call:
+        assert regenerate_code("old code", "MIT", "GPL-3.0", "MIT") is None
+        assert regenerate_code("old code", "MIT", "GPL-3.0", "MIT") == "print('regenerated')"
+
+    assert mock_call.call_count == 2
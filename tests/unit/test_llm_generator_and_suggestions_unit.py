@@ -12,9 +12,19 @@ La suite copre:
 """
 
 import json
+import threading
+import time
+import pytest
 from unittest.mock import patch, mock_open
-from app.services.llm.code_generator import regenerate_code, validate_generated_code
+from app.services.llm.code_generator import (
+    regenerate_code,
+    regenerate_code_chunked,
+    validate_generated_code,
+)
 from app.services.llm.suggestion import ask_llm_for_suggestions, review_document, enrich_with_llm_suggestions
+from app.services.llm.suggestion import enrich_issue, prefetch_issue_suggestions
+from app.services.llm.scheduler import INTERACTIVE, current_priority
+from app.services.llm.circuit_breaker import CircuitOpenError
 from app.services.llm import license_recommender
 
 # ==============================================================================
@@ -76,6 +86,114 @@ def test_regenerate_code_validation_fails():
         assert result is None
 
 
+def _large_python_source(functions: int = 6) -> str:
+    """
+    Costruisce un sorgente Python con più funzioni di primo livello.
+    """
+    return "".join(
+        f"def func_{i}():\n    return {i}  # {'x' * 60}\n\n\n" for i in range(functions)
+    )
+
+
+def test_regenerate_code_large_file_uses_chunks():
+    """
+    Verifica che un file più grande del limite venga rigenerato a blocchi e riassemblato
+    nell'ordine originale.
+    """
+    def fake_llm(prompt, **_kwargs):
+        part = prompt.split("part ", 1)[1].split(" of", 1)[0]
+        return f"```python\n# regenerated part {part}\n```"
+
+    with patch('app.services.llm.code_generator.REGEN_CHUNK_MAX_CHARS', 200), \
+            patch('app.services.llm.code_generator.call_ollama_qwen3_coder',
+                  side_effect=fake_llm) as mock_call:
+        result = regenerate_code(_large_python_source(), "MIT", "GPL", "MIT", file_path="big.py")
+
+    total = mock_call.call_count
+    assert total > 1
+    assert result == "\n\n".join(f"# regenerated part {i}" for i in range(1, total + 1))
+
+
+def test_regenerate_code_deadline_limits_requests():
+    """
+    Verifica che la scadenza limiti il timeout della richiesta al modello e che, superata,
+    non vengano avviati altri tentativi di correzione.
+    """
+    import time
+
+    def slow_invalid(prompt, **_kwargs):
+        time.sleep(0.3)
+        return "def broken(:\n    pass"
+
+    with patch('app.services.llm.code_generator.call_ollama_qwen3_coder',
+               side_effect=slow_invalid) as mock_call:
+        deadline = time.monotonic() + 0.2
+        result = regenerate_code("def ok():\n    return 1\n", "MIT", "GPL", "MIT",
+                                 file_path="a.py", deadline=deadline)
+
+    assert result is None
+    assert mock_call.call_count == 1
+    assert 0 < mock_call.call_args.kwargs["timeout"] <= 0.2
+
+
+def test_regenerate_code_chunked_retries_failed_chunk():
+    """
+    Verifica che un blocco fallito venga ritentato senza ripetere gli altri.
+    """
+    with patch('app.services.llm.code_generator.call_ollama_qwen3_coder',
+               side_effect=[Exception("timeout"), "def a():\n    return 1"]) as mock_call:
+        result = regenerate_code_chunked(
+            "def a():\n    return 0\n", "MIT", "GPL", "MIT",
+            file_path="a.py", max_chunk_chars=100, retries=1
+        )
+
+    assert result == "def a():\n    return 1"
+    assert mock_call.call_count == 2
+
+
+def test_regenerate_code_chunked_fails_if_any_chunk_fails():
+    """
+    Verifica che il file non venga rigenerato parzialmente se un blocco esaurisce i tentativi.
+    """
+    def fake_llm(prompt, **_kwargs):
+        return "" if "part 2 of" in prompt else "# regenerated code block"
+
+    with patch('app.services.llm.code_generator.call_ollama_qwen3_coder',
+               side_effect=fake_llm):
+        result = regenerate_code_chunked(
+            _large_python_source(3), "MIT", "GPL", "MIT",
+            file_path="big.py", max_chunk_chars=100, retries=1
+        )
+
+    assert result is None
+
+
+def test_regenerate_code_chunked_deadline():
+    """
+    Verifica che, superata la scadenza complessiva, la rigenerazione restituisca None
+    senza attendere i blocchi ancora in corso.
+    """
+    release = threading.Event()
+
+    def slow_llm(_prompt):
+        release.wait(5)
+        return "# regenerated code block"
+
+    try:
+        with patch('app.services.llm.code_generator.call_ollama_qwen3_coder',
+                   side_effect=slow_llm):
+            start = time.monotonic()
+            result = regenerate_code_chunked(
+                _large_python_source(3), "MIT", "GPL", "MIT",
+                file_path="big.py", max_chunk_chars=100, deadline_seconds=0.2
+            )
+            elapsed = time.monotonic() - start
+    finally:
+        release.set()
+
+    assert result is None
+    assert elapsed < 2
+
 # ==============================================================================
 # TESTS FOR LICENSE SUGGESTIONS (ENRICHMENT)
 # ==============================================================================
@@ -94,21 +212,22 @@ def test_ask_llm_for_suggestions():
 
 def test_review_document_success():
     """
-    Verifica che `review_document` legga il contenuto del file, lo invii all'LLM e
-    estragga il consiglio contenuto all'interno dei tag XML previsti (<advice>).
+    Verifica che `review_document` legga il contenuto del file, lo invii all'LLM con lo
+    schema JSON della risposta e restituisca il consiglio validato.
     """
     issue = {"file_path": "file.md", "detected_license": "GPL"}
     with patch('builtins.open', mock_open(read_data="content")), \
          patch('app.services.llm.suggestion.call_ollama_deepseek') as mock_call:
-        mock_call.return_value = "<advice>Change license</advice>"
+        mock_call.return_value = '{"advice": " Change license "}'
         result = review_document(issue, "MIT", "MIT, Apache")
         assert result == "Change license"
+        assert "advice" in mock_call.call_args.kwargs["response_format"]["properties"]
 
 
 def test_review_document_no_tags():
     """
-    Verifica che `review_document` restituisca None se la risposta dell'LLM non contiene
-    i tag XML richiesti per estrarre il consiglio.
+    Verifica che `review_document` restituisca None se la risposta dell'LLM non rispetta
+    lo schema JSON nemmeno dopo il tentativo di correzione.
     """
     issue = {"file_path": "file.md", "detected_license": "GPL"}
     with patch('builtins.open', mock_open(read_data="content")), \
@@ -116,6 +235,7 @@ def test_review_document_no_tags():
         mock_call.return_value = "Some advice without tags"
         result = review_document(issue, "MIT", "MIT, Apache")
         assert result is None
+        assert mock_call.call_count == 2
 
 
 def test_review_document_llm_returns_none():
@@ -152,6 +272,43 @@ def test_review_document_llm_error():
         assert result is None
 
 
+
+@pytest.mark.parametrize("file_path", ["/etc/passwd.txt", "../outside/NOTICE.md"])
+def test_review_document_refuses_paths_outside_clone_dir(file_path):
+    """
+    Verifica che `review_document` non legga file esterni alla directory di clonazione.
+    """
+    issue = {"file_path": file_path, "detected_license": "GPL"}
+    with patch('builtins.open', mock_open(read_data="secret")) as mock_file, \
+         patch('app.services.llm.suggestion.call_ollama_deepseek') as mock_call:
+        assert review_document(issue, "MIT", "") is None
+    mock_file.assert_not_called()
+    mock_call.assert_not_called()
+
+
+def test_review_document_trims_long_document_to_budget():
+    """
+    Verifica che un documento lungo venga ridotto al budget del prompt conservando il
+    testo individuato dalla scansione.
+    """
+    filler = "".join(f"Installation step number {n} for the project.\n" for n in range(2000))
+    content = filler + "Portions are distributed under the GNU General Public License v3.\n" + filler
+    issue = {
+        "file_path": "README.md",
+        "detected_license": "GPL-3.0",
+        "matched_texts": ["Portions are distributed under the GNU General Public License v3."],
+    }
+    with patch('builtins.open', mock_open(read_data=content)), \
+         patch('app.services.llm.suggestion.call_ollama_deepseek') as mock_call:
+        mock_call.return_value = '{"advice": "Ask for dual licensing"}'
+        result = review_document(issue, "MIT", "MIT, Apache")
+
+    prompt = mock_call.call_args.args[0]
+    assert result == "Ask for dual licensing"
+    assert "GNU General Public License v3" in prompt
+    assert "lines omitted" in prompt
+    assert len(prompt) < len(content) // 10
+
 def test_enrich_with_llm_suggestions_compatible():
     """
     Verifica che per i problemi contrassegnati come 'compatibili', la logica di arricchimento aggiunga un
@@ -172,12 +329,65 @@ def test_enrich_with_llm_suggestions_incompatible_code():
     issues = [{"file_path": "file.py", "detected_license": "GPL", "compatible": False, "reason": "incompatible"}]
     with patch('app.services.llm.suggestion.ask_llm_for_suggestions') as mock_ask:
         mock_ask.return_value = "MIT, Apache-2.0"
-        result = enrich_with_llm_suggestions("MIT", issues)
+        result = enrich_with_llm_suggestions("MIT", issues, deterministic=False)
         assert len(result) == 1
         assert "MIT, Apache-2.0" in result[0]["suggestion"]
         assert result[0]["licenses"] == "MIT, Apache-2.0"
 
 
+def test_enrich_deterministic_alternatives_skip_llm_for_code():
+    """
+    Verifica che in modalità deterministica le alternative dei file di codice vengano
+    calcolate dalla matrice senza chiamare l'LLM, mentre i documenti vengono ancora rivisti.
+    """
+    issues = [
+        {"file_path": "a.py", "detected_license": "GPL-3.0-only", "compatible": False, "reason": "r"},
+        {"file_path": "NOTICE", "detected_license": "GPL-3.0-only", "compatible": False, "reason": "r"},
+    ]
+    with patch('app.services.llm.suggestion.compatible_alternatives',
+               return_value=["MIT", "Apache-2.0"]) as mock_alternatives, \
+            patch('app.services.llm.suggestion.ask_llm_for_suggestions') as mock_ask, \
+            patch('app.services.llm.suggestion.review_document', return_value="Keep notice") as mock_review:
+        result = enrich_with_llm_suggestions("MIT", issues, deterministic=True)
+
+    mock_alternatives.assert_called_once_with("MIT", "GPL-3.0-only")
+    mock_ask.assert_not_called()
+    mock_review.assert_called_once()
+    assert result[0]["licenses"] == "MIT, Apache-2.0"
+    assert "MIT, Apache-2.0" in result[0]["suggestion"]
+    assert "Keep notice" in result[1]["suggestion"]
+
+
+def test_enrich_deterministic_falls_back_to_llm_outside_matrix():
+    """
+    Verifica che, se la licenza principale non è nella matrice, venga interrogato l'LLM.
+    """
+    issues = [{"file_path": "a.py", "detected_license": "GPL", "compatible": False, "reason": "r"}]
+    with patch('app.services.llm.suggestion.compatible_alternatives', return_value=[]), \
+            patch('app.services.llm.suggestion.ask_llm_for_suggestions',
+                  return_value="MIT") as mock_ask:
+        result = enrich_with_llm_suggestions("Custom-License", issues, deterministic=True)
+
+    mock_ask.assert_called_once()
+    assert result[0]["licenses"] == "MIT"
+
+
+def test_enrich_open_circuit_falls_back_to_matrix():
+    """
+    Verifica che, con il circuito LLM aperto, le alternative dei file di codice vengano
+    calcolate dalla matrice invece di fallire.
+    """
+    issues = [{"file_path": "a.py", "detected_license": "GPL-3.0-only", "compatible": False, "reason": "r"}]
+    with patch('app.services.llm.suggestion.ask_llm_for_suggestions',
+               side_effect=CircuitOpenError("open")), \
+            patch('app.services.llm.suggestion.compatible_alternatives',
+                  return_value=["MIT", "BSD-3-Clause"]) as mock_alternatives:
+        result = enrich_with_llm_suggestions("MIT", issues, deterministic=False)
+
+    mock_alternatives.assert_called_once_with("MIT", "GPL-3.0-only")
+    assert result[0]["licenses"] == "MIT, BSD-3-Clause"
+
+
 def test_enrich_with_llm_suggestions_incompatible_doc():
     """
     Verifica che per i file di documentazione incompatibili (ad es., .md), la logica di arricchimento
@@ -311,7 +521,7 @@ def test_suggest_license_success_clean_json():
     Verifica che una risposta JSON valida dall'LLM venga correttamente analizzata
     e restituita.
     """
-    requirements = {"commercial_use": True}
+    requirements = {"commercial_use": True, "additional_requirements": "Must be OSI approved"}
     mock_response = json.dumps({
         "suggested_license": "Apache-2.0",
         "explanation": "Fits commercial needs.",
@@ -329,7 +539,7 @@ def test_suggest_license_strips_markdown():
     Verifica che i blocchi di codice Markdown (```json ... ```) vengano rimossi da
     la risposta dell'LLM prima dell'analisi.
     """
-    requirements = {"commercial_use": True}
+    requirements = {"commercial_use": True, "additional_requirements": "Must be OSI approved"}
     mock_response = "```json\n" + json.dumps({
         "suggested_license": "BSD-3-Clause",
         "explanation": "Exp",
@@ -346,7 +556,7 @@ def test_suggest_license_empty_response_fallback():
     Verifica che se l'LLM restituisce None o una stringa vuota, la funzione
     solleva/cattura ValueError e restituisce il fallback (MIT).
     """
-    requirements = {}
+    requirements = {"additional_requirements": "Must be OSI approved"}
 
     # Simula risposta vuota
     with patch("app.services.llm.license_recommender.call_ollama_deepseek", return_value=""):
@@ -361,7 +571,7 @@ def test_suggest_license_invalid_json_fallback():
     Verifica che se l'LLM restituisce JSON non valido (testo spazzatura),
     la funzione catturi JSONDecodeError e restituisca il fallback.
     """
-    requirements = {}
+    requirements = {"additional_requirements": "Must be OSI approved"}
 
     with patch("app.services.llm.license_recommender.call_ollama_deepseek", return_value="Not a JSON"):
         result = license_recommender.suggest_license_based_on_requirements(requirements)
@@ -373,7 +583,7 @@ def test_suggest_license_generic_exception_fallback():
     Verifica che eccezioni inaspettate (ad es. errore di rete) vengano catturate
     e risultino in un fallback sicuro.
     """
-    requirements = {}
+    requirements = {"additional_requirements": "Must be OSI approved"}
 
     with patch("app.services.llm.license_recommender.call_ollama_deepseek", side_effect=Exception("API Down")):
         result = license_recommender.suggest_license_based_on_requirements(requirements)
@@ -441,7 +651,7 @@ def test_suggest_license_prompt_construction_no_copyleft():
     """
     Verifica la logica specifica per 'copyleft': 'none'.
     """
-    requirements = {"copyleft": "none"}
+    requirements = {"copyleft": "none", "additional_requirements": "Must be OSI approved"}
 
     with patch("app.services.llm.license_recommender.call_ollama_deepseek", return_value="{}") as mock_call:
         license_recommender.suggest_license_based_on_requirements(requirements)
@@ -481,7 +691,7 @@ def test_suggest_license_strips_generic_markdown():
     vengano correttamente rimossi. Questo copre il ramo specifico:
     'if response.startswith("```"):' che viene altrimenti saltato dai blocchi json.
     """
-    requirements = {"commercial_use": True}
+    requirements = {"commercial_use": True, "additional_requirements": "Must be OSI approved"}
     # Risposta con tag di blocco di codice generico
     mock_response = "```\n" + json.dumps({
         "suggested_license": "GPL-3.0",
@@ -504,7 +714,7 @@ def test_enrich_with_llm_suggestions_llm_failure_fallback():
 
     # Mock ask_llm_for_suggestions per restituire None (simulando errore/riposta vuota)
     with patch('app.services.llm.suggestion.ask_llm_for_suggestions', return_value=None):
-        result = enrich_with_llm_suggestions("MIT", issues)
+        result = enrich_with_llm_suggestions("MIT", issues, deterministic=False)
 
         assert len(result) == 1
         # Quando licenses_list_str è None, f"{licenses_list_str}" diventa "None"
@@ -526,3 +736,282 @@ def test_enrich_with_llm_suggestions_doc_review_failure_fallback():
         assert len(result) == 1
         assert "Check document manually." in result[0]["suggestion"]
 
+
+
+# ==============================================================================
+# TESTS FOR CONCURRENT ENRICHMENT
+# ==============================================================================
+
+def test_enrich_with_llm_suggestions_runs_calls_concurrently_in_order():
+    """
+    Verifica che le chiamate LLM vengano eseguite in parallelo (la latenza totale non cresce
+    con il numero di problemi) e che i risultati mantengano l'ordine originale.
+    """
+    import time
+    import threading
+
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def slow_ask(issue, main_spdx):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.2)
+        with lock:
+            state["running"] -= 1
+        return f"ALT-{issue['file_path']}"
+
+    issues = [
+        {"file_path": f"f{i}.py", "detected_license": "GPL", "compatible": False, "reason": "x"}
+        for i in range(6)
+    ]
+    with patch('app.services.llm.suggestion.ask_llm_for_suggestions', side_effect=slow_ask):
+        start = time.monotonic()
+        result = enrich_with_llm_suggestions("MIT", issues, max_concurrency=3, deterministic=False)
+        elapsed = time.monotonic() - start
+
+    assert [r["licenses"] for r in result] == [f"ALT-f{i}.py" for i in range(6)]
+    assert state["peak"] == 3
+    assert elapsed < 1.0
+
+
+def test_enrich_with_llm_suggestions_timeout_and_error_fallback():
+    """
+    Verifica che una chiamata scaduta o fallita produca il suggerimento generico senza
+    bloccare gli altri problemi.
+    """
+    import time
+
+    def ask(issue, main_spdx):
+        if issue["file_path"] == "slow.py":
+            time.sleep(1)
+        if issue["file_path"] == "boom.py":
+            raise RuntimeError("Ollama is not running")
+        return "MIT"
+
+    issues = [
+        {"file_path": name, "detected_license": "GPL", "compatible": False, "reason": "x"}
+        for name in ("slow.py", "boom.py", "ok.py")
+    ]
+    with patch('app.services.llm.suggestion.ask_llm_for_suggestions', side_effect=ask):
+        result = enrich_with_llm_suggestions("MIT", issues, call_timeout=0.2, deterministic=False)
+
+    assert [r["licenses"] for r in result] == ["", "", "MIT"]
+    assert all("3§" in r["suggestion"] for r in result)
+
+
+def test_enrich_with_llm_suggestions_hanging_call_does_not_starve_queue():
+    """
+    Verifica che una chiamata bloccata oltre il timeout non occupi il posto dei problemi
+    in coda: con una sola chiamata simultanea i problemi successivi vengono comunque risolti.
+    """
+    import threading
+    import time
+
+    release = threading.Event()
+
+    def ask(issue, main_spdx):
+        if issue["file_path"] == "hang.py":
+            release.wait(5)
+        return "MIT"
+
+    issues = [
+        {"file_path": name, "detected_license": "GPL", "compatible": False, "reason": "x"}
+        for name in ("hang.py", "a.py", "b.py", "c.py")
+    ]
+    try:
+        with patch('app.services.llm.suggestion.ask_llm_for_suggestions', side_effect=ask):
+            start = time.monotonic()
+            result = enrich_with_llm_suggestions(
+                "MIT", issues, max_concurrency=1, call_timeout=0.2, batch_size=1,
+                deterministic=False
+            )
+            elapsed = time.monotonic() - start
+    finally:
+        release.set()
+
+    assert [r["licenses"] for r in result] == ["", "MIT", "MIT", "MIT"]
+    assert elapsed < 2
+
+
+def test_enrich_with_llm_suggestions_on_event_loop():
+    """
+    Verifica che la variante sincrona rifiuti di bloccare un event loop attivo e che la
+    variante asincrona esegua l'arricchimento senza bloccarlo.
+    """
+    import asyncio
+    from app.services.llm.suggestion import enrich_with_llm_suggestions_async
+
+    issues = [{"file_path": "a.py", "detected_license": "GPL", "compatible": False, "reason": "x"}]
+
+    async def run():
+        with pytest.raises(RuntimeError, match="running event loop"):
+            enrich_with_llm_suggestions("MIT", issues, deterministic=False)
+        return await enrich_with_llm_suggestions_async("MIT", issues, deterministic=False)
+
+    with patch('app.services.llm.suggestion.ask_llm_for_suggestions', return_value="MIT"):
+        result = asyncio.run(run())
+
+    assert result[0]["licenses"] == "MIT"
+
+
+# ==============================================================================
+# TESTS FOR BATCHED SUGGESTIONS
+# ==============================================================================
+
+def _batch_reply(prompt, **_kwargs):
+    """Simula l'LLM rispondendo in JSON a ogni conflitto numerato del prompt."""
+    import json
+    import re
+    ids = [int(n) for n in re.findall(r"^(\d+)\. License:", prompt, re.MULTILINE)]
+    return json.dumps({"results": [{"id": i, "licenses": ["MIT", f"ALT-{i}"]} for i in ids]})
+
+
+def test_enrich_batches_distinct_conflicts():
+    """
+    Verifica che 50 conflitti distinti vengano risolti con due prompt raggruppati
+    (dimensione del gruppo 25) invece di 50 chiamate singole.
+    """
+    issues = [
+        {"file_path": f"f{i}.py", "detected_license": f"LIC-{i}", "compatible": False, "reason": "x"}
+        for i in range(50)
+    ]
+    with patch('app.services.llm.suggestion.call_ollama_deepseek', side_effect=_batch_reply) as mock_llm, \
+            patch('app.services.llm.suggestion.ask_llm_for_suggestions') as mock_single:
+        result = enrich_with_llm_suggestions("MIT", issues, batch_size=25, deterministic=False)
+
+    assert mock_llm.call_count == 2
+    mock_single.assert_not_called()
+    assert all(r["licenses"].startswith("MIT, ALT-") for r in result)
+
+
+def test_enrich_batch_parse_failure_falls_back_to_single_calls():
+    """
+    Verifica che una risposta raggruppata non valida faccia ricadere ogni conflitto
+    sulla chiamata singola.
+    """
+    issues = [
+        {"file_path": "a.py", "detected_license": "GPL-3.0", "compatible": False, "reason": "x"},
+        {"file_path": "b.py", "detected_license": "AGPL-3.0", "compatible": False, "reason": "y"},
+    ]
+    with patch('app.services.llm.suggestion.call_ollama_deepseek', return_value="not json"), \
+            patch('app.services.llm.suggestion.ask_llm_for_suggestions', return_value="Apache-2.0") as mock_single:
+        result = enrich_with_llm_suggestions("MIT", issues, deterministic=False)
+
+    assert mock_single.call_count == 2
+    assert [r["licenses"] for r in result] == ["Apache-2.0", "Apache-2.0"]
+
+
+def test_enrich_batch_partial_answers():
+    """
+    Verifica che solo i conflitti mancanti nella risposta raggruppata vengano richiesti
+    singolarmente e che i file con la stessa tupla condividano la risposta.
+    """
+    issues = [
+        {"file_path": "a.py", "detected_license": "GPL-3.0", "compatible": False, "reason": "x"},
+        {"file_path": "a2.py", "detected_license": "GPL-3.0", "compatible": False, "reason": "x"},
+        {"file_path": "b.py", "detected_license": "AGPL-3.0", "compatible": False, "reason": "y"},
+    ]
+    reply = '```json\n{"results": [{"id": 1, "licenses": "MIT, BSD-3-Clause"}, {"id": 7, "licenses": ["X"]}]}\n```'
+    with patch('app.services.llm.suggestion.call_ollama_deepseek', return_value=reply), \
+            patch('app.services.llm.suggestion.ask_llm_for_suggestions', return_value="Apache-2.0") as mock_single:
+        result = enrich_with_llm_suggestions("MIT", issues, deterministic=False)
+
+    assert [r["licenses"] for r in result] == ["MIT, BSD-3-Clause", "MIT, BSD-3-Clause", "Apache-2.0"]
+    mock_single.assert_called_once()
+    assert mock_single.call_args[0][0]["file_path"] == "b.py"
+
+
+def test_enrich_batch_disabled():
+    """
+    Verifica che con `batch_size=1` venga usata solo la chiamata singola.
+    """
+    issues = [
+        {"file_path": "a.py", "detected_license": "GPL-3.0", "compatible": False, "reason": "x"},
+        {"file_path": "b.py", "detected_license": "AGPL-3.0", "compatible": False, "reason": "y"},
+    ]
+    with patch('app.services.llm.suggestion.call_ollama_deepseek') as mock_llm, \
+            patch('app.services.llm.suggestion.ask_llm_for_suggestions', return_value="MIT") as mock_single:
+        enrich_with_llm_suggestions("MIT", issues, batch_size=1, deterministic=False)
+
+    mock_llm.assert_not_called()
+    assert mock_single.call_count == 2
+
+
+# ==============================================================================
+# TESTS FOR LAZY ENRICHMENT
+# ==============================================================================
+
+def _lazy_issues():
+    """
+    Problemi di esempio: un file di codice risolto dalla matrice e un documento.
+    """
+    return [
+        {"file_path": "a.py", "detected_license": "GPL-3.0-only", "compatible": False, "reason": "r"},
+        {"file_path": "repo/NOTICE", "detected_license": "GPL-3.0-only", "compatible": False,
+         "reason": "r", "matched_texts": ["GPL notice"]},
+        {"file_path": "b.py", "detected_license": "MIT", "compatible": True, "reason": "ok"},
+    ]
+
+
+def test_enrich_lazy_marks_llm_issues_pending():
+    """
+    Verifica che in modalità differita nessuna chiamata LLM venga eseguita: il documento
+    resta "pending" mentre le alternative dalla matrice e i file compatibili sono pronti.
+    """
+    with patch('app.services.llm.suggestion.compatible_alternatives', return_value=["MIT"]), \
+            patch('app.services.llm.suggestion.ask_llm_for_suggestions') as mock_ask, \
+            patch('app.services.llm.suggestion.review_document') as mock_review:
+        result = enrich_with_llm_suggestions("MIT", _lazy_issues(), deterministic=True, lazy=True)
+
+    mock_ask.assert_not_called()
+    mock_review.assert_not_called()
+    assert [r["suggestion_status"] for r in result] == ["ready", "pending", "ready"]
+    assert result[0]["licenses"] == "MIT"
+    assert result[1]["suggestion"] is None and result[1]["licenses"] is None
+
+
+def test_enrich_issue_computes_pending_suggestion_interactively():
+    """
+    Verifica che `enrich_issue` calcoli il suggerimento di un problema in attesa con
+    priorità interattiva, recuperando i testi individuati dalla scansione.
+    """
+    issues = _lazy_issues()
+    enriched = enrich_with_llm_suggestions("MIT", issues, deterministic=True, lazy=True)
+    public = {k: v for k, v in enriched[1].items() if k != "matched_texts"}
+    seen = {}
+
+    def review(issue, _main, _licenses, **_kwargs):
+        seen["priority"] = current_priority()
+        seen["matched_texts"] = issue.get("matched_texts")
+        return "Ask for dual licensing"
+
+    with patch('app.services.llm.suggestion.review_document', side_effect=review):
+        result = enrich_issue("MIT", public)
+
+    assert result["suggestion_status"] == "ready"
+    assert "Ask for dual licensing" in result["suggestion"]
+    assert seen == {"priority": INTERACTIVE, "matched_texts": ["GPL notice"]}
+
+
+def test_prefetch_issue_suggestions_limits_to_top_pending():
+    """
+    Verifica che il pre-calcolo in background riguardi solo i primi N problemi in attesa.
+    """
+    issues = [
+        {"file_path": f"repo/doc{n}.md", "detected_license": "GPL-3.0", "compatible": False,
+         "reason": "r"}
+        for n in range(4)
+    ]
+    enriched = enrich_with_llm_suggestions("MIT", issues, lazy=True)
+
+    with patch('app.services.llm.suggestion.review_document', return_value="x") as mock_review:
+        thread = prefetch_issue_suggestions("MIT", enriched, limit=2)
+        thread.join(5)
+
+    assert sorted(c.args[0]["file_path"] for c in mock_review.call_args_list) == [
+        "repo/doc0.md", "repo/doc1.md"
+    ]
+    assert prefetch_issue_suggestions("MIT", enriched, limit=0) is None
+
@@ -6,10 +6,15 @@ Le dipendenze esterne (requests, subprocess, file system) sono mockate per garan
 esecuzione isolata e veloce.
 """
 
+import asyncio
 import unittest
 import json
+import httpx
 import requests
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock, mock_open
 
 # Import module to be tested
@@ -18,11 +23,17 @@ from app.services.llm import ollama_api
 
 class TestOllamaApiUnit(unittest.TestCase):
 
+    def setUp(self):
+        """
+        Azzera lo stato del warm-up dei modelli tra un test e l'altro.
+        """
+        ollama_api._warmup.clear()
+
     # ==============================================================================
     # TESTS FOR SERVICE LIFECYCLE (Status & Start)
     # ==============================================================================
 
-    @patch('app.services.llm.ollama_api.requests.get')
+    @patch('app.services.llm.ollama_api.requests.Session.get')
     def test_is_ollama_running_true(self, mock_get):
         """
         Verifica che `_is_ollama_running` restituisca True se l'endpoint del servizio
@@ -31,7 +42,7 @@ class TestOllamaApiUnit(unittest.TestCase):
         mock_get.return_value.status_code = 200
         self.assertTrue(ollama_api._is_ollama_running())
 
-    @patch('app.services.llm.ollama_api.requests.get')
+    @patch('app.services.llm.ollama_api.requests.Session.get')
     def test_is_ollama_running_false(self, mock_get):
         """
         Verifica che `_is_ollama_running` restituisca False se la richiesta solleva
@@ -81,7 +92,7 @@ class TestOllamaApiUnit(unittest.TestCase):
     # TEST SULLA GESTIONE DEI MODELLI (Check & Pull)
     # ===============================================================================
 
-    @patch('app.services.llm.ollama_api.requests.get')
+    @patch('app.services.llm.ollama_api.requests.Session.get')
     def test_is_model_installed_found(self, mock_get):
         """
         Verifica che `_is_model_installed` restituisca True quando il nome del modello
@@ -91,7 +102,7 @@ class TestOllamaApiUnit(unittest.TestCase):
         mock_get.return_value.json.return_value = mock_response
         self.assertTrue(ollama_api._is_model_installed("qwen2.5-coder"))
 
-    @patch('app.services.llm.ollama_api.requests.get')
+    @patch('app.services.llm.ollama_api.requests.Session.get')
     def test_is_model_installed_not_found(self, mock_get):
         """
         Verifica che `_is_model_installed` restituisca False quando il modello richiesto
@@ -101,7 +112,7 @@ class TestOllamaApiUnit(unittest.TestCase):
         mock_get.return_value.json.return_value = mock_response
         self.assertFalse(ollama_api._is_model_installed("missing-model"))
 
-    @patch('app.services.llm.ollama_api.requests.get')
+    @patch('app.services.llm.ollama_api.requests.Session.get')
     def test_is_model_installed_error(self, mock_get):
         """
         Verifica che `_is_model_installed` restituisca False in modo sicuro se la chiamata API fallisce.
@@ -176,12 +187,64 @@ class TestOllamaApiUnit(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             ollama_api.ensure_ollama_ready("test-model", pull_if_needed=False)
 
+    @patch('app.services.llm.ollama_api._is_ollama_running')
+    @patch('app.services.llm.ollama_api._is_model_installed')
+    def test_ensure_ollama_ready_uses_cached_state(self, mock_installed, mock_running):
+        """
+        Verifica che, entro il TTL, `ensure_ollama_ready` non ripeta i controlli di
+        stato e dei modelli installati.
+        """
+        mock_running.return_value = True
+        mock_installed.return_value = True
+
+        ollama_api.ensure_ollama_ready("test-model")
+        ollama_api.ensure_ollama_ready("test-model")
+        ollama_api.ensure_ollama_ready("test-model")
+
+        mock_running.assert_called_once()
+        mock_installed.assert_called_once_with("test-model")
+
+    @patch('app.services.llm.ollama_api._is_ollama_running')
+    @patch('app.services.llm.ollama_api._is_model_installed')
+    def test_ensure_ollama_ready_stale_refreshes_in_background(self, mock_installed, mock_running):
+        """
+        Verifica che uno stato scaduto non blocchi la chiamata e venga aggiornato da un
+        thread in background; se la verifica fallisce lo stato viene invalidato.
+        """
+        mock_running.return_value = True
+        mock_installed.return_value = True
+        ollama_api.ensure_ollama_ready("test-model")
+
+        mock_running.return_value = False
+        with patch.object(ollama_api._readiness, 'ttl_seconds', -1):
+            # Non solleva: lo stato scaduto viene considerato valido durante l'aggiornamento
+            ollama_api.ensure_ollama_ready("test-model")
+            ollama_api._readiness._refreshing["test-model"].join(timeout=5)
+
+        self.assertEqual(ollama_api._readiness.status("test-model"), "unknown")
+
+    @patch('app.services.llm.ollama_api.requests.Session.post')
+    def test_connection_error_invalidates_readiness(self, mock_post):
+        """
+        Verifica che un errore di connessione durante il prompt invalidi lo stato di
+        prontezza memorizzato per il modello.
+        """
+        ollama_api._readiness.mark_ready(ollama_api.OLLAMA_GENERAL_MODEL)
+        mock_post.side_effect = requests.ConnectionError
+
+        with self.assertRaises(requests.ConnectionError):
+            ollama_api.call_ollama_deepseek("prompt")
+
+        self.assertEqual(
+            ollama_api._readiness.status(ollama_api.OLLAMA_GENERAL_MODEL), "unknown"
+        )
+
     # ===============================================================================
     # TEST SULL'ESECUZIONE API (DeepSeek & Qwen)
     # ===============================================================================
 
     @patch('app.services.llm.ollama_api.ensure_ollama_ready')
-    @patch('app.services.llm.ollama_api.requests.post')
+    @patch('app.services.llm.ollama_api.requests.Session.post')
     @patch('app.services.llm.ollama_api.os.makedirs')  # Previene la creazione di directory
     @patch('builtins.open', new_callable=mock_open)
     def test_call_ollama_qwen3_coder_success(self, mock_file, mock_makedirs, mock_post, mock_ensure):
@@ -200,7 +263,7 @@ class TestOllamaApiUnit(unittest.TestCase):
         mock_file.assert_called()
 
     @patch('app.services.llm.ollama_api.ensure_ollama_ready')
-    @patch('app.services.llm.ollama_api.requests.post')
+    @patch('app.services.llm.ollama_api.requests.Session.post')
     @patch('app.services.llm.ollama_api.os.makedirs')
     @patch('builtins.open', new_callable=mock_open)
     def test_call_ollama_deepseek_clean_markdown(self, mock_file, mock_makedirs, mock_post, mock_ensure):
@@ -217,3 +280,187 @@ class TestOllamaApiUnit(unittest.TestCase):
         # Verify markdown removal
         expected = "\n{\"key\": \"val\"}\n"
         self.assertEqual(result, expected)
+
+    @patch('app.services.llm.ollama_api.OLLAMA_URL', 'http://mock-ollama:11434/api/generate')
+    @patch('app.services.llm.ollama_api.ensure_ollama_ready')
+    def test_stream_ollama_yields_tokens(self, mock_ensure):
+        """
+        Verifica che `stream_ollama` richieda lo streaming e restituisca i token dei chunk
+        JSON fino a quello con `"done": true`.
+        """
+        def handler(request):
+            body = json.loads(request.content)
+            self.assertTrue(body["stream"])
+            lines = [
+                {"response": "Hello", "done": False},
+                {"response": " world", "done": False},
+                {"response": "", "done": True},
+            ]
+            return httpx.Response(200, text="\n".join(json.dumps(line) for line in lines))
+
+        async def collect():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with patch('app.services.llm.ollama_api.get_async_http_client', return_value=client):
+                tokens = [t async for t in ollama_api.stream_ollama("test-model", "prompt")]
+            await client.aclose()
+            return tokens
+
+        self.assertEqual(asyncio.run(collect()), ["Hello", " world"])
+        mock_ensure.assert_called_once_with("test-model")
+
+    @patch('app.services.llm.ollama_api.OLLAMA_URL', 'http://mock-ollama:11434/api/generate')
+    @patch('app.services.llm.ollama_api.ensure_ollama_ready')
+    def test_stream_ollama_connect_error_invalidates_readiness(self, mock_ensure):
+        """
+        Verifica che un errore di connessione durante lo streaming invalidi lo stato di
+        prontezza del modello.
+        """
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        async def consume():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with patch('app.services.llm.ollama_api.get_async_http_client', return_value=client):
+                async for _ in ollama_api.stream_ollama("test-model", "prompt"):
+                    pass
+
+        ollama_api._readiness.mark_ready("test-model")
+        with self.assertRaises(httpx.ConnectError):
+            asyncio.run(consume())
+        self.assertEqual(ollama_api._readiness.status("test-model"), "unknown")
+
+
+    # ===============================================================================
+    # TESTS FOR SINGLE-FLIGHT DEDUPLICATION
+    # ===============================================================================
+
+    @patch('app.services.llm.ollama_api.ensure_ollama_ready')
+    @patch('app.services.llm.ollama_api.requests.Session.post')
+    @patch('app.services.llm.ollama_api.os.makedirs')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_identical_concurrent_prompts_share_one_call(self, _mock_file, _mock_makedirs,
+                                                         mock_post, _mock_ensure):
+        """
+        Verifica che prompt identici eseguiti in contemporanea producano una sola
+        richiesta a Ollama e che tutti i chiamanti ricevano la stessa risposta.
+        """
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_post(*_args, **_kwargs):
+            started.set()
+            release.wait(5)
+            response = MagicMock()
+            response.json.return_value = {"response": "MIT"}
+            return response
+
+        mock_post.side_effect = slow_post
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            leader = executor.submit(ollama_api.call_ollama_deepseek, "same prompt")
+            self.assertTrue(started.wait(5))
+            followers = [executor.submit(ollama_api.call_ollama_deepseek, "same prompt")
+                         for _ in range(2)]
+            time.sleep(0.1)  # I follower si registrano sulla chiamata in corso
+            release.set()
+            results = [leader.result(5)] + [f.result(5) for f in followers]
+
+        self.assertEqual(results, ["MIT", "MIT", "MIT"])
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(ollama_api._single_flight.in_flight(), 0)
+
+    @patch('app.services.llm.ollama_api.ensure_ollama_ready')
+    @patch('app.services.llm.ollama_api.requests.Session.post')
+    @patch('app.services.llm.ollama_api.os.makedirs')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_sequential_and_distinct_prompts_are_not_merged(self, _mock_file, _mock_makedirs,
+                                                            mock_post, _mock_ensure):
+        """
+        Verifica che prompt diversi, o identici ma non contemporanei, vengano inviati
+        separatamente.
+        """
+        mock_post.return_value.json.return_value = {"response": "MIT"}
+
+        ollama_api.call_ollama_deepseek("prompt A")
+        ollama_api.call_ollama_deepseek("prompt A")
+        ollama_api.call_ollama_deepseek("prompt B")
+
+        self.assertEqual(mock_post.call_count, 3)
+
+    def test_single_flight_shares_exceptions(self):
+        """
+        Verifica che l'errore della chiamata condivisa venga propagato a tutti i chiamanti
+        in attesa e che la chiave venga rilasciata.
+        """
+        flight = ollama_api._SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise requests.HTTPError("500")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, ("m", "k"), failing)
+            self.assertTrue(started.wait(5))
+            follower = executor.submit(flight.do, ("m", "k"), MagicMock())
+            time.sleep(0.1)
+            release.set()
+            with self.assertRaises(requests.HTTPError):
+                leader.result(5)
+            with self.assertRaises(requests.HTTPError):
+                follower.result(5)
+
+        self.assertEqual(flight.in_flight(), 0)
+
+    # ===============================================================================
+    # TESTS FOR MODEL WARM-UP
+    # ===============================================================================
+
+    @patch('app.services.llm.ollama_api.OLLAMA_CODING_MODEL', 'coder')
+    @patch('app.services.llm.ollama_api.OLLAMA_GENERAL_MODEL', 'general')
+    @patch('app.services.llm.ollama_api.OLLAMA_URL', 'http://mock-ollama:11434/api/generate')
+    @patch('app.services.llm.ollama_api._post_generate')
+    @patch('app.services.llm.ollama_api.ensure_ollama_ready')
+    def test_start_model_warmup_loads_configured_models(self, mock_ensure, mock_post):
+        """
+        Verifica che il warm-up prepari e carichi ogni modello configurato con un prompt
+        vuoto e `keep_alive`, riportando lo stato "ready".
+        """
+        thread = ollama_api.start_model_warmup()
+        thread.join(5)
+
+        self.assertEqual([c.kwargs["model_name"] for c in mock_ensure.call_args_list],
+                         ["coder", "general"])
+        payload = mock_post.call_args_list[0].args[0]
+        self.assertEqual(payload["prompt"], "")
+        self.assertEqual(payload["keep_alive"], ollama_api.OLLAMA_KEEP_ALIVE)
+
+        status = ollama_api.get_model_warmup_status()
+        self.assertTrue(status["ready"])
+        self.assertEqual(status["models"]["coder"]["state"], "ready")
+
+    @patch('app.services.llm.ollama_api.OLLAMA_CODING_MODEL', 'coder')
+    @patch('app.services.llm.ollama_api.OLLAMA_GENERAL_MODEL', 'general')
+    @patch('app.services.llm.ollama_api._post_generate')
+    @patch('app.services.llm.ollama_api.ensure_ollama_ready')
+    def test_warm_up_model_failure_is_reported(self, mock_ensure, mock_post):
+        """
+        Verifica che un warm-up fallito venga riportato senza sollevare eccezioni.
+        """
+        mock_ensure.side_effect = RuntimeError("pull failed")
+
+        self.assertFalse(ollama_api.warm_up_model("coder"))
+
+        status = ollama_api.get_model_warmup_status()
+        self.assertFalse(status["ready"])
+        self.assertEqual(status["models"]["coder"], {"state": "failed", "error": "pull failed"})
+        self.assertEqual(status["models"]["general"], {"state": "not_started"})
+        mock_post.assert_not_called()
+
+    @patch('app.services.llm.ollama_api.OLLAMA_URL', None)
+    def test_start_model_warmup_skipped_without_url(self):
+        """
+        Verifica che il warm-up non venga avviato se Ollama non è configurato.
+        """
+        self.assertIsNone(ollama_api.start_model_warmup())
@@ -18,6 +18,11 @@ Comportamento:
 - `Leaf` chiama `normalize_symbol(value)`; nei test, mockare `normalize_symbol` nel modulo `parser_spdx`.
 """
 
+import copy
+import pickle
+
+import pytest
+
 from app.services.compatibility import parser_spdx as ps
 
 
@@ -170,4 +175,51 @@ def test_parser_malformed_parenthesis_does_not_crash(monkeypatch):
     monkeypatch.setattr(ps, "normalize_symbol", lambda s: s)
     for expr in ["(MIT AND", "MIT OR", "(A OR (B AND C)", "(OR) MIT"]:
         node = ps.parse_spdx(expr)
-        assert node is None or isinstance(node, ps.Node)
\ No newline at end of file
+        assert node is None or isinstance(node, ps.Node)
+
+def test_parser_shares_identical_subtrees(monkeypatch):
+    """I sotto-alberi identici devono essere condivisi (hash-consing) e usabili come chiavi di cache."""
+    monkeypatch.setattr(ps, "normalize_symbol", lambda s: s)
+    first = ps.parse_spdx("(MIT OR Apache-2.0) AND GPL-3.0")
+    second = ps.parse_spdx("GPL-3.0 AND (MIT OR Apache-2.0)")
+
+    assert first.left is second.right
+    assert first.right is second.left
+    assert ps.parse_spdx("(MIT OR Apache-2.0) AND GPL-3.0") is first
+
+    cache = {first: "cached"}
+    assert cache[ps.And(ps.Or(ps.Leaf("MIT"), ps.Leaf("Apache-2.0")), ps.Leaf("GPL-3.0"))] == "cached"
+
+
+def test_nodes_are_immutable_and_distinguish_operators(monkeypatch):
+    """I nodi condivisi non devono poter essere modificati; And e Or con gli stessi figli restano distinti."""
+    monkeypatch.setattr(ps, "normalize_symbol", lambda s: s)
+    leaf = ps.Leaf("MIT")
+    with pytest.raises(AttributeError):
+        leaf.value = "GPL-3.0"
+
+    left, right = ps.Leaf("A"), ps.Leaf("B")
+    assert ps.And(left, right) != ps.Or(left, right)
+    assert not hasattr(leaf, "__dict__")
+
+
+def test_nodes_survive_copy_and_pickle():
+    """copy/deepcopy restituiscono lo stesso nodo; pickle lo re-interna tramite il costruttore."""
+    tree = ps.parse_spdx("MIT AND (Apache-2.0 OR X)")
+
+    assert copy.copy(tree) is tree
+    assert copy.deepcopy(tree) is tree
+    assert copy.deepcopy({"expr": tree})["expr"] is tree
+
+    restored = pickle.loads(pickle.dumps(tree))
+    assert restored == tree
+    assert restored is tree
+    assert restored.right.left is tree.right.left
+
+
+def test_tokenize_single_regex_output(monkeypatch):
+    """Il tokenizer deve separare parentesi e simboli e unire le clausole WITH."""
+    assert ps._tokenize("(MIT OR gpl-2.0  with  Classpath)AND X") == [
+        "(", "MIT", "OR", "gpl-2.0 WITH Classpath", ")", "AND", "X"
+    ]
+    assert ps._tokenize("") == []
@@ -0,0 +1,148 @@
+"""
+Prompt Budget Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.prompt_budget`.
+Verifica che i contenuti inseriti nei prompt LLM vengano compattati e ridotti al budget
+di token senza perdere le regioni rilevanti per la licenza.
+
+La suite copre:
+1. Compattazione: Spazi finali, righe vuote ripetute e commenti HTML.
+2. Budget: Conservazione dell'inizio del documento e delle regioni di licenza.
+3. Statistiche: Token risparmiati e contenuti ridotti.
+"""
+
+import pytest
+
+from app.services.llm.prompt_budget import (
+    compact_whitespace,
+    estimate_tokens,
+    fit_to_budget,
+    get_prompt_budget_stats,
+    prepare_code_content,
+    prepare_document_content,
+    reset_prompt_budget_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    """
+    Azzera le statistiche cumulative prima di ogni test.
+    """
+    reset_prompt_budget_stats()
+
+
+def _document(lines=400):
+    """
+    Crea un documento lungo con una sola riga di licenza a metà.
+    """
+    body = [f"Step {n}: run the build script and check the output." for n in range(lines)]
+    body[lines // 2] = "This component is released under the GPL-3.0 terms."
+    return "\n".join(body)
+
+# ==================================================================================
+#                                TEST: COMPATTAZIONE
+# ==================================================================================
+
+def test_compact_whitespace_keeps_indentation():
+    """
+    Verifica la rimozione degli spazi finali e delle righe vuote ripetute, conservando
+    l'indentazione.
+    """
+    code = "def f():   \n    return 1\n\n\n\n\ndef g():\n\tpass\t\n"
+
+    assert compact_whitespace(code) == "def f():\n    return 1\n\ndef g():\n\tpass"
+
+
+def test_prepare_document_content_strips_irrelevant_html_comments():
+    """
+    Verifica che i commenti HTML vengano rimossi solo se non menzionano licenze.
+    """
+    text = "# Title\n<!-- badges: generated -->\n<!-- SPDX-License-Identifier: GPL-3.0 -->\nText"
+
+    result = prepare_document_content(text, max_tokens=0)
+
+    assert "badges" not in result
+    assert "SPDX-License-Identifier: GPL-3.0" in result
+
+
+def test_prepare_code_content_keeps_comments():
+    """
+    Verifica che il codice venga solo compattato: commenti e righe restano invariati.
+    """
+    code = "# Copyright (c) Someone\nimport os  \n\n\n\nprint(os.name)\n"
+
+    assert prepare_code_content(code) == "# Copyright (c) Someone\nimport os\n\nprint(os.name)"
+
+# ==================================================================================
+#                                TEST: BUDGET
+# ==================================================================================
+
+def test_fit_to_budget_returns_short_text_unchanged():
+    """
+    Verifica che un testo entro il budget non venga modificato.
+    """
+    assert fit_to_budget("short text", 100) == "short text"
+
+
+def test_fit_to_budget_keeps_head_and_license_region():
+    """
+    Verifica che il documento ridotto rispetti il budget e conservi l'inizio del file e la
+    riga di licenza con il suo contesto, segnalando le righe omesse.
+    """
+    text = _document()
+
+    result = fit_to_budget(text, 200, context_lines=1)
+
+    assert estimate_tokens(result) <= 200
+    assert result.startswith("Step 0:")
+    assert "released under the GPL-3.0 terms" in result
+    assert "Step 199:" in result and "Step 201:" in result
+    assert "lines omitted ...]" in result
+
+
+def test_fit_to_budget_uses_scan_matched_text():
+    """
+    Verifica che le righe individuate dalla scansione vengano conservate anche se non
+    contengono parole chiave di licenza.
+    """
+    text = _document().replace("This component is released under the GPL-3.0 terms.",
+                               "Derived from the upstream parser by A. Author.")
+
+    without = fit_to_budget(text, 150, context_lines=0)
+    with_scan = fit_to_budget(
+        text, 150, relevant_snippets=["Derived from the upstream parser by A. Author."],
+        context_lines=0,
+    )
+
+    assert "upstream parser" not in without
+    assert "upstream parser" in with_scan
+
+
+def test_fit_to_budget_truncates_single_long_line():
+    """
+    Verifica il taglio netto quando nessuna riga entra nel budget (es. file minificati).
+    """
+    result = fit_to_budget("x" * 1000, 10)
+
+    assert result == "x" * 40
+
+# ==================================================================================
+#                                TEST: STATISTICHE
+# ==================================================================================
+
+def test_stats_report_tokens_saved():
+    """
+    Verifica che le statistiche accumulino i token risparmiati e i contenuti ridotti.
+    """
+    text = _document()
+    prepare_document_content(text, "README.md", max_tokens=200)
+    prepare_code_content("a = 1   \n\n\n\nb = 2\n")
+
+    stats = get_prompt_budget_stats()
+
+    assert stats["calls"] == 2
+    assert stats["trimmed"] == 1
+    assert stats["tokens_before"] >= estimate_tokens(text)
+    assert stats["tokens_after"] <= 200 + estimate_tokens("a = 1\n\nb = 2")
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"]
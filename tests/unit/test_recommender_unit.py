@@ -0,0 +1,122 @@
+"""
+Deterministic License Recommender Unit Test Module.
+
+Questo modulo fornisce test unitari per `recommend_license` situata in
+`app.services.compatibility.recommender`. Valida il percorso veloce di raccomandazione
+basato sulla matrice di compatibilità, senza alcuna chiamata all'LLM.
+
+La suite copre:
+1. Preferenze copyleft: Scelta di licenze permissive, copyleft debole o forte.
+2. Concessione di brevetti: Priorità alle licenze con grant esplicito.
+3. Licenze rilevate: Filtraggio delle candidate incompatibili con le licenze esistenti.
+4. Casi fuori dominio: Restituzione di None quando serve l'LLM.
+"""
+
+import pytest
+from app.services.compatibility import recommender
+from app.services.compatibility.recommender import (
+    recommend_license,
+    copyleft_class,
+    compatible_alternatives,
+)
+
+
+@pytest.fixture
+def recommender_matrix(monkeypatch):
+    """
+    Patcha la matrice del recommender con un sottoinsieme ridotto e controllato.
+    """
+    matrix = {
+        "MIT": {"MIT": "yes", "Apache-2.0": "yes", "GPL-3.0-only": "no"},
+        "Apache-2.0": {"MIT": "yes", "Apache-2.0": "yes", "GPL-3.0-only": "no"},
+        "MPL-2.0": {"MIT": "yes", "Apache-2.0": "yes", "GPL-3.0-only": "no"},
+        "GPL-3.0-or-later": {"MIT": "yes", "Apache-2.0": "yes", "GPL-3.0-only": "no"},
+        "GPL-3.0-only": {"MIT": "yes", "Apache-2.0": "yes", "GPL-3.0-only": "yes"},
+    }
+    monkeypatch.setattr(recommender, "get_matrix", lambda: matrix)
+    monkeypatch.setattr(recommender, "normalize_symbol", lambda s: s.strip())
+    return matrix
+
+
+def test_copyleft_class():
+    """
+    Verifica la classificazione delle licenze in base alla forza del copyleft.
+    """
+    assert copyleft_class("MIT") == "none"
+    assert copyleft_class("LGPL-3.0-or-later") == "weak"
+    assert copyleft_class("MPL-2.0") == "weak"
+    assert copyleft_class("GPL-3.0-only") == "strong"
+    assert copyleft_class("AGPL-3.0-or-later") == "strong"
+
+
+def test_recommend_permissive_default(recommender_matrix):
+    """
+    Senza preferenze specifiche viene scelta la licenza più permissiva (MIT).
+    """
+    result = recommend_license({"copyleft": "none"})
+    assert result["suggested_license"] == "MIT"
+    assert "Apache-2.0" in result["alternatives"]
+    assert "permissive" in result["explanation"]
+
+
+def test_recommend_patent_grant(recommender_matrix):
+    """
+    Se è richiesta la concessione di brevetti, Apache-2.0 precede MIT.
+    """
+    result = recommend_license({"copyleft": "none", "patent_grant": True})
+    assert result["suggested_license"] == "Apache-2.0"
+    assert "patent grant" in result["explanation"]
+
+
+def test_recommend_weak_and_strong_copyleft(recommender_matrix):
+    """
+    Le preferenze copyleft debole e forte selezionano la famiglia corrispondente.
+    """
+    assert recommend_license({"copyleft": "weak"})["suggested_license"] == "MPL-2.0"
+    assert recommend_license({"copyleft": "strong"})["suggested_license"] == "GPL-3.0-or-later"
+
+
+def test_recommend_respects_detected_licenses(recommender_matrix):
+    """
+    Le candidate incompatibili con le licenze rilevate vengono scartate, anche se
+    questo significa non rispettare la preferenza copyleft.
+    """
+    result = recommend_license({"copyleft": "none"}, ["GPL-3.0-only"])
+    assert result["suggested_license"] == "GPL-3.0-only"
+    assert result["alternatives"] == []
+    assert "copyleft preference" in result["explanation"]
+
+
+def test_recommend_returns_none_outside_matrix_domain(recommender_matrix):
+    """
+    Restituisce None quando la matrice non può rispondere: modifica non consentita
+    o licenza rilevata sconosciuta alla matrice.
+    """
+    assert recommend_license({"modification": False}) is None
+    assert recommend_license({"distribution": False}) is None
+    assert recommend_license({}, ["Proprietary"]) is None
+
+
+def test_recommend_returns_none_without_matrix(monkeypatch):
+    """
+    Restituisce None se la matrice di compatibilità non è disponibile.
+    """
+    monkeypatch.setattr(recommender, "get_matrix", lambda: {})
+    assert recommend_license({"copyleft": "none"}) is None
+
+
+def test_compatible_alternatives_follow_matrix_row_and_permissive_order(recommender_matrix):
+    """
+    Le alternative sono le licenze accettate dalla riga della licenza principale,
+    ordinate per permissività e senza la licenza del file in conflitto.
+    """
+    assert compatible_alternatives("GPL-3.0-only") == ["MIT", "Apache-2.0", "GPL-3.0-only"]
+    assert compatible_alternatives("GPL-3.0-only", "GPL-3.0-only") == ["MIT", "Apache-2.0"]
+    assert compatible_alternatives("MIT", "GPL-3.0-only", limit=1) == ["MIT"]
+
+
+def test_compatible_alternatives_unknown_main_license(recommender_matrix):
+    """
+    Restituisce una lista vuota se la licenza principale non è nella matrice.
+    """
+    assert compatible_alternatives("Proprietary", "GPL-3.0-only") == []
@@ -0,0 +1,216 @@
+"""
+LLM Request Scheduler Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.scheduler`.
+Verifica che le richieste LLM interattive abbiano la precedenza sul lavoro in blocco
+e che le code piene vengano rifiutate rapidamente.
+
+La suite copre:
+1. Priorità: Ordine di avvio e capacità riservata alla classe interattiva.
+2. Backpressure: Rifiuto per coda piena e per attesa eccessiva.
+3. Metriche: Contatori e profondità delle code.
+4. Integrazione: Propagazione della priorità fino alle chiamate a Ollama.
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from app.services.llm import ollama_api
+from app.services.llm.license_recommender import suggest_license_based_on_requirements
+from app.services.llm.scheduler import (
+    BULK,
+    INTERACTIVE,
+    LLMScheduler,
+    LLMSchedulerBusy,
+    current_priority,
+    llm_priority,
+)
+
+
+def _scheduler(total=2, interactive=2, bulk=1, queue=10, timeout=5.0):
+    """
+    Crea uno scheduler con gli stessi parametri per entrambe le classi di coda.
+    """
+    return LLMScheduler(
+        total,
+        limits={INTERACTIVE: interactive, BULK: bulk},
+        queue_sizes={INTERACTIVE: queue, BULK: queue},
+        queue_timeouts={INTERACTIVE: timeout, BULK: timeout},
+    )
+
+
+def _wait_until(condition, timeout=5.0):
+    """
+    Attende che la condizione diventi vera (o fallisce il test allo scadere).
+    """
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.01)
+
+# ==================================================================================
+#                                TEST: PRIORITÀ
+# ==================================================================================
+
+def test_bulk_limit_reserves_capacity_for_interactive():
+    """
+    Verifica che il lavoro in blocco non occupi tutti gli slot: una richiesta
+    interattiva parte subito anche con la coda bulk piena.
+    """
+    scheduler = _scheduler(total=2, bulk=1)
+    scheduler.acquire(BULK)
+    waiting = threading.Thread(target=scheduler.acquire, args=(BULK,), daemon=True)
+    waiting.start()
+    _wait_until(lambda: scheduler.stats()["classes"][BULK]["queued"] == 1)
+
+    start = time.monotonic()
+    with scheduler.slot(INTERACTIVE):
+        assert time.monotonic() - start < 0.5
+
+    scheduler.release(BULK)
+    waiting.join(5)
+    assert scheduler.stats()["classes"][BULK]["running"] == 1
+
+
+def test_interactive_is_served_before_waiting_bulk():
+    """
+    Verifica che, quando uno slot si libera, venga servita prima la richiesta
+    interattiva anche se quella bulk è in coda da più tempo.
+    """
+    scheduler = _scheduler(total=1, interactive=1, bulk=1)
+    order = []
+    scheduler.acquire(BULK)
+
+    def worker(priority):
+        with scheduler.slot(priority):
+            order.append(priority)
+
+    bulk = threading.Thread(target=worker, args=(BULK,))
+    bulk.start()
+    _wait_until(lambda: scheduler.stats()["classes"][BULK]["queued"] == 1)
+    interactive = threading.Thread(target=worker, args=(INTERACTIVE,))
+    interactive.start()
+    _wait_until(lambda: scheduler.stats()["classes"][INTERACTIVE]["queued"] == 1)
+
+    scheduler.release(BULK)
+    bulk.join(5)
+    interactive.join(5)
+
+    assert order == [INTERACTIVE, BULK]
+
+# ==================================================================================
+#                                TEST: BACKPRESSURE
+# ==================================================================================
+
+def test_full_queue_is_rejected_immediately():
+    """
+    Verifica che una richiesta oltre la lunghezza massima della coda venga rifiutata
+    senza attendere.
+    """
+    scheduler = _scheduler(total=1, interactive=1, bulk=1, queue=1)
+    scheduler.acquire(BULK)
+    waiting = threading.Thread(
+        target=lambda: pytest.raises(LLMSchedulerBusy, scheduler.acquire, BULK), daemon=True
+    )
+    waiting.start()
+    _wait_until(lambda: scheduler.stats()["classes"][BULK]["queued"] == 1)
+
+    start = time.monotonic()
+    with pytest.raises(LLMSchedulerBusy):
+        scheduler.acquire(BULK)
+    assert time.monotonic() - start < 0.5
+    assert scheduler.stats()["classes"][BULK]["rejected"] == 1
+
+
+def test_queue_timeout_rejects_request():
+    """
+    Verifica che una richiesta in attesa oltre il timeout della classe venga rifiutata
+    e rimossa dalla coda.
+    """
+    scheduler = _scheduler(total=1, interactive=1, bulk=1, timeout=0.1)
+    scheduler.acquire(INTERACTIVE)
+
+    with pytest.raises(LLMSchedulerBusy):
+        scheduler.acquire(BULK)
+
+    stats = scheduler.stats()["classes"][BULK]
+    assert stats["queued"] == 0
+    assert stats["rejected"] == 1
+
+
+def test_acquire_async_cancellation_releases_slot():
+    """
+    Verifica che un'attesa asincrona annullata non lasci slot occupati.
+    """
+    scheduler = _scheduler(total=1, interactive=1, bulk=1)
+    scheduler.acquire(BULK)
+
+    async def cancel_waiter():
+        task = asyncio.ensure_future(scheduler.acquire_async(INTERACTIVE))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_waiter())
+    scheduler.release(BULK)
+    _wait_until(lambda: scheduler.stats()["classes"][INTERACTIVE]["completed"] == 1)
+
+    assert scheduler.stats()["classes"][INTERACTIVE]["running"] == 0
+
+# ==================================================================================
+#                          TEST: METRICHE E INTEGRAZIONE
+# ==================================================================================
+
+def test_stats_report_counters():
+    """
+    Verifica i contatori per classe dopo alcune richieste completate.
+    """
+    scheduler = _scheduler()
+    for _ in range(3):
+        with scheduler.slot(BULK):
+            pass
+
+    stats = scheduler.stats()
+    assert stats["total_slots"] == 2
+    assert stats["classes"][BULK]["started"] == 3
+    assert stats["classes"][BULK]["completed"] == 3
+    assert stats["classes"][BULK]["running"] == 0
+    assert stats["classes"][INTERACTIVE]["started"] == 0
+
+
+def test_llm_priority_context():
+    """
+    Verifica che la priorità predefinita sia "bulk" e venga ripristinata all'uscita.
+    """
+    assert current_priority() == BULK
+    with llm_priority(INTERACTIVE):
+        assert current_priority() == INTERACTIVE
+    assert current_priority() == BULK
+
+
+@patch("app.services.llm.ollama_api.ensure_ollama_ready")
+@patch("app.services.llm.ollama_api._post_generate")
+@patch("app.services.llm.ollama_api.os.makedirs")
+@patch("builtins.open")
+def test_license_suggestion_runs_as_interactive(_mock_open, _mock_makedirs, mock_post, _mock_ensure):
+    """
+    Verifica che `/suggest-license` occupi uno slot interattivo mentre l'arricchimento
+    resta nella classe bulk.
+    """
+    mock_post.return_value.json.return_value = {
+        "response": '{"suggested_license": "MIT", "explanation": "x"}'
+    }
+    scheduler = MagicMock()
+
+    with patch("app.services.llm.ollama_api.get_llm_scheduler", return_value=scheduler), \
+            patch("app.services.llm.license_recommender.deterministic_license_suggestion",
+                  return_value=None):
+        suggest_license_based_on_requirements({"additional_requirements": "x"})
+        ollama_api.call_ollama_deepseek("bulk prompt")
+
+    assert [c.args[0] for c in scheduler.slot.call_args_list] == [INTERACTIVE, BULK]
@@ -0,0 +1,173 @@
+"""
+LLM Structured Output Unit Test Module.
+
+Questo modulo fornisce test unitari per `app.services.llm.structured_output` e per
+l'inoltro dello schema JSON a Ollama in `app.services.llm.ollama_api`.
+Verifica che le risposte dell'LLM vengano validate con i modelli Pydantic e che quelle
+non valide vengano corrette con un numero limitato di tentativi conteggiati.
+
+La suite copre:
+1. Validazione: JSON con testo attorno, blocchi Markdown e violazioni dello schema.
+2. Correzione: Prompt di correzione, limite di tentativi e contatori.
+3. Integrazione: Parametro `format` della richiesta e deduplicazione per schema.
+"""
+
+from unittest.mock import patch, mock_open
+
+import pytest
+
+from app.models.schemas import BatchSuggestionOutput, DocumentReviewOutput, LicenseSuggestionResponse
+from app.services.llm import ollama_api
+from app.services.llm.structured_output import (
+    StructuredOutputError,
+    generate_structured,
+    get_structured_output_stats,
+    parse_structured,
+    reset_structured_output_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    """
+    Azzera i contatori delle risposte strutturate prima e dopo ogni test.
+    """
+    reset_structured_output_stats()
+    yield
+    reset_structured_output_stats()
+
+
+class _ScriptedLLM:
+    """
+    Simula l'LLM restituendo in ordine le risposte indicate e registrando i prompt.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+        self.schemas = []
+
+    def __call__(self, prompt, schema):
+        self.prompts.append(prompt)
+        self.schemas.append(schema)
+        return self.responses.pop(0)
+
+# ==================================================================================
+#                                TEST: VALIDAZIONE
+# ==================================================================================
+
+def test_parse_tolerates_markdown_and_surrounding_text():
+    """
+    Verifica che i blocchi Markdown e il testo attorno all'oggetto JSON vengano ignorati.
+    """
+    response = 'Here it is:\n```json\n{"advice": "Isolate the component"}\n```'
+
+    assert parse_structured(response, DocumentReviewOutput).advice == "Isolate the component"
+
+
+@pytest.mark.parametrize("response", [None, "", "no json here", '{"advice": ""}', '{"other": 1}'])
+def test_parse_rejects_invalid_responses(response):
+    """
+    Verifica che le risposte vuote, non JSON o fuori schema sollevino `StructuredOutputError`.
+    """
+    with pytest.raises(StructuredOutputError):
+        parse_structured(response, DocumentReviewOutput)
+
+
+def test_batch_licenses_accept_comma_separated_string():
+    """
+    Verifica che le licenze di un conflitto possano essere indicate anche come stringa.
+    """
+    output = parse_structured('{"results": [{"id": 1, "licenses": "MIT, BSD-3-Clause"}]}',
+                              BatchSuggestionOutput)
+
+    assert output.results[0].licenses == ["MIT", "BSD-3-Clause"]
+
+# ==================================================================================
+#                                TEST: CORREZIONE
+# ==================================================================================
+
+def test_valid_first_answer_needs_no_repair():
+    """
+    Verifica che una risposta valida venga restituita con una sola chiamata e lo schema
+    del modello.
+    """
+    llm = _ScriptedLLM('{"suggested_license": "MIT", "explanation": "x"}')
+
+    result = generate_structured("test", "prompt", LicenseSuggestionResponse, call=llm, retries=2)
+
+    assert result.suggested_license == "MIT"
+    assert llm.schemas == [LicenseSuggestionResponse.model_json_schema()]
+    assert get_structured_output_stats()["test"] == {
+        "calls": 1, "valid_first_try": 1, "repaired": 0, "repair_attempts": 0, "failed": 0,
+    }
+
+
+def test_invalid_answer_is_repaired():
+    """
+    Verifica che il prompt di correzione contenga la risposta non valida e l'errore di
+    validazione e che la correzione riuscita venga conteggiata.
+    """
+    llm = _ScriptedLLM('{"suggested_license": "MIT"}',
+                       '{"suggested_license": "MIT", "explanation": "fixed"}')
+
+    result = generate_structured("test", "prompt", LicenseSuggestionResponse, call=llm, retries=1)
+
+    assert result.explanation == "fixed"
+    repair_prompt = llm.prompts[1]
+    assert repair_prompt.startswith("prompt")
+    assert '{"suggested_license": "MIT"}' in repair_prompt
+    assert "explanation" in repair_prompt.split("### VALIDATION ERROR", 1)[1]
+    stats = get_structured_output_stats()["test"]
+    assert stats["repaired"] == 1
+    assert stats["repair_attempts"] == 1
+
+
+def test_repairs_are_bounded():
+    """
+    Verifica che, esauriti i tentativi di correzione, venga sollevato
+    `StructuredOutputError` e conteggiato il fallimento.
+    """
+    llm = _ScriptedLLM("bad", "still bad", "never asked")
+
+    with pytest.raises(StructuredOutputError):
+        generate_structured("test", "prompt", DocumentReviewOutput, call=llm, retries=1)
+
+    assert len(llm.prompts) == 2
+    assert get_structured_output_stats()["test"]["failed"] == 1
+
+
+def test_given_response_skips_first_call():
+    """
+    Verifica che una risposta già ottenuta (es. in streaming) venga validata senza
+    interrogare di nuovo l'LLM.
+    """
+    llm = _ScriptedLLM()
+
+    result = generate_structured("test", "prompt", DocumentReviewOutput, call=llm,
+                                 response='{"advice": "ok"}')
+
+    assert result.advice == "ok"
+    assert not llm.prompts
+
+# ==================================================================================
+#                                TEST: INTEGRAZIONE
+# ==================================================================================
+
+@patch("app.services.llm.ollama_api.ensure_ollama_ready")
+@patch("app.services.llm.ollama_api._post_generate")
+@patch("app.services.llm.ollama_api.os.makedirs")
+@patch("builtins.open", new_callable=mock_open)
+def test_schema_is_sent_as_ollama_format(_mock_file, _mock_makedirs, mock_post, _mock_ensure):
+    """
+    Verifica che lo schema venga inoltrato nel parametro `format` solo quando richiesto.
+    """
+    mock_post.return_value.json.return_value = {"response": '{"advice": "ok"}'}
+    schema = DocumentReviewOutput.model_json_schema()
+
+    ollama_api.call_ollama_deepseek("prompt", response_format=schema)
+    ollama_api.call_ollama_deepseek("prompt")
+
+    first, second = (call.args[0] for call in mock_post.call_args_list)
+    assert first["format"] == schema
+    assert "format" not in second